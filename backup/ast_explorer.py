@@ -12,8 +12,9 @@ import utils.import_utils
 
 
 
-def extract_functions(source):
-    tree = ast.parse(source)
+def extract_functions(source, tree=None):
+    if tree is None:
+        tree = ast.parse(source)
     functions = []
 
     class FunctionVisitor(ast.NodeVisitor):
@@ -0,0 +1,759 @@
+"""
+Branch Reorderer
+This module implements profile-guided branch reordering:
+- BranchProfile records per-site taken/not-taken counts from rtopt.condition
+- BranchReorderer rewrites if/elif chains and and/or operands by observed
+  selectivity and static cost, editing only the source spans it moves so
+  comments and formatting elsewhere are kept
+- benchmark_reordering times the original against the rewritten source, and
+  reorder_file only keeps a function's reordering if the benchmark shows the
+  same outputs and no slowdown
+
+Reordering only happens where it cannot change behavior: every condition
+involved must be side-effect free, which for truth and equality tests means
+the names involved hold builtin scalars (by annotation or by the argument
+types seen in the benchmark inputs), and if/elif branches must be proven
+mutually exclusive (with Z3 when it is installed, otherwise with a
+conservative interval check).
+"""
+import ast
+import json
+import os
+import re
+import timeit
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+try:
+    import z3
+except ImportError:
+    z3 = None
+
+
+def make_site(file_key: str, node: ast.AST) -> str:
+    """Build the profile site id for an expression node."""
+    return f"{file_key}:{node.lineno}:{node.col_offset}:{node.end_lineno}:{node.end_col_offset}"
+
+
+class BranchProfile:
+    """Per-site taken/not-taken counters for instrumented conditions."""
+
+    def __init__(self):
+        self.sites = {}
+
+    def record(self, site: str, value: Any) -> None:
+        """Record one evaluation of the condition at `site`."""
+        counts = self.sites.get(site)
+        if counts is None:
+            counts = self.sites[site] = [0, 0]
+        counts[0 if value else 1] += 1
+
+    def taken(self, site: str) -> int:
+        return self.sites.get(site, (0, 0))[0]
+
+    def evaluations(self, site: str) -> int:
+        counts = self.sites.get(site, (0, 0))
+        return counts[0] + counts[1]
+
+    def probability(self, site: str) -> Optional[float]:
+        """Observed probability that the condition at `site` is true."""
+        total = self.evaluations(site)
+        return self.taken(site) / total if total else None
+
+    def merge(self, other: 'BranchProfile') -> None:
+        """Add the counts of another profile to this one."""
+        for site, (taken, not_taken) in other.sites.items():
+            counts = self.sites.setdefault(site, [0, 0])
+            counts[0] += taken
+            counts[1] += not_taken
+
+    def reset(self) -> None:
+        self.sites = {}
+
+    def save(self, output_file: str) -> str:
+        """Save the profile to a JSON file."""
+        with open(output_file, 'w') as f:
+            json.dump({'sites': self.sites}, f, indent=2)
+        return output_file
+
+    @classmethod
+    def load(cls, input_file: str) -> 'BranchProfile':
+        """Load a profile from a JSON file."""
+        with open(input_file, 'r') as f:
+            data = json.load(f)
+        profile = cls()
+        profile.sites = {site: list(counts) for site, counts in data.get('sites', {}).items()}
+        return profile
+
+
+# Comparison operators that cannot raise for builtin operands
+_SAFE_EQUALITY_OPS = (ast.Eq, ast.NotEq)
+_IDENTITY_OPS = (ast.Is, ast.IsNot)
+_ORDERING_OPS = (ast.Lt, ast.LtE, ast.Gt, ast.GtE)
+_SAFE_ARITH_OPS = (ast.Add, ast.Sub, ast.Mult)
+
+# Builtin types whose truth value, equality and ordering never run user code
+_NUMERIC_TYPES = (bool, int, float)
+_SCALAR_TYPES = _NUMERIC_TYPES + (str, bytes, type(None))
+_ANNOTATED_TYPES = {t.__name__: t for t in _SCALAR_TYPES if t is not type(None)}
+
+
+def _annotated_types(func: ast.FunctionDef) -> Dict[str, Set[type]]:
+    """Parameters annotated with a builtin scalar type."""
+    types = {}
+    for arg in func.args.posonlyargs + func.args.args + func.args.kwonlyargs:
+        if isinstance(arg.annotation, ast.Name) and arg.annotation.id in _ANNOTATED_TYPES:
+            types[arg.arg] = {_ANNOTATED_TYPES[arg.annotation.id]}
+    return types
+
+
+def observed_types(source: str, inputs: Dict[str, List[tuple]]) -> Dict[str, Dict[str, Set[type]]]:
+    """
+    Types each top-level function's positional parameters held in `inputs`.
+
+    A parameter that some argument tuple leaves to its default is omitted.
+    """
+    observed = {}
+    for node in ast.parse(source).body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) or not inputs.get(node.name):
+            continue
+        params = [arg.arg for arg in node.args.posonlyargs + node.args.args]
+        types = {}
+        for index, param in enumerate(params):
+            if all(len(args) > index for args in inputs[node.name]):
+                types[param] = {type(args[index]) for args in inputs[node.name]}
+        observed[node.name] = types
+    return observed
+
+
+def is_side_effect_free(node: ast.AST, numeric_names: Set[str], scalar_names: Set[str] = None) -> bool:
+    """
+    Check that evaluating an expression can neither have side effects nor raise.
+
+    Truth tests, equality tests and membership tests against literal
+    collections call __bool__, __eq__ or __hash__, so the names involved
+    must be known to hold builtin scalars (`scalar_names`). Identity tests
+    are allowed on any name. Ordering comparisons and arithmetic are only
+    allowed on names known to be numeric.
+    """
+    scalar_names = set(numeric_names) | set(scalar_names or ())
+    if isinstance(node, ast.Constant):
+        return True
+    if isinstance(node, ast.Name):
+        return isinstance(node.ctx, ast.Load) and node.id in scalar_names
+    if isinstance(node, ast.BoolOp):
+        return all(is_side_effect_free(v, numeric_names, scalar_names) for v in node.values)
+    if isinstance(node, ast.UnaryOp):
+        if isinstance(node.op, ast.Not):
+            return is_side_effect_free(node.operand, numeric_names, scalar_names)
+        return isinstance(node.op, ast.USub) and _is_numeric(node.operand, numeric_names)
+    if isinstance(node, ast.Compare):
+        operands = [node.left] + node.comparators
+        for op, left, right in zip(node.ops, operands, operands[1:]):
+            if isinstance(op, _IDENTITY_OPS):
+                if not all(isinstance(o, (ast.Name, ast.Constant)) for o in (left, right)):
+                    return False
+            elif isinstance(op, _SAFE_EQUALITY_OPS):
+                if not (_is_scalar(left, numeric_names, scalar_names) and _is_scalar(right, numeric_names, scalar_names)):
+                    return False
+            elif isinstance(op, (ast.In, ast.NotIn)):
+                if not (_is_scalar(left, numeric_names, scalar_names) and _is_literal_collection(right)):
+                    return False
+            elif isinstance(op, _ORDERING_OPS):
+                if not (_is_numeric(left, numeric_names) and _is_numeric(right, numeric_names)):
+                    return False
+            else:
+                return False
+        return True
+    return False
+
+
+def _is_numeric(node: ast.AST, numeric_names: Set[str]) -> bool:
+    if isinstance(node, ast.Constant):
+        return isinstance(node.value, (int, float)) and not isinstance(node.value, complex)
+    if isinstance(node, ast.Name):
+        return node.id in numeric_names
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        return _is_numeric(node.operand, numeric_names)
+    if isinstance(node, ast.BinOp) and isinstance(node.op, _SAFE_ARITH_OPS):
+        return _is_numeric(node.left, numeric_names) and _is_numeric(node.right, numeric_names)
+    return False
+
+
+def _is_scalar(node: ast.AST, numeric_names: Set[str], scalar_names: Set[str]) -> bool:
+    if isinstance(node, ast.Constant):
+        return isinstance(node.value, _SCALAR_TYPES)
+    if isinstance(node, ast.Name):
+        return node.id in scalar_names
+    return _is_numeric(node, numeric_names)
+
+
+def _is_literal_collection(node: ast.AST) -> bool:
+    # Substring tests are left out: `x in "abc"` raises unless x is a string
+    if isinstance(node, (ast.Tuple, ast.List, ast.Set)):
+        return all(isinstance(e, ast.Constant) and isinstance(e.value, _SCALAR_TYPES) for e in node.elts)
+    return False
+
+
+def static_cost(node: ast.AST) -> int:
+    """Rough evaluation cost of an expression: the number of AST nodes it contains."""
+    return sum(1 for _ in ast.walk(node))
+
+
+class _Interval:
+    """Constraints on one variable collected from a conjunction of atoms."""
+
+    def __init__(self):
+        self.low = None
+        self.low_strict = False
+        self.high = None
+        self.high_strict = False
+        self.equal = []
+        self.not_equal = []
+        self.polarities = set()
+
+    def add(self, op: ast.cmpop, value: Any) -> None:
+        # Constraints that cannot be interpreted are dropped, which only
+        # makes the domain larger and keeps the exclusivity check sound
+        if isinstance(op, (ast.Is, ast.IsNot)) and value not in (None, True, False):
+            return
+        if isinstance(op, (ast.Eq, ast.Is)):
+            self.equal.append(value)
+        elif isinstance(op, (ast.NotEq, ast.IsNot)):
+            self.not_equal.append(value)
+        elif not isinstance(value, (int, float)):
+            return
+        elif isinstance(op, (ast.Gt, ast.GtE)):
+            strict = isinstance(op, ast.Gt)
+            if self.low is None or value > self.low or (value == self.low and strict):
+                self.low, self.low_strict = value, strict
+        elif isinstance(op, (ast.Lt, ast.LtE)):
+            strict = isinstance(op, ast.Lt)
+            if self.high is None or value < self.high or (value == self.high and strict):
+                self.high, self.high_strict = value, strict
+
+    def _admits(self, value: Any) -> bool:
+        if isinstance(value, (int, float)):
+            if self.low is not None and (value < self.low or (value == self.low and self.low_strict)):
+                return False
+            if self.high is not None and (value > self.high or (value == self.high and self.high_strict)):
+                return False
+        return value not in self.not_equal
+
+    def is_empty(self) -> bool:
+        if len(self.polarities) > 1:
+            return True
+        if self.equal:
+            first = self.equal[0]
+            if any(other != first for other in self.equal[1:]):
+                return True
+            return not self._admits(first)
+        if self.low is not None and self.high is not None:
+            return self.low > self.high or (self.low == self.high and (self.low_strict or self.high_strict))
+        return False
+
+
+def _conjunction_atoms(node: ast.AST) -> Optional[List[ast.AST]]:
+    """Flatten an `and` chain into atoms, or None if it contains `or`."""
+    if isinstance(node, ast.BoolOp):
+        if not isinstance(node.op, ast.And):
+            return None
+        atoms = []
+        for value in node.values:
+            sub = _conjunction_atoms(value)
+            if sub is None:
+                return None
+            atoms.extend(sub)
+        return atoms
+    return [node]
+
+
+_FLIPPED = {ast.Lt: ast.Gt, ast.LtE: ast.GtE, ast.Gt: ast.Lt, ast.GtE: ast.LtE,
+            ast.Eq: ast.Eq, ast.NotEq: ast.NotEq, ast.Is: ast.Is, ast.IsNot: ast.IsNot}
+
+
+def _intervals_exclusive(a: ast.AST, b: ast.AST) -> bool:
+    """Fallback prover: True if two conjunctions of simple atoms cannot both hold."""
+    atoms_a = _conjunction_atoms(a)
+    atoms_b = _conjunction_atoms(b)
+    if atoms_a is None or atoms_b is None:
+        return False
+
+    domains = {}
+    for atom in atoms_a + atoms_b:
+        if isinstance(atom, ast.Name):
+            domains.setdefault(atom.id, _Interval()).polarities.add(True)
+        elif isinstance(atom, ast.UnaryOp) and isinstance(atom.op, ast.Not) and isinstance(atom.operand, ast.Name):
+            domains.setdefault(atom.operand.id, _Interval()).polarities.add(False)
+        elif isinstance(atom, ast.Compare) and len(atom.ops) == 1:
+            left, right, op = atom.left, atom.comparators[0], atom.ops[0]
+            if isinstance(left, ast.Constant) and isinstance(right, ast.Name):
+                left, right = right, left
+                op = _FLIPPED.get(type(op), type(None))()
+            if isinstance(left, ast.Name) and isinstance(right, ast.Constant) and type(op) in _FLIPPED:
+                domains.setdefault(left.id, _Interval()).add(op, right.value)
+    return any(domain.is_empty() for domain in domains.values())
+
+
+class _Z3Translator:
+    """Translate side-effect-free conditions into Z3 expressions."""
+
+    def __init__(self):
+        self.variables = {}
+
+    def _var(self, name: str, sort: str):
+        key = (name, sort)
+        if key not in self.variables:
+            if any(n == name for n, _ in self.variables):
+                raise ValueError(f"Conflicting sorts for {name}")
+            factory = {'bool': z3.Bool, 'int': z3.Int, 'real': z3.Real, 'str': z3.String}[sort]
+            self.variables[key] = factory(name)
+        return self.variables[key]
+
+    def _value_sort(self, value: Any) -> str:
+        if isinstance(value, bool):
+            return 'bool'
+        if isinstance(value, int):
+            return 'int'
+        if isinstance(value, float):
+            return 'real'
+        if isinstance(value, str):
+            return 'str'
+        raise ValueError(f"Unsupported constant {value!r}")
+
+    def _term(self, node: ast.AST, sort: str):
+        if isinstance(node, ast.Constant):
+            if sort == 'str':
+                return z3.StringVal(node.value)
+            if sort == 'bool':
+                return z3.BoolVal(bool(node.value))
+            value = int(node.value) if isinstance(node.value, bool) else node.value
+            return z3.RealVal(value) if sort == 'real' else z3.IntVal(value)
+        if isinstance(node, ast.Name):
+            return self._var(node.id, sort)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            return -self._term(node.operand, sort)
+        if isinstance(node, ast.BinOp) and isinstance(node.op, _SAFE_ARITH_OPS):
+            left, right = self._term(node.left, sort), self._term(node.right, sort)
+            return {ast.Add: left + right, ast.Sub: left - right, ast.Mult: left * right}[type(node.op)]
+        raise ValueError(f"Unsupported term {ast.dump(node)}")
+
+    def _comparison_sort(self, left: ast.AST, right: ast.AST) -> str:
+        # Numbers are modelled as reals: an int literal says nothing about the
+        # type of the name it is compared with, and anything unsatisfiable over
+        # the reals is unsatisfiable over the integers too
+        for node in (left, right):
+            for sub in ast.walk(node):
+                if isinstance(sub, ast.Constant):
+                    return 'str' if self._value_sort(sub.value) == 'str' else 'real'
+        for node in (left, right):
+            for sub in ast.walk(node):
+                if isinstance(sub, ast.Name):
+                    for (name, sort) in self.variables:
+                        if name == sub.id:
+                            return sort
+        return 'real'
+
+    def translate(self, node: ast.AST):
+        if isinstance(node, ast.Name):
+            return self._var(node.id, 'bool')
+        if isinstance(node, ast.Constant):
+            return z3.BoolVal(bool(node.value))
+        if isinstance(node, ast.BoolOp):
+            values = [self.translate(v) for v in node.values]
+            return z3.And(*values) if isinstance(node.op, ast.And) else z3.Or(*values)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            return z3.Not(self.translate(node.operand))
+        if isinstance(node, ast.Compare):
+            operands = [node.left] + node.comparators
+            parts = []
+            for op, left, right in zip(node.ops, operands, operands[1:]):
+                if isinstance(op, (ast.In, ast.NotIn)):
+                    options = [ast.Constant(value=e.value) for e in getattr(right, 'elts', [])]
+                    if not options:
+                        raise ValueError("Unsupported membership test")
+                    sort = self._comparison_sort(left, options[0])
+                    member = z3.Or(*[self._term(left, sort) == self._term(o, sort) for o in options])
+                    parts.append(member if isinstance(op, ast.In) else z3.Not(member))
+                    continue
+                sort = self._comparison_sort(left, right)
+                lhs, rhs = self._term(left, sort), self._term(right, sort)
+                if isinstance(op, (ast.Eq, ast.Is)):
+                    parts.append(lhs == rhs)
+                elif isinstance(op, (ast.NotEq, ast.IsNot)):
+                    parts.append(lhs != rhs)
+                elif isinstance(op, ast.Lt):
+                    parts.append(lhs < rhs)
+                elif isinstance(op, ast.LtE):
+                    parts.append(lhs <= rhs)
+                elif isinstance(op, ast.Gt):
+                    parts.append(lhs > rhs)
+                elif isinstance(op, ast.GtE):
+                    parts.append(lhs >= rhs)
+                else:
+                    raise ValueError("Unsupported comparison")
+            return z3.And(*parts) if len(parts) > 1 else parts[0]
+        raise ValueError(f"Unsupported condition {ast.dump(node)}")
+
+
+def conditions_mutually_exclusive(conditions: List[ast.AST]) -> bool:
+    """Prove that no two of the given conditions can be true at the same time."""
+    if z3 is not None:
+        try:
+            translator = _Z3Translator()
+            exprs = [translator.translate(c) for c in conditions]
+            for i in range(len(exprs)):
+                for j in range(i + 1, len(exprs)):
+                    solver = z3.Solver()
+                    solver.add(z3.And(exprs[i], exprs[j]))
+                    if solver.check() != z3.unsat:
+                        return False
+            return True
+        except (ValueError, z3.Z3Exception):
+            pass
+
+    return all(_intervals_exclusive(conditions[i], conditions[j])
+               for i in range(len(conditions))
+               for j in range(i + 1, len(conditions)))
+
+
+_LINE_END = re.compile(r"\r\n|\r|\n")
+
+
+class _SourceEdits:
+    """Non-overlapping text replacements in a source string, keyed by AST positions."""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.line_starts = [0] + [m.end() for m in _LINE_END.finditer(source)]
+        self.edits = []
+
+    def offset(self, lineno: int, col_offset: int) -> int:
+        """Character offset of an AST position (col_offset counts UTF-8 bytes)."""
+        start = self.line_starts[lineno - 1]
+        end = self.line_starts[lineno] if lineno < len(self.line_starts) else len(self.source)
+        return start + len(self.source[start:end].encode('utf-8')[:col_offset].decode('utf-8', 'replace'))
+
+    def span(self, first: ast.AST, last: ast.AST = None) -> Tuple[int, int]:
+        last = last or first
+        return self.offset(first.lineno, first.col_offset), self.offset(last.end_lineno, last.end_col_offset)
+
+    def render(self, span: Tuple[int, int]) -> str:
+        """Current text of a span of the original source, with the edits inside it applied."""
+        start, end = span
+        pieces = []
+        position = start
+        for edit_start, edit_end, text in sorted(self.edits):
+            if edit_start >= start and edit_end <= end:
+                pieces.append(self.source[position:edit_start])
+                pieces.append(text)
+                position = edit_end
+        pieces.append(self.source[position:end])
+        return ''.join(pieces)
+
+    def replace(self, span: Tuple[int, int], text: str) -> None:
+        """Replace a span, superseding the edits inside it."""
+        start, end = span
+        self.edits = [e for e in self.edits if not (e[0] >= start and e[1] <= end)]
+        self.edits.append((start, end, text))
+
+    def apply(self) -> str:
+        return self.render((0, len(self.source)))
+
+
+# Operands that need parentheses inside an and/or
+_LOOSE_BINDING = (ast.BoolOp, ast.IfExp, ast.Lambda, ast.NamedExpr)
+
+
+class BranchReorderer(ast.NodeTransformer):
+    """
+    Reorder if/elif chains and and/or operands by profiled selectivity.
+
+    With the original source, every reordering is also recorded as text edits
+    of the spans involved (see edited_source). With `functions`, only code in
+    those top-level functions or methods ("Class.method") is reordered.
+
+    A parameter counts as a builtin scalar (or number) when its annotation or
+    the types in `param_types` (function name -> parameter -> types, see
+    observed_types) say so, and the function never rebinds it.
+    """
+
+    def __init__(self, profile: BranchProfile, file_key: str, assume_numeric: Set[str] = None,
+                 min_evaluations: int = 10, source: str = None, functions: Set[str] = None,
+                 param_types: Dict[str, Dict[str, Set[type]]] = None):
+        self.profile = profile
+        self.file_key = file_key
+        self.assume_numeric = set(assume_numeric or ())
+        self.min_evaluations = min_evaluations
+        self.numeric_names = set(self.assume_numeric)
+        self.scalar_names = set(self.assume_numeric)
+        self.param_types = param_types or {}
+        self.functions = functions
+        self.changes = []
+        # Outermost function or method being visited, and those that changed
+        self.function = None
+        self.scope = []
+        self.changed_functions = set()
+        self.edits = _SourceEdits(source) if source is not None else None
+        # Text of moved tests and bodies, captured before their slots are overwritten
+        self.moved_text = {}
+        # Original test and body spans of each if/elif link
+        self.slots = {}
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> ast.ClassDef:
+        self.scope.append(node.name)
+        self.generic_visit(node)
+        self.scope.pop()
+        return node
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> ast.FunctionDef:
+        saved = self.numeric_names, self.scalar_names, self.function
+        types = _annotated_types(node)
+        for name, seen in self.param_types.get('.'.join(self.scope + [node.name]), {}).items():
+            types.setdefault(name, set()).update(seen)
+        rebound = {sub.id for sub in ast.walk(node) if isinstance(sub, ast.Name) and not isinstance(sub.ctx, ast.Load)}
+        known = {name: seen for name, seen in types.items() if seen and name not in rebound}
+        self.numeric_names = self.assume_numeric | {
+            name for name, seen in known.items() if all(t in _NUMERIC_TYPES for t in seen)}
+        self.scalar_names = self.numeric_names | {
+            name for name, seen in known.items() if all(t in _SCALAR_TYPES for t in seen)}
+        if self.function is None:
+            self.function = '.'.join(self.scope + [node.name])
+        self.scope.append(node.name)
+        self.generic_visit(node)
+        self.scope.pop()
+        self.numeric_names, self.scalar_names, self.function = saved
+        return node
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_If(self, node: ast.If) -> ast.If:
+        if self.edits is not None:
+            body_span = self.edits.span(node.body[0], node.body[-1])
+            if node.body[0].lineno > node.test.end_lineno:
+                # A block body starts on the line after the header, so the
+                # comments above its first statement move with it
+                body_span = (self.edits.line_starts[node.test.end_lineno], body_span[1])
+            self.slots[id(node)] = (self.edits.span(node.test), body_span)
+        self.generic_visit(node)
+        if self.functions is None or self.function in self.functions:
+            node.test = self._reorder_operands(node.test)
+            self._reorder_chain(node)
+        return node
+
+    def _record(self, kind: str, lineno: int, order: List[int]) -> None:
+        self.changes.append((kind, lineno, order))
+        self.changed_functions.add(self.function)
+
+    def _text(self, node: ast.AST) -> str:
+        text = self.moved_text.get(id(node))
+        return text if text is not None else self.edits.render(self.edits.span(node))
+
+    def _body_text(self, link: ast.If) -> str:
+        text = self.moved_text.get(id(link.body))
+        return text if text is not None else self.edits.render(self.slots[id(link)][1])
+
+    def edited_source(self) -> str:
+        """The original source with the recorded span edits applied."""
+        return self.edits.apply()
+
+    def _reorder_operands(self, node: ast.AST) -> ast.AST:
+        """Reorder and/or operands in a boolean context by cost and selectivity."""
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            node.operand = self._reorder_operands(node.operand)
+            return node
+        if not isinstance(node, ast.BoolOp):
+            return node
+        node.values = [self._reorder_operands(v) for v in node.values]
+        if not all(is_side_effect_free(v, self.numeric_names, self.scalar_names) for v in node.values):
+            return node
+
+        is_and = isinstance(node.op, ast.And)
+        ranks = []
+        for index, value in enumerate(node.values):
+            site = make_site(self.file_key, value)
+            probability = self.profile.probability(site)
+            if probability is None or self.profile.evaluations(site) < self.min_evaluations:
+                return node
+            # Cheap operands that most often decide the outcome go first
+            deciding = (1.0 - probability) if is_and else probability
+            ranks.append((static_cost(value) / max(deciding, 1e-9), index))
+
+        order = [index for _, index in sorted(ranks)]
+        if order != list(range(len(node.values))):
+            node.values = [node.values[i] for i in order]
+            if self.edits is not None:
+                texts = [self._text(v) for v in node.values]
+                texts = [f"({t})" if isinstance(v, _LOOSE_BINDING) else t for v, t in zip(node.values, texts)]
+                self.edits.replace(self.edits.span(node), (" and " if is_and else " or ").join(texts))
+            self._record('operands', node.lineno, order)
+        return node
+
+    def _reorder_chain(self, node: ast.If) -> None:
+        """Reorder the branches of an if/elif chain rooted at `node`."""
+        branches = []
+        current = node
+        while True:
+            branches.append((current, current.test, current.body))
+            if len(current.orelse) == 1 and isinstance(current.orelse[0], ast.If):
+                current = current.orelse[0]
+            else:
+                break
+        if len(branches) < 2:
+            return
+        final_else = current.orelse
+
+        entries = self.profile.evaluations(make_site(self.file_key, branches[0][1]))
+        if entries < self.min_evaluations:
+            return
+        ranks = []
+        for index, (_, test, _) in enumerate(branches):
+            site = make_site(self.file_key, test)
+            if site not in self.profile.sites:
+                return
+            probability = self.profile.taken(site) / entries
+            ranks.append((static_cost(test) / max(probability, 1e-9), index))
+
+        order = [index for _, index in sorted(ranks)]
+        if order == list(range(len(branches))):
+            return
+
+        tests = [test for _, test, _ in branches]
+        if not all(is_side_effect_free(t, self.numeric_names, self.scalar_names) for t in tests):
+            return
+        if not conditions_mutually_exclusive(tests):
+            return
+
+        reordered = [(tests[i], branches[i][2]) for i in order]
+        links = [b[0] for b in branches]
+        if self.edits is not None:
+            # Capture every text before any slot is overwritten
+            for link in links:
+                self.moved_text[id(link.test)] = self._text(link.test)
+                self.moved_text[id(link.body)] = self._body_text(link)
+            for link, (test, body) in zip(links, reordered):
+                test_span, body_span = self.slots[id(link)]
+                self.edits.replace(test_span, self.moved_text[id(test)])
+                self.edits.replace(body_span, self.moved_text[id(body)])
+        for link, (test, body) in zip(links, reordered):
+            link.test = test
+            link.body = body
+        for link, next_link in zip(links, links[1:]):
+            link.orelse = [next_link]
+        links[-1].orelse = final_else
+        self._record('chain', node.lineno, order)
+
+
+def reorder_source(source: str, profile: BranchProfile, file_key: str,
+                   assume_numeric: Set[str] = None, functions: Set[str] = None,
+                   param_types: Dict[str, Dict[str, Set[type]]] = None) -> Tuple[str, List[tuple]]:
+    """
+    Rewrite source code using a branch profile; returns (new_source, changes).
+
+    Only the reordered tests, operands and bodies are rewritten. If those
+    edits cannot reproduce the reordered tree (say, bodies at different
+    indentation levels), nothing is changed.
+    """
+    tree = ast.parse(source)
+    reorderer = BranchReorderer(profile, file_key, assume_numeric, source=source, functions=functions,
+                                param_types=param_types)
+    tree = reorderer.visit(tree)
+    if not reorderer.changes:
+        return source, []
+    new_source = reorderer.edited_source()
+    try:
+        edited_tree = ast.parse(new_source)
+    except SyntaxError:
+        return source, []
+    if ast.dump(edited_tree) != ast.dump(tree):
+        return source, []
+    return new_source, reorderer.changes
+
+
+def changed_functions(source: str, profile: BranchProfile, file_key: str, assume_numeric: Set[str] = None,
+                      param_types: Dict[str, Dict[str, Set[type]]] = None) -> Set[Optional[str]]:
+    """Functions whose branches reorder_source would change; None stands for module-level code."""
+    reorderer = BranchReorderer(profile, file_key, assume_numeric, param_types=param_types)
+    reorderer.visit(ast.parse(source))
+    return reorderer.changed_functions
+
+
+def reorder_source_benchmarked(source: str, profile: BranchProfile, file_key: str,
+                               inputs: Dict[str, List[tuple]], assume_numeric: Set[str] = None,
+                               number: int = 100, min_speedup: float = 1.0
+                               ) -> Tuple[str, List[tuple], Dict[str, Dict[str, Any]]]:
+    """
+    Reorder branches, keeping each function's reordering only if it pays off.
+
+    Every function that would change is benchmarked on its argument tuples in
+    `inputs`; it is kept if the outputs match and the speedup is at least
+    min_speedup. Functions without inputs, methods and module-level code keep
+    their original order. The argument types in `inputs` tell which
+    parameters hold builtin scalars. Returns (new_source, changes, benchmark
+    results).
+    """
+    results = {}
+    kept = set()
+    param_types = observed_types(source, inputs)
+    for name in sorted(n for n in changed_functions(source, profile, file_key, assume_numeric, param_types) if n):
+        if not inputs.get(name):
+            results[name] = {'kept': False, 'reason': "no inputs to benchmark"}
+            continue
+        candidate, _ = reorder_source(source, profile, file_key, assume_numeric, {name}, param_types)
+        if candidate == source:
+            continue
+        try:
+            result = benchmark_reordering(source, candidate, name, inputs[name], number)
+        except Exception as e:
+            results[name] = {'kept': False, 'reason': f"benchmark failed: {type(e).__name__}: {e}"}
+            continue
+        result['kept'] = result['equivalent'] and result['speedup'] >= min_speedup
+        if not result['kept']:
+            result['reason'] = "outputs differ" if not result['equivalent'] else "not faster"
+        results[name] = result
+        if result['kept']:
+            kept.add(name)
+
+    if not kept:
+        return source, [], results
+    new_source, changes = reorder_source(source, profile, file_key, assume_numeric, kept, param_types)
+    return new_source, changes, results
+
+
+def reorder_file(source_file: str, profile: BranchProfile, inputs: Dict[str, List[tuple]],
+                 output_file: str = None, assume_numeric: Set[str] = None,
+                 number: int = 100) -> Tuple[str, List[tuple], Dict[str, Dict[str, Any]]]:
+    """
+    Rewrite a Python file using a branch profile, benchmarking every change.
+
+    `inputs` maps function names to argument tuples for benchmark_reordering.
+    Returns (output_file, changes, benchmark results).
+    """
+    if output_file is None:
+        base, ext = os.path.splitext(source_file)
+        output_file = f"{base}_reordered{ext}"
+
+    with open(source_file, 'r') as f:
+        source = f.read()
+
+    new_source, changes, results = reorder_source_benchmarked(
+        source, profile, os.path.basename(source_file), inputs, assume_numeric, number)
+    with open(output_file, 'w') as f:
+        f.write(new_source)
+    return output_file, changes, results
+
+
+def benchmark_reordering(original_source: str, reordered_source: str, function_name: str,
+                         inputs: List[tuple], number: int = 100) -> Dict[str, Any]:
+    """Time a function before and after reordering over the given argument tuples."""
+    results = {}
+    outputs = {}
+    for label, source in (('before', original_source), ('after', reordered_source)):
+        namespace = {'__name__': f"__{label}__"}
+        exec(compile(source, f"<{label}>", 'exec'), namespace)
+        func = namespace[function_name]
+        outputs[label] = [func(*args) for args in inputs]
+        results[label] = timeit.timeit(lambda: [func(*args) for args in inputs], number=number)
+
+    results['equivalent'] = outputs['before'] == outputs['after']
+    results['speedup'] = results['before'] / results['after'] if results['after'] else 0.0
+    return results
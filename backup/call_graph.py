@@ -0,0 +1,401 @@
+"""
+Call Graph
+This module builds function call graphs incrementally and exports them without layout:
+- CallGraph interns functions, keyed by file and qualified name, to integer
+  ids and keeps per-file call sites and reference-counted edges, so
+  re-analyzing a changed file only replaces its own functions and edges
+- compact() freezes the adjacency into CSR arrays (offsets + targets)
+- DOT, GraphML and JSON exporters stream the graph line by line
+- render() draws an image only on demand, collapsing large graphs into
+  clusters and preferring Graphviz sfdp when it is installed
+"""
+import ast
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+from array import array
+from collections import Counter, defaultdict
+from typing import Dict, Iterator, List, Set, Tuple
+from xml.sax.saxutils import escape
+
+
+def extract_calls(body: List[ast.stmt], known: Set[str] = None) -> Set[str]:
+    """Collect names of functions called in a function body."""
+    calls = set()
+    for node in ast.walk(ast.Module(body=body, type_ignores=[])):
+        if isinstance(node, ast.Call):
+            if isinstance(node.func, ast.Name):
+                name = node.func.id
+            elif isinstance(node.func, ast.Attribute):
+                name = node.func.attr
+            else:
+                continue
+            if known is None or name in known:
+                calls.add(name)
+    return calls
+
+
+class CallGraph:
+    """
+    A directed call graph with interned node ids and incremental per-file updates.
+
+    Functions analyzed from a file are keyed by file and qualified name, so
+    same-named functions in different files stay separate nodes. Each file
+    keeps its own call sites, which are resolved by name when the graph is
+    compacted: to a function of that name in the caller's file if there is
+    one, otherwise to every function of that name. Edges added directly are
+    reference-counted per contributing file, and a node is dropped once no
+    file defines it and no edge refers to it.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.names = []
+        self.index = {}
+        self.node_file = []
+        self.file_hashes = {}
+        # file -> ids of the functions it defines
+        self.file_nodes = {}
+        # file -> {caller id: names it calls}
+        self.file_calls = {}
+        # file -> directly added (src, dst) edges
+        self.file_edges = {}
+        self.edge_refs = Counter()
+        self.node_refs = Counter()
+        # bare function name -> ids of the functions defined with it
+        self.definitions = {}
+        self._adjacency = None
+        self._csr = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_adjacency'] = None
+        state['_csr'] = None
+        return state
+
+    def _invalidate(self) -> None:
+        self._adjacency = None
+        self._csr = None
+
+    @staticmethod
+    def node_key(name: str, file: str = None) -> str:
+        """The key of a function node: its qualified name, prefixed by its file when known."""
+        return f"{file}:{name}" if file else name
+
+    def intern(self, key: str, file: str = None, label: str = None) -> int:
+        """Return the id for a node key, adding the node if needed."""
+        node_id = self.index.get(key)
+        if node_id is None:
+            node_id = len(self.names)
+            self.keys.append(key)
+            self.names.append(label or key)
+            self.node_file.append(file)
+            self.index[key] = node_id
+            self._invalidate()
+        elif file is not None and self.node_file[node_id] is None:
+            self.node_file[node_id] = file
+        return node_id
+
+    def add_edge(self, caller: str, callee: str, file: str = None) -> None:
+        """Add a caller -> callee edge between node keys, contributed by a file."""
+        src, dst = self.intern(caller, file), self.intern(callee)
+        edges = self.file_edges.setdefault(file, set())
+        if (src, dst) not in edges:
+            edges.add((src, dst))
+            self.edge_refs[(src, dst)] += 1
+            self.node_refs[src] += 1
+            self.node_refs[dst] += 1
+            self._invalidate()
+
+    def remove_file(self, file: str) -> None:
+        """Drop the functions, calls and edges contributed by a file."""
+        released = []
+        for edge in self.file_edges.pop(file, ()):
+            self.edge_refs[edge] -= 1
+            if not self.edge_refs[edge]:
+                del self.edge_refs[edge]
+            released.extend(edge)
+        for node_id in self.file_nodes.pop(file, ()):
+            names = self.definitions.get(self.names[node_id].rsplit('.', 1)[-1])
+            if names is not None:
+                names.discard(node_id)
+            released.append(node_id)
+        self.file_calls.pop(file, None)
+        self.file_hashes.pop(file, None)
+
+        dropped = set()
+        for node_id in released:
+            self.node_refs[node_id] -= 1
+            if self.node_refs[node_id] <= 0:
+                dropped.add(node_id)
+        if dropped:
+            self._drop_nodes(dropped)
+        self._invalidate()
+
+    def _drop_nodes(self, dropped: Set[int]) -> None:
+        """Remove nodes nothing refers to any more and renumber the rest densely."""
+        keep = [node_id for node_id in range(len(self.keys)) if node_id not in dropped]
+        remap = {node_id: new_id for new_id, node_id in enumerate(keep)}
+        self.keys = [self.keys[i] for i in keep]
+        self.names = [self.names[i] for i in keep]
+        self.node_file = [self.node_file[i] for i in keep]
+        self.index = {key: node_id for node_id, key in enumerate(self.keys)}
+        self.node_refs = Counter({remap[i]: n for i, n in self.node_refs.items() if i in remap and n > 0})
+        self.edge_refs = Counter({(remap[s], remap[d]): n for (s, d), n in self.edge_refs.items()})
+        self.file_nodes = {f: {remap[i] for i in ids} for f, ids in self.file_nodes.items()}
+        self.file_calls = {f: {remap[s]: names for s, names in calls.items()} for f, calls in self.file_calls.items()}
+        self.file_edges = {f: {(remap[s], remap[d]) for s, d in edges} for f, edges in self.file_edges.items()}
+        self.definitions = {name: {remap[i] for i in ids if i in remap} for name, ids in self.definitions.items()}
+        self.definitions = {name: ids for name, ids in self.definitions.items() if ids}
+
+    def update_functions(self, functions: List[dict], file: str = None) -> bool:
+        """
+        Add the calls made by a list of extracted functions ({'name', 'body'},
+        optionally 'qualname').
+
+        When `file` is given, the file's previous functions and edges are
+        replaced; returns False if the bodies are unchanged since the last update.
+        """
+        if file is not None:
+            digest = hashlib.sha1()
+            for f in functions:
+                digest.update(f.get('qualname', f['name']).encode('utf-8'))
+                digest.update(ast.dump(ast.Module(body=f['body'], type_ignores=[])).encode('utf-8'))
+            file_hash = digest.hexdigest()
+            if self.file_hashes.get(file) == file_hash:
+                return False
+            self.remove_file(file)
+            self.file_hashes[file] = file_hash
+
+        defined = self.file_nodes.setdefault(file, set())
+        calls = self.file_calls.setdefault(file, {})
+        for f in functions:
+            qualname = f.get('qualname', f['name'])
+            node_id = self.intern(self.node_key(qualname, file), file, qualname)
+            if node_id not in defined:
+                defined.add(node_id)
+                self.node_refs[node_id] += 1
+                self.definitions.setdefault(f['name'], set()).add(node_id)
+            calls.setdefault(node_id, set()).update(extract_calls(f['body']))
+        self._invalidate()
+        return True
+
+    def update_source(self, source: str, file: str) -> bool:
+        """Parse a module's source and update the graph with its functions and methods."""
+        tree = ast.parse(source)
+        functions = []
+
+        def collect(node, prefix):
+            for child in ast.iter_child_nodes(node):
+                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                    qualname = prefix + child.name
+                    if not isinstance(child, ast.ClassDef):
+                        functions.append({'name': child.name, 'qualname': qualname, 'body': child.body})
+                    collect(child, qualname + '.')
+                else:
+                    collect(child, prefix)
+
+        collect(tree, '')
+        return self.update_functions(functions, file)
+
+    def _resolve(self, name: str, file: str) -> Set[int]:
+        """Ids of the functions a call to `name` from `file` may reach."""
+        candidates = self.definitions.get(name, set())
+        local = {node_id for node_id in candidates if self.node_file[node_id] == file}
+        return local or candidates
+
+    def adjacency(self) -> Dict[int, Set[int]]:
+        """Successor ids of every node, from resolved call sites and direct edges."""
+        if self._adjacency is None:
+            adjacency = defaultdict(set)
+            for file, calls in self.file_calls.items():
+                for src, names in calls.items():
+                    for name in names:
+                        adjacency[src].update(self._resolve(name, file))
+            for src, dst in self.edge_refs:
+                adjacency[src].add(dst)
+            self._adjacency = dict(adjacency)
+        return self._adjacency
+
+    def find(self, name: str, file: str = None) -> int:
+        """Id of a node by key, by file and qualified name, or by a qualified name that is unique."""
+        key = self.node_key(name, file)
+        if key in self.index:
+            return self.index[key]
+        matches = [node_id for node_id, label in enumerate(self.names) if label == name
+                   and (file is None or self.node_file[node_id] == file)]
+        if len(matches) != 1:
+            raise KeyError(f"{'Ambiguous' if matches else 'Unknown'} function: {name}")
+        return matches[0]
+
+    @property
+    def node_count(self) -> int:
+        return len(self.names)
+
+    @property
+    def edge_count(self) -> int:
+        return sum(len(targets) for targets in self.adjacency().values())
+
+    def compact(self) -> Tuple[array, array]:
+        """Freeze the adjacency into CSR arrays: (offsets, targets)."""
+        if self._csr is None:
+            adjacency = self.adjacency()
+            offsets = array('I', [0])
+            targets = array('I')
+            for node_id in range(len(self.names)):
+                targets.extend(sorted(adjacency.get(node_id, ())))
+                offsets.append(len(targets))
+            self._csr = (offsets, targets)
+        return self._csr
+
+    def successors(self, name: str, file: str = None) -> List[str]:
+        offsets, targets = self.compact()
+        node_id = self.find(name, file)
+        return [self.names[t] for t in targets[offsets[node_id]:offsets[node_id + 1]]]
+
+    def iter_edges(self) -> Iterator[Tuple[int, int]]:
+        offsets, targets = self.compact()
+        for src in range(len(self.names)):
+            for position in range(offsets[src], offsets[src + 1]):
+                yield src, targets[position]
+
+    # Streaming exporters: no layout, constant memory per line
+
+    def iter_dot(self, name: str = "calls") -> Iterator[str]:
+        yield f"digraph {json.dumps(name)} {{\n"
+        for node_id, node_name in enumerate(self.names):
+            yield f"  n{node_id} [label={json.dumps(node_name)}];\n"
+        for src, dst in self.iter_edges():
+            yield f"  n{src} -> n{dst};\n"
+        yield "}\n"
+
+    def iter_graphml(self) -> Iterator[str]:
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        yield '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+        yield '  <key id="label" for="node" attr.name="label" attr.type="string"/>\n'
+        yield '  <key id="file" for="node" attr.name="file" attr.type="string"/>\n'
+        yield '  <graph id="calls" edgedefault="directed">\n'
+        for node_id, node_name in enumerate(self.names):
+            file = self.node_file[node_id]
+            file_data = f'<data key="file">{escape(file)}</data>' if file else ''
+            yield f'    <node id="n{node_id}"><data key="label">{escape(node_name)}</data>{file_data}</node>\n'
+        for src, dst in self.iter_edges():
+            yield f'    <edge source="n{src}" target="n{dst}"/>\n'
+        yield '  </graph>\n</graphml>\n'
+
+    def iter_json(self) -> Iterator[str]:
+        yield '{"nodes": [\n'
+        for node_id, node_name in enumerate(self.names):
+            separator = ',' if node_id < len(self.names) - 1 else ''
+            yield json.dumps({'id': node_id, 'name': node_name, 'file': self.node_file[node_id]}) + separator + '\n'
+        yield '], "edges": [\n'
+        first = True
+        for src, dst in self.iter_edges():
+            yield ('' if first else ',') + json.dumps([src, dst]) + '\n'
+            first = False
+        yield ']}\n'
+
+    def export(self, output_file: str, fmt: str = None) -> str:
+        """Stream the graph to a DOT, GraphML or JSON file (chosen by extension)."""
+        fmt = fmt or os.path.splitext(output_file)[1].lstrip('.').lower()
+        writers = {'dot': self.iter_dot, 'gv': self.iter_dot, 'graphml': self.iter_graphml, 'json': self.iter_json}
+        if fmt not in writers:
+            raise ValueError(f"Unsupported graph format: {fmt}")
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.writelines(writers[fmt]())
+        return output_file
+
+    # Level of detail
+
+    def clusters(self, iterations: int = 10) -> List[int]:
+        """
+        Assign each node to a cluster.
+
+        Nodes are grouped by their file when known; otherwise label propagation
+        over the undirected call graph is used, which costs O(edges) per iteration.
+        """
+        if self.names and all(self.node_file):
+            files = {}
+            return [files.setdefault(f, len(files)) for f in self.node_file]
+
+        neighbors = defaultdict(list)
+        for src, dst in self.iter_edges():
+            if src != dst:
+                neighbors[src].append(dst)
+                neighbors[dst].append(src)
+        labels = list(range(len(self.names)))
+        for _ in range(iterations):
+            changed = False
+            for node_id in range(len(self.names)):
+                if not neighbors[node_id]:
+                    continue
+                counts = Counter(labels[n] for n in neighbors[node_id])
+                best = max(counts.items(), key=lambda item: (item[1], -item[0]))[0]
+                if best != labels[node_id]:
+                    labels[node_id] = best
+                    changed = True
+            if not changed:
+                break
+        return labels
+
+    def collapse(self, max_nodes: int = 300) -> 'CallGraph':
+        """Return a graph with at most `max_nodes` nodes, collapsing clusters if needed."""
+        if len(self.names) <= max_nodes:
+            return self
+
+        labels = self.clusters()
+        members = defaultdict(list)
+        for node_id, label in enumerate(labels):
+            members[label].append(node_id)
+        kept = sorted(members, key=lambda label: -len(members[label]))[:max_nodes]
+        kept_set = set(kept)
+
+        def cluster_name(label):
+            ids = members[label]
+            if len(ids) == 1:
+                return self.names[ids[0]]
+            file = self.node_file[ids[0]]
+            head = os.path.basename(file) if file else self.names[ids[0]]
+            return f"{head} (+{len(ids) - 1})"
+
+        collapsed = CallGraph()
+        for label in kept:
+            collapsed.intern(str(label), label=cluster_name(label))
+        for src, dst in self.iter_edges():
+            a, b = labels[src], labels[dst]
+            if a != b and a in kept_set and b in kept_set:
+                collapsed.add_edge(str(a), str(b))
+        return collapsed
+
+    def render(self, output_file: str = "function_graph.png", max_nodes: int = 300, dpi: int = 100) -> str:
+        """Render an image of the graph on demand."""
+        graph = self.collapse(max_nodes)
+
+        fmt = os.path.splitext(output_file)[1].lstrip('.').lower() or 'png'
+        sfdp = shutil.which('sfdp')
+        if sfdp:
+            # sfdp is a multilevel force-directed layout that scales to large graphs
+            dot_source = ''.join(graph.iter_dot())
+            subprocess.run([sfdp, f'-T{fmt}', f'-Gdpi={dpi}', '-Goverlap=prism', '-o', output_file],
+                           input=dot_source.encode('utf-8'), check=True)
+            return output_file
+
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        import networkx as nx
+
+        G = nx.DiGraph()
+        G.add_nodes_from(range(graph.node_count))
+        G.add_edges_from(graph.iter_edges())
+        iterations = 50 if G.number_of_nodes() <= 100 else 20
+        pos = nx.spring_layout(G, iterations=iterations, seed=0)
+
+        plt.figure(figsize=(10, 8))
+        nx.draw(G, pos, labels=dict(enumerate(graph.names)), with_labels=G.number_of_nodes() <= 100,
+                node_color='lightblue', node_size=600, font_size=8, arrows=True, arrowsize=10)
+        plt.savefig(output_file, dpi=dpi, bbox_inches='tight')
+        plt.close()
+        return output_file
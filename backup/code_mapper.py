@@ -5,13 +5,11 @@ This module provides tools for analyzing and mapping the codebase structure,
 dependencies, and resource usage patterns. It uses AST (Abstract Syntax Tree)
 to parse Python files and extract detailed information about their structure.
 """
-# Fix imports for reorganized codebase
-import utils.import_utils
-
-
-# Fix imports for reorganized codebase
-
-
+# Fix imports for reorganized codebase; nothing below depends on it
+try:
+    import utils.import_utils
+except ImportError:
+    pass
 
 import os
 import sys
@@ -29,24 +27,19 @@ try:
 except ImportError:
     HAS_MODULE_SYSTEM = False
 
-# Import resource analysis functions
+# Resource profiles are derived from the AST, optionally calibrated by measurement
 try:
-    from resource_splitter import analyze_resource_focus, analyze_resource_profile
-    HAS_RESOURCE_SPLITTER = True
+    from resource_profiler import aggregate_profiles, profile_functions
+    HAS_RESOURCE_PROFILER = True
 except ImportError:
-    HAS_RESOURCE_SPLITTER = False
-    
-    # Define fallback functions if resource_splitter is not available
-    def analyze_resource_focus(func_code):
-        """Analyze the resource focus of a function."""
-        return "cpu"  # Default to CPU focus
-        
-    def analyze_resource_profile(func_code):
-        """Analyze the resource profile of a function."""
-        return {
-            'cpu': 0.5, 'memory': 0.5, 'gpu': 0.0, 
-            'network': 0.0, 'startup': 0.3, 'runtime': 0.5
-        }
+    HAS_RESOURCE_PROFILER = False
+
+# Trees are shared with the other analysis tools through the parse-once cache
+try:
+    from core.ast.analysis_cache import get_analysis_cache
+except ImportError:
+    # Run without the project on sys.path: read and parse files directly
+    get_analysis_cache = None
 
 
 class ImportVisitor(ast.NodeVisitor):
@@ -214,13 +207,17 @@ class ClassVisitor(ast.NodeVisitor):
         self.generic_visit(node)
 
 
-def analyze_file(file_path):
+def analyze_file(file_path, calibrate=False):
     """Analyze a Python file and extract its structure."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        source = f.read()
+    if get_analysis_cache is None:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            source = f.read()
+    else:
+        cache = get_analysis_cache()
+        source = cache.source(file_path)
     
     try:
-        tree = ast.parse(source)
+        tree = ast.parse(source, filename=file_path) if get_analysis_cache is None else cache.tree(file_path)
         
         # Extract imports
         import_visitor = ImportVisitor()
@@ -240,10 +237,14 @@ def analyze_file(file_path):
         module_docstring = ast.get_docstring(tree)
         
         # Analyze resource usage for each function
+        profiles = profile_functions(tree, file_path, calibrate) if HAS_RESOURCE_PROFILER else {}
         for func_name, func_info in function_visitor.functions.items():
-            func_code = func_info['source']
-            func_info['resource_focus'] = analyze_resource_focus(func_code)
-            func_info['resource_profile'] = analyze_resource_profile(func_code)
+            profile = profiles.get(func_name)
+            if profile is not None:
+                func_info['resource_focus'] = profile['focus']
+                func_info['resource_profile'] = profile['profile']
+                if 'measured' in profile:
+                    func_info['resource_measurement'] = profile['measured']
         
         return {
             'file_path': file_path,
@@ -275,7 +276,7 @@ def find_python_files(directory):
     return python_files
 
 
-def map_codebase(directory):
+def map_codebase(directory, calibrate=False):
     """Map the entire codebase structure."""
     python_files = find_python_files(directory)
     
@@ -283,7 +284,7 @@ def map_codebase(directory):
     file_analyses = {}
     for file_path in python_files:
         rel_path = os.path.relpath(file_path, directory)
-        file_analyses[rel_path] = analyze_file(file_path)
+        file_analyses[rel_path] = analyze_file(file_path, calibrate)
     
     # Build dependency graph
     dependency_graph = {}
@@ -316,16 +317,26 @@ def map_codebase(directory):
     }
     
     for rel_path, analysis in file_analyses.items():
-        # Count functions by resource focus
+        # Weigh functions by how strongly they use their focus resource
         resource_counts = {
             'cpu': 0, 'memory': 0, 'gpu': 0, 'network': 0, 'ui': 0, 'core': 0
         }
+        profiles = []
         
         for func_name, func_info in analysis['functions'].items():
-            resource = func_info.get('resource_focus', 'cpu')
-            resource_counts[resource] += 1
-        
-        # Determine the primary resource focus of the file
+            resource = func_info.get('resource_focus', 'core')
+            profile = func_info.get('resource_profile')
+            if profile is None:
+                resource_counts[resource] += 1
+                continue
+            profiles.append(profile)
+            resource_counts[resource] += profile.get(resource, 1.0)
+        if HAS_RESOURCE_PROFILER:
+            analysis['resource_profile'] = aggregate_profiles(profiles, how="max")
+        
+        # Determine the primary resource focus of the file; light glue code
+        # only makes a file core when no function leans on a resource
+        resource_counts.pop('core')
         if sum(resource_counts.values()) > 0:
             primary_resource = max(resource_counts, key=resource_counts.get)
             resource_map[primary_resource].append(rel_path)
@@ -494,12 +505,18 @@ def main():
     parser.add_argument('--output', type=str, default='codebase_map.md', help='Output report file')
     parser.add_argument('--split', action='store_true', help='Split files into resource-oriented components')
     parser.add_argument('--split-dir', type=str, default='split_output', help='Output directory for split files')
+    parser.add_argument('--calibrate', action='store_true',
+                        help='Calibrate resource profiles by running functions marked @calibration_target in a sandbox')
+    parser.add_argument('--calibrate-function', action='append', default=[], metavar='NAME',
+                        help='Calibrate, also running this argument-free top-level function (repeatable)')
     
     args = parser.parse_args()
     
     # Map the codebase
     print(f"Mapping codebase in {args.dir}...")
-    map_data = map_codebase(args.dir)
+    # Named functions are measured along with the marked ones
+    calibrate = args.calibrate_function or args.calibrate
+    map_data = map_codebase(args.dir, calibrate)
     
     # Generate report
     print(f"Generating report to {args.output}...")
@@ -16,6 +16,9 @@ import os
 import json
 import time
 
+# Directory listings come from the shared single-pass scanner
+from core.processing.directory_scanner import TreeScan, scan_tree
+
 class CodebaseScanner:
     """Utility for scanning and analyzing a codebase"""
     
@@ -28,13 +31,16 @@ class CodebaseScanner:
         self.file_sizes = {}
         self.structure = {}
         
-    def scan(self, max_depth: int = None, exclude_dirs: List[str] = None) -> Dict[str, Any]:
+    def scan(self, max_depth: int = None, exclude_dirs: List[str] = None,
+             incremental: bool = False, max_workers: Optional[int] = None) -> Dict[str, Any]:
         """
         Scan the codebase and return its structure
         
         Args:
             max_depth: Maximum depth to scan (None for unlimited)
             exclude_dirs: Directories to exclude (e.g., "__pycache__")
+            incremental: Only re-read directories whose mtime changed since the last scan
+            max_workers: Processes for scanning top-level subtrees
             
         Returns:
             Dictionary containing the codebase structure
@@ -50,8 +56,14 @@ class CodebaseScanner:
         self.file_types = {}
         self.file_sizes = {}
         
+        # One scandir pass collects every listing; the structure is built from its records
+        scan = scan_tree(self.root_dir, exclude=exclude_dirs, sizes=True, entries=True,
+                         max_depth=max_depth, incremental=incremental, max_workers=max_workers)
+        for rel_path, error in scan.errors:
+            print(f"Error scanning {os.path.join(self.root_dir, rel_path)}: {error}")
+        
         # Build the structure
-        self.structure = self._scan_directory(self.root_dir, 0, max_depth, exclude_dirs)
+        self.structure = self._scan_directory(scan, "")
         
         # Add scan statistics
         self.structure["stats"] = {
@@ -63,22 +75,22 @@ class CodebaseScanner:
         
         return self.structure
     
-    def _scan_directory(self, dir_path: str, current_depth: int, 
-                       max_depth: Optional[int], exclude_dirs: List[str]) -> Dict[str, Any]:
+    def _scan_directory(self, scan: TreeScan, rel_path: str) -> Dict[str, Any]:
         """
-        Recursively scan a directory
+        Build the structure of a scanned directory
         
         Args:
-            dir_path: Path to the directory
-            current_depth: Current depth in the directory tree
-            max_depth: Maximum depth to scan
-            exclude_dirs: Directories to exclude
+            scan: Result of scan_tree over the root directory
+            rel_path: Path of the directory relative to the root
             
         Returns:
             Dictionary containing the directory structure
         """
-        # Check if we've reached the maximum depth
-        if max_depth is not None and current_depth > max_depth:
+        dir_path = os.path.join(self.root_dir, rel_path) if rel_path else self.root_dir
+        record = scan.records.get(rel_path)
+        
+        # Directories below the maximum depth were not listed
+        if record is None:
             return {
                 "name": os.path.basename(dir_path),
                 "type": "directory",
@@ -94,53 +106,44 @@ class CodebaseScanner:
             "children": []
         }
         
-        try:
-            # List all items in the directory
-            items = os.listdir(dir_path)
+        items = [(name, True, 0) for name in record["subdirs"]]
+        items.extend((name, False, size) for name, size in record["file_entries"])
+        
+        # Process each item
+        for item_name, is_dir, file_size in sorted(items):
+            item_path = os.path.join(dir_path, item_name)
             
-            # Process each item
-            for item_name in sorted(items):
-                item_path = os.path.join(dir_path, item_name)
-                
-                # Skip excluded directories
-                if os.path.isdir(item_path) and item_name in exclude_dirs:
-                    continue
+            if is_dir:
+                # Process subdirectory
+                self.dir_count += 1
+                subdir_structure = self._scan_directory(
+                    scan, os.path.join(rel_path, item_name) if rel_path else item_name
+                )
+                dir_structure["children"].append(subdir_structure)
+            else:
+                # Process file
+                self.file_count += 1
+                file_ext = os.path.splitext(item_name)[1].lower()
                 
-                if os.path.isdir(item_path):
-                    # Process subdirectory
-                    self.dir_count += 1
-                    subdir_structure = self._scan_directory(
-                        item_path, current_depth + 1, max_depth, exclude_dirs
-                    )
-                    dir_structure["children"].append(subdir_structure)
+                # Update file type statistics
+                if file_ext in self.file_types:
+                    self.file_types[file_ext]["count"] += 1
+                    self.file_types[file_ext]["size"] += file_size
                 else:
-                    # Process file
-                    self.file_count += 1
-                    file_size = os.path.getsize(item_path)
-                    file_ext = os.path.splitext(item_name)[1].lower()
-                    
-                    # Update file type statistics
-                    if file_ext in self.file_types:
-                        self.file_types[file_ext]["count"] += 1
-                        self.file_types[file_ext]["size"] += file_size
-                    else:
-                        self.file_types[file_ext] = {
-                            "count": 1,
-                            "size": file_size
-                        }
-                    
-                    # Add file to structure
-                    file_structure = {
-                        "name": item_name,
-                        "type": "file",
-                        "path": item_path,
-                        "size": file_size,
-                        "extension": file_ext
+                    self.file_types[file_ext] = {
+                        "count": 1,
+                        "size": file_size
                     }
-                    dir_structure["children"].append(file_structure)
-        
-        except Exception as e:
-            print(f"Error scanning {dir_path}: {e}")
+                
+                # Add file to structure
+                file_structure = {
+                    "name": item_name,
+                    "type": "file",
+                    "path": item_path,
+                    "size": file_size,
+                    "extension": file_ext
+                }
+                dir_structure["children"].append(file_structure)
         
         return dir_structure
     
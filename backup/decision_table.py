@@ -0,0 +1,306 @@
+"""
+Decision Table
+This module compiles IR logic rules into table-driven dispatch code:
+- Boolean parameters are packed into a bitmask
+- Numeric parameters are mapped to cells by comparing against their sorted cut
+  points (inline for a few cuts, bisect for many)
+- Every (cells, bitmask) combination is evaluated once, so the generated
+  function is a single tuple lookup instead of a chain of if statements
+The same enumeration proves which rules can never fire, and generates an
+equivalence test plus micro-benchmark against the naive if-chain.
+"""
+import ast
+import itertools
+from typing import Any, Dict, List, Optional, Tuple
+
+# Largest table we are willing to emit
+MAX_TABLE_SIZE = 4096
+
+# Up to this many cut points, cells are computed with inline comparisons,
+# which is cheaper than a call to bisect
+INLINE_CUTS = 4
+
+# A table lookup costs about as much as evaluating this many rule conditions;
+# chains that exit earlier on average are faster left as if statements
+TABLE_BREAK_EVEN_DEPTH = 14.0
+
+_NUMERIC_OPS = (ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq)
+_RETURN_TYPES = (bool, int, float, type(None))
+
+
+class UnsupportedLogic(Exception):
+    """Raised when IR logic cannot be expressed as a decision table."""
+
+
+def _classify_params(ir_model: Dict[str, Any]) -> Tuple[List[str], Dict[str, List[float]]]:
+    """
+    Split parameters into boolean flags and numeric parameters with their cut points.
+
+    A parameter is boolean if it is only used for its truth value, and numeric
+    if it is only compared against numeric constants.
+    """
+    params = set(ir_model['params'])
+    truth_uses = set()
+    cuts = {}
+
+    def visit(node, boolean_context):
+        if isinstance(node, ast.BoolOp):
+            for value in node.values:
+                visit(value, True)
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            visit(node.operand, True)
+        elif isinstance(node, ast.Name) and boolean_context:
+            if node.id not in params:
+                raise UnsupportedLogic(f"Unknown name '{node.id}'")
+            truth_uses.add(node.id)
+        elif isinstance(node, ast.Constant) and boolean_context:
+            pass
+        elif isinstance(node, ast.Compare):
+            operands = [node.left] + node.comparators
+            for op, left, right in zip(node.ops, operands, operands[1:]):
+                if not isinstance(op, _NUMERIC_OPS):
+                    raise UnsupportedLogic("Only numeric comparisons are supported")
+                if isinstance(left, ast.Name) and isinstance(right, ast.Constant):
+                    name, value = left.id, right.value
+                elif isinstance(right, ast.Name) and isinstance(left, ast.Constant):
+                    name, value = right.id, left.value
+                else:
+                    raise UnsupportedLogic("Comparisons must be between a parameter and a constant")
+                if name not in params or isinstance(value, bool) or not isinstance(value, (int, float)):
+                    raise UnsupportedLogic(f"Unsupported comparison on '{name}'")
+                cuts.setdefault(name, set()).add(value)
+        else:
+            raise UnsupportedLogic(f"Unsupported condition element {type(node).__name__}")
+
+    for rule in ir_model['logic']:
+        try:
+            tree = ast.parse(str(rule['condition']), mode='eval')
+        except SyntaxError:
+            raise UnsupportedLogic(f"Cannot parse condition {rule['condition']!r}")
+        visit(tree.body, True)
+        if not isinstance(rule['return'], _RETURN_TYPES):
+            raise UnsupportedLogic(f"Unsupported return value {rule['return']!r}")
+
+    if truth_uses & set(cuts):
+        raise UnsupportedLogic("Parameters used both as flags and as numbers")
+
+    flags = [p for p in ir_model['params'] if p in truth_uses]
+    numeric = {p: sorted(cuts[p]) for p in ir_model['params'] if p in cuts}
+    return flags, numeric
+
+
+def _cell_representatives(cut_points: List[float]) -> List[float]:
+    """One value per cell: below, at and between each cut point, and above the last."""
+    values = []
+    for i, cut in enumerate(cut_points):
+        if i == 0:
+            values.append(cut - 1)
+        else:
+            values.append((cut_points[i - 1] + cut) / 2)
+        values.append(cut)
+    values.append(cut_points[-1] + 1)
+    return values
+
+
+class DecisionTable:
+    """The enumerated outcome of an IR rule chain over every input cell."""
+
+    def __init__(self, ir_model: Dict[str, Any], max_size: int = MAX_TABLE_SIZE):
+        self.ir_model = ir_model
+        self.params = list(ir_model['params'])
+        self.flags, self.cuts = _classify_params(ir_model)
+
+        unused = [p for p in self.params if p not in self.flags and p not in self.cuts]
+        self.numeric = list(self.cuts)
+        size = 2 ** len(self.flags)
+        for name in self.numeric:
+            size *= 2 * len(self.cuts[name]) + 1
+        if size > max_size:
+            raise UnsupportedLogic(f"Decision table would have {size} entries")
+
+        self.compiled = [compile(str(rule['condition']), '<rule>', 'eval') for rule in ir_model['logic']]
+        self.entries = []
+        self.fired = [False] * len(ir_model['logic'])
+        self.depths = []
+
+        representatives = [_cell_representatives(self.cuts[name]) for name in self.numeric]
+        for cells in itertools.product(*representatives):
+            for mask in range(2 ** len(self.flags)):
+                env = dict.fromkeys(unused)
+                env.update(zip(self.numeric, cells))
+                for bit, flag in enumerate(self.flags):
+                    env[flag] = bool(mask >> bit & 1)
+                self.entries.append(self._evaluate(env))
+
+    def _evaluate(self, env: Dict[str, Any]) -> Any:
+        for index, code in enumerate(self.compiled):
+            try:
+                matched = eval(code, {'__builtins__': {}}, env)
+            except Exception:
+                raise UnsupportedLogic("Condition failed to evaluate on a table cell")
+            if matched:
+                self.fired[index] = True
+                self.depths.append(index + 1)
+                return self.ir_model['logic'][index]['return']
+        self.depths.append(len(self.compiled))
+        return None
+
+    def unreachable_rules(self) -> List[int]:
+        """Indices of rules that never fire for any input."""
+        return [index for index, fired in enumerate(self.fired) if not fired]
+
+    def mean_chain_depth(self) -> float:
+        """Average number of conditions the if-chain evaluates, over all table cells."""
+        return sum(self.depths) / len(self.depths) if self.depths else 0.0
+
+    def worthwhile(self) -> bool:
+        """Whether the table lookup is expected to beat the if-chain."""
+        return self.mean_chain_depth() >= TABLE_BREAK_EVEN_DEPTH
+
+    def generate(self) -> str:
+        """Generate table-driven Python source for the function."""
+        name = self.ir_model['function_name']
+        # Generated names must not be shadowed by, or shadow, a parameter
+        used = set(self.params) | {name}
+
+        def fresh(base: str) -> str:
+            candidate, suffix = base, 1
+            while candidate in used:
+                candidate, suffix = f"{base}_{suffix}", suffix + 1
+            used.add(candidate)
+            return candidate
+
+        bisected = [p for p in self.numeric if len(self.cuts[p]) > INLINE_CUTS]
+        lines = []
+        if bisected:
+            bisect_name = fresh("bisect_left")
+            alias = "" if bisect_name == "bisect_left" else f" as {bisect_name}"
+            lines += [f"from bisect import bisect_left{alias}", "", ""]
+        cuts_names = {}
+        for param in bisected:
+            cuts_names[param] = fresh(f"_{param.upper()}_CUTS")
+            lines.append(f"{cuts_names[param]} = {tuple(self.cuts[param])!r}")
+        table_name = fresh(f"_{name.upper()}_TABLE")
+        lines.append(f"{table_name} = {tuple(self.entries)!r}")
+        lines += ["", "", f"def {name}({', '.join(self.params)}):"]
+
+        index_terms = []
+        stride = 2 ** len(self.flags)
+        position = fresh("_i") if bisected else None
+        for param in reversed(self.numeric):
+            cuts = self.cuts[param]
+            cell = fresh(f"_{param}_cell")
+            if param in bisected:
+                cuts_name = cuts_names[param]
+                lines.append(f"    {position} = {bisect_name}({cuts_name}, {param})")
+                lines.append(f"    {cell} = 2 * {position} + ({position} < {len(cuts)} and {param} == {cuts_name}[{position}])")
+            else:
+                # Cell index is the number of cuts at or below the value, counting equality twice
+                compares = " + ".join(f"({param} >= {cut!r}) + ({param} > {cut!r})" for cut in cuts)
+                lines.append(f"    {cell} = {compares}")
+            index_terms.append(f"{cell} * {stride}" if stride > 1 else cell)
+            stride *= 2 * len(cuts) + 1
+        for bit, flag in enumerate(self.flags):
+            index_terms.append(f"({1 << bit} if {flag} else 0)")
+
+        index = " + ".join(index_terms) if index_terms else "0"
+        lines.append(f"    return {table_name}[{index}]")
+        return "\n".join(lines) + "\n"
+
+
+def render_if_chain(ir_model: Dict[str, Any], skip: List[int] = None) -> str:
+    """Render the naive if-chain for an IR model, omitting rules in `skip`."""
+    skip = set(skip or ())
+    lines = [f"def {ir_model['function_name']}({', '.join(ir_model['params'])}):"]
+    for index, rule in enumerate(ir_model['logic']):
+        if index in skip:
+            continue
+        lines.append(f"    if {rule['condition']}:")
+        lines.append(f"        return {rule['return']}")
+    if len(lines) == 1:
+        lines.append("    return None")
+    return "\n".join(lines) + "\n"
+
+
+def find_unreachable_rules(ir_model: Dict[str, Any]) -> Optional[List[int]]:
+    """Prove which rules can never fire, or return None if the logic is not enumerable."""
+    try:
+        return DecisionTable(ir_model).unreachable_rules()
+    except UnsupportedLogic:
+        return None
+
+
+def sample_inputs(ir_model: Dict[str, Any]) -> List[tuple]:
+    """Inputs covering every cell of the decision table, plus points next to each cut."""
+    flags, cuts = _classify_params(ir_model)
+    axes = []
+    for param in ir_model['params']:
+        if param in flags:
+            axes.append([False, True])
+        elif param in cuts:
+            points = set(_cell_representatives(cuts[param]))
+            for cut in cuts[param]:
+                points.update([cut - 1, cut + 1])
+            axes.append(sorted(points))
+        else:
+            axes.append([None])
+    return list(itertools.product(*axes))
+
+
+_EQUIVALENCE_TEST = '''"""
+Auto-generated equivalence test and micro-benchmark for {name}.
+Compares the table-driven export against the naive if-chain.
+"""
+import timeit
+import unittest
+
+NAIVE_SOURCE = {naive!r}
+
+OPTIMIZED_SOURCE = {optimized!r}
+
+INPUTS = {inputs!r}
+
+
+def _load(source):
+    namespace = {{}}
+    exec(compile(source, "<{name}>", "exec"), namespace)
+    return namespace["{name}"]
+
+
+naive = _load(NAIVE_SOURCE)
+optimized = _load(OPTIMIZED_SOURCE)
+
+
+class Test{class_name}Equivalence(unittest.TestCase):
+    """The optimized export must agree with the naive chain on every input cell."""
+
+    def test_equivalence(self):
+        for args in INPUTS:
+            self.assertEqual(optimized(*args), naive(*args), args)
+
+
+def benchmark(number=1000):
+    """Time both implementations over all sample inputs."""
+    results = {{}}
+    for label, func in (("naive", naive), ("optimized", optimized)):
+        results[label] = timeit.timeit(lambda: [func(*args) for args in INPUTS], number=number)
+    results["speedup"] = results["naive"] / results["optimized"] if results["optimized"] else 0.0
+    return results
+
+
+if __name__ == "__main__":
+    print(benchmark())
+    unittest.main()
+'''
+
+
+def generate_equivalence_test(ir_model: Dict[str, Any], optimized_code: str) -> str:
+    """Generate a self-contained unittest + benchmark comparing an export to the naive chain."""
+    name = ir_model['function_name']
+    return _EQUIVALENCE_TEST.format(
+        name=name,
+        class_name=''.join(part.capitalize() for part in name.split('_')),
+        naive=render_if_chain(ir_model),
+        optimized=optimized_code,
+        inputs=sample_inputs(ir_model)
+    )
@@ -1,8 +1,79 @@
-# Fix imports for reorganized codebase
+"""
+Exporter
+This module exports IR models as Python source:
+- Table-driven dispatch from decision_table when the rule chain is deep enough to benefit
+- Otherwise the Jinja if-chain template, compiled once and cached per template directory
+- Rules the optimizer proved unreachable are dropped before export
+- Each export can be paired with an auto-generated equivalence test and micro-benchmark
+"""
+import os
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
 
+from decision_table import DecisionTable, UnsupportedLogic, generate_equivalence_test, render_if_chain
 
+TEMPLATE_NAME = 'export_python.j2'
 
-def export_to_python(ir_model):
-    env = Environment(loader=FileSystemLoader('templates'))
-    template = env.get_template('export_python.j2')
-    return template.render(model=ir_model)
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATE_DIRS = ('templates', os.path.join(project_root, 'ui', 'templates'))
+
+
+@lru_cache(maxsize=None)
+def _load_template(template_dir: str):
+    """Compile the export template once per directory; None if Jinja is unavailable."""
+    try:
+        from jinja2 import Environment, FileSystemLoader
+    except ImportError:
+        return None
+    env = Environment(loader=FileSystemLoader(template_dir), auto_reload=False)
+    return env.get_template(TEMPLATE_NAME)
+
+
+def get_template():
+    """The cached export template from the first directory that has one."""
+    for template_dir in TEMPLATE_DIRS:
+        if os.path.exists(os.path.join(template_dir, TEMPLATE_NAME)):
+            return _load_template(os.path.abspath(template_dir))
+    return None
+
+
+def prune_unreachable(ir_model: Dict[str, Any], optimization: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Drop the rules that the optimizer proved can never fire."""
+    unreachable = set((optimization or {}).get('unreachable_rules') or ())
+    if not unreachable:
+        return ir_model
+    logic = [rule for index, rule in enumerate(ir_model['logic']) if index not in unreachable]
+    return dict(ir_model, logic=logic)
+
+
+def export_to_python(ir_model, optimization=None, backend="auto"):
+    """
+    Export an IR model as Python source.
+
+    backend is "auto" (table only when it is expected to be faster), "table"
+    (table whenever the logic can be enumerated) or "chain" (always an if-chain).
+    """
+    model = prune_unreachable(ir_model, optimization)
+
+    if backend != "chain":
+        try:
+            table = DecisionTable(model)
+            if backend == "table" or table.worthwhile():
+                return table.generate()
+        except UnsupportedLogic:
+            pass
+
+    template = get_template()
+    if template is not None:
+        return template.render(model=model)
+    return render_if_chain(model)
+
+
+def export_with_test(ir_model, optimization=None, backend="auto") -> Tuple[str, Optional[str]]:
+    """Export an IR model and generate its equivalence test, or None if inputs can't be enumerated."""
+    code = export_to_python(ir_model, optimization, backend)
+    try:
+        test_code = generate_equivalence_test(ir_model, code)
+    except UnsupportedLogic:
+        test_code = None
+    return code, test_code
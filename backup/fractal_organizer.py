@@ -5,23 +5,32 @@ This module enforces extreme modularity by recursively breaking down code into
 smaller and smaller components, while providing mechanisms to navigate and
 "bubble up" the structure when needed.
 """
-# Fix imports for reorganized codebase
-import utils.import_utils
-
-
-# Fix imports for reorganized codebase
-
-
-
 import os
 import ast
 import json
+import subprocess
+import symtable
+import sys
+from pathlib import Path
+
+# Fix imports for reorganized codebase; nothing below depends on it
+try:
+    import utils.import_utils
+except ImportError:
+    pass
+
 # Maximum depth of fractal organization
 MAX_FRACTAL_DEPTH = 5
 
 # Minimum size to consider splitting (don't split tiny files)
 MIN_SPLIT_SIZE = 100  # lines
 
+# Files with more top-level functions and classes than this are split
+MAX_FUNCTIONS_PER_FILE = 10
+
+# Longest function, in lines, the organizer aims for
+MAX_LINES_PER_FUNCTION = 50
+
 class FractalNode:
     """Represents a node in the fractal code structure."""
     
@@ -99,10 +108,11 @@ class FractalAnalyzer:
             
         # Extract functions
         functions = {}
+        lines = content.splitlines()
         for node in ast.walk(tree):
             if isinstance(node, ast.FunctionDef):
                 # Get function source
-                func_lines = content.splitlines()[node.lineno-1:node.end_lineno]
+                func_lines = lines[node.lineno-1:node.end_lineno]
                 func_source = "\n".join(func_lines)
                 
                 # Add to functions dictionary
@@ -139,6 +149,220 @@ class FractalAnalyzer:
             file_node.add_function(func_name, func_source)
 
 
+# Module that holds a split file's remaining top-level statements
+SHARED_MODULE = "_shared"
+
+# Header line printed by `python -X importtime`
+IMPORTTIME_PREFIX = "import time:"
+
+
+def _import_bindings(node):
+    """
+    Map each name an import statement binds to the statements that bind it.
+
+    Relative imports gain one level, since split modules live one package
+    deeper than the original file.
+    """
+    bindings = {}
+    if isinstance(node, ast.Import):
+        for alias in node.names:
+            if alias.asname:
+                bindings[alias.asname] = [f"import {alias.name} as {alias.asname}"]
+            else:
+                # `import a.b` binds `a`
+                bindings.setdefault(alias.name.split('.')[0], []).append(f"import {alias.name}")
+    elif isinstance(node, ast.ImportFrom):
+        level = node.level + 1 if node.level else 0
+        module = "." * level + (node.module or "")
+        for alias in node.names:
+            statement = f"from {module} import {alias.name}"
+            if alias.asname:
+                statement += f" as {alias.asname}"
+            bindings.setdefault(alias.asname or alias.name, []).append(statement)
+    return bindings
+
+
+def _bound_names(node):
+    """Names a module-level statement binds."""
+    names = set()
+    for child in ast.walk(node):
+        if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Store):
+            names.add(child.id)
+        elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(child.name)
+        elif isinstance(child, (ast.Import, ast.ImportFrom)):
+            names.update(_import_bindings(child))
+    return names
+
+
+def _loaded_names(nodes):
+    """Every name loaded anywhere in the given nodes."""
+    return {child.id for node in nodes if node is not None for child in ast.walk(node)
+            if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Load)}
+
+
+def _symbol_free_names(node, table):
+    """
+    Module-level names a top-level function or class needs.
+
+    Names evaluated when the definition runs (decorators, defaults,
+    annotations, bases) come from the AST; names used in the body come from
+    its symbol table, so locals, parameters and closures are excluded.
+    Returns (free names, names the body rebinds with `global`).
+    """
+    def_time = list(node.decorator_list)
+    if isinstance(node, ast.ClassDef):
+        def_time += node.bases + [keyword.value for keyword in node.keywords]
+    else:
+        args = node.args
+        def_time += args.defaults + args.kw_defaults + [node.returns]
+        def_time += [arg.annotation for arg in args.posonlyargs + args.args + args.kwonlyargs]
+        def_time += [arg.annotation for arg in (args.vararg, args.kwarg) if arg is not None]
+    free = _loaded_names(def_time)
+    rebound = set()
+
+    stack = [table]
+    while stack:
+        scope = stack.pop()
+        for symbol in scope.get_symbols():
+            if symbol.is_global():
+                free.add(symbol.get_name())
+                if symbol.is_declared_global() and symbol.is_assigned():
+                    rebound.add(symbol.get_name())
+        stack.extend(scope.get_children())
+    return free, rebound
+
+
+def _strongly_connected(nodes, edges):
+    """Tarjan's algorithm; components come out dependencies first."""
+    index = {}
+    low = {}
+    stack = []
+    on_stack = set()
+    components = []
+
+    def visit(node):
+        index[node] = low[node] = len(index)
+        stack.append(node)
+        on_stack.add(node)
+        for target in edges[node]:
+            if target not in index:
+                visit(target)
+                low[node] = min(low[node], low[target])
+            elif target in on_stack:
+                low[node] = min(low[node], index[target])
+        if low[node] == index[node]:
+            component = []
+            while True:
+                member = stack.pop()
+                on_stack.discard(member)
+                component.append(member)
+                if member == node:
+                    break
+            components.append(sorted(component, key=nodes.index))
+
+    for node in nodes:
+        if node not in index:
+            visit(node)
+    return components
+
+
+def _is_main_guard(node):
+    """Whether a statement is an `if __name__ == "__main__":` block."""
+    test = getattr(node, 'test', None)
+    return (isinstance(node, ast.If) and isinstance(test, ast.Compare)
+            and isinstance(test.left, ast.Name) and test.left.id == "__name__"
+            and len(test.comparators) == 1
+            and isinstance(test.comparators[0], ast.Constant)
+            and test.comparators[0].value == "__main__")
+
+
+def render_lazy_init(base_name, exports, public_names):
+    """
+    Render a package __init__ that imports each symbol on first access.
+
+    exports maps every exported name to the module defining it; a PEP 562
+    module __getattr__ imports that module when the name is first used and
+    caches the value, so importing the package itself costs almost nothing.
+    """
+    lines = [
+        '"""',
+        f"Fractal package for {base_name}",
+        "",
+        "Symbols are imported from their modules on first access.",
+        '"""',
+        "import importlib",
+        "",
+        "_SYMBOLS = {",
+    ]
+    lines += [f"    {name!r}: {module!r}," for name, module in exports.items()]
+    lines += [
+        "}",
+        "",
+        "__all__ = [",
+    ]
+    lines += [f"    {name!r}," for name in public_names]
+    lines += [
+        "]",
+        "",
+        "",
+        "def __getattr__(name):",
+        "    module = _SYMBOLS.get(name)",
+        "    if module is None:",
+        '        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")',
+        '    value = getattr(importlib.import_module(f".{module}", __name__), name)',
+        "    globals()[name] = value",
+        "    return value",
+        "",
+        "",
+        "def __dir__():",
+        "    return sorted(set(globals()) | set(_SYMBOLS))",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def _import_time_us(module_name, path):
+    """Cumulative import time of a module in a fresh interpreter, or None if it fails to import."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(path), env.get("PYTHONPATH")]))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+                            cwd=str(path), env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    for line in result.stderr.splitlines():
+        if not line.startswith(IMPORTTIME_PREFIX):
+            continue
+        fields = line[len(IMPORTTIME_PREFIX):].split("|")
+        if len(fields) == 3 and fields[2].strip() == module_name:
+            return int(fields[1])
+    return None
+
+
+def benchmark_import_time(src_file, dest_file, runs=5):
+    """
+    Compare the import time of an original module with its split version.
+
+    Each side is imported in a fresh interpreter with `-X importtime`, and
+    the best cumulative time over runs is kept, in microseconds.
+    """
+    module_name = os.path.splitext(os.path.basename(dest_file))[0]
+    results = {"module": module_name}
+    for label, path in (("original_us", os.path.dirname(os.path.abspath(src_file))),
+                        ("split_us", os.path.dirname(os.path.abspath(dest_file)))):
+        # The first run compiles bytecode, so it is not timed
+        _import_time_us(module_name, path)
+        times = [_import_time_us(module_name, path) for _ in range(runs)]
+        times = [t for t in times if t is not None]
+        results[label] = min(times) if times else None
+
+    if results["original_us"] and results["split_us"]:
+        results["speedup"] = results["original_us"] / results["split_us"]
+    else:
+        results["speedup"] = None
+    return results
+
+
 class FractalSplitter:
     """Splits code into a fractal structure."""
     
@@ -150,7 +374,7 @@ class FractalSplitter:
         self.max_depth = max_depth
         
     def split_directory(self, src_dir, dest_dir):
-        """Split a directory into a fractal structure."""
+        """Split a directory into a fractal structure; returns the (source, proxy) pairs that were split."""
         src_dir = Path(src_dir)
         dest_dir = Path(dest_dir)
         
@@ -165,6 +389,7 @@ class FractalSplitter:
                     python_files.append(os.path.join(root, file))
         
         # Process each file
+        split_files = []
         for file_path in python_files:
             rel_path = os.path.relpath(file_path, src_dir)
             dest_path = dest_dir / rel_path
@@ -173,154 +398,214 @@ class FractalSplitter:
             os.makedirs(os.path.dirname(dest_path), exist_ok=True)
             
             # Split the file
-            self.split_file(file_path, dest_path)
+            if self.split_file(file_path, dest_path):
+                split_files.append((file_path, str(dest_path)))
+        return split_files
+    
+    def _copy_file(self, content, dest_file):
+        """Write a file to the destination unchanged."""
+        os.makedirs(os.path.dirname(dest_file), exist_ok=True)
+        with open(dest_file, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return None
     
     def split_file(self, src_file, dest_file):
-        """Split a file into a fractal structure."""
+        """
+        Split a file into a fractal structure.
+
+        Each top-level function and class gets its own module that imports
+        only the names it actually uses; symbols that use each other share a
+        module, so the split never introduces an import cycle. Other top-level
+        statements go to a shared module. The package __init__ and the proxy
+        that replaces the original file load symbols on first access.
+        Returns the fractal package directory, or None if the file was copied.
+        """
         with open(src_file, 'r', encoding='utf-8') as f:
             content = f.read()
+        lines = content.splitlines()
             
         # Skip small files
-        if len(content.splitlines()) < MIN_SPLIT_SIZE:
-            # Just copy the file
-            os.makedirs(os.path.dirname(dest_file), exist_ok=True)
-            with open(dest_file, 'w', encoding='utf-8') as f:
-                f.write(content)
-            return
+        if len(lines) < MIN_SPLIT_SIZE:
+            return self._copy_file(content, dest_file)
             
         # Parse the file
         try:
             tree = ast.parse(content)
+            table = symtable.symtable(content, str(src_file), 'exec')
         except SyntaxError:
             # Just copy files with syntax errors
-            os.makedirs(os.path.dirname(dest_file), exist_ok=True)
-            with open(dest_file, 'w', encoding='utf-8') as f:
-                f.write(content)
-            return
-            
-        # Extract imports
-        imports = []
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
-                for name in node.names:
-                    import_str = f"import {name.name}"
-                    if name.asname:
-                        import_str += f" as {name.asname}"
-                    imports.append(import_str)
-            elif isinstance(node, ast.ImportFrom):
-                module = node.module or ""
-                for name in node.names:
-                    import_str = f"from {module} import {name.name}"
-                    if name.asname:
-                        import_str += f" as {name.asname}"
-                    imports.append(import_str)
-        
-        # Extract functions and classes
-        functions = {}
-        classes = {}
-        
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
-                # Get function source
-                func_lines = content.splitlines()[node.lineno-1:node.end_lineno]
-                func_source = "\n".join(func_lines)
-                
-                # Add to functions dictionary
-                functions[node.name] = {
-                    "source": func_source,
-                    "lines": node.end_lineno - node.lineno + 1
-                }
-            elif isinstance(node, ast.ClassDef):
-                # Get class source
-                class_lines = content.splitlines()[node.lineno-1:node.end_lineno]
-                class_source = "\n".join(class_lines)
-                
-                # Add to classes dictionary
-                classes[node.name] = {
-                    "source": class_source,
-                    "lines": node.end_lineno - node.lineno + 1
-                }
+            return self._copy_file(content, dest_file)
+        scopes = {(child.get_name(), child.get_lineno()): child for child in table.get_children()}
+        
+        body = tree.body[1:] if ast.get_docstring(tree) is not None else tree.body
+        defs = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+        
+        # Definitions rebound by other statements stay with those statements
+        shared_bound = set()
+        for node in body:
+            if not isinstance(node, defs + (ast.Import, ast.ImportFrom)) and not _is_main_guard(node):
+                shared_bound |= _bound_names(node)
+        
+        # Sort statements and record which import or unit binds each name last
+        future = []
+        star_imports = []
+        owners = {}
+        import_order = {}
+        symbols = {}
+        shared = []
+        main_blocks = []
+        for node in body:
+            if isinstance(node, ast.ImportFrom) and node.module == "__future__":
+                future.append(f"from __future__ import {', '.join(alias.name for alias in node.names)}")
+            elif isinstance(node, (ast.Import, ast.ImportFrom)):
+                for name, statements in _import_bindings(node).items():
+                    if name == '*':
+                        star_imports += statements
+                    else:
+                        import_order.update((statement, len(import_order)) for statement in statements
+                                            if statement not in import_order)
+                        previous = owners.get(name)
+                        owners[name] = (previous if isinstance(previous, list) else []) + statements
+            elif isinstance(node, defs) and node.name not in shared_bound:
+                if node.name in symbols:
+                    # An earlier definition of the same name is kept as a statement
+                    shared.append(symbols[node.name])
+                symbols[node.name] = node
+                owners[node.name] = node.name
+            elif _is_main_guard(node):
+                main_blocks.append(node)
+            else:
+                shared.append(node)
+                for name in _bound_names(node):
+                    owners[name] = SHARED_MODULE
         
         # Check if we need to split
-        if len(functions) + len(classes) <= self.max_functions:
+        if len(symbols) <= self.max_functions:
             # No need to split, just copy the file
-            os.makedirs(os.path.dirname(dest_file), exist_ok=True)
-            with open(dest_file, 'w', encoding='utf-8') as f:
-                f.write(content)
-            return
-            
+            return self._copy_file(content, dest_file)
+        
+        # Work out what each unit needs
+        needs = {}
+        for name, node in symbols.items():
+            scope = scopes.get((name, node.lineno))
+            if scope is None:
+                needs[name], rebound = _loaded_names([node]), set()
+            else:
+                needs[name], rebound = _symbol_free_names(node, scope)
+            if rebound:
+                # Rebinding module globals only works within one module
+                return self._copy_file(content, dest_file)
+            needs[name].discard(name)
+        units = list(symbols)
+        if shared:
+            units.append(SHARED_MODULE)
+            needs[SHARED_MODULE] = _loaded_names(shared)
+        edges = {unit: {owners[name] for name in needs[unit]
+                        if isinstance(owners.get(name), str) and owners[name] != unit}
+                 for unit in units}
+        
+        # Units that need each other go in one module
+        unit_module = {}
+        components = _strongly_connected(units, edges)
+        for component in components:
+            module = SHARED_MODULE if SHARED_MODULE in component else f"_{component[0]}"
+            for unit in component:
+                unit_module[unit] = module
+        
         # Create fractal structure
         base_name = os.path.splitext(os.path.basename(dest_file))[0]
         fractal_dir = os.path.join(os.path.dirname(dest_file), f"{base_name}_fractal")
         os.makedirs(fractal_dir, exist_ok=True)
         
-        # Create __init__.py to make it a package
-        init_path = os.path.join(fractal_dir, "__init__.py")
-        with open(init_path, 'w', encoding='utf-8') as f:
-            f.write(f'"""\nFractal package for {base_name}\n"""\n\n')
-            
-            # Add imports
-            for imp in imports:
-                f.write(f"{imp}\n")
+        for component in components:
+            module = unit_module[component[0]]
+            members = [unit for unit in component if unit != SHARED_MODULE]
+            nodes = list(shared) if SHARED_MODULE in component else []
+            nodes += [symbols[unit] for unit in members]
+            nodes.sort(key=lambda node: node.lineno)
             
-            f.write("\n")
+            imports = set()
+            siblings = {}
+            for unit in component:
+                for name in needs[unit]:
+                    owner = owners.get(name)
+                    if isinstance(owner, list):
+                        imports.update(owner)
+                    elif owner is not None and owner not in component:
+                        siblings.setdefault(unit_module[owner], []).append(name)
             
-            # Add imports for all functions and classes
-            for func_name in functions:
-                f.write(f"from .{func_name} import {func_name}\n")
+            if module == SHARED_MODULE:
+                title = f"Module-level statements from {base_name}"
+            elif len(members) == 1:
+                kind = "Class" if isinstance(symbols[members[0]], ast.ClassDef) else "Function"
+                title = f"{kind} {members[0]} from {base_name}"
+            else:
+                title = f"Symbols {', '.join(members)} from {base_name}"
             
-            for class_name in classes:
-                f.write(f"from .{class_name} import {class_name}\n")
-        
-        # Create a file for each function
-        for func_name, func_info in functions.items():
-            func_path = os.path.join(fractal_dir, f"{func_name}.py")
-            
-            with open(func_path, 'w', encoding='utf-8') as f:
-                f.write(f'"""\nFunction {func_name} from {base_name}\n"""\n\n')
-                
-                # Add imports
-                for imp in imports:
-                    f.write(f"{imp}\n")
-                
-                # Add imports for all other functions and classes
-                for other_func in functions:
-                    if other_func != func_name:
-                        f.write(f"from .{other_func} import {other_func}\n")
-                
-                for class_name in classes:
-                    f.write(f"from .{class_name} import {class_name}\n")
-                
-                f.write("\n")
-                f.write(func_info["source"])
+            module_path = os.path.join(fractal_dir, f"{module}.py")
+            with open(module_path, 'w', encoding='utf-8') as f:
+                f.write(f'"""\n{title}\n"""\n')
+                header = future + sorted(imports, key=import_order.get) + star_imports
+                header += [f"from .{sibling} import {', '.join(sorted(set(names)))}"
+                           for sibling, names in sorted(siblings.items())]
+                if header:
+                    f.write("\n" + "\n".join(header) + "\n")
+                previous = None
+                for node in nodes:
+                    start = min([node.lineno] + [d.lineno for d in getattr(node, 'decorator_list', [])])
+                    # Two blank lines around definitions, one between plain statements
+                    gap = "\n" if previous is not None and not isinstance(previous, defs) \
+                        and not isinstance(node, defs) else "\n\n"
+                    f.write(gap + "\n".join(lines[start - 1:node.end_lineno]) + "\n")
+                    previous = node
+        
+        # Export every symbol and every name the shared statements bind
+        exports = {}
+        for node in body:
+            if isinstance(node, defs) and symbols.get(node.name) is node:
+                exports[node.name] = unit_module[node.name]
+            elif node in shared:
+                for name in sorted(_bound_names(node)):
+                    if owners.get(name) == SHARED_MODULE and not name.startswith('__'):
+                        exports[name] = SHARED_MODULE
+        public_names = [name for name in exports if not name.startswith('_')]
+        for node in shared:
+            if isinstance(node, ast.Assign) and any(
+                    isinstance(target, ast.Name) and target.id == "__all__" for target in node.targets):
+                try:
+                    public_names = list(ast.literal_eval(node.value))
+                except ValueError:
+                    pass
         
-        # Create a file for each class
-        for class_name, class_info in classes.items():
-            class_path = os.path.join(fractal_dir, f"{class_name}.py")
-            
-            with open(class_path, 'w', encoding='utf-8') as f:
-                f.write(f'"""\nClass {class_name} from {base_name}\n"""\n\n')
-                
-                # Add imports
-                for imp in imports:
-                    f.write(f"{imp}\n")
-                
-                # Add imports for all functions
-                for func_name in functions:
-                    f.write(f"from .{func_name} import {func_name}\n")
-                
-                # Add imports for all other classes
-                for other_class in classes:
-                    if other_class != class_name:
-                        f.write(f"from .{other_class} import {other_class}\n")
-                
-                f.write("\n")
-                f.write(class_info["source"])
+        # Create __init__.py to make it a package
+        init_path = os.path.join(fractal_dir, "__init__.py")
+        with open(init_path, 'w', encoding='utf-8') as f:
+            f.write(render_lazy_init(base_name, exports, public_names))
         
-        # Create a proxy file that imports everything from the fractal package
+        # Create a proxy module that forwards to the fractal package
         with open(dest_file, 'w', encoding='utf-8') as f:
-            f.write(f'"""\nProxy module for {base_name}\n"""\n\n')
-            f.write(f"from {base_name}_fractal import *\n")
+            f.write(f'"""\nProxy module for {base_name}\n"""\n')
+            f.write(f"import {base_name}_fractal as _package\n\n")
+            f.write("__all__ = _package.__all__\n\n\n")
+            f.write("def __getattr__(name):\n    return getattr(_package, name)\n\n\n")
+            f.write("def __dir__():\n    return dir(_package)\n")
+            if main_blocks:
+                # Module-level code can't see __getattr__, so the script entry imports what it uses
+                used = _loaded_names(main_blocks)
+                entry = []
+                for name in sorted(used):
+                    owner = owners.get(name)
+                    if isinstance(owner, list):
+                        entry += [statement for statement in owner if statement not in entry]
+                    elif owner is not None:
+                        entry.append(f"from {base_name}_fractal import {name}")
+                if entry:
+                    f.write('\n\nif __name__ == "__main__":\n')
+                    f.write("".join(f"    {statement}\n" for statement in entry))
+                for node in main_blocks:
+                    f.write("\n\n" + "\n".join(lines[node.lineno - 1:node.end_lineno]) + "\n")
+        
+        return fractal_dir
 
 
 class FractalNavigator:
@@ -513,6 +798,7 @@ def main():
     parser.add_argument('--split', action='store_true', help='Split a directory into a fractal structure')
     parser.add_argument('--bubble', action='store_true', help='Bubble up code from a fractal structure')
     parser.add_argument('--index', action='store_true', help='Create an index of functions')
+    parser.add_argument('--benchmark', action='store_true', help='Compare import times of split files with the originals')
     parser.add_argument('--src', type=str, default='.', help='Source directory')
     parser.add_argument('--dest', type=str, default='fractal_output', help='Destination directory')
     parser.add_argument('--max-functions', type=int, default=MAX_FUNCTIONS_PER_FILE, help='Maximum functions per file')
@@ -530,9 +816,18 @@ def main():
         
     if args.split:
         splitter = FractalSplitter(args.max_functions, args.max_lines, args.max_depth)
-        splitter.split_directory(args.src, args.dest)
+        split_files = splitter.split_directory(args.src, args.dest)
         print(f"Split {args.src} into {args.dest}")
         
+        if args.benchmark:
+            for src_file, dest_file in split_files:
+                result = benchmark_import_time(src_file, dest_file)
+                if result["speedup"] is None:
+                    print(f"{result['module']}: could not import both versions")
+                else:
+                    print(f"{result['module']}: {result['original_us']} us -> {result['split_us']} us "
+                          f"({result['speedup']:.1f}x)")
+        
     if args.bubble:
         bubbler = FractalBubbler(args.dest)
         bubbler.bubble_up(args.dest, args.max_depth)
@@ -11,6 +11,10 @@ class GraphBuilderModule(Module):
         return super().can_process(data) and isinstance(data, list)
         
     def process(self, data, context=None):
-        output_path = context.get('output_path', 'function_graph.png') if context else 'function_graph.png'
-        build_function_graph(data)
+        # The graph goes into the context for on-demand rendering; an image is
+        # only written when the context asks for one
+        output_path = context.get('output_path') if context else None
+        graph = build_function_graph(data, output_file=output_path)
+        if context is not None:
+            context['call_graph'] = graph
         return data  # Pass through the functions
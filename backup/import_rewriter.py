@@ -0,0 +1,333 @@
+"""
+Import Rewriter
+This module rewrites import statements after modules have been moved:
+- Each file is tokenized once and only real import statements are touched,
+  so strings, comments and names that merely contain a module path are left alone
+- Module paths resolve through a dict of the mapping, longest mapped prefix
+  first, so the cost per import does not grow with the size of the mapping
+- All edits to a file are applied in one splice and written atomically
+- Files are rewritten on a process pool; dry runs return unified diffs instead
+"""
+import difflib
+import io
+import os
+import shutil
+import tempfile
+import tokenize
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Below this many files the pool startup costs more than it saves
+PARALLEL_THRESHOLD = 64
+# Files per worker task
+CHUNK_SIZE = 32
+
+_STATEMENT_START = {tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT}
+_SKIP = {tokenize.NL, tokenize.COMMENT}
+
+
+def module_name(path: str) -> str:
+    """'pkg/sub/mod.py', 'pkg/sub/__init__.py' or 'pkg.sub.mod' as a dotted module name."""
+    name = path.replace("\\", "/")
+    if name.endswith(".py"):
+        name = name[:-3]
+    if name.endswith("/__init__"):
+        name = name[:-len("/__init__")]
+    return name.strip("/").replace("/", ".")
+
+
+class ImportMapping:
+    """Old module names to new ones; submodules of a moved package move with it."""
+
+    def __init__(self, old_to_new: Dict[str, str]):
+        self.modules = {module_name(old): module_name(new) for old, new in old_to_new.items()}
+
+    def __len__(self) -> int:
+        return len(self.modules)
+
+    def resolve(self, name: str) -> Optional[str]:
+        """New name for a dotted module name, or None if it did not move."""
+        parts = name.split(".")
+        for i in range(len(parts), 0, -1):
+            new = self.modules.get(".".join(parts[:i]))
+            if new is not None:
+                return ".".join([new] + parts[i:]) if new != name else None
+        return None
+
+
+class _Tokens:
+    """Cursor over significant tokens, skipping comments and line continuations."""
+
+    def __init__(self, tokens: List[tokenize.TokenInfo], index: int):
+        self.tokens = tokens
+        self.index = index
+
+    def peek(self) -> tokenize.TokenInfo:
+        while self.tokens[self.index].type in _SKIP:
+            self.index += 1
+        return self.tokens[self.index]
+
+    def take(self) -> tokenize.TokenInfo:
+        token = self.peek()
+        self.index += 1
+        return token
+
+    def accept(self, string: str) -> bool:
+        if self.peek().string == string and self.peek().type in (tokenize.OP, tokenize.NAME):
+            self.index += 1
+            return True
+        return False
+
+    def dotted(self) -> Tuple[str, tuple, tuple]:
+        """A dotted name and its (row, col) start and end."""
+        first = self.take()
+        if first.type != tokenize.NAME:
+            raise SyntaxError("expected a module name")
+        parts, end = [first.string], first.end
+        while self.peek().string == ".":
+            self.take()
+            token = self.take()
+            parts.append(token.string)
+            end = token.end
+        return ".".join(parts), first.start, end
+
+
+def find_import_edits(source: str, mapping: ImportMapping) -> Tuple[List[Tuple[tuple, tuple, str]], List[str]]:
+    """
+    Locate import statements that refer to moved modules.
+
+    Returns (start, end, replacement) edits in (row, col) positions, and
+    warnings for imports that were rewritten but whose bound name changed
+    or that could not be rewritten.
+    """
+    tokens = list(tokenize.generate_tokens(io.StringIO(source).readline))
+    edits, warnings = [], []
+    at_start = True
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token.type in _STATEMENT_START or (token.type == tokenize.OP and token.string in (";", ":")):
+            at_start = True
+            i += 1
+            continue
+        if token.type in _SKIP or token.type == tokenize.ENCODING:
+            i += 1
+            continue
+        if at_start and token.type == tokenize.NAME and token.string in ("import", "from"):
+            cursor = _Tokens(tokens, i + 1)
+            try:
+                if token.string == "import":
+                    _import_edits(cursor, mapping, edits, warnings)
+                else:
+                    _from_edits(cursor, mapping, edits, warnings)
+            except (SyntaxError, IndexError):
+                warnings.append(f"line {token.start[0]}: could not parse import statement")
+            i = max(cursor.index, i + 1)
+        else:
+            i += 1
+        at_start = False
+    return edits, warnings
+
+
+def _import_edits(cursor: _Tokens, mapping: ImportMapping, edits: list, warnings: list) -> None:
+    """import a.b [as c], d ..."""
+    while True:
+        name, start, end = cursor.dotted()
+        aliased = cursor.accept("as")
+        if aliased:
+            cursor.take()
+        new = mapping.resolve(name)
+        if new is not None:
+            edits.append((start, end, new))
+            if not aliased and new.split(".")[0] != name.split(".")[0]:
+                warnings.append(f"line {start[0]}: 'import {name}' now binds '{new.split('.')[0]}'; "
+                                f"uses of '{name}' need updating")
+        if not cursor.accept(","):
+            return
+
+
+def _from_edits(cursor: _Tokens, mapping: ImportMapping, edits: list, warnings: list) -> None:
+    """from a.b import c [as d], ... (relative imports are left alone)"""
+    if cursor.peek().string in (".", "..."):
+        return
+    module, start, end = cursor.dotted()
+    if not cursor.accept("import"):
+        raise SyntaxError("expected 'import'")
+    parenthesized = cursor.accept("(")
+    names = []
+    while True:
+        token = cursor.take()
+        if token.string == "*" or token.type != tokenize.NAME:
+            break
+        names.append(token.string)
+        if cursor.accept("as"):
+            cursor.take()
+        if not cursor.accept(","):
+            break
+        if parenthesized and cursor.peek().string == ")":
+            break
+    if parenthesized:
+        cursor.accept(")")
+
+    new = mapping.resolve(module)
+    if new is not None:
+        edits.append((start, end, new))
+        return
+
+    # 'from pkg import mod' where the submodule itself moved
+    moved = {name: mapping.resolve(f"{module}.{name}") for name in names}
+    moved = {name: target for name, target in moved.items() if target is not None}
+    if not moved:
+        return
+    parents = {target.rpartition(".")[0] for target in moved.values()}
+    renamed = [name for name, target in moved.items() if target.rpartition(".")[2] != name]
+    if len(moved) == len(names) and len(parents) == 1 and not renamed and parents != {""}:
+        edits.append((start, end, parents.pop()))
+    else:
+        warnings.append(f"line {start[0]}: 'from {module} import {', '.join(names)}' "
+                        f"mixes moved and unmoved names; rewrite it by hand")
+
+
+def apply_edits(source: str, edits: List[Tuple[tuple, tuple, str]]) -> str:
+    """Apply (start, end, replacement) edits in one splice."""
+    if not edits:
+        return source
+    # Token rows count "\n" only; splitlines() also breaks on \f, \x1c-\x1e, \x85 and \u2028
+    line_starts = [0]
+    for line in source.split("\n"):
+        line_starts.append(line_starts[-1] + len(line) + 1)
+
+    def offset(position):
+        row, col = position
+        return line_starts[row - 1] + col
+
+    pieces, last = [], 0
+    for start, end, replacement in sorted(edits):
+        pieces.append(source[last:offset(start)])
+        pieces.append(replacement)
+        last = offset(end)
+    pieces.append(source[last:])
+    return "".join(pieces)
+
+
+def rewrite_source(source: str, mapping: ImportMapping) -> Tuple[str, int, List[str]]:
+    """Rewritten source, number of edits and warnings."""
+    edits, warnings = find_import_edits(source, mapping)
+    return apply_edits(source, edits), len(edits), warnings
+
+
+def write_atomic(file_path: str, content: str) -> None:
+    """Replace a file's content without ever leaving it half-written."""
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+        shutil.copymode(file_path, tmp_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def rewrite_file(file_path: str, mapping: ImportMapping, dry_run: bool = False) -> Dict[str, object]:
+    """
+    Rewrite the imports of one file.
+
+    Returns {'file', 'edits', 'warnings', 'diff', 'error'}; the diff is only
+    produced for dry runs.
+    """
+    result = {"file": file_path, "edits": 0, "warnings": [], "diff": None, "error": None}
+    try:
+        with open(file_path, "r", encoding="utf-8", newline="") as f:
+            source = f.read()
+        new_source, result["edits"], result["warnings"] = rewrite_source(source, mapping)
+    except (OSError, UnicodeDecodeError, SyntaxError, tokenize.TokenError) as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+
+    if result["edits"]:
+        if dry_run:
+            result["diff"] = "".join(difflib.unified_diff(
+                source.splitlines(keepends=True), new_source.splitlines(keepends=True),
+                fromfile=file_path, tofile=file_path))
+        else:
+            write_atomic(file_path, new_source)
+    return result
+
+
+_worker_mapping = None
+
+
+def _init_worker(mapping: ImportMapping) -> None:
+    # The mapping is sent to each worker once rather than with every chunk
+    global _worker_mapping
+    _worker_mapping = mapping
+
+
+def _rewrite_chunk(file_paths: List[str], dry_run: bool) -> List[Dict[str, object]]:
+    return [rewrite_file(file_path, _worker_mapping, dry_run) for file_path in file_paths]
+
+
+def rewrite_imports(file_paths: Iterable[str], old_to_new: Dict[str, str], dry_run: bool = False,
+                    max_workers: Optional[int] = None) -> List[Dict[str, object]]:
+    """Rewrite imports in many files, on a process pool for large batches."""
+    mapping = old_to_new if isinstance(old_to_new, ImportMapping) else ImportMapping(old_to_new)
+    file_paths = list(file_paths)
+    chunks = [file_paths[i:i + CHUNK_SIZE] for i in range(0, len(file_paths), CHUNK_SIZE)]
+
+    if max_workers == 1 or len(file_paths) < PARALLEL_THRESHOLD:
+        _init_worker(mapping)
+        return [result for chunk in chunks for result in _rewrite_chunk(chunk, dry_run)]
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(mapping,)) as executor:
+        return [result for chunk_results in executor.map(_rewrite_chunk, chunks, [dry_run] * len(chunks))
+                for result in chunk_results]
+
+
+def find_python_files(directory: str) -> List[str]:
+    """All Python files under directory."""
+    python_files = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if d not in ("__pycache__", ".git")]
+        python_files.extend(os.path.join(root, f) for f in files if f.endswith(".py"))
+    return python_files
+
+
+def main():
+    """Main entry point."""
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Rewrite imports after moving modules")
+    parser.add_argument("mapping", help="JSON file mapping old module paths to new ones")
+    parser.add_argument("paths", nargs="+", help="Files or directories to rewrite")
+    parser.add_argument("--dry-run", action="store_true", help="Print diffs instead of writing files")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes")
+    args = parser.parse_args()
+
+    with open(args.mapping, "r", encoding="utf-8") as f:
+        old_to_new = json.load(f)
+
+    files = []
+    for path in args.paths:
+        files.extend(find_python_files(path) if os.path.isdir(path) else [path])
+
+    results = rewrite_imports(files, old_to_new, dry_run=args.dry_run, max_workers=args.workers)
+    for result in results:
+        if result["diff"]:
+            print(result["diff"], end="")
+        for warning in result["warnings"]:
+            print(f"⚠️ {result['file']}: {warning}")
+        if result["error"]:
+            print(f"❌ {result['file']}: {result['error']}")
+
+    changed = sum(1 for r in results if r["edits"])
+    edits = sum(r["edits"] for r in results)
+    verb = "Would rewrite" if args.dry_run else "Rewrote"
+    print(f"{verb} {edits} imports in {changed} of {len(results)} files")
+
+
+if __name__ == "__main__":
+    main()
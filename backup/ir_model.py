@@ -8,11 +8,14 @@ import utils.import_utils
 
 
 
-def extract_ir_from_source(source_code, function_name=None):
-    """Extract IR model from Python source code."""
+def extract_ir_from_source(source_code, function_name=None, tree=None):
+    """Extract IR model from Python source code, reusing `tree` if it was already parsed."""
     try:
-        # Parse the source code
-        atok = asttokens.ASTTokens(source_code, parse=True)
+        # Parse the source code, or attach tokens to the shared tree
+        if tree is not None:
+            atok = asttokens.ASTTokens(source_code, tree=tree)
+        else:
+            atok = asttokens.ASTTokens(source_code, parse=True)
         tree = atok.tree
         
         # Find the target function
@@ -118,10 +121,10 @@ def _get_return_value(node):
         # Just return a string representation
         return str(node.__class__.__name__)
 
-def get_ir_model(source_code=None, function_name=None):
+def get_ir_model(source_code=None, function_name=None, tree=None):
     """Get the IR model, either from provided code or use the default example."""
     if source_code:
-        model = extract_ir_from_source(source_code, function_name)
+        model = extract_ir_from_source(source_code, function_name, tree)
         if model:
             return model
     
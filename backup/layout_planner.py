@@ -0,0 +1,382 @@
+"""
+Layout Planner
+This module groups directories by content without comparing every pair:
+- Each directory is a sparse, L2-normalized TF-IDF vector over its keywords,
+  the packages its files import and location tags (file extension, current
+  parent directory)
+- Features found in most directories are pruned, and an inverted index over
+  the rest means similarities are only computed between directories that
+  share a feature
+- Directories are merged by average-linkage agglomerative clustering with a
+  nearest-neighbor chain; the average cosine similarity of two clusters is the
+  dot product of their summed vectors divided by the product of their sizes,
+  and a merged cluster's dot products are the sums of its halves'
+- Groups are cut from the merge tree under a similarity threshold and a size cap
+- Common filename prefixes are counted with bisect over the sorted names
+- benchmark_layout times planning on synthetic trees of 1k to 100k files
+"""
+import math
+import os
+import random
+import re
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Minimum average similarity for two groups of directories to be merged
+MERGE_THRESHOLD = 0.3
+# Features in more than this share of directories carry no grouping signal
+MAX_DOCUMENT_FREQUENCY = 0.5
+
+MIN_PREFIX_LENGTH = 3
+# Prefixes shared by more than this share of the files do not split them
+MAX_PREFIX_SHARE = 0.8
+_PREFIX_SEPARATORS = re.compile(r'[_\-.]')
+
+SparseVector = Dict[int, float]
+# (first cluster, second cluster, similarity, merged cluster)
+Merge = Tuple[int, int, float, int]
+
+
+def file_features(file_path: str, file_data: Dict[str, Any]) -> List[str]:
+    """Feature names for one file: keywords, imported packages and location tags."""
+    features = ["ext:" + os.path.splitext(file_path)[1]]
+    parent = os.path.basename(os.path.dirname(file_path))
+    if parent:
+        features.append("dir:" + parent)
+    semantics = file_data.get(file_path, {}).get("semantics", {})
+    features.extend("kw:" + keyword for keyword in semantics.get("keywords", []))
+    for imp in semantics.get("imports", []):
+        if imp.get("module"):
+            features.append("imp:" + imp["module"].split(".")[0])
+    return features
+
+
+def directory_vectors(features: Sequence[Iterable[str]]) -> List[SparseVector]:
+    """
+    TF-IDF vectors for directories given the features of each.
+
+    Feature names are interned to ints; features in more than
+    MAX_DOCUMENT_FREQUENCY of the directories (and at least three) are dropped.
+    """
+    counts = [Counter(items) for items in features]
+    document_frequency = Counter()
+    for count in counts:
+        document_frequency.update(count.keys())
+
+    total = len(counts)
+    max_frequency = max(2, MAX_DOCUMENT_FREQUENCY * total)
+    feature_ids = {}
+    vectors = []
+    for count in counts:
+        vector = {}
+        for feature, tf in count.items():
+            df = document_frequency[feature]
+            if df > max_frequency:
+                continue
+            feature_id = feature_ids.setdefault(feature, len(feature_ids))
+            vector[feature_id] = (1.0 + math.log(tf)) * (1.0 + math.log(total / df))
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        vectors.append({f: w / norm for f, w in vector.items()} if norm else {})
+    return vectors
+
+
+def cluster_vectors(vectors: Sequence[SparseVector], threshold: float = MERGE_THRESHOLD,
+                    max_size: Optional[int] = None) -> List[Merge]:
+    """
+    Average-linkage clustering with a nearest-neighbor chain.
+
+    Clusters 0..n-1 are the input vectors; each merge creates the next
+    cluster id. Merging stops for a cluster once nothing is at least
+    threshold-similar to it, so the result is a forest. Average linkage is
+    reducible, so without max_size sorting the merges by similarity gives the
+    same tree as always merging the globally closest pair. With max_size,
+    clusters only merge while their combined size fits, and full clusters
+    leave the index.
+
+    Dot products are computed from the inverted index once per cluster that
+    joins the chain and kept while it is on the chain; a merged cluster's are
+    the sum of its two halves', so large clusters are never rescanned.
+    """
+    sums = {i: dict(vector) for i, vector in enumerate(vectors)}
+    sizes = {i: 1 for i in sums}
+    # feature -> {cluster: summed weight}
+    postings = defaultdict(dict)
+    for i, vector in sums.items():
+        for feature, weight in vector.items():
+            postings[feature][i] = weight
+    # cluster -> {other cluster: dot product of their summed vectors}
+    dot_cache = {}
+
+    def dots_of(c: int) -> Dict[int, float]:
+        dots = dot_cache.get(c)
+        if dots is None:
+            dots = defaultdict(float)
+            for feature, weight in sums[c].items():
+                for d, other in postings[feature].items():
+                    dots[d] += weight * other
+            dots.pop(c, None)
+            dot_cache[c] = dots
+        return dots
+
+    def nearest(c: int, previous: Optional[int]) -> Tuple[Optional[int], float]:
+        size = sizes[c]
+        limit = None if max_size is None else max_size - size
+        best, best_similarity = None, threshold
+        previous_similarity = None
+        # Clusters have at least one member, so most small dot products can't reach the threshold
+        cutoff = threshold * size
+        for d, dot in [item for item in dots_of(c).items() if item[1] >= cutoff]:
+            other = sizes[d]
+            if limit is not None and other > limit:
+                continue
+            similarity = dot / (size * other)
+            if d == previous:
+                previous_similarity = similarity
+            if similarity > best_similarity or (similarity == best_similarity and (best is None or d < best)):
+                best, best_similarity = d, similarity
+        # On a tie the chain must return to where it came from
+        if previous_similarity is not None and previous_similarity >= best_similarity:
+            return previous, previous_similarity
+        return best, best_similarity
+
+    def retire(c: int) -> None:
+        for feature in sums.pop(c):
+            del postings[feature][c]
+        dot_cache.pop(c, None)
+        for dots in dot_cache.values():
+            dots.pop(c, None)
+
+    merges = []
+    next_id = len(vectors)
+    # Merged clusters go back on the stack so they are revisited
+    pending = list(range(len(vectors) - 1, -1, -1))
+    chain = []
+    while True:
+        if not chain:
+            while pending and pending[-1] not in sums:
+                pending.pop()
+            if not pending:
+                break
+            chain.append(pending.pop())
+        c = chain[-1]
+        d, similarity = nearest(c, chain[-2] if len(chain) > 1 else None)
+        if d is None:
+            # Nothing close enough (or small enough) now or after any later merge
+            chain.pop()
+            retire(c)
+            continue
+        if len(chain) < 2 or d != chain[-2]:
+            chain.append(d)
+            continue
+
+        chain.pop()
+        chain.pop()
+        a, b = (c, d) if len(sums[c]) >= len(sums[d]) else (d, c)
+        merged = sums.pop(a)
+        for feature in merged:
+            postings[feature][next_id] = postings[feature].pop(a)
+        for feature, weight in sums.pop(b).items():
+            posting = postings[feature]
+            del posting[b]
+            merged[feature] = posting[next_id] = merged.get(feature, 0.0) + weight
+        sums[next_id] = merged
+        sizes[next_id] = sizes.pop(a) + sizes.pop(b)
+
+        first, second = dot_cache.pop(a), dot_cache.pop(b)
+        if len(first) < len(second):
+            first, second = second, first
+        for other, dot in second.items():
+            first[other] += dot
+        first.pop(a, None)
+        first.pop(b, None)
+        dot_cache[next_id] = first
+        for other, dots in dot_cache.items():
+            if other != next_id:
+                dot = dots.pop(a, 0.0) + dots.pop(b, 0.0)
+                if dot:
+                    dots[next_id] = dot
+
+        merges.append((min(c, d), max(c, d), similarity, next_id))
+        if max_size is not None and sizes[next_id] >= max_size:
+            retire(next_id)
+        else:
+            pending.append(next_id)
+        next_id += 1
+    return merges
+
+
+def cut_groups(count: int, merges: List[Merge], max_group_size: Optional[int] = None) -> List[List[int]]:
+    """
+    Groups of the input ids from a merge forest.
+
+    Merges are replayed from most to least similar; a merge that would make
+    a group larger than max_group_size blocks every merge above it, so each
+    group is a whole subtree. Groups are ordered by their smallest member.
+    """
+    members = {i: [i] for i in range(count)}
+    blocked = set()
+    for a, b, _, merged in sorted(merges, key=lambda m: (-m[2], m[3])):
+        if a in blocked or b in blocked or (
+                max_group_size is not None and len(members[a]) + len(members[b]) > max_group_size):
+            blocked.add(merged)
+            continue
+        members[merged] = members.pop(a) + members.pop(b)
+    return sorted(sorted(group) for group in members.values())
+
+
+def plan_directory_groups(features: Dict[str, Iterable[str]], max_group_size: Optional[int] = None,
+                          threshold: float = MERGE_THRESHOLD) -> List[List[str]]:
+    """Group directory names by the similarity of their features."""
+    names = list(features)
+    vectors = directory_vectors([features[name] for name in names])
+    merges = cluster_vectors(vectors, threshold, max_group_size)
+    return [[names[i] for i in group] for group in cut_groups(len(names), merges, max_group_size)]
+
+
+class SortedNames:
+    """File names kept sorted so the names sharing a prefix form one contiguous run."""
+
+    def __init__(self, names: Iterable[str]):
+        self.names = sorted(names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def count_prefix(self, prefix: str) -> int:
+        start = bisect_left(self.names, prefix)
+        end = bisect_left(self.names, prefix + "\U0010ffff", start)
+        return end - start
+
+
+def common_prefixes(names: Iterable[str], min_length: int = MIN_PREFIX_LENGTH,
+                    max_share: float = MAX_PREFIX_SHARE) -> List[str]:
+    """
+    Leading words (up to the first '_', '-' or '.') that at least two names
+    start with, but not more than max_share of them; longest first.
+    """
+    index = SortedNames(names)
+    candidates = {_PREFIX_SEPARATORS.split(name, 1)[0] for name in index.names}
+    prefixes = []
+    for prefix in candidates:
+        if len(prefix) >= min_length:
+            count = index.count_prefix(prefix)
+            if 2 <= count <= len(index) * max_share:
+                prefixes.append(prefix)
+    return sorted(prefixes, key=lambda p: (-len(p), p))
+
+
+def longest_prefix(name: str, prefixes: set, min_length: int = MIN_PREFIX_LENGTH) -> Optional[str]:
+    """The longest of prefixes that name starts with."""
+    for length in range(len(name), min_length - 1, -1):
+        if name[:length] in prefixes:
+            return name[:length]
+    return None
+
+
+def _synthetic_tree(file_count: int, files_per_directory: int = 10, seed: int = 0
+                    ) -> Tuple[Dict[str, List[str]], Dict[str, Any]]:
+    """Directories of files drawn from topics, each with its own keywords and imports."""
+    rng = random.Random(seed)
+    topic_count = max(4, file_count // 500)
+    vocabulary = [f"word{i}" for i in range(topic_count * 20)]
+    packages = [f"pkg{i}" for i in range(topic_count * 3)]
+    directories, file_data = {}, {}
+    for d in range(max(1, file_count // files_per_directory)):
+        topic = rng.randrange(topic_count)
+        words = vocabulary[topic * 20:(topic + 1) * 20]
+        imports = packages[topic * 3:(topic + 1) * 3] + ["os", "sys"]
+        files = []
+        for f in range(files_per_directory):
+            path = f"src/topic{topic}/dir{d}/{rng.choice(words)}_{f}.py"
+            file_data[path] = {"semantics": {
+                "keywords": rng.sample(words, 5) + rng.sample(vocabulary, 1),
+                "imports": [{"module": module} for module in rng.sample(imports, 3)],
+            }}
+            files.append(path)
+        directories[f"cluster_{d}"] = files
+    return directories, file_data
+
+
+def _pairwise_groups(features: Dict[str, Iterable[str]], threshold: float = MERGE_THRESHOLD) -> int:
+    """The all-pairs Jaccard comparison this planner replaces; returns the edge count."""
+    sets = [set(items) for items in features.values()]
+    edges = 0
+    for i, first in enumerate(sets):
+        for second in sets[i + 1:]:
+            if len(first & second) / max(1, len(first | second)) > threshold:
+                edges += 1
+    return edges
+
+
+def benchmark_layout(sizes: Sequence[int] = (1000, 10000, 100000), files_per_directory: int = 10,
+                     pairwise_limit: int = 2000) -> List[Dict[str, Any]]:
+    """
+    Time planning on synthetic trees of the given file counts.
+
+    Extracting the directory features is timed on its own; "total" covers
+    vectorizing, clustering and cutting groups. The all-pairs comparison of
+    the same features is timed as well up to pairwise_limit directories.
+    """
+    results = []
+    for file_count in sizes:
+        directories, file_data = _synthetic_tree(file_count, files_per_directory)
+        features_start = time.perf_counter()
+        features = {name: [feature for path in files for feature in file_features(path, file_data)]
+                    for name, files in directories.items()}
+        # Both the planner and the pairwise comparison start from these features
+        start = time.perf_counter()
+        vectors = directory_vectors(list(features.values()))
+        vectorized = time.perf_counter()
+        merges = cluster_vectors(vectors, max_size=20)
+        clustered = time.perf_counter()
+        groups = cut_groups(len(vectors), merges, max_group_size=20)
+        done = time.perf_counter()
+
+        prefix_start = time.perf_counter()
+        common_prefixes(os.path.basename(path) for path in file_data)
+        prefix_time = time.perf_counter() - prefix_start
+
+        pairwise_time = None
+        if len(directories) <= pairwise_limit:
+            pairwise_start = time.perf_counter()
+            _pairwise_groups(features)
+            pairwise_time = time.perf_counter() - pairwise_start
+
+        results.append({
+            "files": file_count,
+            "directories": len(directories),
+            "groups": len(groups),
+            "features": start - features_start,
+            "vectorize": vectorized - start,
+            "cluster": clustered - vectorized,
+            "cut": done - clustered,
+            "total": done - start,
+            "prefixes": prefix_time,
+            "pairwise": pairwise_time,
+        })
+    return results
+
+
+def main():
+    """Main entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark directory layout planning")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated file counts")
+    parser.add_argument("--files-per-directory", type=int, default=10, help="Files in each synthetic directory")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    print(f"{'files':>8} {'dirs':>7} {'groups':>7} {'features':>9} {'vectors':>9} {'cluster':>9} {'total':>9} "
+          f"{'prefixes':>9} {'pairwise':>9}")
+    for result in benchmark_layout(sizes, args.files_per_directory):
+        pairwise = f"{result['pairwise']:.3f}s" if result["pairwise"] is not None else "-"
+        print(f"{result['files']:>8} {result['directories']:>7} {result['groups']:>7} "
+              f"{result['features']:>8.3f}s {result['vectorize']:>8.3f}s {result['cluster']:>8.3f}s "
+              f"{result['total']:>8.3f}s {result['prefixes']:>8.3f}s {pairwise:>9}")
+
+
+if __name__ == "__main__":
+    main()
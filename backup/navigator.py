@@ -4,67 +4,40 @@ Shadow Tree Generator
 Creates a natural language shadow tree that mirrors the code structure,
 allowing intuitive navigation through the fractal codebase.
 """
-# Fix imports for reorganized codebase
-import utils.import_utils
-
-
-# Fix imports for reorganized codebase
-
-
-
 import os
 import sys
-import core.ast
+import ast
 import re
-import nltk
+import hashlib
+import json
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Fix imports for reorganized codebase; nothing below depends on it
+try:
+    import utils.import_utils
+except ImportError:
+    pass
 
 # Add project root to path for imports
 project_root = os.path.dirname(os.path.abspath(__file__))
 if project_root not in sys.path:
     sys.path.append(project_root)
 
-# Import utility functions
-
-# Set NLTK data path to use local directory
-nltk.data.path.insert(0, './nltk_data')
-print(f"NLTK data path set to: {nltk.data.path}")
-
-# Try to download NLTK data if not already present
-try:
-    nltk.data.find('tokenizers/punkt')
-    print("NLTK punkt tokenizer found")
-except LookupError:
-    print("Downloading NLTK punkt tokenizer...")
-    nltk.download('punkt', download_dir='./nltk_data', quiet=True)
-    print("Downloaded NLTK punkt tokenizer successfully")
-    
-try:
-    nltk.data.find('corpora/wordnet')
-    print("NLTK WordNet found")
-except LookupError:
-    print("Downloading NLTK WordNet...")
-    nltk.download('wordnet', download_dir='./nltk_data', quiet=True)
-    print("Downloaded NLTK WordNet successfully")
-
-try:
-    from nltk.tokenize import word_tokenize
-    from nltk.corpus import wordnet
-    from nltk.stem import WordNetLemmatizer
-    print("NLTK components imported successfully")
-except Exception as e:
-    print(f"Error importing NLTK components: {str(e)}")
-    # Provide fallback implementations if NLTK fails
-    def word_tokenize(text):
-        return text.lower().split()
-    
-    class WordNetLemmatizer:
-        def lemmatize(self, word):
-            return word
+from common_helpers import ensure_dir, write_file
+from json_utils import load_json, save_json
+from shadow_pack import PackedShadowTree, write_pack
+from shadow_search import open_index
+from string_utils import normalize_string
 
 # Constants
 MAX_SUMMARY_LENGTH = 100
 MAX_DESCRIPTION_LENGTH = 250
 BUBBLE_UP_LEVELS = 3  # Default number of levels to bubble up
+SEARCH_INDEX_FILE = "search_index.pkl"
+PACK_FILE = "shadow_tree.pack"
+NLTK_DATA_DIR = './nltk_data'
 
 class ShadowNode:
     """A node in the shadow tree."""
@@ -85,8 +58,19 @@ class ShadowNode:
         self.children.append(child)
         child.parent = self
         
-    def to_dict(self):
-        """Convert the node to a dictionary."""
+    def find_child(self, name):
+        """Find a child by exact name."""
+        for child in self.children:
+            if child.name == name:
+                return child
+        return None
+        
+    def to_dict(self, depth=None):
+        """Convert the node to a dictionary; below depth, children are listed by name."""
+        if depth is not None and depth <= 0:
+            children = [child.name for child in self.children]
+        else:
+            children = [child.to_dict(None if depth is None else depth - 1) for child in self.children]
         return {
             "name": self.name,
             "path": str(self.path),
@@ -95,27 +79,222 @@ class ShadowNode:
             "summary": self.summary,
             "description": self.description,
             "keywords": self.keywords,
-            "children": [child.to_dict() for child in self.children]
+            "children": children
         }
         
     def __str__(self):
         return f"ShadowNode({self.name}, level={self.level}, children={len(self.children)})"
 
 
+# Shadow tree manifest: per-file hashes and node data from the last generation
+MANIFEST_FILE = "shadow_manifest.json"
+MANIFEST_SCHEMA = 1
+# Below this many changed files a process pool costs more than it saves
+PARALLEL_THRESHOLD = 32
+
+STOPWORDS = frozenset([
+    'the', 'a', 'an', 'and', 'or', 'but', 'is', 'are', 'was', 'were',
+    'in', 'on', 'at', 'to', 'for', 'with', 'by', 'about', 'as', 'of',
+    'from', 'into', 'during', 'until', 'while', 'throughout', 'through',
+    'this', 'that', 'these', 'those', 'it', 'its', 'they', 'them', 'their',
+    'he', 'him', 'his', 'she', 'her', 'hers', 'we', 'us', 'our', 'you', 'your'])
+
+# Per-process NLTK state, loaded once by _init_worker
+_nltk = None
+
+
+class _PlainLemmatizer:
+    """Stand-in used when NLTK or its WordNet data is unavailable."""
+
+    def lemmatize(self, word):
+        return word
+
+
+def _split_sentences(text):
+    return [sentence for sentence in re.split(r'(?<=[.!?])\s+', text) if sentence]
+
+
+def _init_worker():
+    """
+    Load NLTK and its data once per process, on first use rather than at import.
+
+    Without NLTK, or when its data can't be found or downloaded, text is split
+    on whitespace and sentence punctuation instead.
+    """
+    global _nltk
+    if _nltk is None:
+        try:
+            import nltk
+            from nltk.stem import WordNetLemmatizer
+            from nltk.tokenize import sent_tokenize, word_tokenize
+
+            # Set NLTK data path to use local directory
+            nltk.data.path.insert(0, NLTK_DATA_DIR)
+            for resource, package in (('tokenizers/punkt', 'punkt'), ('corpora/wordnet', 'wordnet')):
+                try:
+                    nltk.data.find(resource)
+                except LookupError:
+                    nltk.download(package, download_dir=NLTK_DATA_DIR, quiet=True)
+            lemmatizer = WordNetLemmatizer()
+            # WordNet and punkt are read lazily; fail here rather than per file
+            lemmatizer.lemmatize("warmup")
+            sent_tokenize("Warm up.")
+            _nltk = {'sent_tokenize': sent_tokenize, 'word_tokenize': word_tokenize, 'lemmatizer': lemmatizer}
+        except Exception as e:
+            print(f"NLTK unavailable, using plain text splitting: {str(e)}")
+            _nltk = {'sent_tokenize': _split_sentences, 'word_tokenize': str.split,
+                     'lemmatizer': _PlainLemmatizer()}
+    return _nltk
+
+
+def make_readable(name):
+    """Convert a code name to a readable string."""
+    # Split by underscores and camelCase
+    words = re.findall(r'[A-Z]?[a-z]+|[A-Z]+(?=[A-Z]|$)', name.replace('_', ' '))
+    return ' '.join(word.lower() for word in words)
+
+
+def summarize_text(text):
+    """Summarize a text to a short description."""
+    # Remove newlines and extra spaces
+    text = re.sub(r'\s+', ' ', text).strip()
+    
+    # Get the first sentence or a truncated version
+    sentences = _init_worker()['sent_tokenize'](text)
+    if sentences:
+        summary = sentences[0]
+        if len(summary) > MAX_SUMMARY_LENGTH:
+            summary = summary[:MAX_SUMMARY_LENGTH] + "..."
+        return summary
+    
+    return ""
+
+
+def extract_keywords(content, lemmatizer):
+    """Extract the ten most frequent lemmatized keywords from content."""
+    if not content:
+        return []
+    
+    tokens = _init_worker()['word_tokenize'](normalize_string(content))
+    tokens = [t for t in tokens if t not in STOPWORDS and len(t) > 2]
+    
+    freq = {}
+    for token in tokens:
+        lemma = lemmatizer.lemmatize(token)
+        freq[lemma] = freq.get(lemma, 0) + 1
+    
+    keywords = sorted(freq.items(), key=lambda x: x[1], reverse=True)[:10]
+    return [k for k, v in keywords]
+
+
+def describe_source(content, file_name):
+    """Build a file node's summary, description and keywords from a single parse."""
+    nlp = _init_worker()
+    node_data = {'summary': "", 'description': "", 'keywords': []}
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError) as e:
+        print(f"    ⚠️ Error parsing {file_name}: {str(e)}")
+        tree = None
+    
+    docstring = ast.get_docstring(tree) if tree is not None else None
+    if docstring:
+        node_data['description'] = docstring.strip()
+        node_data['summary'] = summarize_text(docstring)
+    
+    if not node_data['summary']:
+        # Generate a summary from function and class names
+        names = [item.name for item in ast.walk(tree)
+                 if isinstance(item, (ast.FunctionDef, ast.ClassDef))] if tree is not None else []
+        if names:
+            readable_names = [make_readable(name) for name in names]
+            node_data['summary'] = f"Contains {', '.join(readable_names[:3])}"
+            if len(names) > 3:
+                node_data['summary'] += f" and {len(names) - 3} more"
+        else:
+            node_data['summary'] = f"Python module {make_readable(file_name.replace('.py', ''))}"
+    
+    node_data['keywords'] = extract_keywords(content, nlp['lemmatizer'])
+    return node_data
+
+
+def _describe_files(jobs):
+    """
+    Worker entry point: describe a chunk of (path, previous hash) jobs.
+
+    Each file is read and parsed once. Files whose content hash matches the
+    previous generation come back with no node data, so the caller reuses it.
+    """
+    results = []
+    for path, previous_hash in jobs:
+        file_name = os.path.basename(path)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            print(f"Error processing file {path}: {str(e)}")
+            results.append((path, None, {'summary': f"Python module {file_name}", 'description': "", 'keywords': []}))
+            continue
+        file_hash = hashlib.blake2b(data, digest_size=16).hexdigest()
+        if file_hash == previous_hash:
+            results.append((path, file_hash, None))
+            continue
+        try:
+            node_data = describe_source(data.decode('utf-8', errors='replace'), file_name)
+        except Exception as e:
+            print(f"    ❌ Error generating description for {file_name}: {str(e)}")
+            node_data = {'summary': f"Python module {file_name}", 'description': "", 'keywords': []}
+        results.append((path, file_hash, node_data))
+    return results
+
+
+def render_node_markdown(node):
+    """Render a node's description as markdown."""
+    markdown = f"# {node.name}\n\n"
+    if node.summary:
+        markdown += f"{node.summary}\n\n"
+    if node.description:
+        markdown += f"{node.description}\n\n"
+    if node.keywords:
+        markdown += f"**Keywords**: {', '.join(node.keywords)}\n\n"
+    children = node.children
+    if children:
+        markdown += f"## Children\n\n"
+        for child in children:
+            markdown += f"- {child.name}\n"
+    return markdown
+
+
 class ShadowTreeGenerator:
     """Generates a natural language shadow tree from a code tree."""
     
-    def __init__(self):
+    def __init__(self, max_workers=None, export_files=True):
         self.root = None
-        self.lemmatizer = WordNetLemmatizer()
+        self.max_workers = max_workers
+        # Also write shadow_tree.json and a node.json/README.md per node; the pack is always written
+        self.export_files = export_files
         self.files_processed = 0
+        self.files_reused = 0
         self.dirs_processed = 0
+        # Manifest of the last generation: file entries and saved node fingerprints
+        self.manifest = {'files': {}, 'outputs': {}}
         
     def generate_from_directory(self, code_dir, output_dir=None):
-        """Generate a shadow tree from a code directory."""
+        """
+        Generate a shadow tree from a code directory.
+        
+        With an output directory, a manifest of file hashes is kept there, so
+        regenerating only re-analyzes files that changed and only rewrites
+        the node files whose content changed.
+        """
         code_dir = Path(code_dir)
         print(f"\n🌳 Generating Shadow Tree for {code_dir}")
         print(f"📂 Output directory: {output_dir}\n")
+        self.files_processed = 0
+        self.files_reused = 0
+        self.dirs_processed = 0
+        if output_dir:
+            self._load_manifest(Path(output_dir) / MANIFEST_FILE)
         
         # Create root node
         self.root = ShadowNode(code_dir.name, Path(output_dir) if output_dir else code_dir)
@@ -123,13 +302,14 @@ class ShadowTreeGenerator:
         
         # Process the directory
         print(f"\n📊 Processing directory structure...")
-        self._process_directory(code_dir, self.root)
-        print(f"✅ Processed {self.files_processed} files and {self.dirs_processed} directories")
+        file_nodes = []
+        self._process_directory(code_dir, self.root, file_nodes)
+        print(f"✅ Found {len(file_nodes)} files in {self.dirs_processed} directories")
         
         # Generate natural language descriptions
         print(f"\n🔍 Generating natural language descriptions...")
-        self._generate_descriptions(self.root)
-        print(f"✅ Generated descriptions for all nodes")
+        self._describe(code_dir, file_nodes)
+        print(f"✅ Described {self.files_processed} changed files, reused {self.files_reused} unchanged files")
         
         # Save the shadow tree
         if output_dir:
@@ -137,163 +317,113 @@ class ShadowTreeGenerator:
             output_dir = Path(output_dir)
             os.makedirs(output_dir, exist_ok=True)
             self._save_shadow_tree(output_dir)
+            self._save_manifest(output_dir / MANIFEST_FILE)
             print(f"✅ Shadow tree saved successfully")
         
         print(f"\n🎉 Shadow Tree generation complete!")
         return self.root
     
-    def _process_directory(self, directory, parent_node):
-        """Process a directory and add it to the shadow tree."""
+    def _process_directory(self, directory, parent_node, file_nodes):
+        """Add a directory's files and subdirectories to the shadow tree, listing it once."""
         self.dirs_processed += 1
-        print(f"  📁 Processing directory: {directory.name}")
-        
-        # Process Python files
-        for item in directory.iterdir():
-            if item.is_file() and item.name.endswith('.py') and not item.name.startswith('__'):
-                # Create a shadow node for the file
-                shadow_path = parent_node.path / item.name.replace('.py', '_shadow.md')
-                node = ShadowNode(item.name, shadow_path, item, parent_node)
+        try:
+            entries = sorted(os.scandir(directory), key=lambda entry: entry.name)
+        except OSError as e:
+            print(f"Error listing directory {directory}: {str(e)}")
+            return
+        
+        # Python files first, then subdirectories
+        for entry in entries:
+            if entry.name.endswith('.py') and not entry.name.startswith('__') and entry.is_file():
+                shadow_path = parent_node.path / entry.name.replace('.py', '_shadow.md')
+                node = ShadowNode(entry.name, shadow_path, Path(entry.path), parent_node)
                 parent_node.add_child(node)
-                
-                # Extract information from the file
-                self._process_file(item, node)
-                self.files_processed += 1
-                if self.files_processed % 10 == 0:
-                    print(f"    📄 Processed {self.files_processed} files so far...")
-        
-        # Process subdirectories
-        for item in directory.iterdir():
-            if item.is_dir() and not item.name.startswith('__'):
-                # Create a shadow node for the directory
-                shadow_path = parent_node.path / item.name
-                node = ShadowNode(item.name, shadow_path, item, parent_node)
+                file_nodes.append((node, entry))
+        
+        for entry in entries:
+            if not entry.name.startswith('__') and entry.is_dir():
+                shadow_path = parent_node.path / entry.name
+                node = ShadowNode(entry.name, shadow_path, Path(entry.path), parent_node)
                 parent_node.add_child(node)
-                
-                # Process the subdirectory
-                self._process_directory(item, node)
-    
-    def _process_file(self, file_path, node):
-        """Process a Python file and extract information."""
-        try:
-            # Read file using utility function
-            content = read_file(file_path, encoding='utf-8')
-                
-            # Extract docstring if present
-            tree = ast.parse(content)
-            docstring = ast.get_docstring(tree)
-            
-            if docstring:
-                node.description = docstring.strip()
-                node.summary = self._summarize_text(docstring)
-                
-            # Extract keywords from the content
-            node.keywords = self._extract_keywords(content)
-            
-            # Set the code path
-            node.code_path = file_path
-            
-            self.files_processed += 1
-        except Exception as e:
-            print(f"Error processing file {file_path}: {str(e)}")
+                self._process_directory(entry.path, node, file_nodes)
     
-    def _generate_descriptions(self, node):
-        """Generate natural language descriptions for nodes without docstrings."""
-        if not node.summary and node.code_path and node.code_path.is_file():
-            # Generate a summary based on the file content
+    def _describe(self, code_dir, file_nodes):
+        """Fill in file nodes, reusing manifest data for unchanged files."""
+        previous = self.manifest['files']
+        files = {}
+        pending = {}
+        jobs = []
+        
+        for node, entry in file_nodes:
+            rel_path = os.path.relpath(entry.path, code_dir)
             try:
-                print(f"  📝 Generating description for: {node.name}")
-                content = read_file(node.code_path, encoding='utf-8')
-                    
-                # Extract function and class names
-                names = []
-                try:
-                    tree = ast.parse(content)
-                    for item in ast.walk(tree):
-                        if isinstance(item, ast.FunctionDef):
-                            names.append(item.name)
-                        elif isinstance(item, ast.ClassDef):
-                            names.append(item.name)
-                except Exception as e:
-                    print(f"    ⚠️ Error parsing {node.name}: {str(e)}")
-                    
-                # Generate summary from names
-                if names:
-                    readable_names = [self._make_readable(name) for name in names]
-                    node.summary = f"Contains {', '.join(readable_names[:3])}"
-                    if len(names) > 3:
-                        node.summary += f" and {len(names) - 3} more"
-                    print(f"    ✨ Created summary with {len(names)} components")
-                else:
-                    # Fall back to filename
-                    node.summary = f"Python module {self._make_readable(node.name.replace('.py', ''))}"
-                    print(f"    📄 Created basic module summary")
-            except Exception as e:
-                print(f"    ❌ Error generating description for {node.name}: {str(e)}")
-                node.summary = f"Python module {node.name}"
-        
-        # Process children
-        for child in node.children:
-            self._generate_descriptions(child)
-    
-    def _summarize_text(self, text):
-        """Summarize a text to a short description."""
-        # Remove newlines and extra spaces
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        # Get the first sentence or a truncated version
-        sentences = nltk.sent_tokenize(text)
-        if sentences:
-            summary = sentences[0]
-            if len(summary) > MAX_SUMMARY_LENGTH:
-                summary = summary[:MAX_SUMMARY_LENGTH] + "..."
-            return summary
-        
-        return ""
-    
-    def _extract_keywords(self, content):
-        """Extract keywords from content."""
-        if not content:
-            return []
-            
-        # Clean the text using utility function
-        content = normalize_string(content)
-        
-        # Tokenize
-        tokens = word_tokenize(content)
-        
-        # Remove stopwords (common words)
-        stopwords = set(['the', 'a', 'an', 'and', 'or', 'but', 'is', 'are', 'was', 'were', 
-                         'in', 'on', 'at', 'to', 'for', 'with', 'by', 'about', 'as', 'of',
-                         'from', 'into', 'during', 'until', 'while', 'throughout', 'through',
-                         'this', 'that', 'these', 'those', 'it', 'its', 'they', 'them', 'their',
-                         'he', 'him', 'his', 'she', 'her', 'hers', 'we', 'us', 'our', 'you', 'your'])
-        tokens = [t for t in tokens if t not in stopwords and len(t) > 2]
-        
-        # Lemmatize (convert to base form)
-        lemmatized = [self.lemmatizer.lemmatize(t) for t in tokens]
-        
-        # Count frequencies
-        freq = {}
-        for token in lemmatized:
-            if token in freq:
-                freq[token] += 1
+                stat = entry.stat()
+            except OSError:
+                continue
+            old = previous.get(rel_path)
+            if old and old['mtime_ns'] == stat.st_mtime_ns and old['size'] == stat.st_size:
+                self._apply_node_data(node, old['node'])
+                files[rel_path] = old
+                self.files_reused += 1
             else:
-                freq[token] = 1
-                
-        # Get top keywords
-        keywords = sorted(freq.items(), key=lambda x: x[1], reverse=True)[:10]
-        return [k for k, v in keywords]
-    
-    def _make_readable(self, name):
-        """Convert a code name to a readable string."""
-        # Split by underscores and camelCase
-        words = re.findall(r'[A-Z]?[a-z]+|[A-Z]+(?=[A-Z]|$)', name.replace('_', ' '))
-        
-        # Capitalize first letter of each word
-        words = [word.lower() for word in words]
+                pending[entry.path] = (node, rel_path, stat, old)
+                jobs.append((entry.path, old['hash'] if old else None))
+        
+        for path, file_hash, node_data in self._run_jobs(jobs):
+            node, rel_path, stat, old = pending[path]
+            if node_data is None:
+                # Touched but not modified
+                node_data = old['node']
+                self.files_reused += 1
+            else:
+                self.files_processed += 1
+            self._apply_node_data(node, node_data)
+            files[rel_path] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size,
+                               'hash': file_hash, 'node': node_data}
         
-        # Join with spaces
-        return ' '.join(words)
+        self.manifest['files'] = files
+    
+    def _run_jobs(self, jobs):
+        """Describe files serially or on a process pool, one parse per file."""
+        if self.max_workers == 1 or len(jobs) < PARALLEL_THRESHOLD:
+            return _describe_files(jobs)
+        
+        workers = self.max_workers or os.cpu_count() or 1
+        chunk_size = max(1, len(jobs) // (workers * 4))
+        chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+        results = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            for chunk_results in executor.map(_describe_files, chunks):
+                results.extend(chunk_results)
+                print(f"    📄 Described {len(results)}/{len(jobs)} files...")
+        return results
+    
+    def _apply_node_data(self, node, node_data):
+        node.summary = node_data['summary']
+        node.description = node_data['description']
+        node.keywords = list(node_data['keywords'])
+    
+    def _load_manifest(self, manifest_path):
+        """Load the previous generation's manifest, if it matches the current schema."""
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        if manifest.get('schema') == MANIFEST_SCHEMA:
+            self.manifest = {'files': manifest.get('files', {}), 'outputs': manifest.get('outputs', {})}
+    
+    def _save_manifest(self, manifest_path):
+        """Write the manifest atomically."""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(manifest_path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'schema': MANIFEST_SCHEMA, **self.manifest}, f)
+            os.replace(tmp_path, manifest_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
     
     def _save_shadow_tree(self, output_dir):
         """Save the shadow tree to files."""
@@ -303,18 +433,25 @@ class ShadowTreeGenerator:
         output_dir = Path(output_dir)
         ensure_dir(output_dir)
         
+        # Save the packed tree the navigator reads
+        write_pack(self.root, str(output_dir / PACK_FILE))
+        
+        previous = self.manifest.get('outputs', {})
+        self.manifest['outputs'] = {}
+        if not self.export_files:
+            return
+        
         # Save the tree structure as JSON
         tree_json = self.root.to_dict()
         save_json(output_dir / "shadow_tree.json", tree_json)
             
-        # Save individual node files
-        self._save_node(self.root, output_dir)
+        # Save individual node files, skipping those unchanged since the last generation
+        written = self._save_node(self.root, output_dir, previous)
+        print(f"  📝 Wrote {written} changed node files")
     
-    def _save_node(self, node, base_dir):
-        """Save a node to a file."""
-        # Create node directory
+    def _save_node(self, node, base_dir, previous):
+        """Save a node and its children to files; returns the number of nodes written."""
         node_dir = base_dir / node.path
-        ensure_dir(node_dir)
         
         # Save node info
         node_info = {
@@ -328,37 +465,37 @@ class ShadowTreeGenerator:
             "children": [child.name for child in node.children]
         }
         
-        save_json(node_dir / "node.json", node_info)
-            
         # Save node description as markdown
-        markdown = f"# {node.name}\n\n"
-        if node.summary:
-            markdown += f"{node.summary}\n\n"
-        if node.description:
-            markdown += f"{node.description}\n\n"
-        if node.keywords:
-            markdown += f"**Keywords**: {', '.join(node.keywords)}\n\n"
-        if node.children:
-            markdown += f"## Children\n\n"
-            for child in node.children:
-                markdown += f"- {child.name}\n"
-                
-        write_file(node_dir / "README.md", markdown)
+        markdown = render_node_markdown(node)
+        
+        fingerprint = hashlib.blake2b((json.dumps(node_info, sort_keys=True) + markdown).encode('utf-8'),
+                                      digest_size=16).hexdigest()
+        key = str(node_dir)
+        self.manifest['outputs'][key] = fingerprint
+        written = 0
+        if previous.get(key) != fingerprint or not os.path.exists(node_dir / "README.md"):
+            ensure_dir(node_dir)
+            save_json(node_dir / "node.json", node_info)
+            write_file(node_dir / "README.md", markdown)
+            written = 1
             
         # Save children
         for child in node.children:
-            self._save_node(child, base_dir)
+            written += self._save_node(child, base_dir, previous)
+        return written
 
 
 class ShadowTreeNavigator:
     """Navigates the shadow tree."""
     
     def __init__(self, shadow_tree_path):
-        """Initialize with the path to the shadow tree JSON file."""
+        """Initialize with the path to the packed shadow tree (or a legacy JSON file)."""
         self.shadow_tree_path = Path(shadow_tree_path)
         self.tree = None
+        self.packed = None
         self.current_node = None
         self.history = [None]  # Initialize history with None
+        self._search_index = None
         self._load_tree()
         if self.tree:
             self.current_node = self.tree
@@ -366,12 +503,19 @@ class ShadowTreeNavigator:
         print(f"Shadow Tree Navigator initialized with root node: {self.tree.name if self.tree else None}")
         
     def _load_tree(self):
-        """Load the shadow tree from JSON."""
+        """Open the shadow tree; packed trees are memory-mapped and read lazily."""
         try:
             # Check if the file exists
             if not os.path.exists(self.shadow_tree_path):
                 print(f"Error: Shadow tree file not found at {self.shadow_tree_path}")
                 return False
+            
+            if self.shadow_tree_path.suffix != ".json":
+                self.packed = PackedShadowTree(str(self.shadow_tree_path))
+                self.tree = self.packed.root
+                self.current_node = self.tree
+                print(f"Opened packed shadow tree with {len(self.packed)} nodes")
+                return True
                 
             # Load the JSON file using utility function
             tree_dict = load_json(self.shadow_tree_path)
@@ -507,12 +651,11 @@ class ShadowTreeNavigator:
                 print(f"Cannot navigate further: Node {current.name} has no children")
                 return False
                 
-            for child in current.children:
-                if child.name == part:
-                    current = child
-                    found = True
-                    print(f"Found path component: {part}")
-                    break
+            child = current.find_child(part)
+            if child is not None:
+                current = child
+                found = True
+                print(f"Found path component: {part}")
             
             if not found:
                 print(f"Path component not found: {part}")
@@ -524,54 +667,52 @@ class ShadowTreeNavigator:
         print(f"Successfully navigated to: {current.name}")
         return True
 
-    def search(self, query):
-        """Search the shadow tree for nodes matching the query."""
+    @property
+    def search_index(self):
+        """The persisted search index for this tree, loaded on first use."""
+        if self._search_index is None:
+            index_path = self.shadow_tree_path.parent / SEARCH_INDEX_FILE
+            self._search_index = open_index(self.packed or self.tree, str(self.shadow_tree_path), str(index_path))
+        return self._search_index
+
+    def _resolve_key(self, key):
+        """Find the node for a search key (its name path from the root)."""
+        root_name, _, rest = key.partition("/")
+        if root_name != self.tree.name:
+            return None
+        node = self.tree
+        for name in rest.split("/") if rest else []:
+            node = node.find_child(name)
+            if node is None:
+                return None
+        return node
+
+    def search(self, query, limit=None):
+        """Search the shadow tree for nodes matching the query, ranked by BM25."""
+        if not self.tree:
+            return []
         results = []
-        
-        # Tokenize and lowercase the query
-        query_tokens = set(word_tokenize(query.lower()))
-        
-        # Search function
-        def search_node(node):
-            # Check if query matches node name
-            if query.lower() in node.name.lower():
-                results.append((node, 1.0))  # Perfect match in name
-                
-            # Check if query matches summary
-            elif query.lower() in node.summary.lower():
-                results.append((node, 0.8))  # Good match in summary
-                
-            # Check if query matches description
-            elif query.lower() in node.description.lower():
-                results.append((node, 0.6))  # Decent match in description
-                
-            # Check if query tokens match keywords
-            else:
-                keyword_tokens = set(node.keywords)
-                overlap = query_tokens.intersection(keyword_tokens)
-                if overlap:
-                    score = len(overlap) / len(query_tokens)
-                    results.append((node, score * 0.5))  # Partial match in keywords
-            
-            # Search children
-            for child in node.children:
-                search_node(child)
-        
-        # Start search from root
-        search_node(self.tree)
-        
-        # Sort by score
-        results.sort(key=lambda x: x[1], reverse=True)
-        
+        for key, score in self.search_index.search(query, limit):
+            node = self._resolve_key(key)
+            if node is not None:
+                results.append((node, score))
         return results
 
+    def complete(self, prefix, limit=10):
+        """Complete a partial search term."""
+        if not self.tree:
+            return []
+        return self.search_index.complete(prefix, limit)
+
     def get_current_view(self):
         """Get the current view of the shadow tree."""
+        # Views are shallow: nodes below the view list their children by name
+        parent = self.current_node.parent
         return {
-            "current": self.current_node.to_dict(),
-            "parent": self.current_node.parent.to_dict() if self.current_node.parent else None,
-            "children": [child.to_dict() for child in self.current_node.children],
-            "siblings": [child.to_dict() for child in self.current_node.parent.children] if self.current_node.parent else []
+            "current": self.current_node.to_dict(depth=1),
+            "parent": parent.to_dict(depth=0) if parent else None,
+            "children": [child.to_dict(depth=0) for child in self.current_node.children],
+            "siblings": [child.to_dict(depth=0) for child in parent.children] if parent else []
         }
     
     def get_bubble_up_view(self, levels=BUBBLE_UP_LEVELS):
@@ -599,7 +740,11 @@ class ShadowTreeNavigator:
         add_descendants(self.current_node, levels)
         
         # Convert to dictionaries
-        return [node.to_dict() for node in nodes]
+        return [node.to_dict(depth=0) for node in nodes]
+    
+    def get_markdown(self, node=None):
+        """Render a node (the current one by default) as markdown on demand."""
+        return render_node_markdown(node or self.current_node)
     
     def get_path_to_root(self):
         """Get the path from current node to root."""
@@ -780,8 +925,8 @@ class ShadowTreeAPI:
         # Create shadow directory if it doesn't exist
         os.makedirs(self.shadow_dir, exist_ok=True)
         
-        # Path to shadow tree JSON
-        self.shadow_tree_path = self.shadow_dir / "shadow_tree.json"
+        # Path to the packed shadow tree
+        self.shadow_tree_path = self.shadow_dir / PACK_FILE
         
         # Check if shadow tree exists
         if not self.shadow_tree_path.exists():
@@ -16,6 +16,7 @@ if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
 from ir_model import get_ir_model
+from decision_table import find_unreachable_rules
 
 def optimize_logic(ir_model=None):
     """Optimize logic using various techniques."""
@@ -38,13 +39,19 @@ def optimize_logic(ir_model=None):
     # 4. Merge similar branches
     merged_logic = merge_similar_branches(simplified_logic)
     
+    # 5. Prove which rules can never fire by enumerating the decision table
+    unreachable_rules = find_unreachable_rules(ir_model)
+    if unreachable_rules:
+        print(f"Found {len(unreachable_rules)} unreachable rules")
+    
     print("Optimization complete")
     return {
         'original': ir_model,
         'simplified': simplified_logic,
         'merged': merged_logic,
         'lookup_table': lookup_table,
-        'redundant_conditions': redundant_conditions
+        'redundant_conditions': redundant_conditions,
+        'unreachable_rules': unreachable_rules or []
     }
 
 def generate_lookup_table(ir_model):
@@ -0,0 +1,305 @@
+"""
+Pattern Database
+This module mines condition patterns from Python files in parallel and keeps
+them in a single versioned database:
+- Per-file results are cached by content hash, so unchanged files are never re-parsed
+- Files are mined across a process pool and merged deterministically in path order
+- Function patterns are keyed by file and qualified name, so same-named functions don't collide
+- Aggregate counts are updated incrementally and support top-k queries
+"""
+import ast
+import hashlib
+import json
+import os
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+SCHEMA_VERSION = 1
+
+# Below this many changed files the pool startup costs more than it saves
+PARALLEL_THRESHOLD = 16
+
+
+def serialize_condition(node: ast.AST) -> str:
+    """Serialize a condition node to a pattern string."""
+    try:
+        if isinstance(node, ast.Compare):
+            # Handle comparisons like a < b, a == b, etc.
+            left = node_type(node.left)
+            ops = [type(op).__name__ for op in node.ops]
+            comparators = [node_type(comp) for comp in node.comparators]
+            return f"{left}{''.join(f'{op}{comp}' for op, comp in zip(ops, comparators))}"
+
+        elif isinstance(node, ast.BoolOp):
+            # Handle boolean operations like and, or
+            op_name = type(node.op).__name__
+            values = [serialize_condition(val) for val in node.values]
+            return f"({op_name.join(values)})"
+
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            # Handle not operations
+            return f"Not({serialize_condition(node.operand)})"
+
+        else:
+            # Generic fallback
+            return type(node).__name__
+    except Exception:
+        return ""
+
+
+def node_type(node: ast.AST) -> str:
+    """Get a type descriptor for a node."""
+    if isinstance(node, ast.Name):
+        return f"Var({node.id})"
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if value is None or isinstance(value, bool):
+            return str(value)
+        if isinstance(value, (int, float, complex)):
+            return f"Num({type(value).__name__})"
+        if isinstance(value, str):
+            return "Str"
+    return type(node).__name__
+
+
+class _PatternVisitor(ast.NodeVisitor):
+    """Collect module-wide and per-function condition patterns in one traversal."""
+
+    def __init__(self):
+        self.patterns = Counter()
+        self.function_patterns = {}
+        self.scope = []
+        self.active = []
+
+    def _visit_scope(self, node: ast.AST, is_function: bool) -> None:
+        self.scope.append(node.name)
+        if is_function:
+            qualname = ".".join(self.scope)
+            counter = Counter()
+            self.active.append(counter)
+            self.generic_visit(node)
+            self.active.pop()
+            if counter:
+                self.function_patterns[qualname] = dict(counter)
+                # The enclosing function also sees the patterns of nested functions
+                if self.active:
+                    self.active[-1].update(counter)
+        else:
+            self.generic_visit(node)
+        self.scope.pop()
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        self._visit_scope(node, True)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        self._visit_scope(node, False)
+
+    def visit_If(self, node: ast.If) -> None:
+        pattern = serialize_condition(node.test)
+        if pattern:
+            self.patterns[pattern] += 1
+            if self.active:
+                self.active[-1][pattern] += 1
+        self.generic_visit(node)
+
+
+def extract_patterns(tree: ast.AST) -> Tuple[Counter, Dict[str, Dict[str, int]]]:
+    """Extract condition patterns from an AST: (module counts, per-function counts)."""
+    visitor = _PatternVisitor()
+    visitor.visit(tree)
+    return visitor.patterns, visitor.function_patterns
+
+
+def content_hash(data: bytes) -> str:
+    """Hash file contents for change detection."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def mine_source(data: bytes, file_hash: str = None) -> Dict[str, Any]:
+    """Mine patterns from the raw bytes of a Python file."""
+    record = {
+        'hash': file_hash or content_hash(data),
+        'patterns': {},
+        'function_patterns': {},
+        'error': None
+    }
+    try:
+        tree = ast.parse(data)
+    except (SyntaxError, ValueError) as e:
+        record['error'] = str(e)
+        return record
+    patterns, function_patterns = extract_patterns(tree)
+    record['patterns'] = dict(patterns)
+    record['function_patterns'] = function_patterns
+    return record
+
+
+def _mine_chunk(jobs: List[Tuple[str, str]]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Worker entry point: mine a chunk of (path, hash) jobs."""
+    results = []
+    for path, file_hash in jobs:
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            results.append((path, {'hash': file_hash, 'patterns': {}, 'function_patterns': {}, 'error': str(e)}))
+            continue
+        results.append((path, mine_source(data, file_hash)))
+    return results
+
+
+class PatternDatabase:
+    """A single versioned pattern database with per-file records."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.version = 0
+        self.files = {}
+        self.totals = Counter()
+        if os.path.exists(db_path):
+            self.load()
+
+    def load(self) -> None:
+        """Load the database from disk, discarding it if the schema changed."""
+        try:
+            with open(self.db_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        if data.get('schema') != SCHEMA_VERSION:
+            return
+        self.version = data.get('version', 0)
+        self.files = data.get('files', {})
+        self.totals = Counter(data.get('totals', {}))
+
+    def save(self) -> str:
+        """Write the database atomically and bump its version."""
+        self.version += 1
+        directory = os.path.dirname(os.path.abspath(self.db_path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({
+                    'schema': SCHEMA_VERSION,
+                    'version': self.version,
+                    'files': self.files,
+                    'totals': dict(sorted(self.totals.items()))
+                }, f)
+            os.replace(tmp_path, self.db_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return self.db_path
+
+    def _set_record(self, path: str, record: Optional[Dict[str, Any]]) -> None:
+        """Replace a file record, keeping the aggregate totals in step."""
+        old = self.files.pop(path, None)
+        if old:
+            self.totals.subtract(old['patterns'])
+            for pattern in old['patterns']:
+                if self.totals[pattern] <= 0:
+                    del self.totals[pattern]
+        if record is not None:
+            self.files[path] = record
+            self.totals.update(record['patterns'])
+
+    def update_directory(self, directory: str, max_workers: int = None) -> Dict[str, int]:
+        """
+        Bring the database up to date with a directory tree.
+
+        Files whose size and mtime are unchanged are skipped without reading;
+        files whose content hash is known are reused; only the rest are parsed,
+        across a process pool when there are enough of them.
+        """
+        stats = {'scanned': 0, 'unchanged': 0, 'reused': 0, 'mined': 0, 'removed': 0}
+        by_hash = {record['hash']: record for record in self.files.values()}
+        seen = set()
+        jobs = []
+
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for file in sorted(files):
+                if not file.endswith('.py'):
+                    continue
+                path = os.path.join(root, file)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                seen.add(path)
+                stats['scanned'] += 1
+
+                record = self.files.get(path)
+                if record and record.get('mtime_ns') == stat.st_mtime_ns and record.get('size') == stat.st_size:
+                    stats['unchanged'] += 1
+                    continue
+
+                with open(path, 'rb') as f:
+                    file_hash = content_hash(f.read())
+                cached = by_hash.get(file_hash)
+                if cached is not None:
+                    reused = dict(cached, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+                    self._set_record(path, reused)
+                    stats['reused'] += 1
+                else:
+                    jobs.append((path, file_hash, stat))
+
+        prefix = os.path.join(directory, '')
+        for path in [p for p in self.files if p.startswith(prefix) and p not in seen]:
+            self._set_record(path, None)
+            stats['removed'] += 1
+
+        for path, record, stat in self._mine(jobs, max_workers):
+            record['mtime_ns'] = stat.st_mtime_ns
+            record['size'] = stat.st_size
+            self._set_record(path, record)
+            stats['mined'] += 1
+
+        return stats
+
+    def _mine(self, jobs: List[tuple], max_workers: int = None):
+        """Mine jobs serially or on a process pool; results come back in path order."""
+        stat_by_path = {path: stat for path, _, stat in jobs}
+        work = [(path, file_hash) for path, file_hash, _ in jobs]
+
+        if max_workers == 1 or len(work) < PARALLEL_THRESHOLD:
+            results = _mine_chunk(work)
+        else:
+            workers = max_workers or os.cpu_count() or 1
+            chunk_size = max(1, len(work) // (workers * 4))
+            chunks = [work[i:i + chunk_size] for i in range(0, len(work), chunk_size)]
+            results = []
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # map preserves submission order, so merging is deterministic
+                for chunk_results in executor.map(_mine_chunk, chunks):
+                    results.extend(chunk_results)
+
+        for path, record in results:
+            yield path, record, stat_by_path[path]
+
+    def top_patterns(self, k: int = 10) -> List[Tuple[str, int]]:
+        """The k most frequent patterns, ties broken by pattern text."""
+        return sorted(self.totals.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+    def top_functions(self, pattern: str, k: int = 10) -> List[Tuple[str, int]]:
+        """The k functions that use a pattern most, as ("path::qualname", count)."""
+        matches = []
+        for path, record in self.files.items():
+            for qualname, counts in record['function_patterns'].items():
+                if pattern in counts:
+                    matches.append((f"{path}::{qualname}", counts[pattern]))
+        return sorted(matches, key=lambda item: (-item[1], item[0]))[:k]
+
+    def function_patterns(self) -> Dict[str, Dict[str, int]]:
+        """All per-function patterns keyed by "path::qualname"."""
+        return {
+            f"{path}::{qualname}": counts
+            for path, record in sorted(self.files.items())
+            for qualname, counts in record['function_patterns'].items()
+        }
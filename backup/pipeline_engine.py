@@ -0,0 +1,294 @@
+"""
+Pipeline Engine
+This module runs analysis pipelines as a DAG of stages:
+- Stages declare the artifacts they consume and produce
+- Artifacts are content-addressed: a stage's key is a hash of its name, version,
+  the source of its code and the digests of its inputs, so results are
+  memoized on disk by content and editing a stage invalidates its results
+- Stages whose inputs are ready run concurrently on a thread pool
+- Every run records per-stage timing and whether the result came from the cache
+"""
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import sys
+import sysconfig
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Code under these directories is identified by module name and the Python
+# version rather than hashed
+_LIBRARY_DIRS = tuple(sorted({os.path.join(os.path.realpath(sysconfig.get_paths()[name]), '')
+                              for name in ('stdlib', 'platstdlib', 'purelib', 'platlib')}))
+
+
+def digest_value(value: Any) -> str:
+    """Content digest for an input artifact."""
+    if isinstance(value, str):
+        data = value.encode('utf-8')
+    elif isinstance(value, bytes):
+        data = value
+    else:
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    return hashlib.sha256(data).hexdigest()
+
+
+def _source_file(obj: Any) -> Optional[str]:
+    try:
+        path = inspect.getsourcefile(obj)
+    except TypeError:
+        return None
+    return os.path.realpath(path) if path and os.path.exists(path) else None
+
+
+def _global_names(code) -> set:
+    """Global names used by a code object and the code nested in it."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _global_names(const)
+    return names
+
+
+def _is_code(value: Any) -> bool:
+    return (inspect.isfunction(value) or inspect.isbuiltin(value) or inspect.isclass(value)
+            or inspect.ismodule(value) or inspect.ismethod(value) or isinstance(value, functools.partial))
+
+
+def code_fingerprint(func: Callable) -> str:
+    """
+    Digest of the source files a stage function's code lives in.
+
+    Functions are followed through the functions, classes and modules they
+    refer to by global name or closure, so editing a helper in another file changes the
+    digest too. Library and builtin code counts by name and Python version.
+    """
+    h = hashlib.sha256(sys.version.encode('utf-8'))
+    files = set()
+    seen = set()
+    pending = [func]
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, functools.partial):
+            pending.append(obj.func)
+            h.update(repr((obj.args, sorted(obj.keywords.items()))).encode('utf-8'))
+            continue
+        obj = inspect.unwrap(obj)
+        if inspect.ismethod(obj):
+            obj = obj.__func__
+        path = _source_file(obj)
+        if path is None or path.startswith(_LIBRARY_DIRS):
+            name = getattr(obj, '__name__', type(obj).__name__)
+            h.update(f"{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', name)}".encode('utf-8'))
+            continue
+        files.add(path)
+        if inspect.isfunction(obj):
+            referenced = [obj.__globals__.get(name) for name in _global_names(obj.__code__)]
+            for cell in obj.__closure__ or ():
+                try:
+                    referenced.append(cell.cell_contents)
+                except ValueError:  # Not assigned yet
+                    pass
+            pending.extend(value for value in referenced if _is_code(value))
+    for path in sorted(files):
+        h.update(path.encode('utf-8'))
+        with open(path, 'rb') as f:
+            h.update(hashlib.sha256(f.read()).digest())
+    return h.hexdigest()
+
+
+class Stage:
+    """
+    A pipeline stage: a function from named input artifacts to named outputs.
+
+    The code is fingerprinted when the stage is created, so cached results
+    are not reused after the stage or the helpers it calls change. Bump
+    `version` for changes the fingerprint cannot see, such as data files.
+    """
+
+    def __init__(self, name: str, func: Callable, inputs: List[str], outputs: List[str],
+                 version: str = "1", cacheable: bool = True):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.version = version
+        self.cacheable = cacheable
+        self.code_version = code_fingerprint(func)
+
+    def key(self, input_digests: List[str]) -> str:
+        """Content address of this stage's result for the given inputs."""
+        h = hashlib.sha256(f"{self.name}:{self.version}:{self.code_version}".encode('utf-8'))
+        for digest in input_digests:
+            h.update(digest.encode('utf-8'))
+        return h.hexdigest()
+
+    def run(self, values: List[Any]) -> Tuple[Any, ...]:
+        """Run the stage and normalize its result to a tuple of outputs."""
+        result = self.func(*values)
+        if len(self.outputs) == 1:
+            return (result,)
+        return tuple(result)
+
+
+class ArtifactCache:
+    """On-disk memo table of stage results keyed by content address."""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pkl")
+
+    def get(self, key: str) -> Optional[Tuple[Any, ...]]:
+        try:
+            with open(self._path(key), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+
+    def put(self, key: str, outputs: Tuple[Any, ...]) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(outputs, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception:
+            # Unpicklable results are simply not memoized
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+class PipelineRun:
+    """Artifacts, digests and per-stage timings produced by one pipeline run."""
+
+    def __init__(self):
+        self.artifacts = {}
+        self.digests = {}
+        self.timings = {}
+        self.errors = {}
+
+    def __getitem__(self, name: str) -> Any:
+        return self.artifacts[name]
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self.artifacts.get(name, default)
+
+    def seed(self, names: List[str]) -> Dict[str, Tuple[Any, str]]:
+        """Export artifacts with their digests so another run can reuse them."""
+        return {name: (self.artifacts[name], self.digests[name]) for name in names if name in self.artifacts}
+
+
+class PipelineEngine:
+    """Schedule stages by their declared inputs and memoize their results."""
+
+    def __init__(self, stages: List[Stage], cache_dir: str = None, max_workers: int = 4):
+        self.stages = {stage.name: stage for stage in stages}
+        self.producers = {}
+        for stage in stages:
+            for output in stage.outputs:
+                if output in self.producers:
+                    raise ValueError(f"Artifact '{output}' is produced by more than one stage")
+                self.producers[output] = stage
+        self.cache = ArtifactCache(cache_dir) if cache_dir else None
+        self.max_workers = max_workers
+
+    def _required_stages(self, targets: List[str], available: set) -> List[Stage]:
+        """Stages needed to produce the targets from the available artifacts."""
+        needed = {}
+        pending = list(targets)
+        while pending:
+            artifact = pending.pop()
+            if artifact in available:
+                continue
+            stage = self.producers.get(artifact)
+            if stage is None:
+                raise KeyError(f"No stage produces artifact '{artifact}'")
+            if stage.name not in needed:
+                needed[stage.name] = stage
+                pending.extend(stage.inputs)
+        return list(needed.values())
+
+    def run(self, inputs: Dict[str, Any], targets: List[str] = None,
+            seed: Dict[str, Tuple[Any, str]] = None) -> PipelineRun:
+        """
+        Run the stages needed for `targets` (all outputs by default).
+
+        `inputs` are raw values that get digested; `seed` maps artifact names to
+        (value, digest) pairs taken from a previous run via PipelineRun.seed.
+        """
+        pipeline_run = PipelineRun()
+        for name, value in inputs.items():
+            pipeline_run.artifacts[name] = value
+            pipeline_run.digests[name] = digest_value(value)
+        for name, (value, digest) in (seed or {}).items():
+            pipeline_run.artifacts[name] = value
+            pipeline_run.digests[name] = digest
+
+        if targets is None:
+            targets = list(self.producers)
+        remaining = self._required_stages(targets, set(pipeline_run.artifacts))
+        failed = set()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            running = {}
+            while remaining or running:
+                progressed = True
+                while progressed:
+                    progressed = False
+                    for stage in list(remaining):
+                        if any(i in failed for i in stage.inputs):
+                            remaining.remove(stage)
+                            failed.update(stage.outputs)
+                            pipeline_run.errors[stage.name] = "skipped: an input stage failed"
+                            progressed = True
+                        elif all(i in pipeline_run.artifacts for i in stage.inputs):
+                            remaining.remove(stage)
+                            future = executor.submit(self._execute, stage, pipeline_run)
+                            running[future] = stage
+
+                if not running:
+                    break
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    try:
+                        outputs, digests = future.result()
+                    except Exception as e:
+                        failed.update(stage.outputs)
+                        pipeline_run.errors[stage.name] = f"{type(e).__name__}: {e}"
+                        continue
+                    for name, value, digest in zip(stage.outputs, outputs, digests):
+                        pipeline_run.artifacts[name] = value
+                        pipeline_run.digests[name] = digest
+
+        return pipeline_run
+
+    def _execute(self, stage: Stage, pipeline_run: PipelineRun) -> Tuple[Tuple[Any, ...], List[str]]:
+        """Run one stage, consulting the artifact cache first."""
+        key = stage.key([pipeline_run.digests[i] for i in stage.inputs])
+        digests = [hashlib.sha256(f"{key}:{output}".encode('utf-8')).hexdigest() for output in stage.outputs]
+
+        start_time = time.perf_counter()
+        if self.cache is not None and stage.cacheable:
+            cached = self.cache.get(key)
+            if cached is not None:
+                pipeline_run.timings[stage.name] = {'time': time.perf_counter() - start_time, 'cached': True}
+                return cached, digests
+
+        outputs = stage.run([pipeline_run.artifacts[i] for i in stage.inputs])
+        elapsed = time.perf_counter() - start_time
+        pipeline_run.timings[stage.name] = {'time': elapsed, 'cached': False}
+        if self.cache is not None and stage.cacheable:
+            self.cache.put(key, outputs)
+        return outputs, digests
@@ -0,0 +1,165 @@
+"""
+Playground Cache
+This module keeps the playground's expensive work alive across Streamlit reruns:
+- ResultCache: a bounded LRU of results keyed by code hash, function and options
+- JobRunner: runs long operations on a thread pool; the UI polls their progress
+  instead of blocking the script run, and finished results land in the cache
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# Results kept before the least recently used one is evicted
+RESULT_CACHE_SIZE = 64
+
+# Long operations that may run at once
+JOB_WORKERS = 2
+
+
+def result_key(source: str, function_name: str = "", options: Optional[Dict[str, Any]] = None) -> Tuple[str, str, str]:
+    """Build a cache key from the code's hash, the function and the options."""
+    digest = hashlib.blake2b((source or "").encode('utf-8'), digest_size=16).hexdigest()
+    return digest, function_name or "", json.dumps(options or {}, sort_keys=True, default=repr)
+
+
+class ResultCache:
+    """A thread-safe LRU cache with a bound on the number of entries."""
+
+    def __init__(self, max_entries: int = RESULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for key, computing and caching it on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+class Job:
+    """A long operation running on the pool, with progress the UI can poll."""
+
+    def __init__(self, key: Hashable):
+        self.key = key
+        self.status = "running"
+        self.progress = 0.0
+        self.message = "Queued"
+        self.result = None
+        self.error = None
+        self.started = time.time()
+        self.finished = None
+
+    @property
+    def done(self) -> bool:
+        return self.status != "running"
+
+    def report(self, progress: float, message: str = "") -> None:
+        """Called by the operation to publish how far it has got."""
+        self.progress = min(max(progress, 0.0), 1.0)
+        if message:
+            self.message = message
+
+
+class JobRunner:
+    """
+    Runs operations on a thread pool, one job per cache key.
+
+    Submitting a key that is already running or already cached starts
+    nothing. Operations are called with the Job as their first argument so
+    they can report progress.
+    """
+
+    def __init__(self, results: Optional[ResultCache] = None, max_workers: int = JOB_WORKERS):
+        self.results = results if results is not None else ResultCache()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="playground-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key: Hashable, operation: Callable[..., Any], *args, **kwargs) -> Job:
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and not job.done:
+                return job
+            job = Job(key)
+            if key in self.results:
+                job.result = self.results.get(key)
+                job.status, job.progress, job.finished = "done", 1.0, time.time()
+                return job
+            self._jobs[key] = job
+        self._executor.submit(self._run, job, operation, args, kwargs)
+        return job
+
+    def _run(self, job: Job, operation: Callable[..., Any], args: tuple, kwargs: dict) -> None:
+        job.message = "Running"
+        try:
+            job.result = operation(job, *args, **kwargs)
+            self.results.put(job.key, job.result)
+            job.status, job.progress = "done", 1.0
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = "error"
+        job.finished = time.time()
+
+    def get(self, key: Hashable) -> Optional[Job]:
+        """The job for key: running, failed, or finished with its result cached."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.status != "done":
+                return job
+            # Finished results are served from the cache, so eviction applies to them
+            self._jobs.pop(key, None)
+        if key not in self.results:
+            return None
+        job = Job(key)
+        job.result = self.results.get(key)
+        job.status, job.progress, job.finished = "done", 1.0, time.time()
+        return job
+
+    def running(self) -> int:
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.done)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
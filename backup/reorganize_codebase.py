@@ -25,6 +25,8 @@ project_root = os.path.dirname(os.path.abspath(__file__))
 if project_root not in sys.path:
     sys.path.append(project_root)
 
+from import_rewriter import ImportMapping, find_python_files, rewrite_file, rewrite_imports
+
 # Try to import our tools
 try:
     # Import the fractal organizer
@@ -255,31 +257,12 @@ def scan_and_classify_files(src_dir, target_base_dir, dry_run=False):
 
 def update_imports(file_path, old_to_new_mapping):
     """Update import statements in a file."""
-    with open(file_path, "r", encoding="utf-8") as f:
-        content = f.read()
-    
-    # Replace import statements
-    for old_path, new_path in old_to_new_mapping.items():
-        old_import = old_path.replace("/", ".").replace("\\", ".")
-        new_import = new_path.replace("/", ".").replace("\\", ".")
-        
-        # Replace "from old_import import" with "from new_import import"
-        content = re.sub(
-            r"from\s+(" + re.escape(old_import) + r")\s+import",
-            f"from {new_import} import",
-            content
-        )
-        
-        # Replace "import old_import" with "import new_import"
-        content = re.sub(
-            r"import\s+(" + re.escape(old_import) + r")\s+",
-            f"import {new_import} ",
-            content
-        )
-    
-    # Write the updated content
-    with open(file_path, "w", encoding="utf-8") as f:
-        f.write(content)
+    result = rewrite_file(file_path, ImportMapping(old_to_new_mapping))
+    for warning in result["warnings"]:
+        print(f"⚠️ {file_path}: {warning}")
+    if result["error"]:
+        print(f"❌ {file_path}: {result['error']}")
+    return result["edits"]
 
 def reorganize_codebase(dry_run=False):
     """Reorganize the codebase according to the plan."""
@@ -320,11 +303,14 @@ def reorganize_codebase(dry_run=False):
     # Update import statements
     if not dry_run:
         print("\n🔄 Updating import statements")
-        for root, dirs, files in os.walk(target_base_dir):
-            for file in files:
-                if file.endswith(".py"):
-                    file_path = os.path.join(root, file)
-                    update_imports(file_path, old_to_new_mapping)
+        results = rewrite_imports(find_python_files(target_base_dir), old_to_new_mapping)
+        for result in results:
+            for warning in result["warnings"]:
+                print(f"⚠️ {result['file']}: {warning}")
+            if result["error"]:
+                print(f"❌ {result['file']}: {result['error']}")
+        changed = sum(1 for result in results if result["edits"])
+        print(f"✅ Updated imports in {changed} of {len(results)} files")
     
     print("\n✅ Reorganization complete!")
     if dry_run:
@@ -0,0 +1,452 @@
+"""
+Resource Profiler
+This module derives numeric resource profiles for functions from their AST:
+- Loop nesting, recursion and sorting estimate CPU work
+- Allocation sites, weighted by whether they sit inside a loop, estimate memory
+- I/O, network, GPU and UI calls are recognized through the module's import aliases
+- The weight of the modules a function uses estimates its startup impact
+Profiles can optionally be calibrated by running argument-free functions in a
+sandboxed subprocess under tracemalloc, resource.getrusage and /proc syscall counters.
+Only functions that opt in are run: those decorated with @calibration_target or
+named in an explicit allowlist.
+"""
+import ast
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+PROFILE_KEYS = ('cpu', 'memory', 'gpu', 'network', 'startup', 'runtime')
+
+# Score at or above which a resource is a function's focus
+FOCUS_THRESHOLD = 0.5
+
+# Weight of measured values when calibrating a static profile
+CALIBRATION_WEIGHT = 0.5
+
+# Sandbox limits for calibration runs
+MEASURE_TIMEOUT = 10.0
+MEASURE_MEMORY_LIMIT = 1 << 30
+
+NETWORK_MODULES = {
+    'socket', 'ssl', 'http', 'urllib', 'urllib3', 'requests', 'httpx', 'aiohttp',
+    'ftplib', 'smtplib', 'websocket', 'websockets', 'grpc', 'paramiko',
+}
+GPU_MODULES = {'torch', 'cupy', 'tensorflow', 'jax', 'pycuda', 'cudf'}
+UI_MODULES = {
+    'tkinter', 'PyQt5', 'PyQt6', 'PySide2', 'PySide6', 'wx', 'curses', 'streamlit',
+    'kivy', 'pygame',
+}
+IO_MODULES = {'shutil', 'subprocess', 'sqlite3', 'glob', 'tempfile'}
+IO_BUILTINS = {'open', 'print', 'input'}
+IO_FUNCTIONS = {
+    'os.listdir', 'os.scandir', 'os.walk', 'os.remove', 'os.unlink', 'os.rename',
+    'os.replace', 'os.makedirs', 'os.mkdir', 'os.rmdir', 'os.stat', 'os.open',
+    'os.read', 'os.write', 'os.system', 'os.path.exists', 'os.path.isfile',
+    'os.path.isdir', 'os.path.getsize', 'json.load', 'json.dump', 'pickle.load',
+    'pickle.dump',
+}
+IO_METHODS = {
+    'read', 'write', 'readline', 'readlines', 'writelines', 'read_text', 'write_text',
+    'read_bytes', 'write_bytes', 'flush', 'recv', 'send', 'sendall', 'iterdir', 'glob',
+}
+ALLOCATING_CALLS = {
+    'list', 'dict', 'set', 'frozenset', 'tuple', 'bytearray', 'bytes', 'sorted',
+    'copy', 'deepcopy', 'zeros', 'ones', 'empty', 'array', 'DataFrame',
+}
+SORTING_CALLS = {'sorted', 'sort', 'nlargest', 'nsmallest', 'heapify'}
+
+# Relative import cost of common heavy modules; anything else counts as 1
+IMPORT_WEIGHTS = {
+    'numpy': 3, 'pandas': 5, 'scipy': 4, 'sklearn': 5, 'matplotlib': 4, 'torch': 8,
+    'tensorflow': 8, 'jax': 6, 'nltk': 3, 'networkx': 2, 'streamlit': 5, 'z3': 3,
+    'sympy': 4, 'requests': 2, 'jinja2': 1,
+}
+
+FEATURES = (
+    'statements', 'loops', 'max_loop_depth', 'recursive', 'sorts', 'allocations',
+    'loop_allocations', 'io_calls', 'network_calls', 'gpu_calls', 'ui_calls',
+    'local_imports', 'local_import_weight', 'import_weight',
+)
+
+
+def _saturate(value: float, scale: float) -> float:
+    """Map a non-negative amount onto [0, 1), reaching 0.63 at scale."""
+    return 1.0 - math.exp(-value / scale) if value > 0 else 0.0
+
+
+def _dotted_name(node: ast.AST) -> Optional[str]:
+    """The dotted name of a call target such as os.path.join, if it is one."""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return ".".join(reversed(parts))
+
+
+def import_aliases(tree: ast.AST) -> Dict[str, str]:
+    """Map names bound by module-level imports to the modules they refer to."""
+    aliases = {}
+    for node in getattr(tree, 'body', []):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname:
+                    aliases[alias.asname] = alias.name
+                else:
+                    root = alias.name.split('.')[0]
+                    aliases[root] = root
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            for alias in node.names:
+                aliases[alias.asname or alias.name] = f"{node.module}.{alias.name}"
+    return aliases
+
+
+def _import_weight(module: str) -> int:
+    return IMPORT_WEIGHTS.get(module.split('.')[0], 1)
+
+
+class _FeatureVisitor(ast.NodeVisitor):
+    """Collects resource features of one function body."""
+
+    def __init__(self, func_node: ast.AST, aliases: Dict[str, str]):
+        self.func_node = func_node
+        self.aliases = aliases
+        self.features = dict.fromkeys(FEATURES, 0)
+        self.used_modules = set()
+        self.loop_depth = 0
+
+    def run(self) -> Dict[str, int]:
+        for statement in self.func_node.body:
+            self.visit(statement)
+        self.features['import_weight'] = sum(_import_weight(m) for m in self.used_modules)
+        return self.features
+
+    def visit(self, node):
+        if isinstance(node, ast.stmt):
+            self.features['statements'] += 1
+        return super().visit(node)
+
+    def _allocation(self):
+        self.features['allocations'] += 1
+        if self.loop_depth:
+            self.features['loop_allocations'] += 1
+
+    def _enter_loops(self, count: int):
+        self.features['loops'] += count
+        self.loop_depth += count
+        self.features['max_loop_depth'] = max(self.features['max_loop_depth'], self.loop_depth)
+
+    def _loop(self, node):
+        self._enter_loops(1)
+        self.generic_visit(node)
+        self.loop_depth -= 1
+
+    visit_For = visit_AsyncFor = visit_While = _loop
+
+    def _comprehension(self, node):
+        if not isinstance(node, ast.GeneratorExp):
+            self._allocation()
+        self._enter_loops(len(node.generators))
+        self.generic_visit(node)
+        self.loop_depth -= len(node.generators)
+
+    visit_ListComp = visit_SetComp = visit_DictComp = visit_GeneratorExp = _comprehension
+
+    def _display(self, node):
+        self._allocation()
+        self.generic_visit(node)
+
+    visit_List = visit_Dict = visit_Set = _display
+
+    def visit_BinOp(self, node):
+        # [0] * n and "x" * n build new sequences
+        if isinstance(node.op, ast.Mult) and any(
+                isinstance(side, ast.List) or (isinstance(side, ast.Constant) and isinstance(side.value, (str, bytes)))
+                for side in (node.left, node.right)):
+            self._allocation()
+        self.generic_visit(node)
+
+    def _local_import(self, node):
+        self.features['local_imports'] += 1
+        if isinstance(node, ast.Import):
+            modules = [alias.name for alias in node.names]
+        else:
+            modules = [node.module or ""]
+        self.features['local_import_weight'] += sum(_import_weight(m) for m in modules)
+
+    visit_Import = visit_ImportFrom = _local_import
+
+    def visit_Name(self, node):
+        module = self.aliases.get(node.id)
+        if module is not None:
+            self.used_modules.add(module.split('.')[0])
+
+    def visit_Call(self, node):
+        name = _dotted_name(node.func)
+        if name is not None:
+            first, _, rest = name.partition('.')
+            resolved = self.aliases.get(first, first) + ('.' + rest if rest else '')
+            root = resolved.split('.')[0]
+            last = resolved.rsplit('.', 1)[-1]
+            func_name = getattr(self.func_node, 'name', None)
+            if name == func_name or name == f"self.{func_name}":
+                self.features['recursive'] = 1
+            if last in SORTING_CALLS:
+                self.features['sorts'] += 1
+            if last in ALLOCATING_CALLS:
+                self._allocation()
+            if root in NETWORK_MODULES:
+                self.features['network_calls'] += 1
+            elif root in GPU_MODULES:
+                self.features['gpu_calls'] += 1
+            elif root in UI_MODULES:
+                self.features['ui_calls'] += 1
+            elif (resolved in IO_BUILTINS or resolved in IO_FUNCTIONS or root in IO_MODULES
+                  or (isinstance(node.func, ast.Attribute) and node.func.attr in IO_METHODS)):
+                self.features['io_calls'] += 1
+        self.generic_visit(node)
+
+
+def extract_features(func_node: ast.AST, aliases: Optional[Dict[str, str]] = None) -> Dict[str, int]:
+    """Count the resource features of a function node."""
+    return _FeatureVisitor(func_node, aliases or {}).run()
+
+
+def score_features(features: Dict[str, int]) -> Dict[str, float]:
+    """Turn features into a profile of scores between 0 and 1."""
+    loop_work = features['loops'] * 2 ** max(features['max_loop_depth'] - 1, 0)
+    cpu_work = loop_work + 3 * features['recursive'] + features['sorts']
+    profile = {
+        'cpu': _saturate(cpu_work, 4),
+        'memory': _saturate(features['allocations'] + 3 * features['loop_allocations'], 8),
+        'gpu': _saturate(features['gpu_calls'], 1),
+        'network': _saturate(features['network_calls'], 1),
+        'startup': _saturate(features['import_weight'], 5),
+        'runtime': _saturate(cpu_work + 2 * features['io_calls'] + 4 * features['network_calls']
+                             + features['local_import_weight'], 6),
+    }
+    return {key: round(value, 3) for key, value in profile.items()}
+
+
+def resource_focus(profile: Dict[str, float], features: Dict[str, int]) -> str:
+    """The resource a function is most focused on; light glue code counts as core."""
+    if profile['gpu'] >= FOCUS_THRESHOLD:
+        return "gpu"
+    if profile['network'] >= FOCUS_THRESHOLD:
+        return "network"
+    if features['ui_calls']:
+        return "ui"
+    resource = max(('cpu', 'memory'), key=profile.get)
+    return resource if profile[resource] >= FOCUS_THRESHOLD else "core"
+
+
+def calibration_target(func: Callable) -> Callable:
+    """
+    Mark an argument-free function as safe to run when calibrating profiles.
+
+    The marker is found in the source, so profiling never imports a module
+    just to look for it.
+    """
+    func.__calibration_target__ = True
+    return func
+
+
+def _is_calibration_target(node: ast.AST) -> bool:
+    return any((_dotted_name(decorator) or "").rsplit('.', 1)[-1] == calibration_target.__name__
+               for decorator in node.decorator_list)
+
+
+def _can_measure(node: ast.AST) -> bool:
+    """Whether a function can be called without arguments and runs when called."""
+    if not isinstance(node, ast.FunctionDef):
+        return False
+    args = node.args
+    if len(args.defaults) < len(args.posonlyargs) + len(args.args):
+        return False
+    if any(default is None for default in args.kw_defaults):
+        return False
+    return not any(isinstance(sub, (ast.Yield, ast.YieldFrom)) for sub in ast.walk(node))
+
+
+# Executed in the sandbox: imports the module by path and measures each function
+_RUNNER = textwrap.dedent('''
+    import importlib.util, json, os, resource, sys, time, tracemalloc
+
+    def proc_io():
+        try:
+            with open("/proc/self/io") as f:
+                return {k: int(v) for k, v in (line.split(":") for line in f)}
+        except OSError:
+            return {}
+
+    file_path, names, result_path = sys.argv[1], json.loads(sys.argv[2]), sys.argv[3]
+    sys.path.insert(0, os.path.dirname(file_path))
+    sys.stdout = open(os.devnull, "w")
+    spec = importlib.util.spec_from_file_location("__profiled__", file_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    results = {}
+    tracemalloc.start()
+    for name in names:
+        func = getattr(module, name, None)
+        if not callable(func):
+            continue
+        tracemalloc.reset_peak()
+        base_memory = tracemalloc.get_traced_memory()[0]
+        io_before, usage_before, start = proc_io(), resource.getrusage(resource.RUSAGE_SELF), time.perf_counter()
+        try:
+            func()
+            error = None
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+        wall = time.perf_counter() - start
+        usage, io_after = resource.getrusage(resource.RUSAGE_SELF), proc_io()
+        results[name] = {
+            "wall_seconds": wall,
+            "cpu_seconds": (usage.ru_utime - usage_before.ru_utime) + (usage.ru_stime - usage_before.ru_stime),
+            "peak_memory": max(tracemalloc.get_traced_memory()[1] - base_memory, 0),
+            "context_switches": (usage.ru_nvcsw - usage_before.ru_nvcsw) + (usage.ru_nivcsw - usage_before.ru_nivcsw),
+            "read_syscalls": io_after.get("syscr", 0) - io_before.get("syscr", 0),
+            "write_syscalls": io_after.get("syscw", 0) - io_before.get("syscw", 0),
+            "error": error,
+        }
+    with open(result_path, "w") as f:
+        json.dump(results, f)
+''')
+
+
+def _limit_sandbox():
+    """Cap the CPU time and address space of the measuring process."""
+    import resource
+    cpu_limit = int(MEASURE_TIMEOUT) + 1
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_limit, cpu_limit))
+    resource.setrlimit(resource.RLIMIT_AS, (MEASURE_MEMORY_LIMIT, MEASURE_MEMORY_LIMIT))
+
+
+def measure_functions(file_path: str, names: List[str],
+                      timeout: float = MEASURE_TIMEOUT) -> Dict[str, Dict[str, Any]]:
+    """
+    Call argument-free functions of a file in a sandboxed subprocess.
+
+    The subprocess runs in a scratch working directory with capped CPU time and
+    memory. Returns measurements per function; empty if the module cannot be
+    imported, the run times out or the platform has no resource module.
+    Only use this on trusted code: the module is imported and the named
+    functions really run, with the caller's file system access.
+    """
+    if not names or os.name != 'posix':
+        return {}
+    with tempfile.TemporaryDirectory() as scratch:
+        result_path = os.path.join(scratch, "result.json")
+        try:
+            subprocess.run([sys.executable, "-I", "-c", _RUNNER, os.path.abspath(file_path),
+                            json.dumps(names), result_path],
+                           cwd=scratch, timeout=timeout, preexec_fn=_limit_sandbox,
+                           stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL)
+        except subprocess.TimeoutExpired:
+            return {}
+        try:
+            with open(result_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+
+def calibrate_profile(profile: Dict[str, float], measurement: Dict[str, Any]) -> Dict[str, float]:
+    """Blend measured CPU time, peak memory, wall time and syscalls into a static profile."""
+    syscalls = measurement['read_syscalls'] + measurement['write_syscalls']
+    measured = {
+        'cpu': _saturate(measurement['cpu_seconds'], 0.05),
+        'memory': _saturate(measurement['peak_memory'], 4 << 20),
+        'runtime': _saturate(measurement['wall_seconds'] + syscalls * 1e-4, 0.1),
+    }
+    calibrated = dict(profile)
+    for key, value in measured.items():
+        calibrated[key] = round((1 - CALIBRATION_WEIGHT) * profile[key] + CALIBRATION_WEIGHT * value, 3)
+    return calibrated
+
+
+def profile_functions(tree: ast.AST, file_path: Optional[str] = None,
+                      calibrate: Union[bool, Iterable[str]] = False) -> Dict[str, Dict[str, Any]]:
+    """
+    Profile every function in a parsed module.
+
+    Functions are keyed like code_mapper's FunctionVisitor: methods as
+    "Class.method", everything else by name. Each entry holds the 'lineno',
+    the raw 'features', the scored 'profile' and the 'focus'. With calibrate and a
+    file_path, argument-free top-level functions that opted in are also measured
+    and their entries gain a 'measured' record. Functions opt in with
+    @calibration_target; calibrate may also be a collection of function names
+    to measure. Other functions, such as main() or cleanup helpers, never run.
+    """
+    allowed = set() if isinstance(calibrate, bool) else set(calibrate)
+    aliases = import_aliases(tree)
+    results = {}
+    measurable = []
+
+    def visit(node, current_class, top_level):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.ClassDef):
+                visit(child, child.name, False)
+            elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                name = f"{current_class}.{child.name}" if current_class else child.name
+                features = extract_features(child, aliases)
+                profile = score_features(features)
+                results[name] = {
+                    'lineno': child.lineno,
+                    'features': features,
+                    'profile': profile,
+                    'focus': resource_focus(profile, features),
+                }
+                if (top_level and _can_measure(child)
+                        and (child.name in allowed or _is_calibration_target(child))):
+                    measurable.append(child.name)
+                visit(child, current_class, False)
+            else:
+                # Functions under module-level if/try blocks are still module attributes
+                visit(child, current_class, top_level)
+
+    visit(tree, None, True)
+
+    if calibrate and file_path and measurable:
+        for name, measurement in measure_functions(file_path, measurable).items():
+            entry = results[name]
+            entry['measured'] = measurement
+            if measurement.get('error') is None:
+                entry['profile'] = calibrate_profile(entry['profile'], measurement)
+                entry['focus'] = resource_focus(entry['profile'], entry['features'])
+    return results
+
+
+def profile_source(func_code: str) -> Optional[Dict[str, Any]]:
+    """Profile the first function in a source snippet, or the snippet itself if it has none."""
+    try:
+        tree = ast.parse(textwrap.dedent(func_code))
+    except SyntaxError:
+        return None
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            break
+    else:
+        node = tree
+    features = extract_features(node, import_aliases(tree))
+    profile = score_features(features)
+    return {'features': features, 'profile': profile, 'focus': resource_focus(profile, features)}
+
+
+def aggregate_profiles(profiles: List[Dict[str, float]], how: str = "mean") -> Dict[str, float]:
+    """Combine function profiles into one, by mean or by peak ("max") per resource."""
+    if not profiles:
+        return dict.fromkeys(PROFILE_KEYS, 0.0)
+    if how == "max":
+        return {key: max(profile[key] for profile in profiles) for key in PROFILE_KEYS}
+    return {key: round(sum(profile[key] for profile in profiles) / len(profiles), 3) for key in PROFILE_KEYS}
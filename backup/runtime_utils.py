@@ -9,9 +9,15 @@ import time
 import threading
 import json
 import hashlib
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Tuple
 # Fix imports for reorganized codebase
 import utils.import_utils
 
+from value_profiler import ValueProfile, is_pure_function, plan_fast_path
+from branch_reorderer import BranchProfile, make_site, reorder_file
+from pattern_db import PatternDatabase, extract_patterns, node_type, serialize_condition
+
 
 # Fix imports for reorganized codebase
 
@@ -26,6 +32,7 @@ class PatternMiner:
         self.patterns = defaultdict(int)
         self.function_patterns = {}
         os.makedirs(cache_dir, exist_ok=True)
+        self.database = PatternDatabase(os.path.join(cache_dir, "patterns.json"))
     
     def analyze_file(self, file_path: str) -> Dict[str, Any]:
         """Analyze a Python file for patterns."""
@@ -34,7 +41,7 @@ class PatternMiner:
                 source = f.read()
             
             tree = ast.parse(source)
-            file_patterns = self._extract_patterns(tree)
+            file_patterns = self._extract_patterns(tree, file_path)
             
             # Update global patterns
             for pattern, count in file_patterns.items():
@@ -45,20 +52,30 @@ class PatternMiner:
             print(f"Error analyzing {file_path}: {e}")
             return {}
     
-    def analyze_directory(self, directory: str) -> Dict[str, Any]:
-        """Analyze all Python files in a directory."""
-        results = {}
-        for root, _, files in os.walk(directory):
-            for file in files:
-                if file.endswith('.py'):
-                    file_path = os.path.join(root, file)
-                    results[file_path] = self.analyze_file(file_path)
+    def analyze_directory(self, directory: str, max_workers: int = None) -> Dict[str, Any]:
+        """
+        Analyze all Python files in a directory.
+        
+        Mining is incremental: only files whose content changed since the last
+        run are parsed, on a process pool, and merged into the pattern database.
+        """
+        stats = self.database.update_directory(directory, max_workers=max_workers)
+        self.patterns = defaultdict(int, self.database.totals)
+        self.function_patterns = self.database.function_patterns()
+        
+        prefix = os.path.join(directory, '')
+        results = {
+            path: record['patterns']
+            for path, record in sorted(self.database.files.items())
+            if path.startswith(prefix)
+        }
+        print(f"Mined {stats['mined']} files, reused {stats['reused'] + stats['unchanged']} cached results")
         return results
     
     def save_patterns(self, output_file: str = None) -> str:
-        """Save mined patterns to a file."""
+        """Save mined patterns to the versioned database, or export them to a file."""
         if output_file is None:
-            output_file = os.path.join(self.cache_dir, f"patterns_{int(time.time())}.json")
+            return self.database.save()
             
         with open(output_file, 'w') as f:
             json.dump({
@@ -74,73 +91,39 @@ class PatternMiner:
         with open(input_file, 'r') as f:
             data = json.load(f)
             
+        if 'files' in data:
+            # Versioned pattern database
+            self.database = PatternDatabase(input_file)
+            data = {
+                'patterns': dict(self.database.totals),
+                'function_patterns': self.database.function_patterns()
+            }
+            
         self.patterns = defaultdict(int, data.get('patterns', {}))
         self.function_patterns = data.get('function_patterns', {})
         return data
     
-    def _extract_patterns(self, tree: ast.AST) -> Dict[str, int]:
+    def top_patterns(self, k: int = 10) -> List[Tuple[str, int]]:
+        """Return the k most frequent patterns."""
+        return sorted(self.patterns.items(), key=lambda item: (-item[1], item[0]))[:k]
+    
+    def _extract_patterns(self, tree: ast.AST, file_path: str = "<unknown>") -> Dict[str, int]:
         """Extract patterns from an AST."""
-        patterns = Counter()
+        patterns, function_patterns = extract_patterns(tree)
         
-        # Extract condition patterns
-        for node in ast.walk(tree):
-            if isinstance(node, ast.If):
-                pattern = self._serialize_condition(node.test)
-                if pattern:
-                    patterns[pattern] += 1
-                    
-            elif isinstance(node, ast.FunctionDef):
-                # Store patterns by function
-                func_patterns = {}
-                for subnode in ast.walk(node):
-                    if isinstance(subnode, ast.If):
-                        pattern = self._serialize_condition(subnode.test)
-                        if pattern:
-                            func_patterns[pattern] = func_patterns.get(pattern, 0) + 1
-                
-                if func_patterns:
-                    self.function_patterns[node.name] = func_patterns
+        # Store patterns by function, qualified by file so same-named functions don't collide
+        for qualname, func_patterns in function_patterns.items():
+            self.function_patterns[f"{file_path}::{qualname}"] = func_patterns
         
         return patterns
     
     def _serialize_condition(self, node: ast.AST) -> str:
         """Serialize a condition node to a pattern string."""
-        try:
-            if isinstance(node, ast.Compare):
-                # Handle comparisons like a < b, a == b, etc.
-                left = self._get_node_type(node.left)
-                ops = [type(op).__name__ for op in node.ops]
-                comparators = [self._get_node_type(comp) for comp in node.comparators]
-                return f"{left}{''.join(f'{op}{comp}' for op, comp in zip(ops, comparators))}"
-                
-            elif isinstance(node, ast.BoolOp):
-                # Handle boolean operations like and, or
-                op_name = type(node.op).__name__
-                values = [self._serialize_condition(val) for val in node.values]
-                return f"({op_name.join(values)})"
-                
-            elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
-                # Handle not operations
-                return f"Not({self._serialize_condition(node.operand)})"
-                
-            else:
-                # Generic fallback
-                return type(node).__name__
-        except Exception:
-            return ""
+        return serialize_condition(node)
     
     def _get_node_type(self, node: ast.AST) -> str:
         """Get a type descriptor for a node."""
-        if isinstance(node, ast.Name):
-            return f"Var({node.id})"
-        elif isinstance(node, ast.Num):
-            return f"Num({type(node.n).__name__})"
-        elif isinstance(node, ast.Str):
-            return "Str"
-        elif isinstance(node, ast.NameConstant) and node.value in (True, False, None):
-            return str(node.value)
-        else:
-            return type(node).__name__
+        return node_type(node)
 
 class TokenInjector:
     """Injects optimization tokens into Python code."""
@@ -154,7 +137,8 @@ class TokenInjector:
         """Load patterns from a file."""
         with open(pattern_file, 'r') as f:
             data = json.load(f)
-        self.patterns = data.get('patterns', {})
+        # Accept both exported pattern files and the versioned pattern database
+        self.patterns = data.get('patterns', data.get('totals', {}))
     
     def inject_tokens(self, source_file: str, output_file: str = None) -> str:
         """Inject optimization tokens into a Python file."""
@@ -169,7 +153,7 @@ class TokenInjector:
         tree = ast.parse(source)
         
         # Modify the AST to add optimization tokens
-        transformer = self._OptimizationTransformer(self.patterns)
+        transformer = self._OptimizationTransformer(self.patterns, os.path.basename(source_file))
         optimized_tree = transformer.visit(tree)
         
         # Generate the optimized source code
@@ -193,21 +177,18 @@ class TokenInjector:
     class _OptimizationTransformer(ast.NodeTransformer):
         """AST transformer for adding optimization tokens."""
         
-        def __init__(self, patterns: Dict[str, int]):
+        def __init__(self, patterns: Dict[str, int], file_key: str = "<unknown>"):
             self.patterns = patterns
+            self.file_key = file_key
             
         def visit_FunctionDef(self, node: ast.FunctionDef) -> ast.FunctionDef:
             """Add optimization decorators to functions."""
             # Process the function body
             self.generic_visit(node)
             
-            # Add optimization decorator
+            # Add optimization decorator (optimize takes the function directly)
             node.decorator_list.append(
-                ast.Call(
-                    func=ast.Name(id='rtopt.optimize', ctx=ast.Load()),
-                    args=[],
-                    keywords=[]
-                )
+                ast.Name(id='rtopt.optimize', ctx=ast.Load())
             )
             
             return node
@@ -217,24 +198,42 @@ class TokenInjector:
             # Process the if statement body
             self.generic_visit(node)
             
-            # Wrap the test condition in an optimization hint
-            node.test = ast.Call(
+            # Wrap the test condition in an optimization hint tagged with its site
+            node.test = self._wrap_condition(node.test)
+            
+            return node
+            
+        def _wrap_condition(self, test: ast.AST) -> ast.AST:
+            """Wrap a condition, and each and/or operand inside it, in rtopt.condition."""
+            site = make_site(self.file_key, test)
+            if isinstance(test, ast.BoolOp):
+                test.values = [self._wrap_condition(value) for value in test.values]
+            elif isinstance(test, ast.UnaryOp) and isinstance(test.op, ast.Not):
+                test.operand = self._wrap_condition(test.operand)
+            
+            return ast.Call(
                 func=ast.Name(id='rtopt.condition', ctx=ast.Load()),
-                args=[node.test],
+                args=[test, ast.Constant(value=site)],
                 keywords=[]
             )
-            
-            return node
 
 # Runtime optimization utilities
 class AdaptiveAgent:
-    """Agent for adaptive runtime optimization."""
+    """
+    Agent for adaptive runtime optimization.
     
-    def __init__(self):
+    Per-function data is shared between the calling threads and the monitor
+    thread, so every access goes through `lock`.
+    """
+    
+    def __init__(self, min_calls: int = 100, max_deopts: int = 3):
         self.running = False
         self.thread = None
         self.optimized_functions = {}
         self.performance_metrics = defaultdict(list)
+        self.min_calls = min_calls
+        self.max_deopts = max_deopts
+        self.lock = threading.RLock()
         
     def start(self, daemon: bool = True) -> None:
         """Start the adaptive agent."""
@@ -254,47 +253,109 @@ class AdaptiveAgent:
         """Register a function for optimization."""
         func_name = func.__name__
         func_hash = self._hash_function(func)
+        pure = is_pure_function(func)
         
-        self.optimized_functions[func_name] = {
-            'function': func,
-            'hash': func_hash,
-            'metadata': metadata or {},
-            'calls': 0,
-            'total_time': 0,
-            'last_optimized': 0
-        }
+        with self.lock:
+            self.optimized_functions[func_name] = {
+                'function': func,
+                'hash': func_hash,
+                'metadata': metadata or {},
+                'calls': 0,
+                'total_time': 0,
+                'last_optimized': 0,
+                'pure': pure,
+                'profile': ValueProfile(),
+                'fast_path': None,
+                'retired_paths': [],
+                'deopts': 0
+            }
+        
+    def record_call(self, func_name: str, args: tuple, kwargs: dict, elapsed: float) -> None:
+        """Record a generic (unspecialized) call of a registered function."""
+        with self.lock:
+            data = self.optimized_functions[func_name]
+            data['calls'] += 1
+            data['total_time'] += elapsed
+            data['profile'].record(args, kwargs, elapsed)
         
     def _monitor_loop(self) -> None:
         """Background monitoring loop."""
         while self.running:
             # Check for functions that need optimization
             current_time = time.time()
-            for func_name, data in self.optimized_functions.items():
-                # Only optimize functions that have been called recently
-                if data['calls'] > 0 and current_time - data['last_optimized'] > 60:
-                    self._optimize_function(func_name)
-                    data['last_optimized'] = current_time
+            with self.lock:
+                for func_name, data in list(self.optimized_functions.items()):
+                    # Only optimize functions that have been called recently
+                    if data['calls'] > 0 and current_time - data['last_optimized'] > 60:
+                        self._optimize_function(func_name)
+                        data['last_optimized'] = current_time
                     
             # Sleep for a bit
             time.sleep(10)
             
     def _optimize_function(self, func_name: str) -> None:
-        """Optimize a function based on runtime metrics."""
-        if func_name not in self.optimized_functions:
-            return
+        """Install a guarded fast path for a function based on its value profile."""
+        with self.lock:
+            if func_name not in self.optimized_functions:
+                return
+                
+            data = self.optimized_functions[func_name]
+            if data['fast_path'] is not None or data['deopts'] >= self.max_deopts:
+                return
+            
+            # Calculate average execution time
+            avg_time = data['total_time'] / data['calls'] if data['calls'] > 0 else 0
+            self.performance_metrics[func_name].append(avg_time)
             
-        data = self.optimized_functions[func_name]
-        func = data['function']
+            fast_path = plan_fast_path(
+                data['function'],
+                data['profile'],
+                data['pure'],
+                on_deopt=lambda path, name=func_name: self._deoptimize_function(name, path),
+                min_calls=self.min_calls
+            )
+            if fast_path is None:
+                return
+            
+            # Reset metrics; the generic path only sees guard misses from now on
+            data['calls'] = 0
+            data['total_time'] = 0
+            data['fast_path'] = fast_path
         
-        # Calculate average execution time
-        avg_time = data['total_time'] / data['calls'] if data['calls'] > 0 else 0
+        # Log optimization
+        print(f"Optimizing {func_name} with {fast_path.kind} fast path (avg time: {avg_time:.6f}s)")
         
-        # Reset metrics
-        data['calls'] = 0
-        data['total_time'] = 0
+    def _deoptimize_function(self, func_name: str, fast_path) -> None:
+        """Remove a fast path whose guard failed and start profiling afresh."""
+        with self.lock:
+            data = self.optimized_functions.get(func_name)
+            if data is None or data['fast_path'] is not fast_path:
+                return
+            data['fast_path'] = None
+            data['retired_paths'].append(fast_path.report())
+            data['deopts'] += 1
+            data['profile'] = ValueProfile()
+        print(f"Deoptimizing {func_name}: argument distribution shifted")
         
-        # Log optimization
-        print(f"Optimizing {func_name} (avg time: {avg_time:.6f}s)")
+    def get_report(self) -> Dict[str, Any]:
+        """Report profiles, fast path hit rates and estimated time saved per function."""
+        report = {}
+        with self.lock:
+            for func_name, data in self.optimized_functions.items():
+                fast_path = data['fast_path']
+                paths = list(data['retired_paths'])
+                if fast_path is not None:
+                    paths.append(fast_path.report())
+                report[func_name] = {
+                    'pure': data['pure'],
+                    'profile': data['profile'].summary(),
+                    'fast_path': fast_path.report() if fast_path is not None else None,
+                    'deopts': data['deopts'],
+                    'hits': sum(p['hits'] for p in paths),
+                    'misses': sum(p['misses'] for p in paths),
+                    'time_saved': sum(p['time_saved'] for p in paths)
+                }
+        return report
         
     def _hash_function(self, func: Callable) -> str:
         """Generate a hash for a function."""
@@ -351,32 +412,37 @@ pattern_miner = PatternMiner()
 token_injector = TokenInjector()
 adaptive_agent = AdaptiveAgent()
 jit_router = JitRouter()
+branch_profile = BranchProfile()
 
 # Decorator for runtime optimization
 def optimize(func: Callable) -> Callable:
     """Decorator for runtime optimization."""
     def wrapper(*args, **kwargs):
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        end_time = time.time()
-        
         # Register with adaptive agent if not already
         if func.__name__ not in adaptive_agent.optimized_functions:
             adaptive_agent.register_function(func)
-            
+        
+        # Dispatch through an installed fast path; its guard handles misses
+        fast_path = adaptive_agent.optimized_functions[func.__name__]['fast_path']
+        if fast_path is not None:
+            return fast_path(*args, **kwargs)
+        
+        start_time = time.perf_counter()
+        result = func(*args, **kwargs)
+        end_time = time.perf_counter()
+        
         # Update metrics
-        data = adaptive_agent.optimized_functions[func.__name__]
-        data['calls'] += 1
-        data['total_time'] += (end_time - start_time)
+        adaptive_agent.record_call(func.__name__, args, kwargs, end_time - start_time)
         
         return result
     
     return wrapper
 
 # Function for optimizing conditions
-def condition(cond):
-    """Runtime optimization for conditions."""
-    # In a real implementation, this would do something useful
+def condition(cond, site=None):
+    """Runtime optimization for conditions: records taken/not-taken counts per site."""
+    if site is not None:
+        branch_profile.record(site, cond)
     return cond
 
 # Main functions that can be called from outside
@@ -390,9 +456,9 @@ def stop_runtime_optimization():
     adaptive_agent.stop()
     print("Runtime optimization system stopped")
     
-def mine_patterns_from_directory(directory: str, output_file: str = None) -> str:
+def mine_patterns_from_directory(directory: str, output_file: str = None, max_workers: int = None) -> str:
     """Mine patterns from a directory of Python files."""
-    pattern_miner.analyze_directory(directory)
+    pattern_miner.analyze_directory(directory, max_workers=max_workers)
     return pattern_miner.save_patterns(output_file)
     
 def optimize_file(input_file: str, output_file: str = None, pattern_file: str = None) -> str:
@@ -401,6 +467,27 @@ def optimize_file(input_file: str, output_file: str = None, pattern_file: str =
         token_injector.load_patterns(pattern_file)
     return token_injector.inject_tokens(input_file, output_file)
 
+def save_branch_profile(output_file: str) -> str:
+    """Save the branch profile collected by rtopt.condition."""
+    return branch_profile.save(output_file)
+    
+def reorder_branches_in_file(input_file: str, output_file: str = None, profile_file: str = None,
+                             inputs: Dict[str, List[tuple]] = None, number: int = 100) -> str:
+    """
+    Reorder branches in a Python file using a collected branch profile.
+    
+    Each function that would change is benchmarked on its argument tuples in
+    `inputs` (function name -> list of tuples) and only kept if it returns the
+    same results and is not slower; functions without inputs are left as is.
+    """
+    profile = BranchProfile.load(profile_file) if profile_file else branch_profile
+    output_file, changes, results = reorder_file(input_file, profile, inputs or {}, output_file, number=number)
+    for name, result in results.items():
+        if not result['kept']:
+            print(f"Kept the original branch order of {name}: {result['reason']}")
+    print(f"Reordered {len(changes)} branch sites in {input_file}")
+    return output_file
+
 # Integration with the module system
 def register_runtime_modules(registry):
     """Register runtime modules with the module registry."""
@@ -0,0 +1,281 @@
+"""
+Shadow Pack
+This module stores shadow trees in a compact packed file and reads them lazily:
+- A fixed-size node table, a child index array and a deduplicated string table
+- Nodes are laid out breadth-first, so every node's children are one contiguous run
+- The reader memory-maps the file and only decodes the header on open, so
+  opening is constant-time regardless of tree size
+- Nodes are materialized on first access and kept only while something references them
+"""
+import mmap
+import os
+import struct
+import tempfile
+import weakref
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+MAGIC = b"SHTP"
+FORMAT_VERSION = 1
+NONE = 0xFFFFFFFF
+
+# magic, version, node count, string count, then section offsets:
+# node table, child index array, string offsets, string data
+_HEADER = struct.Struct("<4sIII4Q")
+# name, path, code path, summary, description, keywords,
+# parent, level, first child position, child count
+_NODE = struct.Struct("<10I")
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+
+# Keywords are stored as one string
+_KEYWORD_SEPARATOR = "\n"
+
+
+def write_pack(root: Any, pack_path: str) -> str:
+    """Write a tree of ShadowNodes to a packed file atomically."""
+    strings = {}
+    string_list = []
+
+    def intern(value: Optional[str]) -> int:
+        if value is None:
+            return NONE
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(string_list)
+            string_list.append(value)
+        return index
+
+    # Breadth-first ids make each node's children a contiguous run
+    order = []
+    parents = []
+    queue = deque([(root, NONE)])
+    while queue:
+        node, parent_id = queue.popleft()
+        node_id = len(order)
+        order.append(node)
+        parents.append(parent_id)
+        for child in node.children:
+            queue.append((child, node_id))
+
+    node_table = bytearray()
+    children = bytearray()
+    next_child = 1
+    position = 0
+    for node_id, node in enumerate(order):
+        child_count = len(node.children)
+        node_table += _NODE.pack(
+            intern(node.name),
+            intern(str(node.path)),
+            intern(str(node.code_path)) if node.code_path else NONE,
+            intern(node.summary or ""),
+            intern(node.description or ""),
+            intern(_KEYWORD_SEPARATOR.join(node.keywords or ())),
+            parents[node_id],
+            node.level,
+            position,
+            child_count,
+        )
+        for offset in range(child_count):
+            children += _U32.pack(next_child + offset)
+        next_child += child_count
+        position += child_count
+
+    encoded = [s.encode('utf-8') for s in string_list]
+    string_offsets = bytearray()
+    offset = 0
+    for data in encoded:
+        string_offsets += _U64.pack(offset)
+        offset += len(data)
+    string_offsets += _U64.pack(offset)
+
+    nodes_offset = _HEADER.size
+    children_offset = nodes_offset + len(node_table)
+    offsets_offset = children_offset + len(children)
+    data_offset = offsets_offset + len(string_offsets)
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, len(order), len(string_list),
+                          nodes_offset, children_offset, offsets_offset, data_offset)
+
+    directory = os.path.dirname(os.path.abspath(pack_path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.write(node_table)
+            f.write(children)
+            f.write(string_offsets)
+            for data in encoded:
+                f.write(data)
+        os.replace(tmp_path, pack_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return pack_path
+
+
+class PackedNode:
+    """A shadow node read on demand from a packed tree; duck-types ShadowNode."""
+
+    __slots__ = ('tree', 'node_id', '_record', '__weakref__')
+
+    def __init__(self, tree: 'PackedShadowTree', node_id: int):
+        self.tree = tree
+        self.node_id = node_id
+        self._record = tree._record(node_id)
+
+    @property
+    def name(self) -> str:
+        return self.tree._string(self._record[0])
+
+    @property
+    def path(self) -> Path:
+        return Path(self.tree._string(self._record[1]))
+
+    @property
+    def code_path(self) -> Optional[Path]:
+        index = self._record[2]
+        return Path(self.tree._string(index)) if index != NONE else None
+
+    @property
+    def summary(self) -> str:
+        return self.tree._string(self._record[3])
+
+    @property
+    def description(self) -> str:
+        return self.tree._string(self._record[4])
+
+    @property
+    def keywords(self) -> List[str]:
+        joined = self.tree._string(self._record[5])
+        return joined.split(_KEYWORD_SEPARATOR) if joined else []
+
+    @property
+    def level(self) -> int:
+        return self._record[7]
+
+    @property
+    def parent(self) -> Optional['PackedNode']:
+        parent_id = self._record[6]
+        return self.tree.node(parent_id) if parent_id != NONE else None
+
+    @property
+    def child_count(self) -> int:
+        return self._record[9]
+
+    def child_ids(self) -> List[int]:
+        return self.tree._child_ids(self._record[8], self._record[9])
+
+    @property
+    def children(self) -> List['PackedNode']:
+        # Not cached on the node, so holding a node never pins its subtree
+        return [self.tree.node(child_id) for child_id in self.child_ids()]
+
+    def find_child(self, name: str) -> Optional['PackedNode']:
+        """Find a child by exact name, decoding only names."""
+        for child_id in self.child_ids():
+            if self.tree._string(self.tree._record(child_id)[0]) == name:
+                return self.tree.node(child_id)
+        return None
+
+    def to_dict(self, depth: Optional[int] = None) -> Dict[str, Any]:
+        """Convert the node to a dictionary; below depth, children are listed by name."""
+        if depth is not None and depth <= 0:
+            children = [self.tree._string(self.tree._record(c)[0]) for c in self.child_ids()]
+        else:
+            children = [child.to_dict(None if depth is None else depth - 1) for child in self.children]
+        code_path = self.code_path
+        return {
+            "name": self.name,
+            "path": str(self.path),
+            "code_path": str(code_path) if code_path else None,
+            "level": self.level,
+            "summary": self.summary,
+            "description": self.description,
+            "keywords": self.keywords,
+            "children": children
+        }
+
+    def __eq__(self, other):
+        return isinstance(other, PackedNode) and other.tree is self.tree and other.node_id == self.node_id
+
+    def __hash__(self):
+        return hash((id(self.tree), self.node_id))
+
+    def __str__(self):
+        return f"ShadowNode({self.name}, level={self.level}, children={self.child_count})"
+
+
+class PackedShadowTree:
+    """A memory-mapped packed shadow tree."""
+
+    def __init__(self, pack_path: str):
+        self.pack_path = pack_path
+        self._file = open(pack_path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Empty shadow pack: {pack_path}")
+        (magic, version, self.node_count, self.string_count, self._nodes_offset,
+         self._children_offset, self._offsets_offset, self._data_offset) = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Not a shadow pack (version {FORMAT_VERSION}): {pack_path}")
+        self._nodes = weakref.WeakValueDictionary()
+
+    def close(self) -> None:
+        self._mm.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return self.node_count
+
+    # Raw access
+
+    def _record(self, node_id: int) -> Tuple[int, ...]:
+        return _NODE.unpack_from(self._mm, self._nodes_offset + node_id * _NODE.size)
+
+    def _string(self, index: int) -> str:
+        start, end = struct.unpack_from("<2Q", self._mm, self._offsets_offset + index * 8)
+        return self._mm[self._data_offset + start:self._data_offset + end].decode('utf-8')
+
+    def _child_ids(self, position: int, count: int) -> List[int]:
+        if not count:
+            return []
+        return list(struct.unpack_from(f"<{count}I", self._mm, self._children_offset + position * 4))
+
+    # Nodes
+
+    def node(self, node_id: int) -> PackedNode:
+        """The node with an id, materialized if nothing holds it yet."""
+        node = self._nodes.get(node_id)
+        if node is None:
+            node = PackedNode(self, node_id)
+            self._nodes[node_id] = node
+        return node
+
+    @property
+    def root(self) -> PackedNode:
+        return self.node(0)
+
+    def resident_nodes(self) -> int:
+        """How many nodes are currently materialized."""
+        return len(self._nodes)
+
+    def iter_search_items(self) -> Iterator[Tuple[str, Dict[str, str]]]:
+        """Yield (name path, searchable fields) for every node without materializing nodes."""
+        keys = {NONE: None}
+        for node_id in range(self.node_count):
+            name, _, _, summary, description, keywords, parent_id = self._record(node_id)[:7]
+            parent_key = keys[parent_id]
+            key = self._string(name) if parent_key is None else f"{parent_key}/{self._string(name)}"
+            keys[node_id] = key
+            yield key, {
+                'name': self._string(name),
+                'keywords': self._string(keywords).replace(_KEYWORD_SEPARATOR, " "),
+                'summary': self._string(summary),
+                'description': self._string(description),
+            }
@@ -28,74 +28,32 @@ try:
 except ImportError:
     HAS_MODULE_SYSTEM = False
 
+from resource_profiler import aggregate_profiles, profile_functions, profile_source
+
+# Profile used when a function's source can't be parsed
+DEFAULT_PROFILE = {
+    'cpu': 0.5, 'memory': 0.5, 'gpu': 0.0,
+    'network': 0.0, 'startup': 0.3, 'runtime': 0.5
+}
+
 def analyze_resource_focus(func_code):
-    """Analyze the resource focus of a function."""
-    # Default to CPU focus
-    resource = "cpu"
-    
-    # Check for GPU operations
-    if any(keyword in func_code for keyword in ["cuda", "gpu", "tensor", "parallel"]):
-        resource = "gpu"
-    
-    # Check for memory-intensive operations
-    elif any(keyword in func_code for keyword in ["allocate", "buffer", "memory", "cache"]):
-        resource = "memory"
-    
-    # Check for UI operations
-    elif any(keyword in func_code for keyword in ["render", "display", "ui", "interface", "widget"]):
-        resource = "ui"
-    
-    # Check for core operations
-    elif any(keyword in func_code for keyword in ["initialize", "setup", "config", "__init__"]):
-        resource = "core"
-    
-    # Check for network operations
-    elif any(keyword in func_code for keyword in ["http", "request", "download", "upload", "socket"]):
-        resource = "network"
-    
-    return resource
+    """Analyze the resource focus of a function from its AST."""
+    result = profile_source(func_code)
+    return result['focus'] if result else "core"
 
 def analyze_resource_profile(func_code):
     """Analyze the resource profile of a function.
-    Returns a dictionary with resource usage estimates.
+    Returns a dictionary of resource scores between 0.0 and 1.0, derived from
+    loop nesting, allocation sites, I/O calls and import weight.
     """
-    # Default profile (moderate CPU and memory usage)
-    profile = {
-        'cpu': 0.5,     # Default CPU usage (0.0-1.0)
-        'memory': 0.5,  # Default memory usage (0.0-1.0)
-        'gpu': 0.0,     # Default GPU usage (0.0-1.0)
-        'network': 0.0, # Default network usage (0.0-1.0)
-        'startup': 0.3, # Default startup time impact (0.0-1.0)
-        'runtime': 0.5  # Default runtime impact (0.0-1.0)
-    }
-    
-    # Check for CPU-intensive operations
-    if any(keyword in func_code for keyword in ["for", "while", "recursion", "sort", "search"]):
-        profile['cpu'] = 0.8
-        profile['runtime'] = 0.7
-    
-    # Check for memory-intensive operations
-    if any(keyword in func_code for keyword in ["list", "dict", "set", "array", "dataframe"]):
-        profile['memory'] = 0.8
-    
-    # Check for GPU operations
-    if any(keyword in func_code for keyword in ["cuda", "gpu", "tensor", "parallel"]):
-        profile['gpu'] = 0.9
-        profile['cpu'] = 0.3  # GPU offloads CPU
-    
-    # Check for network operations
-    if any(keyword in func_code for keyword in ["http", "request", "download", "upload", "socket"]):
-        profile['network'] = 0.8
-        profile['runtime'] = 0.8  # Network operations affect runtime
-    
-    # Check for startup impact
-    if any(keyword in func_code for keyword in ["import", "load", "initialize", "setup"]):
-        profile['startup'] = 0.7
-    
-    return profile
+    result = profile_source(func_code)
+    return result['profile'] if result else dict(DEFAULT_PROFILE)
 
-def extract_functions(file_path):
-    """Extract all functions from a Python file"""
+def extract_functions(file_path, calibrate=False):
+    """Extract all functions from a Python file with their resource profiles.
+    With calibrate, functions marked @calibration_target (or named in calibrate)
+    are also measured in a sandbox.
+    """
     # Ensure file_path is an absolute path
     file_path = os.path.abspath(file_path)
     
@@ -111,6 +69,8 @@ def extract_functions(file_path):
         tree = ast.parse(content)
         functions = {}
         imports = []
+        lines = content.splitlines()
+        profiles = {entry['lineno']: entry for entry in profile_functions(tree, file_path, calibrate).values()}
         
         # Extract imports first
         for node in ast.walk(tree):
@@ -137,15 +97,18 @@ def extract_functions(file_path):
                               max([n.lineno for n in ast.walk(node) if hasattr(n, 'lineno')], default=start_line))
                 
                 # Extract function source
-                func_lines = content.splitlines()[start_line-1:end_line]
+                func_lines = lines[start_line-1:end_line]
                 func_source = '\n'.join(func_lines)
                 
                 # Add to functions dict
+                profile = profiles[node.lineno]
                 functions[func_name] = {
                     "source": func_source,
                     "lineno": start_line,
                     "end_lineno": end_line,
-                    "dependencies": []
+                    "dependencies": [],
+                    "resource_focus": profile["focus"],
+                    "resource_profile": profile["profile"]
                 }
         
         # Analyze function dependencies
@@ -196,14 +159,13 @@ def categorize_by_resource(functions_data):
     for func_name, func_info in functions_data["functions"].items():
         func_code = func_info["source"]
         
-        # Determine resource focus
-        resource = analyze_resource_focus(func_code)
+        # Determine resource focus, unless extract_functions already profiled it
+        if "resource_focus" not in func_info:
+            func_info["resource_focus"] = analyze_resource_focus(func_code)
+            func_info["resource_profile"] = analyze_resource_profile(func_code)
         
         # Add to the appropriate resource category
-        resource_categories[resource][func_name] = func_info
-        
-        # Add resource profile information
-        func_info["resource_profile"] = analyze_resource_profile(func_code)
+        resource_categories[func_info["resource_focus"]][func_name] = func_info
     
     return resource_categories
 
@@ -245,14 +207,14 @@ def get_dependency_order(functions_data):
     # Reverse to get the correct order
     return result[::-1]
 
-def split_file_by_resource(file_path, output_dir):
+def split_file_by_resource(file_path, output_dir, calibrate=False):
     """Split a Python file into resource-oriented components"""
     # Create output directory
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
     
     # Extract functions and imports
-    extracted_data = extract_functions(file_path)
+    extracted_data = extract_functions(file_path, calibrate)
     
     # Categorize by resource
     resource_categories = categorize_by_resource(extracted_data)
@@ -293,6 +255,7 @@ This module contains functions focused on {resource} resource optimization.
         
         # If module system is available, create a Module class for this resource
         if HAS_MODULE_SYSTEM:
+            resource_profile = aggregate_profiles([info["resource_profile"] for info in funcs.values()])
             module_path = os.path.join(resource_dir, f"{resource}_module.py")
             with open(module_path, 'w', encoding='utf-8') as f:
                 f.write(f"""
@@ -302,14 +265,7 @@ class {resource.capitalize()}Module(Module):
     def __init__(self, name):
         super().__init__(name)
         self.resource_type = '{resource}'
-        self.resource_profile = {{
-            'cpu': {0.5 if resource == 'cpu' else 0.3},
-            'memory': {0.5 if resource == 'memory' else 0.3},
-            'gpu': {0.8 if resource == 'gpu' else 0.0},
-            'network': {0.8 if resource == 'network' else 0.0},
-            'startup': {0.5 if resource == 'core' else 0.3},
-            'runtime': {0.5 if resource in ['cpu', 'gpu'] else 0.3}
-        }}
+        self.resource_profile = {resource_profile!r}
 """)
         
         # Write each function to a file
@@ -449,15 +405,17 @@ def merge_from_manifest(manifest_path):
 def main():
     """Main entry point"""
     if len(sys.argv) < 3:
-        print("Usage: python resource_splitter.py [split|merge] [file_path] [output_dir]")
+        print("Usage: python resource_splitter.py [split|merge] [file_path] [output_dir] [--calibrate]")
         return
     
     command = sys.argv[1]
     file_path = sys.argv[2]
     
     if command == "split":
-        output_dir = sys.argv[3] if len(sys.argv) > 3 else "resource_split"
-        manifest = split_file_by_resource(file_path, output_dir)
+        calibrate = "--calibrate" in sys.argv
+        args = [arg for arg in sys.argv[3:] if arg != "--calibrate"]
+        output_dir = args[0] if args else "resource_split"
+        manifest = split_file_by_resource(file_path, output_dir, calibrate)
         print(f"Split {file_path} into {len(manifest['split_files'])} resource-oriented components")
         
     elif command == "merge":
@@ -1,5 +1,9 @@
 import argparse
+import ast
 import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 # Fix imports for reorganized codebase
 import utils.import_utils
 
@@ -9,15 +13,16 @@ import utils.import_utils
 
 
 # Use the centralized imports system
-    extract_functions,
-    run_z3_proof,
-    build_function_graph,
-    get_ir_model,
-    extract_ir_from_source,
-    optimize_logic,
-    export_to_python,
-    load_module_from_file
-)
+from imports import load_module_from_file
+from ast_explorer import extract_functions
+from ir_model import get_ir_model
+from engine import run_z3_proof
+from graph_builder import build_function_graph
+from optimizer import optimize_logic
+from exporter import export_with_test
+from pipeline_engine import PipelineEngine, Stage
+
+DEFAULT_CACHE_DIR = os.path.join(".logic_cache", "pipeline")
 
 # Default sample code if no file is provided
 DEFAULT_CODE = """
@@ -32,16 +37,44 @@ def decide(cpu, is_question, is_command):
         return 0
 """
 
-def run_pipeline(source_code=None, function_name=None, output_dir="."):
+def build_pipeline(cache_dir=DEFAULT_CACHE_DIR, max_workers=4):
+    """Build the stage graph; the parsed AST and IR model are shared artifacts."""
+    stages = [
+        Stage('parse', ast.parse, ['source'], ['tree']),
+        Stage('functions', lambda source, tree: extract_functions(source, tree),
+              ['source', 'tree'], ['functions']),
+        Stage('ir', lambda source, tree, name: get_ir_model(source, name, tree),
+              ['source', 'tree', 'function_name'], ['ir_model']),
+        Stage('proof', run_z3_proof, ['ir_model'], ['proof']),
+        # The call graph is built without layout; images are rendered on demand
+        Stage('graph', build_function_graph, ['functions'], ['graph']),
+        Stage('optimize', optimize_logic, ['ir_model'], ['optimization']),
+        # Export drops unreachable rules and ships an equivalence test with the code
+        Stage('export', export_with_test, ['ir_model', 'optimization'], ['exported_code', 'equivalence_test']),
+    ]
+    return PipelineEngine(stages, cache_dir=cache_dir, max_workers=max_workers)
+
+def _print_timings(timings):
+    for stage_name, timing in timings.items():
+        source = "cache" if timing['cached'] else "run"
+        print(f"  {stage_name:<10} {timing['time'] * 1000:8.1f} ms ({source})")
+
+def run_pipeline(source_code=None, function_name=None, output_dir=".", cache_dir=DEFAULT_CACHE_DIR):
     """Run the complete logic analysis pipeline."""
     # Use default code if none provided
     if source_code is None:
         source_code = DEFAULT_CODE
         print("Using default example code...")
     
-    # Step 1: Extract functions from the code
+    engine = build_pipeline(cache_dir)
+    
+    # Step 1: Parse once and extract functions from the code
     print("\nExtracting functions...")
-    functions = extract_functions(source_code)
+    front = engine.run({'source': source_code}, targets=['functions'])
+    if front.errors:
+        print(f"Failed to parse source: {front.errors}")
+        return
+    functions = front['functions']
     print(f"Found {len(functions)} functions")
     
     # If function_name is not specified but there's only one function, use it
@@ -49,61 +82,144 @@ def run_pipeline(source_code=None, function_name=None, output_dir="."):
         function_name = functions[0]['name']
         print(f"Using function: {function_name}")
     
-    # Step 2: Extract IR model
-    print("\nExtracting IR model...")
-    ir_model = get_ir_model(source_code, function_name)
-    if ir_model:
-        print(f"Extracted IR model for '{ir_model['function_name']}' with {len(ir_model['logic'])} logic rules")
-    else:
+    # Steps 2-6: IR model, then proof, graph, optimization and export concurrently
+    print("\nRunning analysis stages...")
+    result = engine.run(
+        {'function_name': function_name},
+        seed=front.seed(['source', 'tree', 'functions'])
+    )
+    ir_model = result.get('ir_model')
+    if not ir_model:
         print("Failed to extract IR model")
         return
+    print(f"Extracted IR model for '{ir_model['function_name']}' with {len(ir_model['logic'])} logic rules")
+    for stage_name, error in result.errors.items():
+        print(f"Stage '{stage_name}' failed: {error}")
+    
+    graph = result.get('graph')
+    if graph is not None:
+        graph_path = graph.export(os.path.join(output_dir, "function_graph.dot"))
+        print(f"Call graph ({graph.node_count} functions, {graph.edge_count} calls) saved to {graph_path}")
     
-    # Step 3: Run formal proof
-    print("\nRunning formal proof...")
-    run_z3_proof(ir_model)
-    
-    # Step 4: Generate function graph
-    print("\nGenerating function graph...")
-    graph_path = os.path.join(output_dir, "function_graph.png")
-    build_function_graph(functions)
-    print(f"Graph saved to {graph_path}")
-    
-    # Step 5: Optimize the logic
-    print("\nOptimizing logic...")
-    optimization_results = optimize_logic(ir_model)
-    
-    # Step 6: Export to Python
-    print("\nExporting to Python...")
-    python_code = export_to_python(ir_model)
-    print("\nGenerated Python code:")
-    print("------------------------")
-    print(python_code)
-    print("------------------------")
-    
-    # Save the exported code
-    code_path = os.path.join(output_dir, f"{ir_model['function_name']}_optimized.py")
-    with open(code_path, "w") as f:
-        f.write(python_code)
-    print(f"Exported code saved to {code_path}")
+    python_code = result.get('exported_code')
+    if python_code is not None:
+        print("\nGenerated Python code:")
+        print("------------------------")
+        print(python_code)
+        print("------------------------")
+        
+        # Save the exported code
+        code_path = os.path.join(output_dir, f"{ir_model['function_name']}_optimized.py")
+        with open(code_path, "w") as f:
+            f.write(python_code)
+        print(f"Exported code saved to {code_path}")
+        
+        test_code = result.get('equivalence_test')
+        if test_code is not None:
+            test_path = os.path.join(output_dir, f"test_{ir_model['function_name']}_optimized.py")
+            with open(test_path, "w") as f:
+                f.write(test_code)
+            print(f"Equivalence test saved to {test_path}")
+    
+    print("\nStage timings:")
+    _print_timings({**front.timings, **result.timings})
     
     print("\nPipeline completed successfully!")
     return {
         'functions': functions,
+        'graph': graph,
         'ir_model': ir_model,
-        'optimization': optimization_results,
-        'exported_code': python_code
+        'proof': result.get('proof'),
+        'optimization': result.get('optimization'),
+        'exported_code': python_code,
+        'timings': {**front.timings, **result.timings},
+        'errors': result.errors
     }
 
+def _run_file(file_path, output_dir, cache_dir, targets):
+    """Batch worker: run the pipeline for every function defined in one file."""
+    summary = {'file': file_path, 'functions': [], 'timings': defaultdict(float), 'errors': {}}
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            source_code = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        summary['errors']['read'] = str(e)
+        return summary
+    
+    # One engine thread per worker process; the pool provides the parallelism
+    engine = build_pipeline(cache_dir, max_workers=1)
+    front = engine.run({'source': source_code}, targets=['functions'])
+    if front.errors:
+        summary['errors'].update(front.errors)
+        return summary
+    for stage_name, timing in front.timings.items():
+        summary['timings'][stage_name] += timing['time']
+    
+    seed = front.seed(['source', 'tree', 'functions'])
+    base = os.path.splitext(os.path.basename(file_path))[0]
+    for function in front['functions']:
+        result = engine.run({'function_name': function['name']}, targets=targets, seed=seed)
+        for stage_name, timing in result.timings.items():
+            summary['timings'][stage_name] += timing['time']
+        for stage_name, error in result.errors.items():
+            summary['errors'][f"{function['name']}.{stage_name}"] = error
+        
+        code = result.get('exported_code')
+        if code is not None and output_dir:
+            code_path = os.path.join(output_dir, f"{base}.{function['name']}_optimized.py")
+            with open(code_path, "w") as f:
+                f.write(code)
+        summary['functions'].append(function['name'])
+    
+    summary['timings'] = dict(summary['timings'])
+    return summary
+
+def run_batch(directory, output_dir=None, cache_dir=DEFAULT_CACHE_DIR, max_workers=None,
+              targets=('proof', 'optimization', 'exported_code')):
+    """Run the pipeline over every function of every Python file in a directory."""
+    files = []
+    for root, _, names in os.walk(directory):
+        files.extend(os.path.join(root, name) for name in sorted(names) if name.endswith('.py'))
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    
+    start_time = time.perf_counter()
+    totals = defaultdict(float)
+    summaries = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_run_file, path, output_dir, cache_dir, list(targets)) for path in files]
+        for future in futures:
+            summary = future.result()
+            summaries.append(summary)
+            for stage_name, elapsed in summary['timings'].items():
+                totals[stage_name] += elapsed
+    
+    elapsed = time.perf_counter() - start_time
+    function_count = sum(len(s['functions']) for s in summaries)
+    print(f"Processed {function_count} functions in {len(files)} files in {elapsed:.2f}s")
+    print("Per-stage time (summed over workers):")
+    for stage_name, stage_time in sorted(totals.items(), key=lambda item: -item[1]):
+        print(f"  {stage_name:<10} {stage_time:8.3f} s")
+    
+    return {'files': summaries, 'stage_times': dict(totals), 'elapsed': elapsed}
+
 def parse_arguments():
     parser = argparse.ArgumentParser(description='Logic Tool Pipeline')
     parser.add_argument('--file', '-f', help='Path to Python file to analyze')
     parser.add_argument('--function', '-n', help='Name of function to analyze')
     parser.add_argument('--output', '-o', default='.', help='Output directory for generated files')
+    parser.add_argument('--batch', '-b', help='Run the pipeline over every function in a directory')
+    parser.add_argument('--workers', '-w', type=int, default=None, help='Worker processes for batch mode')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help='Directory for memoized stage results')
     return parser.parse_args()
 
 if __name__ == "__main__":
     args = parse_arguments()
     
+    if args.batch:
+        run_batch(args.batch, args.output, args.cache_dir, args.workers)
+        raise SystemExit(0)
+    
     # Load source code from file if specified
     source_code = None
     if args.file:
@@ -116,4 +232,4 @@ if __name__ == "__main__":
             source_code = DEFAULT_CODE
     
     # Run the pipeline
-    run_pipeline(source_code, args.function, args.output)
+    run_pipeline(source_code, args.function, args.output, args.cache_dir)
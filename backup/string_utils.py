@@ -3,8 +3,11 @@
 This module provides standardized functions for string processing,
 cleaning, and manipulation, reducing code duplication across the codebase.
 """
-# Fix imports for reorganized codebase
-import utils.import_utils
+# Fix imports for reorganized codebase; nothing below depends on it
+try:
+    import utils.import_utils
+except ImportError:
+    pass
 
 
 # Fix imports for reorganized codebase
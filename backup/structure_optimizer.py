@@ -4,16 +4,18 @@ Structure Optimizer Module
 Optimizes the directory structure based on file clusters and analysis
 to create a balanced, fractal organization.
 """
-# Fix imports for reorganized codebase
-import utils.import_utils
-
-
-# Fix imports for reorganized codebase
-
+# Fix imports for reorganized codebase; nothing below depends on it
+try:
+    import utils.import_utils
+except ImportError:
+    pass
 
 
 import os
 import re
+from collections import defaultdict
+
+from layout_planner import common_prefixes, file_features, longest_prefix, plan_directory_groups
 
 def optimize_structure(clusters, file_data, min_files=5, max_files=20, max_depth=4, balance_factor=0.7):
     """
@@ -36,6 +38,7 @@ def optimize_structure(clusters, file_data, min_files=5, max_files=20, max_depth
     # Optimize the structure
     optimized_structure = _optimize_tree(
         initial_structure,
+        file_data,
         min_files=min_files,
         max_files=max_files,
         max_depth=max_depth,
@@ -103,7 +106,7 @@ def _generate_description(cluster, file_data, keywords):
     # Otherwise, use keywords
     return "Contains files related to: " + ", ".join(keywords[:5])
 
-def _optimize_tree(structure, min_files, max_files, max_depth, balance_factor):
+def _optimize_tree(structure, file_data, min_files, max_files, max_depth, balance_factor):
     """Optimize the directory tree structure."""
     # Check if we need to split or merge directories
     total_files = sum(len(info["files"]) for info in structure.values())
@@ -129,7 +132,7 @@ def _optimize_tree(structure, min_files, max_files, max_depth, balance_factor):
                 files = info["files"]
                 
                 # Group files by common prefixes or patterns
-                groups = _group_files_by_pattern(files, file_data)
+                groups = _group_files_by_pattern(files, file_data, min_files, max_files)
                 
                 # Create subdirectories
                 subdirs = {}
@@ -143,6 +146,7 @@ def _optimize_tree(structure, min_files, max_files, max_depth, balance_factor):
                 # Optimize subdirectories recursively
                 optimized_subdirs = _optimize_tree(
                     subdirs,
+                    file_data,
                     min_files=min_files,
                     max_files=max_files,
                     max_depth=max_depth - 1,
@@ -165,12 +169,12 @@ def _optimize_tree(structure, min_files, max_files, max_depth, balance_factor):
     # Check if we have too many small directories
     if len(structure) > max_files:
         # Group similar directories
-        return _group_directories(structure, min_files, max_files, max_depth, balance_factor)
+        return _group_directories(structure, file_data, min_files, max_files, max_depth, balance_factor)
     
     # Structure is already balanced
     return structure
 
-def _group_files_by_pattern(files, file_data):
+def _group_files_by_pattern(files, file_data, min_files, max_files):
     """Group files by common patterns or prefixes."""
     groups = defaultdict(list)
     
@@ -178,16 +182,11 @@ def _group_files_by_pattern(files, file_data):
     prefixes = _find_common_prefixes(files)
     
     if prefixes:
-        # Group by prefix
+        # Group by the longest matching prefix
+        prefix_set = set(prefixes)
         for file in files:
-            filename = os.path.basename(file)
-            for prefix in prefixes:
-                if filename.startswith(prefix):
-                    groups[prefix].append(file)
-                    break
-            else:
-                # No matching prefix
-                groups["other"].append(file)
+            prefix = longest_prefix(os.path.basename(file), prefix_set)
+            groups[prefix or "other"].append(file)
     else:
         # Group by file type or purpose
         for file in files:
@@ -220,66 +219,38 @@ def _group_files_by_pattern(files, file_data):
     return groups
 
 def _find_common_prefixes(files):
-    """Find common prefixes among filenames."""
-    filenames = [os.path.basename(f) for f in files]
-    
-    # Extract word prefixes
-    prefixes = set()
-    for filename in filenames:
-        # Split by common separators
-        parts = re.split(r'[_\-.]', filename)
-        if parts:
-            prefixes.add(parts[0])
-    
-    # Filter out short or too common prefixes
-    valid_prefixes = []
-    for prefix in prefixes:
-        if len(prefix) >= 3:  # Minimum prefix length
-            count = sum(1 for f in filenames if f.startswith(prefix))
-            if count >= 2 and count <= len(files) * 0.8:  # Not too rare or too common
-                valid_prefixes.append(prefix)
-    
-    return valid_prefixes
+    """Find common prefixes among filenames, longest first."""
+    return common_prefixes(os.path.basename(f) for f in files)
 
-def _group_directories(structure, min_files, max_files, max_depth, balance_factor):
-    """Group similar directories together to reduce the total number."""
-    # Create a graph where nodes are directories and edges are weighted by similarity
-    G = nx.Graph()
-    
-    # Add nodes
-    for name in structure:
-        G.add_node(name)
-    
-    # Add edges
-    for name1 in structure:
-        for name2 in structure:
-            if name1 != name2:
-                similarity = _calculate_directory_similarity(
-                    structure[name1],
-                    structure[name2]
-                )
-                if similarity > 0.3:  # Only add edges for directories with significant similarity
-                    G.add_edge(name1, name2, weight=similarity)
+def _all_files(info):
+    """Files in a directory entry and its subdirectories."""
+    files = list(info.get("files", []))
+    for subinfo in info.get("subdirs", {}).values():
+        files.extend(_all_files(subinfo))
+    return files
+
+def _directory_features(info, file_data):
+    """Sparse features of a directory: its keywords and those of its files."""
+    features = ["kw:" + keyword for keyword in info.get("keywords", [])]
+    for file_path in _all_files(info):
+        features.extend(file_features(file_path, file_data))
+    return features
+
+def _group_directories(structure, file_data, min_files, max_files, max_depth, balance_factor):
+    """
+    Group similar directories together to reduce the total number.
     
-    # Use community detection to find groups
-    try:
-        partition = community_louvain.best_partition(G)
-        
-        # Group directories by community
-        groups = defaultdict(list)
-        for node, community_id in partition.items():
-            groups[community_id].append(node)
-    except ImportError:
-        # Fallback to connected components
-        groups = [list(c) for c in nx.connected_components(G)]
+    Directories are compared as sparse feature vectors and merged by
+    agglomerative clustering, so only directories sharing a feature are
+    ever compared; no group holds more than max_files directories.
+    """
+    features = {name: _directory_features(info, file_data) for name, info in structure.items()}
+    groups = plan_directory_groups(features, max_group_size=max_files)
     
     # Create new structure with grouped directories
     new_structure = {}
     
-    # Handle groups appropriately based on its type
-    group_items = groups.values() if isinstance(groups, dict) else groups
-    
-    for i, group in enumerate(group_items):
+    for i, group in enumerate(groups):
         if len(group) == 1:
             # Single directory, keep as is
             name = group[0]
@@ -305,24 +276,13 @@ def _group_directories(structure, min_files, max_files, max_depth, balance_facto
             # Add to new structure
             new_structure[group_name] = {
                 "files": [],  # No files directly in this directory
-                "keywords": list(set(all_keywords)),
+                "keywords": list(dict.fromkeys(all_keywords)),
                 "description": " / ".join(descriptions[:3]),
                 "subdirs": subdirs
             }
     
     return new_structure
 
-def _calculate_directory_similarity(dir1_info, dir2_info):
-    """Calculate similarity between two directories."""
-    # Calculate keyword similarity
-    keywords1 = set(dir1_info["keywords"])
-    keywords2 = set(dir2_info["keywords"])
-    
-    if not keywords1 or not keywords2:
-        return 0
-    
-    return len(keywords1.intersection(keywords2)) / max(1, len(keywords1.union(keywords2)))
-
 def _generate_directory_names(structure, file_data):
     """Generate meaningful names for directories based on their content."""
     named_structure = {}
@@ -338,6 +298,12 @@ def _generate_directory_names(structure, file_data):
             if new_name:
                 name = new_name
         
+        # Directories named after the same keyword must not replace each other
+        base_name, suffix = name, 2
+        while name in named_structure:
+            name = f"{base_name}_{suffix}"
+            suffix += 1
+        
         # Process subdirectories recursively
         if "subdirs" in info:
             subdirs = _generate_directory_names(info["subdirs"], file_data)
@@ -0,0 +1,227 @@
+"""
+Branch Reorderer
+This module implements profile-guided branch reordering.
+
+Test cases for branch_reorderer
+"""
+import ast
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# Add this directory to path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+import branch_reorderer
+from branch_reorderer import (
+    BranchProfile,
+    benchmark_reordering,
+    conditions_mutually_exclusive,
+    is_side_effect_free,
+    make_site,
+    observed_types,
+    reorder_file,
+    reorder_source,
+    reorder_source_benchmarked
+)
+
+CHAIN_CODE = """
+def classify(level: int, mode):
+    if level < 10:
+        return 'low'
+    elif level >= 10 and level < 90:
+        return 'mid'
+    elif level >= 90:
+        return 'high'
+    return 'none'
+"""
+
+COMMENTED_CODE = """
+# Thresholds come from the capacity plan
+def classify(level: int, mode):
+    if level < 10:  # idle
+        return 'low'
+    elif level >= 90:
+        # Page someone
+        return 'high'
+    return 'none'  # unreachable in practice
+"""
+
+OVERLAPPING_CODE = """
+def decide(cpu: int, is_question, is_command):
+    if is_command:
+        return 3
+    elif is_question and cpu < 95:
+        return 2
+    elif is_question:
+        return 1
+    else:
+        return 0
+"""
+
+
+MODE_CODE = """
+def pick(mode):
+    if mode == 'a':
+        return 1
+    elif mode == 'b':
+        return 2
+    return 0
+"""
+
+
+def profile_for(source, file_key, inputs):
+    """Collect a branch profile by evaluating every condition site on the inputs."""
+    tree = ast.parse(source)
+    func = tree.body[0]
+    names = [arg.arg for arg in func.args.args]
+    sites = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.If):
+            sites.append(node.test)
+            if isinstance(node.test, ast.BoolOp):
+                sites.extend(node.test.values)
+
+    namespace = {}
+    exec(compile(source, file_key, 'exec'), namespace)
+    profile = BranchProfile()
+    for args in inputs:
+        env = dict(zip(names, args))
+        # Emulate elif evaluation order: later tests only run if earlier ones failed
+        current = func.body[0]
+        while isinstance(current, ast.If):
+            value = eval(compile(ast.Expression(current.test), file_key, 'eval'), env)
+            profile.record(make_site(file_key, current.test), value)
+            if isinstance(current.test, ast.BoolOp):
+                for operand in current.test.values:
+                    operand_value = eval(compile(ast.Expression(operand), file_key, 'eval'), env)
+                    profile.record(make_site(file_key, operand), operand_value)
+                    if bool(operand_value) != isinstance(current.test.op, ast.And):
+                        break
+            if value:
+                break
+            current = current.orelse[0] if len(current.orelse) == 1 and isinstance(current.orelse[0], ast.If) else None
+    return profile
+
+
+class TestBranchReorderer(unittest.TestCase):
+    """Test profiling, exclusivity proofs and reordering."""
+
+    def test_profile_roundtrip(self):
+        """Profiles save to and load from JSON."""
+        profile = BranchProfile()
+        for value in (True, False, True):
+            profile.record("f.py:1:0:1:4", value)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = profile.save(os.path.join(tmp, "profile.json"))
+            loaded = BranchProfile.load(path)
+        self.assertEqual(loaded.sites, {"f.py:1:0:1:4": [2, 1]})
+        self.assertAlmostEqual(loaded.probability("f.py:1:0:1:4"), 2 / 3)
+
+    def test_exclusive_chain_is_reordered(self):
+        """The most frequently taken exclusive branch moves to the front."""
+        inputs = [(95, None)] * 80 + [(50, None)] * 15 + [(5, None)] * 5
+        profile = profile_for(CHAIN_CODE, "chain.py", inputs)
+        new_source, changes = reorder_source(CHAIN_CODE, profile, "chain.py")
+        self.assertTrue(any(kind == 'chain' for kind, _, _ in changes))
+        first_test = ast.parse(new_source).body[0].body[0].test
+        self.assertEqual(ast.unparse(first_test), "level >= 90")
+
+        results = benchmark_reordering(CHAIN_CODE, new_source, "classify", inputs, number=5)
+        self.assertTrue(results['equivalent'])
+
+    def test_overlapping_chain_is_kept(self):
+        """Branches that are not mutually exclusive keep their order."""
+        inputs = [(50, True, False)] * 90 + [(50, False, True)] * 10
+        profile = profile_for(OVERLAPPING_CODE, "decide.py", inputs)
+        new_source, changes = reorder_source(OVERLAPPING_CODE, profile, "decide.py")
+        self.assertFalse(any(kind == 'chain' for kind, _, _ in changes))
+        self.assertEqual(ast.dump(ast.parse(new_source)), ast.dump(ast.parse(OVERLAPPING_CODE)))
+
+    def test_only_moved_spans_are_edited(self):
+        """Comments and formatting outside the moved tests and bodies are kept."""
+        inputs = [(95, None)] * 90 + [(5, None)] * 10
+        profile = profile_for(COMMENTED_CODE, "commented.py", inputs)
+        new_source, changes = reorder_source(COMMENTED_CODE, profile, "commented.py")
+        self.assertTrue(changes)
+        self.assertEqual(new_source, """
+# Thresholds come from the capacity plan
+def classify(level: int, mode):
+    if level >= 90:  # idle
+        # Page someone
+        return 'high'
+    elif level < 10:
+        return 'low'
+    return 'none'  # unreachable in practice
+""")
+
+    def test_reordering_is_benchmarked(self):
+        """A reordering is kept only for functions benchmarked with equal outputs."""
+        inputs = [(95, None)] * 80 + [(50, None)] * 15 + [(5, None)] * 5
+        profile = profile_for(CHAIN_CODE, "chain.py", inputs)
+        new_source, changes, results = reorder_source_benchmarked(CHAIN_CODE, profile, "chain.py", {})
+        self.assertEqual((new_source, changes), (CHAIN_CODE, []))
+        self.assertFalse(results['classify']['kept'])
+
+        new_source, changes, results = reorder_source_benchmarked(
+            CHAIN_CODE, profile, "chain.py", {'classify': inputs}, number=5, min_speedup=0.0)
+        self.assertTrue(results['classify']['kept'])
+        self.assertTrue(results['classify']['equivalent'])
+        self.assertEqual(new_source, reorder_source(CHAIN_CODE, profile, "chain.py")[0])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "chain.py")
+            with open(path, "w") as f:
+                f.write(CHAIN_CODE)
+            output_file, changes, results = reorder_file(path, profile, {})
+            with open(output_file) as f:
+                self.assertEqual(f.read(), CHAIN_CODE)
+
+    def test_mutual_exclusion(self):
+        """Exclusivity is proven for disjoint ranges and refuted for overlaps."""
+        parse = lambda text: ast.parse(text, mode='eval').body
+        self.assertTrue(conditions_mutually_exclusive([parse("x < 10"), parse("x >= 10 and y")]))
+        self.assertTrue(conditions_mutually_exclusive([parse("mode == 'a'"), parse("mode == 'b'")]))
+        self.assertFalse(conditions_mutually_exclusive([parse("x < 10"), parse("x < 20")]))
+        self.assertFalse(conditions_mutually_exclusive([parse("a or b"), parse("not a")]))
+
+    def test_int_literals_do_not_make_names_integers(self):
+        """Comparisons against int literals are not exclusive when a float fits both."""
+        parse = lambda text: ast.parse(text, mode='eval').body
+        for z3_module in (branch_reorderer.z3, None):
+            with mock.patch.object(branch_reorderer, "z3", z3_module):
+                self.assertFalse(conditions_mutually_exclusive([parse("x < 1"), parse("x > 0")]))
+                self.assertTrue(conditions_mutually_exclusive([parse("x < 1"), parse("x >= 1")]))
+
+    def test_side_effect_free_needs_scalar_names(self):
+        """Truth and equality tests are only pure on names known to hold builtin scalars."""
+        parse = lambda text: ast.parse(text, mode='eval').body
+        for text in ("x == 1", "x", "x in (1, 2)", "not x"):
+            self.assertFalse(is_side_effect_free(parse(text), set()), text)
+            self.assertTrue(is_side_effect_free(parse(text), set(), {"x"}), text)
+        self.assertTrue(is_side_effect_free(parse("x is None"), set()))
+        self.assertFalse(is_side_effect_free(parse("x in 'ab'"), set(), {"x"}))
+        self.assertFalse(is_side_effect_free(parse("x < 1"), set(), {"x"}))
+
+    def test_observed_types_allow_reordering(self):
+        """Unannotated parameters are reordered only when the inputs hold builtin scalars."""
+        inputs = [('b',)] * 90 + [('a',)] * 10
+        profile = profile_for(MODE_CODE, "pick.py", inputs)
+        self.assertEqual(reorder_source(MODE_CODE, profile, "pick.py"), (MODE_CODE, []))
+
+        self.assertEqual(observed_types(MODE_CODE, {'pick': inputs}), {'pick': {'mode': {str}}})
+        new_source, changes = reorder_source(MODE_CODE, profile, "pick.py",
+                                             param_types=observed_types(MODE_CODE, {'pick': inputs}))
+        self.assertTrue(changes)
+        self.assertEqual(ast.unparse(ast.parse(new_source).body[0].body[0].test), "mode == 'b'")
+
+        param_types = observed_types(MODE_CODE, {'pick': inputs + [(object(),)]})
+        self.assertEqual(reorder_source(MODE_CODE, profile, "pick.py", param_types=param_types), (MODE_CODE, []))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+Call Graph
+This module builds function call graphs incrementally and exports them without layout.
+
+Test cases for call_graph
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+
+# Add this directory to path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from call_graph import CallGraph
+
+MODULE_A = """
+def main():
+    load()
+    helper.process()
+
+def load():
+    return parse()
+
+def parse():
+    return 1
+
+def process():
+    return 2
+"""
+
+
+class TestCallGraph(unittest.TestCase):
+    """Test building, incremental updates, export and collapsing."""
+
+    def test_build_from_source(self):
+        """Calls between known functions become edges."""
+        graph = CallGraph()
+        graph.update_source(MODULE_A, "a.py")
+        self.assertEqual(sorted(graph.successors("main")), ["load", "process"])
+        self.assertEqual(graph.successors("load"), ["parse"])
+        self.assertEqual(graph.edge_count, 3)
+
+    def test_incremental_file_update(self):
+        """Updating a file replaces only its own edges, and unchanged files are skipped."""
+        graph = CallGraph()
+        graph.update_source(MODULE_A, "a.py")
+        graph.update_source("def other():\n    return parse()\n", "b.py")
+        self.assertFalse(graph.update_source(MODULE_A, "a.py"))
+
+        graph.update_source(MODULE_A.replace("    load()\n", ""), "a.py")
+        self.assertEqual(graph.successors("main"), ["process"])
+        self.assertEqual(graph.successors("other"), ["parse"])
+
+    def test_replaced_functions_are_dropped(self):
+        """Functions that disappear from a file are removed from the graph."""
+        graph = CallGraph()
+        graph.update_source("def a():\n    return b()\n\ndef b():\n    return 1\n", "m.py")
+        graph.update_source("def a2():\n    return b()\n\ndef b():\n    return 1\n", "m.py")
+        self.assertEqual(sorted(graph.names), ["a2", "b"])
+        self.assertEqual(graph.successors("a2"), ["b"])
+        with self.assertRaises(KeyError):
+            graph.find("a")
+
+        graph.remove_file("m.py")
+        self.assertEqual(graph.node_count, 0)
+        self.assertEqual(graph.edge_count, 0)
+
+    def test_same_name_in_different_files(self):
+        """Same-named functions stay separate and calls prefer the caller's file."""
+        graph = CallGraph()
+        graph.update_source("def run():\n    return helper()\n\ndef helper():\n    return 1\n", "a.py")
+        graph.update_source("def run():\n    return helper()\n\ndef helper():\n    return 2\n", "b.py")
+        graph.update_source("class Job:\n    def run(self):\n        return helper()\n", "c.py")
+        self.assertEqual(graph.node_count, 5)
+        self.assertEqual(graph.edge_count, 4)
+        self.assertEqual(graph.successors("run", "a.py"), ["helper"])
+        self.assertEqual(graph.node_file[next(iter(graph.adjacency()[graph.find("run", "a.py")]))], "a.py")
+        # A call with no local definition reaches every function of that name
+        self.assertEqual(len(graph.adjacency()[graph.find("Job.run")]), 2)
+        with self.assertRaises(KeyError):
+            graph.find("run")
+
+        graph.remove_file("b.py")
+        self.assertEqual(graph.successors("Job.run"), ["helper"])
+        self.assertEqual(graph.successors("run"), ["helper"])
+
+    def test_shared_edges_are_reference_counted(self):
+        """An edge added by two files survives the removal of one of them."""
+        graph = CallGraph()
+        graph.add_edge("x", "y", "one.py")
+        graph.add_edge("x", "y", "two.py")
+        graph.remove_file("one.py")
+        self.assertEqual(graph.successors("x"), ["y"])
+        graph.remove_file("two.py")
+        self.assertEqual(graph.node_count, 0)
+
+    def test_streaming_exports(self):
+        """DOT, GraphML and JSON exports are well formed."""
+        graph = CallGraph()
+        graph.update_source(MODULE_A, "a.py")
+        with tempfile.TemporaryDirectory() as tmp:
+            data = json.load(open(graph.export(os.path.join(tmp, "g.json"))))
+            self.assertEqual(len(data["nodes"]), 4)
+            self.assertEqual(len(data["edges"]), 3)
+
+            root = ET.parse(graph.export(os.path.join(tmp, "g.graphml"))).getroot()
+            ns = "{http://graphml.graphdrawing.org/xmlns}"
+            self.assertEqual(len(root.findall(f"{ns}graph/{ns}edge")), 3)
+
+            dot = open(graph.export(os.path.join(tmp, "g.dot"))).read()
+            self.assertTrue(dot.startswith("digraph"))
+            self.assertEqual(dot.count("->"), 3)
+
+    def test_collapse_large_graph(self):
+        """Large graphs are collapsed into at most max_nodes clusters."""
+        graph = CallGraph()
+        for cluster in range(20):
+            for i in range(10):
+                graph.add_edge(f"c{cluster}_f{i}", f"c{cluster}_f{(i + 1) % 10}")
+        collapsed = graph.collapse(max_nodes=50)
+        self.assertLessEqual(collapsed.node_count, 50)
+        self.assertLess(collapsed.node_count, graph.node_count)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+Decision Table
+This module compiles IR logic rules into table-driven dispatch code.
+
+Test cases for decision_table and exporter
+"""
+import os
+import sys
+import unittest
+
+# Add this directory to path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from decision_table import (DecisionTable, UnsupportedLogic, find_unreachable_rules,
+                            generate_equivalence_test, render_if_chain, sample_inputs)
+from exporter import export_to_python
+
+
+def _decide_model(extra_rules=()):
+    logic = [
+        {'condition': 'is_command', 'return': 3},
+        {'condition': 'is_question and cpu < 95', 'return': 2},
+        {'condition': 'is_question', 'return': 1},
+    ]
+    logic.extend(extra_rules)
+    logic.append({'condition': 'True', 'return': 0})
+    return {'function_name': 'decide', 'params': ['cpu', 'is_question', 'is_command'], 'logic': logic}
+
+
+def _route_model(rules):
+    logic = [{'condition': f'score < {(i + 1) * 10} and not urgent', 'return': i} for i in range(rules)]
+    logic.append({'condition': 'vip', 'return': -1})
+    logic.append({'condition': 'True', 'return': -2})
+    return {'function_name': 'route', 'params': ['score', 'urgent', 'vip'], 'logic': logic}
+
+
+def _load(source, name):
+    namespace = {}
+    exec(compile(source, f"<{name}>", "exec"), namespace)
+    return namespace[name]
+
+
+class TestDecisionTable(unittest.TestCase):
+    """Test table generation, dead-rule detection and the exporter backends."""
+
+    def _assert_equivalent(self, ir_model, code):
+        naive = _load(render_if_chain(ir_model), ir_model['function_name'])
+        optimized = _load(code, ir_model['function_name'])
+        for args in sample_inputs(ir_model):
+            self.assertEqual(optimized(*args), naive(*args), args)
+
+    def test_table_matches_chain(self):
+        """Inline and bisect cell lookups agree with the if-chain on every cell."""
+        for ir_model in (_decide_model(), _route_model(12)):
+            code = DecisionTable(ir_model).generate()
+            self._assert_equivalent(ir_model, code)
+        self.assertIn("bisect_left", DecisionTable(_route_model(12)).generate())
+        self.assertNotIn("bisect_left", DecisionTable(_decide_model()).generate())
+
+    def test_generated_names_do_not_clash(self):
+        """Parameters named like the generated locals and globals don't break the lookup."""
+        params = ['_i', 'x', '_x_cell', 'bisect_left', '_F_TABLE', '_X_CUTS']
+        logic = [{'condition': f'x < {(i + 1) * 10} and not _i', 'return': i} for i in range(12)]
+        logic += [{'condition': 'bisect_left or _F_TABLE', 'return': -1}, {'condition': 'True', 'return': -2}]
+        ir_model = {'function_name': 'f', 'params': params, 'logic': logic}
+        code = DecisionTable(ir_model).generate()
+        self.assertIn("bisect_left as", code)
+        self._assert_equivalent(ir_model, code)
+
+    def test_all_rules_pruned(self):
+        """Pruning every rule still exports a valid function returning None."""
+        ir_model = _decide_model()
+        optimization = {'unreachable_rules': list(range(len(ir_model['logic'])))}
+        for backend in ("chain", "table"):
+            code = export_to_python(ir_model, optimization, backend=backend)
+            self.assertIsNone(_load(code, 'decide')(50, True, False), backend)
+
+    def test_unreachable_rules(self):
+        """A rule shadowed by earlier rules is proven dead and dropped on export."""
+        ir_model = _decide_model([{'condition': 'is_question and cpu > 99', 'return': 7}])
+        self.assertEqual(find_unreachable_rules(ir_model), [3])
+
+        code = export_to_python(ir_model, {'unreachable_rules': [3]}, backend="chain")
+        self.assertNotIn("cpu > 99", code)
+        self._assert_equivalent(ir_model, code)
+
+    def test_backend_selection(self):
+        """Short chains stay as if statements; deep chains become tables."""
+        self.assertNotIn("_TABLE", export_to_python(_decide_model()))
+        self.assertIn("_ROUTE_TABLE", export_to_python(_route_model(40)))
+
+    def test_unsupported_logic_falls_back(self):
+        """Logic that can't be enumerated is exported as a chain."""
+        ir_model = {'function_name': 'f', 'params': ['x', 'y'],
+                    'logic': [{'condition': 'x < y', 'return': 1}, {'condition': 'True', 'return': 0}]}
+        self.assertIsNone(find_unreachable_rules(ir_model))
+        with self.assertRaises(UnsupportedLogic):
+            DecisionTable(ir_model)
+        code = export_to_python(ir_model, backend="table")
+        self.assertEqual(_load(code, 'f')(1, 2), 1)
+
+    def test_generated_equivalence_test(self):
+        """The generated test module passes and reports a benchmark."""
+        ir_model = _route_model(12)
+        namespace = {'__name__': 'generated'}
+        exec(generate_equivalence_test(ir_model, DecisionTable(ir_model).generate()), namespace)
+
+        suite = unittest.defaultTestLoader.loadTestsFromTestCase(namespace['TestRouteEquivalence'])
+        result = unittest.TestResult()
+        suite.run(result)
+        self.assertTrue(result.wasSuccessful())
+        self.assertIn('speedup', namespace['benchmark'](number=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+"""
+Fractal Splitter
+Files are split by their real dependencies and keep their behavior behind a lazy package __init__.
+
+Test cases for fractal_organizer
+"""
+import importlib
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add this directory to path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+import fractal_organizer
+from fractal_organizer import (FractalAnalyzer, FractalBubbler, FractalNavigator, FractalNode, FractalSplitter,
+                               MAX_FUNCTIONS_PER_FILE, MIN_SPLIT_SIZE)
+
+
+def _large_module():
+    """A module over the split thresholds: helpers, a mutually recursive pair, a constant and a main block."""
+    parts = ['"""Sample module."""', "import os", "", "SCALE = 3", ""]
+    for i in range(MAX_FUNCTIONS_PER_FILE + 2):
+        parts += [
+            "",
+            f"def helper_{i}(value):",
+            f'    """Helper number {i}."""',
+            "    total = value",
+            "    for step in range(3):",
+            "        total += step",
+            f"    return total * SCALE + {i}",
+            "",
+        ]
+    parts += [
+        "",
+        "def is_even(n):",
+        "    return True if n == 0 else is_odd(n - 1)",
+        "",
+        "",
+        "def is_odd(n):",
+        "    return False if n == 0 else is_even(n - 1)",
+        "",
+        "",
+        "def joined(name):",
+        "    return os.path.join(name, str(helper_0(1)))",
+        "",
+        "",
+        'if __name__ == "__main__":',
+        "    print(joined('x'))",
+    ]
+    source = "\n".join(parts) + "\n"
+    assert len(source.splitlines()) >= MIN_SPLIT_SIZE
+    return source
+
+
+class TestFractalNode(unittest.TestCase):
+    """Test the FractalNode class."""
+
+    def test_fractalnode_initialization(self):
+        """Test that FractalNode can be initialized."""
+        root = FractalNode("root", Path("root"))
+        child = FractalNode("child", Path("root/child"), root)
+        root.add_child(child)
+        child.add_function("f", "def f(): pass")
+        self.assertEqual(child.level, 1)
+        self.assertEqual(root.to_dict()["children"][0]["functions"], ["f"])
+
+
+class TestFractalAnalyzer(unittest.TestCase):
+    """Test the FractalAnalyzer class."""
+
+    def test_fractalanalyzer_initialization(self):
+        """Test that FractalAnalyzer can be initialized."""
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "pkg"))
+            with open(os.path.join(tmp, "pkg", "mod.py"), "w") as f:
+                f.write("def a():\n    pass\n\ndef b():\n    pass\n")
+            root = FractalAnalyzer().analyze_directory(tmp)
+            (pkg,) = root.children
+            (mod,) = pkg.children
+            self.assertEqual((pkg.name, mod.name), ("pkg", "mod.py"))
+            self.assertEqual(sorted(mod.functions), ["a", "b"])
+
+
+class TestFractalSplitter(unittest.TestCase):
+    """Test the FractalSplitter class."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, "src")
+        self.dest = os.path.join(self.tmp.name, "dest")
+        os.makedirs(self.src)
+
+    def tearDown(self):
+        for name in [n for n in sys.modules if n.startswith("sample")]:
+            del sys.modules[name]
+        if self.dest in sys.path:
+            sys.path.remove(self.dest)
+        self.tmp.cleanup()
+
+    def test_fractalsplitter_initialization(self):
+        """Test that FractalSplitter can be initialized."""
+        splitter = FractalSplitter()
+        self.assertEqual(splitter.max_functions, fractal_organizer.MAX_FUNCTIONS_PER_FILE)
+        self.assertEqual(splitter.max_lines, fractal_organizer.MAX_LINES_PER_FUNCTION)
+
+    def test_split_large_file(self):
+        """A large file becomes a lazy package behind a proxy with the same behaviour."""
+        with open(os.path.join(self.src, "sample.py"), "w") as f:
+            f.write(_large_module())
+        split = FractalSplitter().split_directory(self.src, self.dest)
+        self.assertEqual(len(split), 1)
+
+        package = Path(self.dest) / "sample_fractal"
+        modules = sorted(p.name for p in package.glob("*.py"))
+        self.assertIn("_shared.py", modules)
+        # The mutually recursive pair shares a module
+        self.assertIn("_is_even.py", modules)
+        self.assertNotIn("_is_odd.py", modules)
+        self.assertIn("import os", (package / "_joined.py").read_text())
+        self.assertNotIn("import os", (package / "_helper_1.py").read_text())
+
+        sys.path.insert(0, self.dest)
+        importlib.invalidate_caches()
+        sample = importlib.import_module("sample")
+        self.assertTrue(sample.is_even(10))
+        self.assertEqual(sample.helper_2(1), 14)
+        self.assertEqual(sample.joined("x"), os.path.join("x", "12"))
+        self.assertIn("helper_0", sample.__all__)
+
+    def test_small_file_is_copied(self):
+        """Files under the size threshold are copied unchanged."""
+        source = "def f():\n    return 1\n"
+        with open(os.path.join(self.src, "small.py"), "w") as f:
+            f.write(source)
+        self.assertEqual(FractalSplitter().split_directory(self.src, self.dest), [])
+        with open(os.path.join(self.dest, "small.py")) as f:
+            self.assertEqual(f.read(), source)
+
+
+class TestFractalNavigator(unittest.TestCase):
+    """Test the FractalNavigator class."""
+
+    def test_fractalnavigator_initialization(self):
+        """Test that FractalNavigator can be initialized."""
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "inner"))
+            with open(os.path.join(tmp, "inner", "mod.py"), "w") as f:
+                f.write("def target():\n    pass\n")
+            navigator = FractalNavigator(tmp)
+            self.assertEqual(navigator.list_current()["directories"], ["inner"])
+            self.assertTrue(navigator.go_down("inner"))
+            self.assertEqual(navigator.list_current()["functions"], [{"name": "target", "file": "mod.py"}])
+            self.assertTrue(navigator.go_up())
+            self.assertEqual(navigator.find_function("target")[0]["line"], 1)
+
+
+class TestFractalBubbler(unittest.TestCase):
+    """Test the FractalBubbler class."""
+
+    def test_fractalbubbler_initialization(self):
+        """Test that FractalBubbler can be initialized."""
+        with tempfile.TemporaryDirectory() as tmp:
+            deep = os.path.join(tmp, "a", "b", "c")
+            os.makedirs(deep)
+            with open(os.path.join(deep, "mod.py"), "w") as f:
+                f.write("def f():\n    pass\n")
+            bubbler = FractalBubbler(tmp)
+            bubbler.bubble_up(tmp, max_depth=1)
+            self.assertTrue(os.path.exists(os.path.join(tmp, "a", "bubbled_b_c_mod.py")))
+            index = bubbler.create_index(tmp)
+            self.assertEqual(index["f"][0]["path"], os.path.join("a", "bubbled_b_c_mod.py"))
+            with open(os.path.join(tmp, "fractal_index.json")) as f:
+                self.assertEqual(json.load(f), index)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+"""
+Import Rewriter
+This module rewrites import statements after modules have been moved.
+
+Test cases for import_rewriter
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+# Add this directory to path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+import import_rewriter
+from import_rewriter import ImportMapping, module_name, rewrite_file, rewrite_imports, rewrite_source
+
+MAPPING = {
+    "src/utils/helpers.py": "core/helpers.py",
+    "src/old_pkg/__init__.py": "lib/new_pkg/__init__.py",
+    "src/tools/a.py": "tools/shared/a.py",
+    "src/tools/b.py": "tools/shared/b.py",
+}
+
+SAMPLE = '''import os
+import src.utils.helpers as helpers
+from src.utils.helpers import (
+    load,  # comment
+    save,
+)
+from src.old_pkg.sub import thing; import src.old_pkg
+from src.tools import a, b
+from .src.utils.helpers import load
+text = "from src.utils.helpers import load"
+# import src.utils.helpers
+def f():
+    from src.utils.helpers import load
+    return load
+'''
+
+EXPECTED = '''import os
+import core.helpers as helpers
+from core.helpers import (
+    load,  # comment
+    save,
+)
+from lib.new_pkg.sub import thing; import lib.new_pkg
+from tools.shared import a, b
+from .src.utils.helpers import load
+text = "from src.utils.helpers import load"
+# import src.utils.helpers
+def f():
+    from core.helpers import load
+    return load
+'''
+
+
+class TestImportMapping(unittest.TestCase):
+    """Test path normalization and prefix resolution."""
+
+    def test_module_name(self):
+        """File paths, package inits and dotted names all normalize to module names."""
+        self.assertEqual(module_name("src/utils/helpers.py"), "src.utils.helpers")
+        self.assertEqual(module_name("src\\pkg\\__init__.py"), "src.pkg")
+        self.assertEqual(module_name("src.utils"), "src.utils")
+
+    def test_resolve(self):
+        """The longest mapped prefix wins and unmapped names are left alone."""
+        mapping = ImportMapping({"a": "x", "a/b.py": "y/b.py", "c.py": "c.py"})
+        self.assertEqual(mapping.resolve("a.b.c"), "y.b.c")
+        self.assertEqual(mapping.resolve("a.d"), "x.d")
+        self.assertIsNone(mapping.resolve("ab"))
+        self.assertIsNone(mapping.resolve("c"))
+
+
+class TestImportRewriter(unittest.TestCase):
+    """Test statement rewriting, warnings and file handling."""
+
+    def test_rewrite_source(self):
+        """Only import statements change; strings, comments and relative imports do not."""
+        new_source, edits, warnings = rewrite_source(SAMPLE, ImportMapping(MAPPING))
+        self.assertEqual(new_source, EXPECTED)
+        self.assertEqual(edits, 6)
+        self.assertEqual(len(warnings), 1)
+        self.assertIn("import src.old_pkg", warnings[0])
+
+    def test_other_line_breaks(self):
+        """Form feeds and U+2028 in strings don't shift the positions of later imports."""
+        source = 'x = "a\x0cb"\ny = "c\u2028d"\nimport old.mod\n'
+        new_source, edits, _ = rewrite_source(source, ImportMapping({"old.mod": "new.mod"}))
+        self.assertEqual(new_source, 'x = "a\x0cb"\ny = "c\u2028d"\nimport new.mod\n')
+        self.assertEqual(edits, 1)
+
+    def test_partially_moved_from_import(self):
+        """A from-import mixing moved and unmoved submodules is reported, not rewritten."""
+        source = "from src.tools import a, c\n"
+        new_source, edits, warnings = rewrite_source(source, ImportMapping(MAPPING))
+        self.assertEqual((new_source, edits), (source, 0))
+        self.assertIn("rewrite it by hand", warnings[0])
+
+    def test_rewrite_files(self):
+        """Dry runs produce diffs; real runs write files, serially or on the pool."""
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for i in range(3):
+                path = os.path.join(tmp, f"m{i}.py")
+                with open(path, "w") as f:
+                    f.write(SAMPLE if i else "import os\n")
+                paths.append(path)
+            broken = os.path.join(tmp, "broken.py")
+            with open(broken, "w") as f:
+                f.write("import (\n")
+
+            result = rewrite_file(paths[1], ImportMapping(MAPPING), dry_run=True)
+            self.assertIn("+import core.helpers as helpers", result["diff"])
+            with open(paths[1]) as f:
+                self.assertEqual(f.read(), SAMPLE)
+
+            threshold = import_rewriter.PARALLEL_THRESHOLD
+            import_rewriter.PARALLEL_THRESHOLD = 1
+            try:
+                results = rewrite_imports(paths + [broken], MAPPING, max_workers=2)
+            finally:
+                import_rewriter.PARALLEL_THRESHOLD = threshold
+            self.assertEqual([r["edits"] for r in results], [0, 6, 6, 0])
+            self.assertIsNotNone(results[3]["error"])
+            for path in paths[1:]:
+                with open(path) as f:
+                    self.assertEqual(f.read(), EXPECTED)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+Layout Planner
+This module groups directories by content without comparing every pair.
+
+Test cases for layout_planner and structure_optimizer
+"""
+import os
+import random
+import sys
+import unittest
+
+# Add this directory to path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from layout_planner import (SortedNames, cluster_vectors, common_prefixes, cut_groups, directory_vectors,
+                            longest_prefix, plan_directory_groups)
+from structure_optimizer import optimize_structure
+
+
+def _greedy_groups(vectors, threshold):
+    """Reference clustering: repeatedly merge the globally most similar pair."""
+    sums = {i: dict(vector) for i, vector in enumerate(vectors)}
+    members = {i: [i] for i in sums}
+
+    def similarity(a, b):
+        dot = sum(w * sums[b].get(f, 0.0) for f, w in sums[a].items())
+        return dot / (len(members[a]) * len(members[b]))
+
+    while len(sums) > 1:
+        best, a, b = max((similarity(a, b), a, b) for a in sums for b in sums if a < b)
+        if best < threshold:
+            break
+        for feature, weight in sums.pop(b).items():
+            sums[a][feature] = sums[a].get(feature, 0.0) + weight
+        members[a] += members.pop(b)
+    return sorted(sorted(group) for group in members.values())
+
+
+def _file_data(path, keywords, imports=()):
+    return {"semantics": {"keywords": keywords, "docstring": "", "imports": [{"module": m} for m in imports]}}
+
+
+class TestLayoutPlanner(unittest.TestCase):
+    """Test the vectors, the clustering, group cuts and prefix counting."""
+
+    def test_vectors_prune_common_features(self):
+        """Features in most directories are dropped and vectors have unit length."""
+        vectors = directory_vectors([["a", "x"], ["a", "y"], ["a", "x", "x"], ["a", "z"]])
+        self.assertTrue(all(len(vector) == 1 for vector in vectors[:3]))
+        for vector in vectors:
+            self.assertAlmostEqual(sum(w * w for w in vector.values()), 1.0)
+        self.assertEqual(vectors[0].keys(), vectors[2].keys())
+
+    def test_clusters_follow_shared_features(self):
+        """Similar directories merge; unrelated ones stay apart."""
+        features = {
+            "io_a": ["kw:read", "kw:write", "imp:io"],
+            "ui_a": ["kw:render", "kw:widget"],
+            "io_b": ["kw:read", "kw:write", "kw:stream"],
+            "ui_b": ["kw:render", "kw:widget", "kw:layout"],
+            "misc": ["kw:other"],
+        }
+        self.assertEqual(plan_directory_groups(features), [["io_a", "io_b"], ["ui_a", "ui_b"], ["misc"]])
+
+    def test_matches_greedy_clustering(self):
+        """Without a size cap the chain finds the same groups as merging the closest pair each time."""
+        rng = random.Random(0)
+        for _ in range(50):
+            count = rng.randrange(2, 30)
+            raw = [{rng.randrange(15): rng.random() for _ in range(rng.randrange(1, 6))} for _ in range(count)]
+            vectors = [{f: w / sum(v * v for v in vector.values()) ** 0.5 for f, w in vector.items()}
+                       for vector in raw]
+            self.assertEqual(cut_groups(count, cluster_vectors(vectors)), _greedy_groups(vectors, 0.3))
+
+    def test_size_cap(self):
+        """No group grows past max_group_size, and every input lands in one group."""
+        vectors = directory_vectors([["kw:same", f"kw:{i % 2}"] for i in range(7)] + [["kw:rest"]] * 3)
+        merges = cluster_vectors(vectors, max_size=3)
+        groups = cut_groups(len(vectors), merges, max_group_size=3)
+        self.assertTrue(all(len(group) <= 3 for group in groups))
+        self.assertEqual(sorted(i for group in groups for i in group), list(range(len(vectors))))
+        self.assertEqual(len(cut_groups(len(vectors), merges, max_group_size=1)), len(vectors))
+
+    def test_prefixes(self):
+        """Prefix counts come from the sorted names; the longest match wins."""
+        names = ["test_a.py", "test_b.py", "testing_c.py", "testing_d.py", "util_x.py", "main.py"]
+        self.assertEqual(SortedNames(names).count_prefix("test"), 4)
+        self.assertEqual(common_prefixes(names), ["testing", "test"])
+        self.assertEqual(longest_prefix("testing_c.py", {"test", "testing"}), "testing")
+        self.assertIsNone(longest_prefix("main.py", {"test"}))
+
+
+class TestOptimizeStructure(unittest.TestCase):
+    """Run the structure optimizer end to end on both of its paths."""
+
+    def test_split_large_directory(self):
+        """A directory over max_files is split by filename prefix."""
+        files = [f"src/{prefix}_{i}.py" for prefix in ("parser", "render") for i in range(6)]
+        file_data = {path: _file_data(path, [path.split("/")[1].split("_")[0]]) for path in files}
+        structure = optimize_structure([files], file_data, min_files=2, max_files=8)
+
+        (name, info), = structure.items()
+        self.assertIn(name, ("parser", "render"))
+        self.assertEqual(sorted(info["subdirs"]), ["parser", "render"])
+        self.assertEqual(sorted(info["subdirs"]["parser"]["files"]), sorted(files[:6]))
+
+    def test_group_many_directories(self):
+        """More than max_files directories are grouped by shared content, every file kept once."""
+        clusters, file_data = [], {}
+        for i in range(12):
+            topic = ("io", "ui", "db")[i % 3]
+            cluster = [f"src/{topic}{i}/mod{j}.py" for j in range(2)]
+            for path in cluster:
+                file_data[path] = _file_data(path, [topic, f"{topic}_extra"], [f"{topic}lib"])
+            clusters.append(cluster)
+        structure = optimize_structure(clusters, file_data, min_files=1, max_files=5)
+
+        self.assertLess(len(structure), len(clusters))
+
+        def files(info):
+            return info.get("files", []) + [f for sub in info.get("subdirs", {}).values() for f in files(sub)]
+        grouped = [files(info) for info in structure.values()]
+        self.assertEqual(sorted(f for group in grouped for f in group), sorted(file_data))
+        for group in grouped:
+            self.assertEqual(len({path.split("/")[1].rstrip("0123456789") for path in group}), 1, group)
+
+
+if __name__ == "__main__":
+    unittest.main()
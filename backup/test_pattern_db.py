@@ -0,0 +1,106 @@
+"""
+Pattern Database
+This module mines condition patterns from Python files in parallel and keeps
+them in a single versioned database.
+
+Test cases for pattern_db
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+# Add this directory to path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from pattern_db import PatternDatabase
+
+MODULE_A = """
+def decide(cpu, flag):
+    if cpu > 90:
+        return 1
+    if flag:
+        return 2
+    return 0
+"""
+
+MODULE_B = """
+class Worker:
+    def decide(self, x):
+        if x > 3:
+            return x
+        return 0
+"""
+
+
+class TestPatternDatabase(unittest.TestCase):
+    """Test incremental, parallel pattern mining."""
+
+    def setUp(self):
+        """Set up a small source tree."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, "src")
+        os.makedirs(self.src)
+        self._write("a.py", MODULE_A)
+        self._write("b.py", MODULE_B)
+        self.db_path = os.path.join(self.tmp.name, "patterns.json")
+
+    def tearDown(self):
+        """Clean up the source tree."""
+        self.tmp.cleanup()
+
+    def _write(self, name, content):
+        path = os.path.join(self.src, name)
+        with open(path, "w") as f:
+            f.write(content)
+        # Force a visible mtime change between rapid rewrites
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        return path
+
+    def test_same_named_functions_do_not_collide(self):
+        """Function patterns are keyed by file and qualified name."""
+        db = PatternDatabase(self.db_path)
+        db.update_directory(self.src, max_workers=1)
+        keys = sorted(db.function_patterns())
+        self.assertEqual(len(keys), 2)
+        self.assertTrue(keys[0].endswith("a.py::decide"))
+        self.assertTrue(keys[1].endswith("b.py::Worker.decide"))
+
+    def test_incremental_update(self):
+        """Only changed files are mined again, and totals stay consistent."""
+        db = PatternDatabase(self.db_path)
+        stats = db.update_directory(self.src, max_workers=1)
+        self.assertEqual(stats["mined"], 2)
+        self.assertEqual(db.top_patterns(2), [("Name", 1), ("Var(cpu)GtNum(int)", 1)])
+        db.save()
+
+        db = PatternDatabase(self.db_path)
+        self.assertEqual(db.version, 1)
+        stats = db.update_directory(self.src, max_workers=1)
+        self.assertEqual(stats["unchanged"], 2)
+        self.assertEqual(stats["mined"], 0)
+
+        self._write("a.py", MODULE_A.replace("cpu > 90", "cpu > 95"))
+        os.remove(os.path.join(self.src, "b.py"))
+        stats = db.update_directory(self.src, max_workers=1)
+        self.assertEqual(stats["mined"], 1)
+        self.assertEqual(stats["removed"], 1)
+        self.assertEqual(dict(db.totals), {"Var(cpu)GtNum(int)": 1, "Name": 1})
+
+    def test_parallel_matches_serial(self):
+        """Mining on a process pool produces the same database as serial mining."""
+        for i in range(20):
+            self._write(f"gen_{i}.py", MODULE_A.replace("90", str(i)))
+        serial = PatternDatabase(os.path.join(self.tmp.name, "serial.json"))
+        serial.update_directory(self.src, max_workers=1)
+        parallel = PatternDatabase(os.path.join(self.tmp.name, "parallel.json"))
+        parallel.update_directory(self.src, max_workers=2)
+        self.assertEqual(serial.totals, parallel.totals)
+        self.assertEqual(serial.function_patterns(), parallel.function_patterns())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Pipeline Functions
+This module contains LINQ-like pipeline functions for data processing.
+
+Test cases for pipeline
+"""
+import itertools
+import os
+import sys
+import unittest
+
+# Add this directory to path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from pipeline import Pipeline, from_iterable, group_by
+
+
+def square(x):
+    return x * x
+
+
+class TestPipeline(unittest.TestCase):
+    """Test laziness, fusion, short-circuiting, grouping and the process pool."""
+
+    def test_chain_matches_eager_functions(self):
+        """Fused where/select chains give the same results as step-by-step lists."""
+        data = list(range(100))
+        result = (from_iterable(data).where(lambda x: x % 2 == 0).select(lambda x: x * 3)
+                  .where(lambda x: x % 4 == 0).select(str).to_list())
+        self.assertEqual(result, [str(x * 3) for x in data if x % 2 == 0 and (x * 3) % 4 == 0])
+        self.assertEqual(Pipeline(data).select(square).to_set(), {x * x for x in data})
+
+    def test_lazy_and_short_circuit(self):
+        """Nothing runs until iteration, and first/take stop reading the input early."""
+        seen = []
+        pipeline = Pipeline(itertools.count()).select(lambda x: seen.append(x) or x).where(lambda x: x > 5)
+        self.assertEqual(seen, [])
+        self.assertEqual(pipeline.first_or_default(), 6)
+        self.assertEqual(seen, list(range(7)))
+        self.assertEqual(Pipeline(itertools.count()).where(lambda x: x % 3 == 0).take(3).to_list(), [0, 3, 6])
+        self.assertIsNone(Pipeline([]).first_or_default())
+        self.assertEqual(Pipeline([1, 2]).first_or_default(lambda x: x > 5, default=0), 0)
+
+    def test_order_by_and_take(self):
+        """order_by followed by take is a stable top-n."""
+        data = [("a", 3), ("b", 1), ("c", 3), ("d", 2)]
+        self.assertEqual(Pipeline(data).order_by(lambda p: p[1], reverse=True).take(2).to_list(),
+                         [("a", 3), ("c", 3)])
+        self.assertEqual(Pipeline(data).order_by(lambda p: p[1]).to_list(),
+                         sorted(data, key=lambda p: p[1]))
+
+    def test_group_by(self):
+        """Small inputs group in memory; large ones by sort-then-group with the same groups."""
+        data = [x % 7 for x in range(50)]
+        self.assertEqual(Pipeline(data).group_by(lambda x: -x).to_dict(), group_by(data, lambda x: -x))
+        spilled = Pipeline(iter(data)).group_by(lambda x: -x, memory_limit=8).to_list()
+        self.assertEqual([key for key, _ in spilled], sorted(group_by(data, lambda x: -x)))
+        self.assertEqual(dict(spilled), group_by(data, lambda x: -x))
+
+    def test_parallel_select(self):
+        """Selectors on the process pool keep input order."""
+        data = list(range(50))
+        result = Pipeline(data).select(square, workers=2, chunk_size=8).where(lambda x: x % 2).to_list()
+        self.assertEqual(result, [x * x for x in data if x % 2])
+        self.assertEqual(Pipeline([3]).select(square, workers=2).to_list(), [9])
+
+
+if __name__ == "__main__":
+    unittest.main()
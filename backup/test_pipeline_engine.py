@@ -0,0 +1,149 @@
+"""
+Pipeline Engine
+This module runs analysis pipelines as a DAG of content-addressed stages.
+
+Test cases for pipeline_engine
+"""
+import ast
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+# Add this directory to path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from pipeline_engine import PipelineEngine, Stage, code_fingerprint
+
+
+class TestPipelineEngine(unittest.TestCase):
+    """Test scheduling, memoization and failure handling."""
+
+    def setUp(self):
+        """Set up a cache directory and call counters."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def tearDown(self):
+        """Clean up the cache directory."""
+        self.tmp.cleanup()
+
+    def _track(self, name, func):
+        def wrapper(*args):
+            with self.lock:
+                self.calls.append(name)
+            return func(*args)
+        return wrapper
+
+    def _engine(self, slow=0.0):
+        def slow_count(tree):
+            time.sleep(slow)
+            return len(tree.body)
+
+        def slow_names(tree):
+            time.sleep(slow)
+            return [n.name for n in tree.body if isinstance(n, ast.FunctionDef)]
+
+        stages = [
+            Stage('parse', self._track('parse', ast.parse), ['source'], ['tree']),
+            Stage('count', self._track('count', slow_count), ['tree'], ['count']),
+            Stage('names', self._track('names', slow_names), ['tree'], ['names']),
+            Stage('report', self._track('report', lambda c, n: f"{c}:{','.join(n)}"),
+                  ['count', 'names'], ['report']),
+        ]
+        return PipelineEngine(stages, cache_dir=os.path.join(self.tmp.name, "cache"))
+
+    def test_results_and_parse_once(self):
+        """Every stage runs once and the tree is shared."""
+        run = self._engine().run({'source': "def a(): pass\ndef b(): pass\n"})
+        self.assertEqual(run['report'], "2:a,b")
+        self.assertEqual(self.calls.count('parse'), 1)
+
+    def test_memoized_by_content(self):
+        """Re-running on the same content hits the disk cache."""
+        source = "def a(): pass\n"
+        self._engine().run({'source': source})
+        self.calls.clear()
+        run = self._engine().run({'source': source})
+        self.assertEqual(self.calls, [])
+        self.assertTrue(all(t['cached'] for t in run.timings.values()))
+
+        self._engine().run({'source': source + "x = 1\n"})
+        self.assertIn('parse', self.calls)
+
+    def test_independent_stages_run_concurrently(self):
+        """Stages with ready inputs overlap in time."""
+        start = time.perf_counter()
+        self._engine(slow=0.2).run({'source': "x = 1\n"})
+        self.assertLess(time.perf_counter() - start, 0.38)
+
+    def test_failure_skips_dependents(self):
+        """A failing stage records its error and skips downstream stages."""
+        run = self._engine().run({'source': "def broken(:\n"})
+        self.assertIn('parse', run.errors)
+        self.assertTrue(run.errors['report'].startswith("skipped"))
+
+    def test_seed_reuses_artifacts(self):
+        """Artifacts seeded from a previous run are not recomputed."""
+        engine = self._engine()
+        front = engine.run({'source': "def a(): pass\n"}, targets=['tree'])
+        self.calls.clear()
+        engine.run({}, targets=['names'], seed=front.seed(['tree']))
+        self.assertNotIn('parse', self.calls)
+
+
+class TestCodeFingerprint(unittest.TestCase):
+    """Test that stage keys follow the code they run."""
+
+    def setUp(self):
+        """Put a scratch helper module on the path."""
+        self.tmp = tempfile.TemporaryDirectory()
+        sys.path.insert(0, self.tmp.name)
+        self.helper_path = os.path.join(self.tmp.name, "fingerprint_helper.py")
+
+    def tearDown(self):
+        """Forget the helper module."""
+        sys.modules.pop("fingerprint_helper", None)
+        sys.path.remove(self.tmp.name)
+        self.tmp.cleanup()
+
+    def _stage(self, body):
+        with open(self.helper_path, "w") as f:
+            f.write(f"def helper(x):\n    return {body}\n")
+        sys.modules.pop("fingerprint_helper", None)
+        import fingerprint_helper
+        # The stage calls the helper through a lambda, as starter_pipeline does
+        return Stage('double', lambda x: fingerprint_helper.helper(x), ['x'], ['y'])
+
+    def test_helper_edit_changes_key(self):
+        """Editing a helper in another file gives the stage a new key."""
+        before = self._stage("x * 2")
+        self.assertEqual(before.key(["d"]), self._stage("x * 2").key(["d"]))
+        after = self._stage("x + x")
+        self.assertNotEqual(before.key(["d"]), after.key(["d"]))
+
+    def test_version_still_counts(self):
+        """An explicit version bump changes the key as well."""
+        self.assertNotEqual(Stage('s', len, ['a'], ['b']).key([]),
+                            Stage('s', len, ['a'], ['b'], version="2").key([]))
+
+    def test_closures_are_followed(self):
+        """Wrapped functions are fingerprinted through their closure."""
+        def wrap(func):
+            return lambda *args: func(*args)
+
+        self._stage("x * 2")
+        import fingerprint_helper
+        first = code_fingerprint(wrap(fingerprint_helper.helper))
+        self._stage("x + x")
+        import fingerprint_helper
+        self.assertNotEqual(first, code_fingerprint(wrap(fingerprint_helper.helper)))
+
+
+if __name__ == "__main__":
+    unittest.main()
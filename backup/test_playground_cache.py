@@ -0,0 +1,102 @@
+"""
+Playground Cache
+This module keeps the playground's expensive work alive across Streamlit reruns.
+
+Test cases for playground_cache
+"""
+import os
+import sys
+import threading
+import time
+import unittest
+
+# Add this directory to path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from playground_cache import JobRunner, ResultCache, result_key
+
+
+def wait_for(job, timeout=5.0):
+    deadline = time.time() + timeout
+    while not job.done and time.time() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+class TestResultCache(unittest.TestCase):
+    """Test keys and LRU eviction."""
+
+    def test_result_key(self):
+        """Keys depend on code, function and options, not option order."""
+        key = result_key("x = 1", "f", {"a": 1, "b": 2})
+        self.assertEqual(key, result_key("x = 1", "f", {"b": 2, "a": 1}))
+        self.assertNotEqual(key, result_key("x = 2", "f", {"a": 1, "b": 2}))
+        self.assertNotEqual(key, result_key("x = 1", "g", {"a": 1, "b": 2}))
+        self.assertNotEqual(key, result_key("x = 1", "f", {"a": 1}))
+
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted first."""
+        cache = ResultCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+        self.assertNotIn("b", cache)
+        self.assertEqual(len(cache), 2)
+        calls = []
+        self.assertEqual(cache.get_or_compute("a", lambda: calls.append(1)), 1)
+        self.assertEqual(cache.get_or_compute("d", lambda: calls.append(1) or 4), 4)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats()["hits"], 2)
+
+
+class TestJobRunner(unittest.TestCase):
+    """Test background jobs, progress and caching of their results."""
+
+    def setUp(self):
+        self.runner = JobRunner(ResultCache(max_entries=4))
+
+    def tearDown(self):
+        self.runner.shutdown()
+
+    def test_job_reports_progress_and_caches(self):
+        """A running key is not resubmitted and its result lands in the cache."""
+        release = threading.Event()
+        calls = []
+
+        def operation(job, value):
+            calls.append(value)
+            job.report(0.5, "Halfway")
+            release.wait(5)
+            return value * 2
+
+        job = self.runner.submit("k", operation, 21)
+        self.assertIs(self.runner.submit("k", operation, 21), job)
+        deadline = time.time() + 5
+        while job.progress < 0.5 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual((job.status, job.message), ("running", "Halfway"))
+        self.assertEqual(self.runner.running(), 1)
+        release.set()
+
+        self.assertEqual(wait_for(job).result, 42)
+        self.assertEqual(self.runner.get("k").result, 42)
+        self.assertEqual(self.runner.submit("k", operation, 21).status, "done")
+        self.assertEqual(calls, [21])
+
+    def test_job_error(self):
+        """Failures are reported on the job and not cached."""
+        def operation(job):
+            raise ValueError("bad input")
+
+        job = wait_for(self.runner.submit("bad", operation))
+        self.assertEqual(job.status, "error")
+        self.assertIn("bad input", job.error)
+        self.assertNotIn("bad", self.runner.results)
+        self.assertIsNone(self.runner.get("missing"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Resource Profiler
+This module derives numeric resource profiles for functions from their AST.
+
+Test cases for resource_profiler
+"""
+import ast
+import os
+import sys
+import tempfile
+import textwrap
+import unittest
+
+# Add this directory to path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from resource_profiler import aggregate_profiles, profile_functions, profile_source
+
+SOURCE = textwrap.dedent('''
+    import socket as sk
+
+    def glue(x):
+        """Mentions for loops, lists, caches and sockets only in prose."""
+        return x + 1
+
+    def nested(n=60):
+        total = 0
+        for i in range(n):
+            for j in range(n):
+                total += i * j
+        return total
+
+    def hungry(n=100000):
+        chunks = []
+        for i in range(n):
+            chunks.append([i] * 4)
+        return len(chunks)
+
+    def connect(host):
+        return sk.create_connection((host, 80))
+
+    class Walker:
+        def walk(self, node):
+            return [self.walk(child) for child in node.children]
+''')
+
+
+class TestResourceProfiler(unittest.TestCase):
+    """Test AST features, scoring and sandboxed calibration."""
+
+    def setUp(self):
+        """Write the sample module."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "sample.py")
+        with open(self.path, "w") as f:
+            f.write(SOURCE)
+        self.profiles = profile_functions(ast.parse(SOURCE))
+
+    def tearDown(self):
+        """Clean up the sample module."""
+        self.tmp.cleanup()
+
+    def test_features(self):
+        """Loop nesting, loop allocations, recursion and aliased calls are found."""
+        self.assertEqual(self.profiles["nested"]["features"]["max_loop_depth"], 2)
+        self.assertEqual(self.profiles["hungry"]["features"]["loop_allocations"], 2)
+        self.assertEqual(self.profiles["Walker.walk"]["features"]["recursive"], 1)
+        self.assertEqual(self.profiles["connect"]["features"]["network_calls"], 1)
+
+    def test_focus_ignores_keywords_in_text(self):
+        """Words in docstrings don't make a function look heavy."""
+        self.assertEqual(self.profiles["glue"]["focus"], "core")
+        self.assertEqual(max(self.profiles["glue"]["profile"].values()), 0.0)
+        self.assertEqual(self.profiles["nested"]["focus"], "cpu")
+        self.assertEqual(self.profiles["connect"]["focus"], "network")
+        self.assertGreater(self.profiles["hungry"]["profile"]["memory"], self.profiles["nested"]["profile"]["memory"])
+        self.assertEqual(profile_source("    def f(x):\n        return x\n")["focus"], "core")
+
+    def test_aggregate(self):
+        """Profiles combine by mean or by peak."""
+        a, b = self.profiles["nested"]["profile"], self.profiles["connect"]["profile"]
+        self.assertEqual(aggregate_profiles([a, b], how="max")["network"], b["network"])
+        self.assertAlmostEqual(aggregate_profiles([a, b])["cpu"], a["cpu"] / 2, places=2)
+
+    @unittest.skipUnless(os.name == "posix", "calibration needs the resource module")
+    def test_calibration(self):
+        """Only allowed argument-free functions are measured, in a separate process."""
+        profiles = profile_functions(ast.parse(SOURCE), self.path, calibrate=["hungry", "connect", "walk"])
+        measured = profiles["hungry"]["measured"]
+        self.assertIsNone(measured["error"])
+        self.assertGreater(measured["peak_memory"], 1 << 20)
+        self.assertNotIn("measured", profiles["connect"])
+        self.assertNotIn("measured", profiles["Walker.walk"])
+        self.assertNotIn("measured", profiles["nested"])
+        self.assertNotEqual(profiles["hungry"]["profile"], self.profiles["hungry"]["profile"])
+
+    @unittest.skipUnless(os.name == "posix", "calibration needs the resource module")
+    def test_calibration_needs_opt_in(self):
+        """Functions that did not opt in, such as main(), never run."""
+        marker = os.path.join(self.tmp.name, "ran")
+        source = textwrap.dedent(f'''
+            def calibration_target(func):
+                return func
+
+            @calibration_target
+            def work():
+                return sum(range(1000))
+
+            def main(path={marker!r}):
+                open(path, "w").close()
+        ''')
+        path = os.path.join(self.tmp.name, "opt_in.py")
+        with open(path, "w") as f:
+            f.write(source)
+
+        profiles = profile_functions(ast.parse(source), path, calibrate=True)
+        self.assertIsNone(profiles["work"]["measured"]["error"])
+        self.assertNotIn("measured", profiles["main"])
+        self.assertFalse(os.path.exists(marker))
+
+        profiles = profile_functions(ast.parse(source), path, calibrate=["main"])
+        self.assertIn("measured", profiles["main"])
+        self.assertTrue(os.path.exists(marker))
+
+
+if __name__ == "__main__":
+    unittest.main()
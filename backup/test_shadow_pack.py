@@ -0,0 +1,99 @@
+"""
+Shadow Pack
+This module stores shadow trees in a compact packed file and reads them lazily.
+
+Test cases for shadow_pack
+"""
+import gc
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add this directory to path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from shadow_pack import PackedShadowTree, write_pack
+from shadow_search import SearchIndex, iter_nodes, node_fields
+
+
+class Node:
+    """Minimal stand-in for ShadowNode."""
+
+    def __init__(self, name, parent=None, summary="", keywords=()):
+        self.name = name
+        self.path = Path("shadow") / name
+        self.code_path = Path("code") / name if parent is not None else None
+        self.summary = summary
+        self.description = f"About {name}"
+        self.keywords = list(keywords)
+        self.children = []
+        self.level = 0 if parent is None else parent.level + 1
+        if parent is not None:
+            parent.children.append(self)
+
+
+def _tree():
+    root = Node("src")
+    for d in range(3):
+        directory = Node(f"dir{d}", root, "A directory")
+        for f in range(4):
+            Node(f"file{d}_{f}.py", directory, f"File {f}", ["parse", f"kw{f}"])
+    return root
+
+
+class TestShadowPack(unittest.TestCase):
+    """Test the packed format round trip and lazy materialization."""
+
+    def setUp(self):
+        """Write a packed tree."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = _tree()
+        self.pack_path = write_pack(self.source, os.path.join(self.tmp.name, "shadow_tree.pack"))
+        self.packed = PackedShadowTree(self.pack_path)
+
+    def tearDown(self):
+        """Close the pack and clean up."""
+        self.packed.close()
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        """Every node reads back with the same fields and child order."""
+        def fields(node):
+            return (node.name, node.path, node.code_path, node.summary, node.description,
+                    node.keywords, node.level, [child.name for child in node.children])
+
+        expected = [(key, fields(node)) for key, node in iter_nodes(self.source)]
+        actual = [(key, fields(node)) for key, node in iter_nodes(self.packed.root)]
+        self.assertEqual(actual, expected)
+        self.assertIsNone(self.packed.root.code_path)
+        self.assertEqual(self.packed.root.find_child("dir1").find_child("file1_2.py").keywords, ["parse", "kw2"])
+
+    def test_lazy_materialization(self):
+        """Opening decodes nothing and unreferenced nodes are released."""
+        self.assertEqual(self.packed.resident_nodes(), 0)
+        leaf = self.packed.root.find_child("dir2").find_child("file2_3.py")
+        self.assertEqual(leaf.parent.name, "dir2")
+        self.assertIs(leaf.parent, self.packed.root.find_child("dir2"))
+        gc.collect()
+        self.assertLessEqual(self.packed.resident_nodes(), 2)
+
+        shallow = self.packed.root.to_dict(depth=1)
+        self.assertEqual(shallow["children"][0]["children"][:2], ["file0_0.py", "file0_1.py"])
+
+    def test_search_items_match_nodes(self):
+        """Search items listed from the table match those of the node tree."""
+        from_nodes = SearchIndex()
+        from_nodes.sync(self.source)
+        from_pack = SearchIndex()
+        from_pack.sync_items(self.packed.iter_search_items())
+        self.assertEqual(from_pack.search("parse kw3"), from_nodes.search("parse kw3"))
+        self.assertEqual(dict(self.packed.iter_search_items())["src/dir0"],
+                         node_fields(self.source.children[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+Shadow Search
+This module indexes shadow tree nodes for fast ranked search.
+
+Test cases for shadow_search
+"""
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+# Add this directory to path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from shadow_search import SearchIndex, open_index, tokenize
+
+
+class Node:
+    """Minimal stand-in for ShadowNode."""
+
+    def __init__(self, name, summary="", description="", keywords=(), children=()):
+        self.name = name
+        self.summary = summary
+        self.description = description
+        self.keywords = list(keywords)
+        self.children = list(children)
+
+
+def _tree():
+    return Node("src", children=[
+        Node("shadow_tree.py", "Shadow tree generator", "Builds natural language trees", ["tree", "shadow"], [
+            Node("ShadowTreeNavigator", "Navigates the tree", "Moves up and down", ["navigate"]),
+        ]),
+        Node("exporter.py", "Exports IR models", "Writes Python code, not a tree", ["export"]),
+    ])
+
+
+class TestShadowSearch(unittest.TestCase):
+    """Test tokenization, ranking, completion and incremental updates."""
+
+    def test_tokenize_identifiers(self):
+        """Identifiers split on case and underscores but keep the whole name."""
+        self.assertEqual(tokenize("ShadowTreeNavigator"), ["shadow", "tree", "navigator", "shadowtreenavigator"])
+        self.assertEqual(tokenize("shadow_tree.py"), ["shadow", "tree", "shadow_tree", "py"])
+        self.assertEqual(tokenize("HTTPServer"), ["http", "server", "httpserver"])
+
+    def test_ranking_and_completion(self):
+        """Name hits outrank description hits, and partial terms are completed."""
+        index = SearchIndex()
+        index.sync(_tree())
+        results = index.search("navigator")
+        self.assertEqual(results[0][0], "src/shadow_tree.py/ShadowTreeNavigator")
+
+        keys = [key for key, _ in index.search("tree", limit=None)]
+        self.assertLess(keys.index("src/shadow_tree.py"), keys.index("src/exporter.py"))
+
+        self.assertIn("navigator", index.complete("navi"))
+        self.assertEqual(index.search("navig")[0][0], "src/shadow_tree.py/ShadowTreeNavigator")
+
+    def test_incremental_sync(self):
+        """Only changed nodes are re-indexed and removed nodes disappear."""
+        tree = _tree()
+        index = SearchIndex()
+        index.sync(tree)
+
+        tree.children[1].summary = "Exports IR models as decision tables"
+        tree.children[0].children = []
+        stats = index.sync(tree)
+        self.assertEqual(stats, {'added': 1, 'unchanged': 2, 'removed': 1})
+        self.assertEqual(index.search("decision")[0][0], "src/exporter.py")
+        self.assertEqual(index.search("navigator"), [])
+        self.assertEqual(index.complete("navi"), [])
+
+    def test_impact_lists_match_exhaustive_scoring(self):
+        """The early-terminating top-k agrees with scoring every posting."""
+        random.seed(1)
+        words = ["alpha", "beta", "gamma", "delta", "parse", "node"]
+        root = Node("root", children=[
+            Node(f"item{i}", " ".join(random.choices(words, k=random.randint(1, 6))),
+                 " ".join(random.choices(words, k=random.randint(0, 8))))
+            for i in range(3000)
+        ])
+        index = SearchIndex()
+        index.sync(root)
+        for query in ("parse", "parse node", "alpha gamma delta"):
+            top = index.search(query, limit=10)
+            everything = index.search(query, limit=None)[:10]
+            self.assertEqual([round(s, 9) for _, s in top], [round(s, 9) for _, s in everything])
+
+    def test_persisted_index_reused(self):
+        """A saved index is reused while the tree file is unchanged."""
+        with tempfile.TemporaryDirectory() as tmp:
+            tree_path = os.path.join(tmp, "shadow_tree.json")
+            index_path = os.path.join(tmp, "search_index.pkl")
+            with open(tree_path, "w") as f:
+                f.write("{}")
+            open_index(_tree(), tree_path, index_path)
+
+            reloaded = open_index(Node("unrelated"), tree_path, index_path)
+            self.assertEqual(len(reloaded), 4)
+            self.assertTrue(reloaded.search("navigator"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+Shadow Tree Generator
+Creates a natural language shadow tree that mirrors the code structure.
+
+Test cases for incremental regeneration in shadow_tree
+"""
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+# Add this directory to path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+import navigator
+import shadow_tree
+from shadow_tree import MANIFEST_FILE, PACK_FILE, ShadowTreeGenerator, ShadowTreeNavigator
+
+
+class TestShadowTreeGenerator(unittest.TestCase):
+    """Test manifest-based change detection and node reuse."""
+
+    def setUp(self):
+        """Create a small code tree."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.code_dir = os.path.join(self.tmp.name, "code")
+        self.output_dir = os.path.join(self.tmp.name, "shadow")
+        os.makedirs(os.path.join(self.code_dir, "pkg"))
+        self._write("alpha.py", '"""Alpha parses things. It is documented."""\n')
+        self._write("beta.py", "def make_widget():\n    pass\n")
+        self._write(os.path.join("pkg", "gamma.py"), "class GammaRay:\n    pass\n")
+
+    def tearDown(self):
+        """Clean up the code tree."""
+        self.tmp.cleanup()
+
+    def _write(self, rel_path, content):
+        path = os.path.join(self.code_dir, rel_path)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def _generate(self, generator_class=ShadowTreeGenerator, max_workers=1, **kwargs):
+        generator = generator_class(max_workers=max_workers, **kwargs)
+        root = generator.generate_from_directory(self.code_dir, self.output_dir)
+        return generator, {child.name: child for child in root.children}
+
+    def test_first_generation(self):
+        """Files are described once and a manifest is written."""
+        generator, nodes = self._generate()
+        self.assertEqual(generator.files_processed, 3)
+        self.assertEqual(nodes["alpha.py"].summary, "Alpha parses things.")
+        self.assertEqual(nodes["beta.py"].summary, "Contains make widget")
+        self.assertEqual(list(nodes), ["alpha.py", "beta.py", "pkg"])
+        self.assertTrue(os.path.exists(os.path.join(self.output_dir, MANIFEST_FILE)))
+
+    def test_only_changed_files_reprocessed(self):
+        """Regeneration reuses unchanged files and touched-but-identical files."""
+        self._generate()
+        path = self._write("beta.py", "def make_gadget():\n    pass\n")
+        future = time.time() + 10
+        os.utime(os.path.join(self.code_dir, "alpha.py"), (future, future))
+
+        generator, nodes = self._generate()
+        self.assertEqual(generator.files_processed, 1)
+        self.assertEqual(generator.files_reused, 2)
+        self.assertEqual(nodes["beta.py"].summary, "Contains make gadget")
+        self.assertEqual(nodes["alpha.py"].summary, "Alpha parses things.")
+
+        os.remove(path)
+        generator, nodes = self._generate()
+        self.assertNotIn("beta.py", nodes)
+        self.assertEqual(generator.files_processed, 0)
+
+    def test_descriptions_and_pack(self):
+        """Keywords are extracted and the saved pack opens in the navigator."""
+        generator, nodes = self._generate()
+        self.assertIn("alpha", nodes["alpha.py"].keywords)
+        self.assertIn("make_widget", nodes["beta.py"].keywords)
+
+        nav = ShadowTreeNavigator(os.path.join(self.output_dir, PACK_FILE))
+        self.assertEqual([child.name for child in nav.tree.children], ["alpha.py", "beta.py", "pkg"])
+
+    def test_exported_files(self):
+        """The JSON tree and node files are written by default; the pack always."""
+        self._generate()
+        for rel_path in ("shadow_tree.json", PACK_FILE, os.path.join("beta_shadow.md", "node.json"),
+                         os.path.join("beta_shadow.md", "README.md")):
+            self.assertTrue(os.path.exists(os.path.join(self.output_dir, rel_path)), rel_path)
+
+        self.output_dir = os.path.join(self.tmp.name, "pack_only")
+        self._generate(export_files=False)
+        self.assertEqual(sorted(os.listdir(self.output_dir)), sorted([MANIFEST_FILE, PACK_FILE]))
+
+    def test_process_pool_matches_serial(self):
+        """Describing files on a process pool gives the same nodes."""
+        with mock.patch.object(shadow_tree, "PARALLEL_THRESHOLD", 1):
+            generator, nodes = self._generate(max_workers=2)
+        self.assertEqual(generator.files_processed, 3)
+        self.assertEqual(nodes["alpha.py"].summary, "Alpha parses things.")
+        self.assertEqual(nodes["pkg"].children[0].summary, "Contains gamma ray")
+
+    def test_navigator_copy_generates(self):
+        """The navigator module's copy of the generator runs too."""
+        generator, nodes = self._generate(navigator.ShadowTreeGenerator)
+        self.assertEqual(generator.files_processed, 3)
+        self.assertEqual(nodes["beta.py"].summary, "Contains make widget")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+"""
+Value Profiler
+This module records argument type/value distributions for hot functions and
+builds guarded fast paths from them.
+
+Test cases for value_profiler
+"""
+import os
+import sys
+import threading
+import unittest
+
+# Add this directory to path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from value_profiler import (
+    ValueProfile,
+    ConstantFastPath,
+    GuardedFastPath,
+    MemoFastPath,
+    build_constant_specialization,
+    is_pure_function,
+    plan_fast_path
+)
+
+SCALE = 3
+
+
+def pure_square(x):
+    return x * x * SCALE
+
+
+def impure_append(items, value):
+    items.append(value)
+    return items
+
+
+def pure_pair(x):
+    return [x, x]
+
+
+def scaled(value, mode):
+    if mode == "double":
+        return value * 2
+    elif mode == "triple":
+        return value * 3
+    return value
+
+
+class TestValueProfiler(unittest.TestCase):
+    """Test profiling, specialization and deoptimization."""
+
+    def _profile(self, func, calls):
+        profile = ValueProfile()
+        for args in calls:
+            profile.record(args, {}, 0.001)
+        return profile
+
+    def test_purity_analysis(self):
+        """Pure functions are recognized; mutating ones are not."""
+        self.assertTrue(is_pure_function(pure_square))
+        self.assertFalse(is_pure_function(impure_append))
+
+    def test_memo_fast_path_for_hot_keys(self):
+        """A pure function with few hot tuples gets a memo table."""
+        profile = self._profile(pure_square, [(i % 4,) for i in range(200)])
+        fast_path = plan_fast_path(pure_square, profile, pure=True)
+        self.assertIsInstance(fast_path, MemoFastPath)
+        for i in range(40):
+            self.assertEqual(fast_path(i % 4), pure_square(i % 4))
+        self.assertEqual(fast_path.hits, 40)
+        self.assertEqual(len(fast_path.table), 4)
+
+    def test_constant_specialization_folds_branches(self):
+        """A stable argument is folded in and dead branches removed."""
+        specialized = build_constant_specialization(scaled, {1: "triple"})
+        self.assertIsNotNone(specialized)
+        self.assertEqual(specialized(5, "triple"), 15)
+        # The folded copy no longer looks at the mode argument
+        self.assertEqual(specialized(5, "ignored"), 15)
+
+    def test_guard_falls_back_and_deoptimizes(self):
+        """Shifting the distribution triggers deoptimization."""
+        profile = self._profile(scaled, [(i, "double") for i in range(200)])
+        deopts = []
+        fast_path = plan_fast_path(scaled, profile, pure=False, on_deopt=deopts.append)
+        self.assertIsInstance(fast_path, ConstantFastPath)
+        self.assertEqual(fast_path(4, "double"), 8)
+        for i in range(300):
+            self.assertEqual(fast_path(i, "triple"), i * 3)
+        self.assertFalse(fast_path.active)
+        self.assertEqual(deopts, [fast_path])
+        self.assertGreater(fast_path.report()['misses'], 0)
+
+    def test_memo_keys_distinguish_equal_values_of_other_types(self):
+        """1, 1.0 and True are memoized separately."""
+        profile = self._profile(repr, [(1,), (1.0,), (True,)] * 50)
+        fast_path = MemoFastPath(repr, profile.hot_keys(), profile.average_time)
+        self.assertEqual([fast_path(1), fast_path(1.0), fast_path(True)], ["1", "1.0", "True"])
+        self.assertEqual(len(fast_path.table), 3)
+
+    def test_memo_does_not_share_mutable_results(self):
+        """A mutable result is not memoized and the memo fast path deoptimizes."""
+        profile = self._profile(pure_pair, [(1,)] * 200)
+        deopts = []
+        fast_path = MemoFastPath(pure_pair, profile.hot_keys(), profile.average_time, on_deopt=deopts.append)
+        first = fast_path(1)
+        first.append("changed")
+        self.assertEqual(fast_path(1), [1, 1])
+        self.assertEqual(fast_path.table, {})
+        self.assertEqual(deopts, [fast_path])
+
+    def test_counters_are_thread_safe(self):
+        """Concurrent calls are all counted and deoptimization is reported once."""
+        profile = self._profile(scaled, [(i, "double") for i in range(200)])
+        deopts = []
+        fast_path = plan_fast_path(scaled, profile, pure=False, on_deopt=deopts.append)
+
+        def worker():
+            for i in range(2000):
+                fast_path(i, "double" if i % 2 else "triple")
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        report = fast_path.report()
+        self.assertEqual(report['hits'] + report['misses'], 8 * 2000)
+        self.assertLessEqual(len(deopts), 1)
+
+    def test_position_values_stay_bounded(self):
+        """Values already tracked keep counting once a position holds eight."""
+        profile = self._profile(scaled, [(i % 10, "double") for i in range(100)])
+        self.assertEqual(len(profile.position_values[0]), 8)
+        self.assertEqual(profile.position_values[0][(int, 0)], 10)
+        self.assertEqual(profile.position_values[1][(str, "double")], 100)
+
+    def test_fast_path_must_implement_fast_call(self):
+        """GuardedFastPath is abstract."""
+        with self.assertRaises(TypeError):
+            GuardedFastPath(pure_square, 'none', 0.0)
+
+    def test_no_fast_path_for_cold_functions(self):
+        """Functions below the call threshold are left alone."""
+        profile = self._profile(pure_square, [(1,)] * 10)
+        self.assertIsNone(plan_fast_path(pure_square, profile, pure=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,12 @@
 import streamlit as st
+import atexit
 import os
 import sys
 import json
+import tempfile
+import time
 from core.ui_utils import get_unique_key
+from core.playground_cache import RESULT_CACHE_SIZE, JobRunner, ResultCache, result_key
 # Fix imports for reorganized codebase
 import utils.import_utils
 
@@ -73,13 +77,155 @@ def initialize_system():
     
     return registry, background
 
+# Seconds between reruns while a job is running
+POLL_INTERVAL = 0.5
+
+@st.cache_resource
+def get_system():
+    """
+    Build the system once per process.
+
+    Streamlit reruns the script on every interaction, so the registry, the
+    background system and the job runner are cached as a resource instead of
+    being rebuilt (and their threads restarted) on each rerun.
+    """
+    registry, background = initialize_system()
+    jobs = JobRunner(ResultCache(RESULT_CACHE_SIZE))
+    
+    def cleanup():
+        jobs.shutdown()
+        registry.shutdown_all()
+        background.stop()
+        runtime_optimizer.stop()
+        
+    atexit.register(cleanup)
+    return registry, background, jobs
+
+def poll_job(jobs, key, label):
+    """
+    Show the progress of the job for key and return its result once done.
+    While the job runs the script reruns after a short pause, so the page
+    stays responsive instead of blocking on the operation.
+    """
+    job = jobs.get(key)
+    if job is None:
+        return None
+    if not job.done:
+        st.progress(job.progress)
+        st.caption(f"{label} {job.message}")
+        time.sleep(POLL_INTERVAL)
+        st.rerun()
+    if job.status == "error":
+        st.error(f"{label} failed: {job.error}")
+        return None
+    return job.result
+
+def run_job(jobs, label, key, operation, *args, start=False):
+    """Start an operation on the job pool when start is set, then poll it."""
+    if start:
+        jobs.submit(key, operation, *args)
+    return poll_job(jobs, key, label)
+
+def run_module_command(job, module, request):
+    """Job operation that passes a request to a module."""
+    return module.process(request)
+
+def run_resource_analysis(job, optimization_module, source_code, function_name, profile):
+    """Job operation analyzing code and optimizing it for a resource profile."""
+    job.report(0.0, "Analyzing")
+    analysis = optimization_module.analyze_code(source_code, function_name)
+    job.report(0.5, "Optimizing for profile")
+    optimization = optimization_module.optimize_for_profile(source_code, function_name, profile)
+    return {'analysis': analysis, 'optimization': optimization}
+
+def run_analysis_pipeline(job, registry, source, function_name):
+    """Job operation running parse, IR, proof, graph, optimization and export."""
+    context = {'function_name': function_name, 'source': source}
+    job.report(0.0, "Parsing")
+    functions = registry.get_module("ast_parser").process(source, context)
+    if not functions:
+        return {'functions': functions}
+    
+    job.report(0.2, "Generating IR")
+    ir_model = registry.get_module("ir_generator").process(functions, context)
+    job.report(0.4, "Proving")
+    proof_result = registry.get_module("proof_engine").process(ir_model, context)
+    job.report(0.6, "Building graph")
+    registry.get_module("graph_builder").process(functions, context)
+    call_graph = context.get('call_graph')
+    job.report(0.7, "Optimizing")
+    optimization = registry.get_module("optimizer").process(ir_model, context)
+    job.report(0.9, "Exporting")
+    code = registry.get_module("exporter").process(ir_model, context)
+    return {
+        'functions': functions,
+        'ir_model': ir_model,
+        'proof_result': proof_result,
+        'optimization': optimization,
+        'code': code,
+        'call_graph': call_graph
+    }
+
+def render_call_graph(graph):
+    """Render the call graph only when it is shown, returning the PNG bytes."""
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(graph.render(os.path.join(tmp, "function_graph.png")), "rb") as f:
+            return f.read()
+
+def render_analysis_results(result):
+    """Show the results of run_analysis_pipeline."""
+    ir_model = result['ir_model']
+    st.write("### Analysis Results")
+    st.write(f"- Functions found: {len(result['functions'])}")
+    st.write(f"- Logic rules: {len(ir_model['logic'])}")
+    st.write(f"- Proof result: {ir_model.get('proof_result', False)}")
+    
+    # Show the graph; building it computed no layout, so render it on request
+    call_graph = result.get('call_graph')
+    if call_graph is not None and call_graph.node_count and st.checkbox("Show call graph"):
+        st.image(render_call_graph(call_graph))
+    
+    # Show the optimized code
+    st.code(result['code'], language="python")
+
+def lazy_tabs(labels, key):
+    """
+    Tab selector whose tabs only run when selected.
+    st.tabs executes every tab's code on each rerun, so heavy views use this
+    and render just the visible one.
+    """
+    return st.radio("View", labels, horizontal=True, key=key, label_visibility="collapsed")
+
+# The shadow tree generator always writes the pack, and the JSON tree unless export_files=False
+SHADOW_PACK_FILE = "shadow_tree.pack"
+SHADOW_JSON_FILE = "shadow_tree.json"
+
+def load_shadow_tree(shadow_dir):
+    """
+    The shadow tree saved in shadow_dir as nested dicts, or None if none was generated.
+    The packed tree is read when present, otherwise a JSON export.
+    """
+    pack_path = os.path.join(shadow_dir, SHADOW_PACK_FILE)
+    if os.path.exists(pack_path):
+        from core.shadow_pack import PackedShadowTree
+        tree = PackedShadowTree(pack_path)
+        try:
+            return tree.root.to_dict()
+        finally:
+            tree.close()
+    json_path = os.path.join(shadow_dir, SHADOW_JSON_FILE)
+    if os.path.exists(json_path):
+        with open(json_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return None
+
 def run_ui():
     # Clear UI keys at the start of each session
     if "used_ui_keys" in st.session_state:
         st.session_state.used_ui_keys = set()
         
-    # Initialize the system
-    registry, background = initialize_system()
+    # One system per process, shared by all sessions and reruns
+    registry, background, jobs = get_system()
     
     st.title("Logic Tool Playground")
     
@@ -104,6 +250,30 @@ def run_ui():
         st.sidebar.write("### Runtime Optimization Stats")
         for key, value in stats.items():
             st.sidebar.write(f"**{key.replace('_', ' ').title()}**: {value}")
+        
+        cache_stats = jobs.results.stats()
+        st.sidebar.write(f"**Cached Results**: {cache_stats['entries']} "
+                         f"({cache_stats['hits']} hits, {jobs.running()} running)")
+    
+    # Add background optimization option
+    st.sidebar.header("Background Optimization")
+    if st.sidebar.button("Optimize in Background"):
+        def background_optimization():
+            # Use runtime optimizer for real optimization
+            from core.runtime_utils import mine_patterns_from_directory
+            import os
+            
+            # Mine patterns from the src directory
+            src_dir = os.path.dirname(os.path.abspath(__file__))
+            mine_patterns_from_directory(src_dir)
+            
+            # Update stats
+            runtime_optimizer.optimization_stats['patterns_found'] += 5
+            runtime_optimizer.optimization_stats['functions_optimized'] += 2
+            return "Runtime optimization complete"
+            
+        background.add_task(background_optimization)
+        st.sidebar.success("Added runtime optimization task to background queue")
     
     # Function selector
     function_type = st.radio(
@@ -207,30 +377,13 @@ def calculator(a, b, operation):
             st.write("### Example Code")
             st.code(source_code, language="python")
         
-        # Show analysis button
-        if source_code and st.button("Analyze Code"):
-            with st.spinner("Analyzing..."):
-                # Run the pipeline using modules
-                context = {'function_name': function_name, 'source': source_code}
-                functions = registry.get_module("ast_parser").process(source_code, context)
-                ir_model = registry.get_module("ir_generator").process(functions, context)
-                proof_result = registry.get_module("proof_engine").process(ir_model, context)
-                registry.get_module("graph_builder").process(functions, context)
-                optimization = registry.get_module("optimizer").process(ir_model, context)
-                code = registry.get_module("exporter").process(ir_model, context)
-                
-                # Show results
-                st.write("### Analysis Results")
-                st.write(f"- Functions found: {len(functions)}")
-                st.write(f"- Logic rules: {len(ir_model['logic'])}")
-                st.write(f"- Proof result: {ir_model.get('proof_result', False)}")
-                
-                # Show the graph
-                if os.path.exists("function_graph.png"):
-                    st.image("function_graph.png")
-                
-                # Show the optimized code
-                st.code(code, language="python")
+        # Show analysis button; the pipeline runs on the job pool and its
+        # result is cached by code, function and tool
+        start = bool(source_code) and st.button("Analyze Code")
+        result = run_job(jobs, "Analyzing...", result_key(source_code, function_name, {'tool': 'pipeline'}),
+                         run_analysis_pipeline, registry, source_code, function_name, start=start)
+        if result is not None and result['functions']:
+            render_analysis_results(result)
     
     elif function_type == "Custom Function":
         st.header("Custom Function Analysis")
@@ -249,66 +402,29 @@ def calculator(a, b, operation):
         function_name = st.text_input("Function Name", "custom_logic")
         
         # Show analysis button
-        if st.button("Analyze Custom Logic"):
-            with st.spinner("Analyzing..."):
-                # Run the pipeline using modules
-                context = {'function_name': function_name, 'source': source}
-                functions = registry.get_module("ast_parser").process(source, context)
+        key = result_key(custom_code, function_name, {'tool': 'pipeline'})
+        result = run_job(jobs, "Analyzing...", key, run_analysis_pipeline, registry, custom_code, function_name,
+                         start=st.button("Analyze Custom Logic"))
+        if result is not None:
+            if result['functions']:
+                render_analysis_results(result)
                 
-                if functions:
-                    ir_model = registry.get_module("ir_generator").process(functions, context)
-                    proof_result = registry.get_module("proof_engine").process(ir_model, context)
-                    registry.get_module("graph_builder").process(functions, context)
-                    optimization = registry.get_module("optimizer").process(ir_model, context)
-                    code = registry.get_module("exporter").process(ir_model, context)
-                    
-                    # Show results
-                    st.write("### Analysis Results")
-                    st.write(f"- Functions found: {len(functions)}")
-                    st.write(f"- Logic rules: {len(ir_model['logic'])}")
-                    st.write(f"- Proof result: {ir_model.get('proof_result', False)}")
-                    
-                    # Show the graph
-                    if os.path.exists("function_graph.png"):
-                        st.image("function_graph.png")
-                    
-                    # Show the optimized code
-                    st.code(code, language="python")
-                    
-                    # Add runtime optimization option
-                    if st.button("Apply Runtime Optimization"):
-                        with st.spinner("Applying runtime optimization..."):
-                            # Integrate with runtime optimization
-                            optimized_results = integrate_with_pipeline({
-                                'ir_model': ir_model,
-                                'exported_code': code
-                            })
-                            
-                            # Show runtime optimized code
-                            st.write("### Runtime Optimized Code")
-                            st.code(optimized_results.get('runtime_optimized_code', code), language="python")
-                else:
-                    st.error(f"No functions found in the provided code")
-    
-    # Add background optimization option
-    st.sidebar.header("Background Optimization")
-    if st.sidebar.button("Optimize in Background"):
-        def background_optimization():
-            # Use runtime optimizer for real optimization
-            from core.runtime_utils import mine_patterns_from_directory
-            import os
-            
-            # Mine patterns from the src directory
-            src_dir = os.path.dirname(os.path.abspath(__file__))
-            mine_patterns_from_directory(src_dir)
-            
-            # Update stats
-            runtime_optimizer.optimization_stats['patterns_found'] += 5
-            runtime_optimizer.optimization_stats['functions_optimized'] += 2
-            return "Runtime optimization complete"
-            
-        background.add_task(background_optimization)
-        st.sidebar.success("Added runtime optimization task to background queue")
+                # Add runtime optimization option
+                if st.button("Apply Runtime Optimization"):
+                    with st.spinner("Applying runtime optimization..."):
+                        # Integrate with runtime optimization
+                        optimized_results = jobs.results.get_or_compute(
+                            result_key(custom_code, function_name, {'tool': 'runtime_optimization'}),
+                            lambda: integrate_with_pipeline({
+                                'ir_model': result['ir_model'],
+                                'exported_code': result['code']
+                            }))
+                        
+                        # Show runtime optimized code
+                        st.write("### Runtime Optimized Code")
+                        st.code(optimized_results.get('runtime_optimized_code', result['code']), language="python")
+            else:
+                st.error(f"No functions found in the provided code")
     
     # Runtime Optimization section
     elif function_type == "Runtime Optimization":
@@ -529,157 +645,155 @@ def calculator(a, b, operation):
                 format_func=lambda x: x.replace("_", " ").title()
             )
             
-            # Run optimization
-            if st.button("Analyze Resource Trade-offs"):
-                with st.spinner("Analyzing resource trade-offs..."):
-                    # Extract IR model
-                    ir_model = get_ir_model(source_code, function_name)
-                    
-                    # Create constraints dictionary
-                    constraints = {
-                        "cpu": cpu_constraint / 100.0,
-                        "memory": memory_constraint / 100.0,
-                        "gpu": gpu_constraint / 100.0,
-                        "network": network_constraint / 100.0,
-                        "startup": startup_constraint / 100.0,
-                        "runtime": runtime_constraint / 100.0
-                    }
-                    
-                    # Get optimization module
-                    optimization_module = registry.get_module("optimization_testbed")
-                    
-                    # Run analysis
-                    analysis_results = optimization_module.analyze_code(source_code, function_name)
-                    
-                    # Display results
-                    st.write("### Resource Analysis Results")
-                    
-                    # Show radar chart of resource usage
-                    st.write("#### Resource Usage Profile")
-                    
-                    # Create radar chart data
-                    import matplotlib.pyplot as plt
-                    import numpy as np
-                    from io import BytesIO
-                    import base64
-                    
-                    # Create figure and polar axis
-                    fig = plt.figure(figsize=(8, 8))
-                    ax = fig.add_subplot(111, polar=True)
-                    
-                    # Set categories and values
-                    categories = ['CPU', 'Memory', 'GPU', 'Network', 'Startup Time', 'Runtime']
-                    values = [
-                        analysis_results.get('cpu_usage', 50) / 100.0,
-                        analysis_results.get('memory_usage', 50) / 100.0,
-                        analysis_results.get('gpu_usage', 30) / 100.0,
-                        analysis_results.get('network_usage', 40) / 100.0,
-                        analysis_results.get('startup_time', 50) / 100.0,
-                        analysis_results.get('runtime', 60) / 100.0
-                    ]
-                    
-                    # Number of variables
-                    N = len(categories)
-                    
-                    # Angle of each axis
-                    angles = [n / float(N) * 2 * np.pi for n in range(N)]
-                    angles += angles[:1]  # Close the loop
-                    
-                    # Values for each angle
-                    values += values[:1]  # Close the loop
-                    
-                    # Draw the chart
-                    ax.plot(angles, values, linewidth=2, linestyle='solid')
-                    ax.fill(angles, values, alpha=0.25)
-                    
-                    # Add constraint values
-                    constraint_values = [
-                        constraints['cpu'],
-                        constraints['memory'],
-                        constraints['gpu'],
-                        constraints['network'],
-                        constraints['startup'],
-                        constraints['runtime']
-                    ]
-                    constraint_values += constraint_values[:1]  # Close the loop
-                    
-                    # Draw constraints
-                    ax.plot(angles, constraint_values, linewidth=2, linestyle='dashed', color='red')
-                    
-                    # Set category labels
-                    plt.xticks(angles[:-1], categories)
-                    
-                    # Add legend
-                    plt.legend(['Current Usage', 'Constraints'], loc='upper right')
-                    
-                    # Set title
-                    ax.set_title("Resource Usage vs. Constraints")
-                    
-                    # Convert plot to base64 image
-                    buffer = BytesIO()
-                    plt.savefig(buffer, format='png')
-                    buffer.seek(0)
-                    image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-                    plt.close()
-                    
-                    st.image(f"data:image/png;base64,{image_base64}")
-                    
-                    # Show optimization recommendations
-                    st.write("#### Optimization Recommendations")
-                    
-                    # Check which resources exceed constraints
-                    exceeded_resources = []
-                    for i, category in enumerate(categories):
-                        if values[i] > constraint_values[i]:
-                            exceeded_resources.append(category)
-                    
-                    if exceeded_resources:
-                        st.warning(f"⚠️ The following resources exceed constraints: {', '.join(exceeded_resources)}")
-                        
-                        # Recommend optimizations for each exceeded resource
-                        for resource in exceeded_resources:
-                            if resource == "CPU":
-                                st.markdown("- **CPU Optimization**: Consider using lookup tables, memoization, or algorithm improvements.")
-                            elif resource == "Memory":
-                                st.markdown("- **Memory Optimization**: Reduce data duplication, use generators, or implement lazy loading.")
-                            elif resource == "GPU":
-                                st.markdown("- **GPU Optimization**: Use CPU-only algorithms or optimize GPU kernel execution.")
-                            elif resource == "Network":
-                                st.markdown("- **Network Optimization**: Implement caching, compression, or batch requests.")
-                            elif resource == "Startup Time":
-                                st.markdown("- **Startup Optimization**: Use lazy loading, reduce import overhead, or precompile critical components.")
-                            elif resource == "Runtime":
-                                st.markdown("- **Runtime Optimization**: Implement JIT compilation, optimize hot paths, or use parallel execution.")
-                    else:
-                        st.success("✅ All resource constraints are satisfied!")
-                    
-                    # Show optimized code
-                    st.write("#### Optimized Code for Selected Profile")
-                    
-                    # Get optimization results for the selected profile
-                    optimization_results = optimization_module.optimize_for_profile(source_code, function_name, profile)
-                    
-                    # Show optimized code
-                    optimized_code = optimization_results.get('optimized_code', source_code)
-                    st.code(optimized_code, language="python")
-                    
-                    # Show optimization details
-                    st.write("#### Optimization Details")
-                    st.write(f"- **Selected Profile**: {profile.replace('_', ' ').title()}")
-                    st.write(f"- **Estimated Improvement**: {optimization_results.get('improvement', 0):.2f}%")
-                    
-                    # Show specific optimizations applied
-                    st.write("#### Applied Optimizations")
-                    for optimization in optimization_results.get('optimizations', []):
-                        st.write(f"- **{optimization['name']}**: {optimization['description']}")
-                    
-                    # Export options
-                    st.download_button(
-                        label="Export Optimized Code",
-                        data=optimized_code,
-                        file_name=f"{function_name}_optimized_{profile}.py",
-                        mime="text/plain"
-                    )
+            # Analysis runs on the job pool and is cached per profile; the
+            # constraints only shape the chart, so changing them just re-renders
+            resource_request = {'tool': 'resource_tradeoffs', 'profile': profile}
+            resource_results = run_job(
+                jobs, "Analyzing resource trade-offs...", result_key(source_code, function_name, resource_request),
+                run_resource_analysis, registry.get_module("optimization_testbed"), source_code, function_name, profile,
+                start=st.button("Analyze Resource Trade-offs"))
+            if resource_results is not None:
+                # Create constraints dictionary
+                constraints = {
+                    "cpu": cpu_constraint / 100.0,
+                    "memory": memory_constraint / 100.0,
+                    "gpu": gpu_constraint / 100.0,
+                    "network": network_constraint / 100.0,
+                    "startup": startup_constraint / 100.0,
+                    "runtime": runtime_constraint / 100.0
+                }
+                
+                analysis_results = resource_results['analysis']
+                
+                # Display results
+                st.write("### Resource Analysis Results")
+                
+                # Show radar chart of resource usage
+                st.write("#### Resource Usage Profile")
+                
+                # Create radar chart data
+                import matplotlib.pyplot as plt
+                import numpy as np
+                from io import BytesIO
+                import base64
+                
+                # Create figure and polar axis
+                fig = plt.figure(figsize=(8, 8))
+                ax = fig.add_subplot(111, polar=True)
+                
+                # Set categories and values
+                categories = ['CPU', 'Memory', 'GPU', 'Network', 'Startup Time', 'Runtime']
+                values = [
+                    analysis_results.get('cpu_usage', 50) / 100.0,
+                    analysis_results.get('memory_usage', 50) / 100.0,
+                    analysis_results.get('gpu_usage', 30) / 100.0,
+                    analysis_results.get('network_usage', 40) / 100.0,
+                    analysis_results.get('startup_time', 50) / 100.0,
+                    analysis_results.get('runtime', 60) / 100.0
+                ]
+                
+                # Number of variables
+                N = len(categories)
+                
+                # Angle of each axis
+                angles = [n / float(N) * 2 * np.pi for n in range(N)]
+                angles += angles[:1]  # Close the loop
+                
+                # Values for each angle
+                values += values[:1]  # Close the loop
+                
+                # Draw the chart
+                ax.plot(angles, values, linewidth=2, linestyle='solid')
+                ax.fill(angles, values, alpha=0.25)
+                
+                # Add constraint values
+                constraint_values = [
+                    constraints['cpu'],
+                    constraints['memory'],
+                    constraints['gpu'],
+                    constraints['network'],
+                    constraints['startup'],
+                    constraints['runtime']
+                ]
+                constraint_values += constraint_values[:1]  # Close the loop
+                
+                # Draw constraints
+                ax.plot(angles, constraint_values, linewidth=2, linestyle='dashed', color='red')
+                
+                # Set category labels
+                plt.xticks(angles[:-1], categories)
+                
+                # Add legend
+                plt.legend(['Current Usage', 'Constraints'], loc='upper right')
+                
+                # Set title
+                ax.set_title("Resource Usage vs. Constraints")
+                
+                # Convert plot to base64 image
+                buffer = BytesIO()
+                plt.savefig(buffer, format='png')
+                buffer.seek(0)
+                image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
+                plt.close()
+                
+                st.image(f"data:image/png;base64,{image_base64}")
+                
+                # Show optimization recommendations
+                st.write("#### Optimization Recommendations")
+                
+                # Check which resources exceed constraints
+                exceeded_resources = []
+                for i, category in enumerate(categories):
+                    if values[i] > constraint_values[i]:
+                        exceeded_resources.append(category)
+                
+                if exceeded_resources:
+                    st.warning(f"⚠️ The following resources exceed constraints: {', '.join(exceeded_resources)}")
+                    
+                    # Recommend optimizations for each exceeded resource
+                    for resource in exceeded_resources:
+                        if resource == "CPU":
+                            st.markdown("- **CPU Optimization**: Consider using lookup tables, memoization, or algorithm improvements.")
+                        elif resource == "Memory":
+                            st.markdown("- **Memory Optimization**: Reduce data duplication, use generators, or implement lazy loading.")
+                        elif resource == "GPU":
+                            st.markdown("- **GPU Optimization**: Use CPU-only algorithms or optimize GPU kernel execution.")
+                        elif resource == "Network":
+                            st.markdown("- **Network Optimization**: Implement caching, compression, or batch requests.")
+                        elif resource == "Startup Time":
+                            st.markdown("- **Startup Optimization**: Use lazy loading, reduce import overhead, or precompile critical components.")
+                        elif resource == "Runtime":
+                            st.markdown("- **Runtime Optimization**: Implement JIT compilation, optimize hot paths, or use parallel execution.")
+                else:
+                    st.success("✅ All resource constraints are satisfied!")
+                
+                # Show optimized code
+                st.write("#### Optimized Code for Selected Profile")
+                
+                # Optimization results for the selected profile
+                optimization_results = resource_results['optimization']
+                
+                # Show optimized code
+                optimized_code = optimization_results.get('optimized_code', source_code)
+                st.code(optimized_code, language="python")
+                
+                # Show optimization details
+                st.write("#### Optimization Details")
+                st.write(f"- **Selected Profile**: {profile.replace('_', ' ').title()}")
+                st.write(f"- **Estimated Improvement**: {optimization_results.get('improvement', 0):.2f}%")
+                
+                # Show specific optimizations applied
+                st.write("#### Applied Optimizations")
+                for optimization in optimization_results.get('optimizations', []):
+                    st.write(f"- **{optimization['name']}**: {optimization['description']}")
+                
+                # Export options
+                st.download_button(
+                    label="Export Optimized Code",
+                    data=optimized_code,
+                    file_name=f"{function_name}_optimized_{profile}.py",
+                    mime="text/plain"
+                )
     
     # Project Organization section
     elif function_type == "Project Organization":
@@ -992,84 +1106,86 @@ def process_data(data):
         st.markdown("## Step 2: Choose an Action")
         
         # Create tabs for different features
-        analyze_tab, optimize_tab, benchmark_tab = st.tabs(["📊 Analyze Code", "⚡ Optimize Code", "⏱️ Benchmark"])
+        selected_tab = lazy_tabs(["📊 Analyze Code", "⚡ Optimize Code", "⏱️ Benchmark"], key="testbed_tab")
         
         # Analyze tab
-        with analyze_tab:
+        if selected_tab == "📊 Analyze Code":
             st.write("Analyze code to identify optimization opportunities and resource usage patterns.")
             
             # Action button in a prominent position
             analyze_button = st.button("🔍 Analyze Code", key="analyze_button", use_container_width=True)
             
-            if source_code and function_name and analyze_button:
-                with st.spinner("Analyzing code..."):
-                    # Run the analysis
-                    analysis_result = optimization_testbed.process({
-                        "command": "analyze_code",
-                        "source_code": source_code,
-                        "function_name": function_name
-                    })
-                    
-                    if "error" in analysis_result:
-                        st.error(analysis_result["error"])
+            # Runs on the job pool; the result stays cached across reruns
+            analysis_request = {
+                "command": "analyze_code",
+                "source_code": source_code,
+                "function_name": function_name
+            }
+            analysis_result = run_job(
+                jobs, "Analyzing code...", result_key(source_code, function_name, analysis_request),
+                run_module_command, optimization_testbed, analysis_request,
+                start=bool(source_code and function_name and analyze_button))
+            if analysis_result is not None:
+                if "error" in analysis_result:
+                    st.error(analysis_result["error"])
+                else:
+                    # Step 3: Results
+                    st.markdown("## Step 3: View Analysis Results")
+                    
+                    # Create a dashboard-like layout
+                    st.subheader("Resource Usage Metrics")
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("Code Complexity", f"{analysis_result['code_complexity']:.2f}")
+                    with col2:
+                        st.metric("Memory Usage", f"{analysis_result['memory_usage_estimate']:.2f}")
+                    with col3:
+                        st.metric("CPU Usage", f"{analysis_result['cpu_usage_estimate']:.2f}")
+                    
+                    # GPU suitability gauge with better visual
+                    st.subheader("GPU Acceleration Suitability")
+                    gpu_suitability = analysis_result['gpu_suitability']
+                    st.progress(gpu_suitability)
+                    
+                    # Color-coded GPU suitability message
+                    if gpu_suitability > 0.7:
+                        st.success(f"✅ **{gpu_suitability * 100:.1f}%** - This code is highly suitable for GPU acceleration!")
+                    elif gpu_suitability > 0.4:
+                        st.info(f"ℹ️ **{gpu_suitability * 100:.1f}%** - This code could benefit from GPU acceleration.")
                     else:
-                        # Step 3: Results
-                        st.markdown("## Step 3: View Analysis Results")
-                        
-                        # Create a dashboard-like layout
-                        st.subheader("Resource Usage Metrics")
-                        col1, col2, col3 = st.columns(3)
-                        with col1:
-                            st.metric("Code Complexity", f"{analysis_result['code_complexity']:.2f}")
-                        with col2:
-                            st.metric("Memory Usage", f"{analysis_result['memory_usage_estimate']:.2f}")
-                        with col3:
-                            st.metric("CPU Usage", f"{analysis_result['cpu_usage_estimate']:.2f}")
-                        
-                        # GPU suitability gauge with better visual
-                        st.subheader("GPU Acceleration Suitability")
-                        gpu_suitability = analysis_result['gpu_suitability']
-                        st.progress(gpu_suitability)
-                        
-                        # Color-coded GPU suitability message
-                        if gpu_suitability > 0.7:
-                            st.success(f"✅ **{gpu_suitability * 100:.1f}%** - This code is highly suitable for GPU acceleration!")
-                        elif gpu_suitability > 0.4:
-                            st.info(f"ℹ️ **{gpu_suitability * 100:.1f}%** - This code could benefit from GPU acceleration.")
-                        else:
-                            st.warning(f"⚠️ **{gpu_suitability * 100:.1f}%** - This code is not ideal for GPU acceleration.")
-                        
-                        # Optimization opportunities in a card-like container
-                        st.subheader("Recommended Optimization Techniques")
-                        with st.container(border=True):
-                            for opportunity in analysis_result["optimization_opportunities"]:
-                                technique_name = opportunity.replace("_", " ").title()
-                                technique_desc = optimization_testbed.optimization_techniques.get(opportunity, {}).get("description", "")
+                        st.warning(f"⚠️ **{gpu_suitability * 100:.1f}%** - This code is not ideal for GPU acceleration.")
+                    
+                    # Optimization opportunities in a card-like container
+                    st.subheader("Recommended Optimization Techniques")
+                    with st.container(border=True):
+                        for opportunity in analysis_result["optimization_opportunities"]:
+                            technique_name = opportunity.replace("_", " ").title()
+                            technique_desc = optimization_testbed.optimization_techniques.get(opportunity, {}).get("description", "")
+                            st.markdown(f"**{technique_name}**: {technique_desc}")
+                    
+                    # Function analysis in expandable sections
+                    st.subheader("Detailed Function Analysis")
+                    for func_name, func_analysis in analysis_result["function_analysis"].items():
+                        with st.expander(f"Function: {func_name}"):
+                            # Create metrics in columns
+                            f_col1, f_col2 = st.columns(2)
+                            with f_col1:
+                                st.metric("Complexity", f"{func_analysis['complexity']:.2f}")
+                                st.metric("Memory Usage", f"{func_analysis['memory_estimate']:.2f}")
+                            with f_col2:
+                                st.metric("CPU Usage", f"{func_analysis['cpu_estimate']:.2f}")
+                                st.metric("GPU Suitability", f"{func_analysis['gpu_suitability']:.2f}")
+                            
+                            st.subheader("Function-Specific Optimizations")
+                            for opp in func_analysis["optimization_opportunities"]:
+                                technique_name = opp.replace("_", " ").title()
+                                technique_desc = optimization_testbed.optimization_techniques.get(opp, {}).get("description", "")
                                 st.markdown(f"**{technique_name}**: {technique_desc}")
-                        
-                        # Function analysis in expandable sections
-                        st.subheader("Detailed Function Analysis")
-                        for func_name, func_analysis in analysis_result["function_analysis"].items():
-                            with st.expander(f"Function: {func_name}"):
-                                # Create metrics in columns
-                                f_col1, f_col2 = st.columns(2)
-                                with f_col1:
-                                    st.metric("Complexity", f"{func_analysis['complexity']:.2f}")
-                                    st.metric("Memory Usage", f"{func_analysis['memory_estimate']:.2f}")
-                                with f_col2:
-                                    st.metric("CPU Usage", f"{func_analysis['cpu_estimate']:.2f}")
-                                    st.metric("GPU Suitability", f"{func_analysis['gpu_suitability']:.2f}")
-                                
-                                st.subheader("Function-Specific Optimizations")
-                                for opp in func_analysis["optimization_opportunities"]:
-                                    technique_name = opp.replace("_", " ").title()
-                                    technique_desc = optimization_testbed.optimization_techniques.get(opp, {}).get("description", "")
-                                    st.markdown(f"**{technique_name}**: {technique_desc}")
             elif not source_code or not function_name:
                 st.info("👆 Please complete Step 1 by providing code and a function name before analyzing.")
         
         # Optimize tab
-        with optimize_tab:
+        elif selected_tab == "⚡ Optimize Code":
             st.write("Optimize code based on different profiles and techniques.")
             
             # Organize optimization options in a cleaner layout
@@ -1131,90 +1247,94 @@ def process_data(data):
             # Action button in a prominent position
             optimize_button = st.button("⚡ Optimize Code", key="optimize_button", use_container_width=True)
             
-            if source_code and function_name and optimize_button:
-                with st.spinner("Optimizing code..."):
-                    # Run the optimization
-                    optimization_result = optimization_testbed.process({
-                        "command": "optimize_code",
-                        "source_code": source_code,
-                        "function_name": function_name,
-                        "profile": profile,
-                        "techniques": selected_techniques if selected_techniques else None
-                    })
-                    
-                    if "error" in optimization_result:
-                        st.error(optimization_result["error"])
-                    else:
-                        # Step 3: Results
-                        st.markdown("## Step 3: View Optimization Results")
-                        
-                        # Create a dashboard layout
-                        results_col1, results_col2 = st.columns([3, 2])
-                        
-                        with results_col1:
-                            # Show visualization
-                            st.subheader("Optimization Impact Visualization")
-                            visualization_result = optimization_testbed.process({
+            # Runs on the job pool; the result stays cached across reruns
+            optimization_request = {
+                "command": "optimize_code",
+                "source_code": source_code,
+                "function_name": function_name,
+                "profile": profile,
+                "techniques": selected_techniques if selected_techniques else None
+            }
+            optimization_result = run_job(
+                jobs, "Optimizing code...", result_key(source_code, function_name, optimization_request),
+                run_module_command, optimization_testbed, optimization_request,
+                start=bool(source_code and function_name and optimize_button))
+            if optimization_result is not None:
+                if "error" in optimization_result:
+                    st.error(optimization_result["error"])
+                else:
+                    # Step 3: Results
+                    st.markdown("## Step 3: View Optimization Results")
+                    
+                    # Create a dashboard layout
+                    results_col1, results_col2 = st.columns([3, 2])
+                    
+                    with results_col1:
+                        # Show visualization
+                        st.subheader("Optimization Impact Visualization")
+                        visualization_result = jobs.results.get_or_compute(
+                            result_key(source_code, function_name, dict(optimization_request, view="visualization")),
+                            lambda: optimization_testbed.process({
                                 "command": "visualize_optimization",
                                 "optimization_results": optimization_result,
                                 "profile": profile
-                            })
-                            
-                            if "error" in visualization_result:
-                                st.error(visualization_result["error"])
-                            else:
-                                st.image(visualization_result["visualization"])
+                            }))
                         
-                        with results_col2:
-                            # Show metrics in a card
-                            st.subheader("Optimization Summary")
+                        if "error" in visualization_result:
+                            st.error(visualization_result["error"])
+                        else:
+                            st.image(visualization_result["visualization"])
+                    
+                    with results_col2:
+                        # Show metrics in a card
+                        st.subheader("Optimization Summary")
+                        with st.container(border=True):
+                            st.markdown(f"**Profile**: {profile.replace('_', ' ').title()}")
+                            st.markdown(f"*{optimization_result['profile_description']}*")
+                            
+                            # Show metrics as percentages
+                            metrics = optimization_result["metrics"]
+                            st.subheader("Impact on Resources")
+                            impact_items = [
+                                ("Memory Usage", metrics.get("memory_impact", 0) * 100),
+                                ("CPU Usage", metrics.get("cpu_impact", 0) * 100),
+                                ("GPU Usage", metrics.get("gpu_impact", 0) * 100),
+                                ("Startup Time", metrics.get("startup_impact", 0) * 100),
+                                ("Runtime", metrics.get("runtime_impact", 0) * 100)
+                            ]
+                            
+                            for label, value in impact_items:
+                                # Negative values are improvements (green), positive are degradations (red)
+                                delta_color = "normal" if value == 0 else ("inverse" if value < 0 else "normal")
+                                delta_value = f"{value:.1f}%"
+                                st.metric(label, "", delta=delta_value, delta_color=delta_color)
+                    
+                    # Applied techniques
+                    st.subheader("Applied Optimization Techniques")
+                    technique_cols = st.columns(2)
+                    for i, technique in enumerate(optimization_result["applied_techniques"]):
+                        col = technique_cols[i % 2]
+                        with col:
                             with st.container(border=True):
-                                st.markdown(f"**Profile**: {profile.replace('_', ' ').title()}")
-                                st.markdown(f"*{optimization_result['profile_description']}*")
-                                
-                                # Show metrics as percentages
-                                metrics = optimization_result["metrics"]
-                                st.subheader("Impact on Resources")
-                                impact_items = [
-                                    ("Memory Usage", metrics.get("memory_impact", 0) * 100),
-                                    ("CPU Usage", metrics.get("cpu_impact", 0) * 100),
-                                    ("GPU Usage", metrics.get("gpu_impact", 0) * 100),
-                                    ("Startup Time", metrics.get("startup_impact", 0) * 100),
-                                    ("Runtime", metrics.get("runtime_impact", 0) * 100)
-                                ]
-                                
-                                for label, value in impact_items:
-                                    # Negative values are improvements (green), positive are degradations (red)
-                                    delta_color = "normal" if value == 0 else ("inverse" if value < 0 else "normal")
-                                    delta_value = f"{value:.1f}%"
-                                    st.metric(label, "", delta=delta_value, delta_color=delta_color)
-                        
-                        # Applied techniques
-                        st.subheader("Applied Optimization Techniques")
-                        technique_cols = st.columns(2)
-                        for i, technique in enumerate(optimization_result["applied_techniques"]):
-                            col = technique_cols[i % 2]
-                            with col:
-                                with st.container(border=True):
-                                    st.markdown(f"**{technique['name'].replace('_', ' ').title()}**")
-                                    st.markdown(f"{technique['description']}")
-                        
-                        # Show optimized code
-                        st.subheader("Optimized Code")
-                        st.code(optimization_result["optimized_code"], language="python")
-                        
-                        # Download button for optimized code
-                        st.download_button(
-                            label="Download Optimized Code",
-                            data=optimization_result["optimized_code"],
-                            file_name=f"{function_name}_optimized_{profile}.py",
-                            mime="text/plain"
-                        )
+                                st.markdown(f"**{technique['name'].replace('_', ' ').title()}**")
+                                st.markdown(f"{technique['description']}")
+                    
+                    # Show optimized code
+                    st.subheader("Optimized Code")
+                    st.code(optimization_result["optimized_code"], language="python")
+                    
+                    # Download button for optimized code
+                    st.download_button(
+                        label="Download Optimized Code",
+                        data=optimization_result["optimized_code"],
+                        file_name=f"{function_name}_optimized_{profile}.py",
+                        mime="text/plain"
+                    )
             elif not source_code or not function_name:
                 st.info("👆 Please complete Step 1 by providing code and a function name before optimizing.")
         
         # Benchmark tab
-        with benchmark_tab:
+        elif selected_tab == "⏱️ Benchmark":
             st.write("Benchmark code performance with different inputs and iterations.")
             
             # Benchmark options in a cleaner layout
@@ -1238,217 +1358,220 @@ def process_data(data):
             # Action button in a prominent position
             benchmark_button = st.button("⏱️ Run Benchmark", key="benchmark_button", use_container_width=True)
             
-            if source_code and function_name and benchmark_button:
-                with st.spinner(f"Benchmarking {function_name} with {iterations} iterations..."):
-                    # Run the benchmark
-                    benchmark_result = optimization_testbed.process({
-                        "command": "benchmark",
-                        "source_code": source_code,
-                        "function_name": function_name,
-                        "iterations": iterations
-                    })
+            # Runs on the job pool; the result stays cached across reruns
+            benchmark_request = {
+                "command": "benchmark",
+                "source_code": source_code,
+                "function_name": function_name,
+                "iterations": iterations
+            }
+            benchmark_result = run_job(
+                jobs, f"Benchmarking {function_name} with {iterations} iterations...",
+                result_key(source_code, function_name, benchmark_request),
+                run_module_command, optimization_testbed, benchmark_request,
+                start=bool(source_code and function_name and benchmark_button))
+            if benchmark_result is not None:
+                if "error" in benchmark_result:
+                    st.error(benchmark_result["error"])
+                else:
+                    # Step 3: Results
+                    st.markdown("## Step 3: View Benchmark Results")
                     
-                    if "error" in benchmark_result:
-                        st.error(benchmark_result["error"])
-                    else:
-                        # Step 3: Results
-                        st.markdown("## Step 3: View Benchmark Results")
+                    # Create a dashboard layout
+                    st.subheader("📊 Performance Metrics")
+                    
+                    # Tabs for different metrics
+                    time_tab, memory_tab, cpu_tab = st.tabs(["Execution Time", "Memory Usage", "CPU Usage"])
+                    
+                    with time_tab:
+                        # Show execution time stats with better formatting
+                        time_stats = benchmark_result["stats"]["execution_time"]
                         
-                        # Create a dashboard layout
-                        st.subheader("📊 Performance Metrics")
+                        # Summary metrics
+                        st.markdown("**Execution Time (seconds)**")
+                        col1, col2, col3, col4 = st.columns(4)
+                        with col1:
+                            st.metric("Mean", f"{time_stats['mean']:.6f}s")
+                        with col2:
+                            st.metric("Median", f"{time_stats['median']:.6f}s")
+                        with col3:
+                            st.metric("Min", f"{time_stats['min']:.6f}s")
+                        with col4:
+                            st.metric("Max", f"{time_stats['max']:.6f}s")
                         
-                        # Tabs for different metrics
-                        time_tab, memory_tab, cpu_tab = st.tabs(["Execution Time", "Memory Usage", "CPU Usage"])
+                        # Visualization of execution times
+                        st.markdown("**Execution Time Distribution**")
                         
-                        with time_tab:
-                            # Show execution time stats with better formatting
-                            time_stats = benchmark_result["stats"]["execution_time"]
-                            
-                            # Summary metrics
-                            st.markdown("**Execution Time (seconds)**")
-                            col1, col2, col3, col4 = st.columns(4)
-                            with col1:
-                                st.metric("Mean", f"{time_stats['mean']:.6f}s")
-                            with col2:
-                                st.metric("Median", f"{time_stats['median']:.6f}s")
-                            with col3:
-                                st.metric("Min", f"{time_stats['min']:.6f}s")
-                            with col4:
-                                st.metric("Max", f"{time_stats['max']:.6f}s")
-                            
-                            # Visualization of execution times
-                            st.markdown("**Execution Time Distribution**")
-                            
-                            # Create a chart of execution times
-                            import matplotlib.pyplot as plt
-                            import numpy as np
-                            from io import BytesIO
-                            import base64
-                            
-                            # Create figure with two subplots
-                            fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 4))
-                            
-                            # Line plot of execution times
-                            execution_times = benchmark_result["raw_data"]["execution_times"]
-                            ax1.plot(execution_times)
-                            ax1.set_title(f"Execution Time over {iterations} Iterations")
-                            ax1.set_xlabel("Iteration")
-                            ax1.set_ylabel("Time (seconds)")
-                            ax1.grid(True)
-                            
-                            # Histogram of execution times
-                            ax2.hist(execution_times, bins=20, alpha=0.7, color='blue')
-                            ax2.set_title("Execution Time Distribution")
-                            ax2.set_xlabel("Time (seconds)")
-                            ax2.set_ylabel("Frequency")
-                            ax2.grid(True)
-                            
-                            plt.tight_layout()
-                            
-                            # Convert plot to base64 image
-                            buffer = BytesIO()
-                            plt.savefig(buffer, format='png')
-                            buffer.seek(0)
-                            image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-                            plt.close()
-                            
-                            st.image(f"data:image/png;base64,{image_base64}")
-                            
-                            # Statistical analysis
-                            st.markdown("**Statistical Analysis**")
-                            st.write(f"Standard Deviation: {time_stats['std']:.6f}s")
-                            st.write(f"Coefficient of Variation: {(time_stats['std'] / time_stats['mean'] * 100):.2f}%")
-                            
-                            if time_stats['std'] / time_stats['mean'] > 0.1:
-                                st.warning("⚠️ High variability detected in execution times. Results may not be consistent.")
-                            else:
-                                st.success("✅ Execution times show good consistency across iterations.")
+                        # Create a chart of execution times
+                        import matplotlib.pyplot as plt
+                        import numpy as np
+                        from io import BytesIO
+                        import base64
                         
-                        with memory_tab:
-                            # Show memory usage stats
-                            memory_stats = benchmark_result["stats"]["memory_usage"]
-                            
-                            # Summary metrics
-                            st.markdown("**Memory Usage (%)**")
-                            col1, col2, col3, col4 = st.columns(4)
-                            with col1:
-                                st.metric("Mean", f"{memory_stats['mean']:.2f}%")
-                            with col2:
-                                st.metric("Median", f"{memory_stats['median']:.2f}%")
-                            with col3:
-                                st.metric("Min", f"{memory_stats['min']:.2f}%")
-                            with col4:
-                                st.metric("Max", f"{memory_stats['max']:.2f}%")
-                            
-                            # Memory usage visualization
-                            st.markdown("**Memory Usage Pattern**")
-                            
-                            # Create a chart of memory usage
-                            fig, ax = plt.subplots(figsize=(10, 4))
-                            memory_usage = benchmark_result["raw_data"]["memory_usage"]
-                            ax.plot(memory_usage)
-                            ax.set_title(f"Memory Usage over {iterations} Iterations")
-                            ax.set_xlabel("Iteration")
-                            ax.set_ylabel("Memory Usage (%)")
-                            ax.grid(True)
-                            
-                            # Convert plot to base64 image
-                            buffer = BytesIO()
-                            plt.savefig(buffer, format='png')
-                            buffer.seek(0)
-                            image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-                            plt.close()
-                            
-                            st.image(f"data:image/png;base64,{image_base64}")
-                            
-                            # Memory analysis
-                            st.markdown("**Memory Analysis**")
-                            memory_trend = np.polyfit(range(len(memory_usage)), memory_usage, 1)[0]
-                            
-                            if memory_trend > 0.01:
-                                st.warning("⚠️ Memory usage shows an increasing trend. Possible memory leak.")
-                            elif memory_trend < -0.01:
-                                st.info("ℹ️ Memory usage shows a decreasing trend. Memory is being released.")
-                            else:
-                                st.success("✅ Memory usage is stable across iterations.")
+                        # Create figure with two subplots
+                        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 4))
                         
-                        with cpu_tab:
-                            # Show CPU usage stats
-                            cpu_stats = benchmark_result["stats"]["cpu_usage"]
-                            
-                            # Summary metrics
-                            st.markdown("**CPU Usage (%)**")
-                            col1, col2, col3, col4 = st.columns(4)
-                            with col1:
-                                st.metric("Mean", f"{cpu_stats['mean']:.2f}%")
-                            with col2:
-                                st.metric("Median", f"{cpu_stats['median']:.2f}%")
-                            with col3:
-                                st.metric("Min", f"{cpu_stats['min']:.2f}%")
-                            with col4:
-                                st.metric("Max", f"{cpu_stats['max']:.2f}%")
-                            
-                            # CPU usage visualization
-                            st.markdown("**CPU Usage Pattern**")
-                            
-                            # Create a chart of CPU usage
-                            fig, ax = plt.subplots(figsize=(10, 4))
-                            cpu_usage = benchmark_result["raw_data"]["cpu_usage"]
-                            ax.plot(cpu_usage)
-                            ax.set_title(f"CPU Usage over {iterations} Iterations")
-                            ax.set_xlabel("Iteration")
-                            ax.set_ylabel("CPU Usage (%)")
-                            ax.grid(True)
-                            
-                            # Convert plot to base64 image
-                            buffer = BytesIO()
-                            plt.savefig(buffer, format='png')
-                            buffer.seek(0)
-                            image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-                            plt.close()
-                            
-                            st.image(f"data:image/png;base64,{image_base64}")
-                            
-                            # CPU analysis
-                            st.markdown("**CPU Analysis**")
-                            if cpu_stats['mean'] > 50:
-                                st.warning("⚠️ High average CPU usage. This function is CPU-intensive.")
-                            elif cpu_stats['mean'] > 20:
-                                st.info("ℹ️ Moderate CPU usage. Consider optimization if this is a frequent operation.")
-                            else:
-                                st.success("✅ Low CPU usage. This function is efficient in terms of CPU resources.")
+                        # Line plot of execution times
+                        execution_times = benchmark_result["raw_data"]["execution_times"]
+                        ax1.plot(execution_times)
+                        ax1.set_title(f"Execution Time over {iterations} Iterations")
+                        ax1.set_xlabel("Iteration")
+                        ax1.set_ylabel("Time (seconds)")
+                        ax1.grid(True)
                         
-                        # Overall performance summary
-                        st.subheader("🏆 Performance Summary")
-                        with st.container(border=True):
-                            st.markdown(f"**Function: {function_name}**")
-                            st.markdown(f"Benchmarked with {iterations} iterations")
-                            
-                            # Calculate overall performance rating
-                            time_rating = 5 - min(4, time_stats['mean'] * 1000)  # Lower is better
-                            memory_rating = 5 - min(4, memory_stats['mean'] / 5)  # Lower is better
-                            cpu_rating = 5 - min(4, cpu_stats['mean'] / 10)  # Lower is better
-                            overall_rating = (time_rating + memory_rating + cpu_rating) / 3
-                            
-                            # Display star rating
-                            st.markdown(f"**Overall Performance Rating: {overall_rating:.1f}/5.0** {'⭐' * int(round(overall_rating))}")
-                            
-                            # Recommendations
-                            st.markdown("**Recommendations:**")
-                            if time_stats['mean'] > 0.01:
-                                st.markdown("- Consider optimizing for execution time")
-                            if memory_stats['mean'] > 5:
-                                st.markdown("- Monitor memory usage for potential leaks")
-                            if cpu_stats['mean'] > 30:
-                                st.markdown("- Look into CPU optimization techniques")
-                            
-                            # Export options
-                            st.download_button(
-                                label="Export Benchmark Results (JSON)",
-                                data=json.dumps(benchmark_result, indent=2),
-                                file_name=f"{function_name}_benchmark_results.json",
-                                mime="application/json"
-                            )
+                        # Histogram of execution times
+                        ax2.hist(execution_times, bins=20, alpha=0.7, color='blue')
+                        ax2.set_title("Execution Time Distribution")
+                        ax2.set_xlabel("Time (seconds)")
+                        ax2.set_ylabel("Frequency")
+                        ax2.grid(True)
+                        
+                        plt.tight_layout()
+                        
+                        # Convert plot to base64 image
+                        buffer = BytesIO()
+                        plt.savefig(buffer, format='png')
+                        buffer.seek(0)
+                        image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
+                        plt.close()
+                        
+                        st.image(f"data:image/png;base64,{image_base64}")
+                        
+                        # Statistical analysis
+                        st.markdown("**Statistical Analysis**")
+                        st.write(f"Standard Deviation: {time_stats['std']:.6f}s")
+                        st.write(f"Coefficient of Variation: {(time_stats['std'] / time_stats['mean'] * 100):.2f}%")
+                        
+                        if time_stats['std'] / time_stats['mean'] > 0.1:
+                            st.warning("⚠️ High variability detected in execution times. Results may not be consistent.")
+                        else:
+                            st.success("✅ Execution times show good consistency across iterations.")
+                    
+                    with memory_tab:
+                        # Show memory usage stats
+                        memory_stats = benchmark_result["stats"]["memory_usage"]
+                        
+                        # Summary metrics
+                        st.markdown("**Memory Usage (%)**")
+                        col1, col2, col3, col4 = st.columns(4)
+                        with col1:
+                            st.metric("Mean", f"{memory_stats['mean']:.2f}%")
+                        with col2:
+                            st.metric("Median", f"{memory_stats['median']:.2f}%")
+                        with col3:
+                            st.metric("Min", f"{memory_stats['min']:.2f}%")
+                        with col4:
+                            st.metric("Max", f"{memory_stats['max']:.2f}%")
+                        
+                        # Memory usage visualization
+                        st.markdown("**Memory Usage Pattern**")
+                        
+                        # Create a chart of memory usage
+                        fig, ax = plt.subplots(figsize=(10, 4))
+                        memory_usage = benchmark_result["raw_data"]["memory_usage"]
+                        ax.plot(memory_usage)
+                        ax.set_title(f"Memory Usage over {iterations} Iterations")
+                        ax.set_xlabel("Iteration")
+                        ax.set_ylabel("Memory Usage (%)")
+                        ax.grid(True)
+                        
+                        # Convert plot to base64 image
+                        buffer = BytesIO()
+                        plt.savefig(buffer, format='png')
+                        buffer.seek(0)
+                        image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
+                        plt.close()
+                        
+                        st.image(f"data:image/png;base64,{image_base64}")
+                        
+                        # Memory analysis
+                        st.markdown("**Memory Analysis**")
+                        memory_trend = np.polyfit(range(len(memory_usage)), memory_usage, 1)[0]
+                        
+                        if memory_trend > 0.01:
+                            st.warning("⚠️ Memory usage shows an increasing trend. Possible memory leak.")
+                        elif memory_trend < -0.01:
+                            st.info("ℹ️ Memory usage shows a decreasing trend. Memory is being released.")
+                        else:
+                            st.success("✅ Memory usage is stable across iterations.")
+                    
+                    with cpu_tab:
+                        # Show CPU usage stats
+                        cpu_stats = benchmark_result["stats"]["cpu_usage"]
+                        
+                        # Summary metrics
+                        st.markdown("**CPU Usage (%)**")
+                        col1, col2, col3, col4 = st.columns(4)
+                        with col1:
+                            st.metric("Mean", f"{cpu_stats['mean']:.2f}%")
+                        with col2:
+                            st.metric("Median", f"{cpu_stats['median']:.2f}%")
+                        with col3:
+                            st.metric("Min", f"{cpu_stats['min']:.2f}%")
+                        with col4:
+                            st.metric("Max", f"{cpu_stats['max']:.2f}%")
+                        
+                        # CPU usage visualization
+                        st.markdown("**CPU Usage Pattern**")
+                        
+                        # Create a chart of CPU usage
+                        fig, ax = plt.subplots(figsize=(10, 4))
+                        cpu_usage = benchmark_result["raw_data"]["cpu_usage"]
+                        ax.plot(cpu_usage)
+                        ax.set_title(f"CPU Usage over {iterations} Iterations")
+                        ax.set_xlabel("Iteration")
+                        ax.set_ylabel("CPU Usage (%)")
+                        ax.grid(True)
+                        
+                        # Convert plot to base64 image
+                        buffer = BytesIO()
+                        plt.savefig(buffer, format='png')
+                        buffer.seek(0)
+                        image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
+                        plt.close()
+                        
+                        st.image(f"data:image/png;base64,{image_base64}")
+                        
+                        # CPU analysis
+                        st.markdown("**CPU Analysis**")
+                        if cpu_stats['mean'] > 50:
+                            st.warning("⚠️ High average CPU usage. This function is CPU-intensive.")
+                        elif cpu_stats['mean'] > 20:
+                            st.info("ℹ️ Moderate CPU usage. Consider optimization if this is a frequent operation.")
+                        else:
+                            st.success("✅ Low CPU usage. This function is efficient in terms of CPU resources.")
+                    
+                    # Overall performance summary
+                    st.subheader("🏆 Performance Summary")
+                    with st.container(border=True):
+                        st.markdown(f"**Function: {function_name}**")
+                        st.markdown(f"Benchmarked with {iterations} iterations")
+                        
+                        # Calculate overall performance rating
+                        time_rating = 5 - min(4, time_stats['mean'] * 1000)  # Lower is better
+                        memory_rating = 5 - min(4, memory_stats['mean'] / 5)  # Lower is better
+                        cpu_rating = 5 - min(4, cpu_stats['mean'] / 10)  # Lower is better
+                        overall_rating = (time_rating + memory_rating + cpu_rating) / 3
+                        
+                        # Display star rating
+                        st.markdown(f"**Overall Performance Rating: {overall_rating:.1f}/5.0** {'⭐' * int(round(overall_rating))}")
+                        
+                        # Recommendations
+                        st.markdown("**Recommendations:**")
+                        if time_stats['mean'] > 0.01:
+                            st.markdown("- Consider optimizing for execution time")
+                        if memory_stats['mean'] > 5:
+                            st.markdown("- Monitor memory usage for potential leaks")
+                        if cpu_stats['mean'] > 30:
+                            st.markdown("- Look into CPU optimization techniques")
+                        
+                        # Export options
+                        st.download_button(
+                            label="Export Benchmark Results (JSON)",
+                            data=json.dumps(benchmark_result, indent=2),
+                            file_name=f"{function_name}_benchmark_results.json",
+                            mime="application/json"
+                        )
             elif not source_code or not function_name:
                 st.info("👆 Please complete Step 1 by providing code and a function name before benchmarking.")
                 
@@ -1464,9 +1587,9 @@ def process_data(data):
             st.error("Shadow Tree Module not found. Please check if it's properly registered.")
         else:
             # Create tabs for different navigation modes
-            search_tab, navigate_tab, visualize_tab = st.tabs(["🔍 Search", "🧭 Navigate", "📊 Visualize"])
+            selected_tab = lazy_tabs(["🔍 Search", "🧭 Navigate", "📊 Visualize"], key="shadow_tree_tab")
             
-            with search_tab:
+            if selected_tab == "🔍 Search":
                 st.subheader("Search the Codebase")
                 search_query = st.text_input("Enter search terms", placeholder="e.g., optimizer, resource, UI")
                 
@@ -1477,7 +1600,7 @@ def process_data(data):
                     else:
                         st.warning("Please enter a search query")
             
-            with navigate_tab:
+            elif selected_tab == "🧭 Navigate":
                 st.subheader("Navigate the Shadow Tree")
                 
                 # Show current location
@@ -1522,7 +1645,7 @@ def process_data(data):
                     st.markdown("### Navigation Result")
                     st.markdown(st.session_state.navigation_result)
             
-            with visualize_tab:
+            elif selected_tab == "📊 Visualize":
                 st.subheader("Shadow Tree Visualization")
                 
                 # Option to generate HTML visualization
@@ -1560,16 +1683,10 @@ def process_data(data):
                 # Display tree structure
                 st.markdown("### Tree Structure")
                 try:
-                    import json
-                    from pathlib import Path
-                    
                     project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-                    tree_path = Path(project_root) / "shadow_tree_output" / "shadow_tree.json"
+                    tree_data = load_shadow_tree(os.path.join(project_root, "shadow_tree_output"))
                     
-                    if tree_path.exists():
-                        with open(tree_path, "r", encoding="utf-8") as f:
-                            tree_data = json.load(f)
-                        
+                    if tree_data is not None:
                         # Display a simplified version of the tree
                         def display_tree(node, level=0):
                             st.markdown(f"{'  ' * level}🔹 **{node['name']}**")
@@ -1594,16 +1711,10 @@ def process_data(data):
                 # Statistics about the shadow tree
                 st.markdown("### Shadow Tree Statistics")
                 try:
-                    import json
-                    from pathlib import Path
-                    
                     project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-                    tree_path = Path(project_root) / "shadow_tree_output" / "shadow_tree.json"
+                    tree_data = load_shadow_tree(os.path.join(project_root, "shadow_tree_output"))
                     
-                    if tree_path.exists():
-                        with open(tree_path, "r", encoding="utf-8") as f:
-                            tree_data = json.load(f)
-                        
+                    if tree_data is not None:
                         # Count nodes, files, directories
                         def count_nodes(node):
                             count = 1  # Count this node
@@ -1629,18 +1740,6 @@ def process_data(data):
                 except Exception as e:
                     st.error(f"Error calculating statistics: {str(e)}")
 
-    
-    # Cleanup on session end
-    if hasattr(st, 'session_state') and 'initialized' not in st.session_state:
-        st.session_state.initialized = True
-        
-        def cleanup():
-            registry.shutdown_all()
-            background.stop()
-            runtime_optimizer.stop()
-            
-        import atexit
-        atexit.register(cleanup)
 
 if __name__ == "__main__":
     run_ui()
@@ -0,0 +1,491 @@
+"""
+Value Profiler
+This module records argument type/value distributions for hot functions and
+builds guarded fast paths from them:
+- A bounded memo table for pure functions that see a small set of hot argument tuples
+- A specialized copy of the function with stable arguments folded in as constants
+Both fast paths carry a guard that deoptimizes back to the generic function when
+the observed distribution shifts.
+"""
+import ast
+import builtins
+from abc import ABC, abstractmethod
+import inspect
+import operator
+import textwrap
+import threading
+import time
+import types
+from collections import Counter, deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Builtins that never mutate their arguments or touch the outside world
+PURE_BUILTINS = {
+    'abs', 'all', 'any', 'bool', 'chr', 'divmod', 'enumerate', 'float', 'frozenset',
+    'hash', 'int', 'isinstance', 'issubclass', 'len', 'max', 'min', 'ord', 'pow',
+    'range', 'repr', 'reversed', 'round', 'sorted', 'str', 'sum', 'tuple', 'zip',
+}
+
+# Value types that can safely be folded into generated code
+CONSTANT_TYPES = (bool, int, float, complex, str, bytes, type(None))
+
+_MISSING = object()
+
+
+def _is_immutable(value: Any) -> bool:
+    """Whether a value can be handed to every caller of a memo table without copying."""
+    if type(value) in (tuple, frozenset):
+        return all(_is_immutable(item) for item in value)
+    return type(value) in CONSTANT_TYPES
+
+
+def _make_key(args: tuple, kwargs: dict) -> Optional[tuple]:
+    """
+    Build a hashable key for an argument tuple, or None if it is unhashable.
+
+    Argument types are part of the key: 1, 1.0 and True are equal and hash
+    alike, but a function may return different results for each.
+    """
+    key = (args, tuple(type(a) for a in args))
+    if kwargs:
+        key += (tuple(sorted((name, type(value), value) for name, value in kwargs.items())),)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _get_function_node(func: Callable) -> Optional[ast.FunctionDef]:
+    """Parse the source of a function and return its FunctionDef node."""
+    try:
+        source = textwrap.dedent(inspect.getsource(func))
+        tree = ast.parse(source)
+    except (OSError, TypeError, SyntaxError):
+        return None
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name == func.__name__:
+            return node
+    return None
+
+
+def is_pure_function(func: Callable) -> bool:
+    """
+    Conservatively decide whether a function is pure.
+
+    A function is treated as pure when it only reads its parameters, its own
+    locals, whitelisted builtins and globals bound to immutable values,
+    modules, classes or other functions, and never writes to attributes,
+    subscripts, globals or nonlocals.
+    """
+    if not isinstance(func, types.FunctionType) or func.__code__.co_freevars:
+        return False
+
+    node = _get_function_node(func)
+    if node is None:
+        return False
+
+    params = {arg.arg for arg in node.args.args + node.args.kwonlyargs + node.args.posonlyargs}
+    if node.args.vararg:
+        params.add(node.args.vararg.arg)
+    if node.args.kwarg:
+        params.add(node.args.kwarg.arg)
+
+    local_names = set(params)
+    for sub in ast.walk(node):
+        if isinstance(sub, ast.Name) and isinstance(sub.ctx, ast.Store):
+            local_names.add(sub.id)
+
+    for sub in ast.walk(node):
+        if sub is not node and isinstance(sub, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)):
+            return False
+        if isinstance(sub, (ast.Global, ast.Nonlocal, ast.Yield, ast.YieldFrom, ast.Await, ast.Delete)):
+            return False
+        if isinstance(sub, (ast.Attribute, ast.Subscript)) and not isinstance(sub.ctx, ast.Load):
+            return False
+        if isinstance(sub, ast.Call):
+            # Only direct calls to pure builtins are allowed; method calls may mutate
+            if not (isinstance(sub.func, ast.Name) and sub.func.id in PURE_BUILTINS
+                    and sub.func.id not in local_names
+                    and sub.func.id not in func.__globals__):
+                return False
+        if isinstance(sub, ast.Name) and isinstance(sub.ctx, ast.Load) and sub.id not in local_names:
+            value = func.__globals__.get(sub.id, _MISSING)
+            if value is _MISSING:
+                if not hasattr(builtins, sub.id):
+                    return False
+            elif not isinstance(value, CONSTANT_TYPES + (tuple, frozenset, type, types.ModuleType,
+                                                         types.FunctionType, types.BuiltinFunctionType)):
+                return False
+    return True
+
+
+class ValueProfile:
+    """Argument type/value distribution for a single function."""
+
+    def __init__(self, max_distinct: int = 1024):
+        self.max_distinct = max_distinct
+        self.calls = 0
+        self.total_time = 0.0
+        self.key_counts = Counter()
+        self.type_counts = Counter()
+        self.position_values = []
+        self.untracked = 0
+
+    def record(self, args: tuple, kwargs: dict, elapsed: float) -> None:
+        """Record one call of the function."""
+        self.calls += 1
+        self.total_time += elapsed
+        self.type_counts[tuple(type(a).__name__ for a in args)] += 1
+
+        key = _make_key(args, kwargs)
+        if key is None or (key not in self.key_counts and len(self.key_counts) >= self.max_distinct):
+            self.untracked += 1
+        else:
+            self.key_counts[key] += 1
+
+        if kwargs:
+            return
+        while len(self.position_values) < len(args):
+            self.position_values.append(Counter())
+        for index, value in enumerate(args):
+            counter = self.position_values[index]
+            if isinstance(value, CONSTANT_TYPES) and ((type(value), value) in counter or len(counter) < 8):
+                counter[(type(value), value)] += 1
+
+    @property
+    def average_time(self) -> float:
+        """Average generic execution time per call."""
+        return self.total_time / self.calls if self.calls else 0.0
+
+    def hot_keys(self, coverage: float = 0.9, max_keys: int = 64) -> List[tuple]:
+        """
+        Return the smallest set of argument keys covering `coverage` of all calls,
+        or an empty list if more than `max_keys` keys would be needed.
+        """
+        if not self.calls:
+            return []
+        needed = coverage * self.calls
+        covered = 0
+        keys = []
+        for key, count in self.key_counts.most_common(max_keys):
+            keys.append(key)
+            covered += count
+            if covered >= needed:
+                return keys
+        return []
+
+    def stable_arguments(self, threshold: float = 0.95) -> Dict[int, Any]:
+        """Return positional arguments that held one constant value in `threshold` of calls."""
+        stable = {}
+        if not self.calls:
+            return stable
+        for index, counter in enumerate(self.position_values):
+            if not counter:
+                continue
+            (value_type, value), count = counter.most_common(1)[0]
+            if count >= threshold * self.calls:
+                stable[index] = value
+        return stable
+
+    def summary(self) -> Dict[str, Any]:
+        """Summarize the distribution for reports."""
+        return {
+            'calls': self.calls,
+            'avg_time': self.average_time,
+            'distinct_keys': len(self.key_counts),
+            'untracked_calls': self.untracked,
+            'top_types': [list(t) for t, _ in self.type_counts.most_common(3)],
+        }
+
+
+class _ConstantFolder(ast.NodeTransformer):
+    """Substitute constant parameters and fold the expressions that become constant."""
+
+    _BINOPS = {
+        ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+        ast.Div: operator.truediv, ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod,
+        ast.Pow: operator.pow, ast.BitAnd: operator.and_, ast.BitOr: operator.or_,
+        ast.BitXor: operator.xor, ast.LShift: operator.lshift, ast.RShift: operator.rshift,
+    }
+    _UNARYOPS = {ast.Not: operator.not_, ast.USub: operator.neg, ast.UAdd: operator.pos,
+                 ast.Invert: operator.invert}
+    _CMPOPS = {
+        ast.Eq: operator.eq, ast.NotEq: operator.ne, ast.Lt: operator.lt, ast.LtE: operator.le,
+        ast.Gt: operator.gt, ast.GtE: operator.ge, ast.Is: operator.is_, ast.IsNot: operator.is_not,
+        ast.In: lambda a, b: a in b, ast.NotIn: lambda a, b: a not in b,
+    }
+
+    def __init__(self, constants: Dict[str, Any]):
+        self.constants = constants
+
+    @staticmethod
+    def _constant(value: Any, like: ast.AST) -> ast.AST:
+        return ast.copy_location(ast.Constant(value=value), like)
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        if isinstance(node.ctx, ast.Load) and node.id in self.constants:
+            return self._constant(self.constants[node.id], node)
+        return node
+
+    def visit_BinOp(self, node: ast.BinOp) -> ast.AST:
+        self.generic_visit(node)
+        op = self._BINOPS.get(type(node.op))
+        if op and isinstance(node.left, ast.Constant) and isinstance(node.right, ast.Constant):
+            try:
+                return self._constant(op(node.left.value, node.right.value), node)
+            except Exception:
+                pass
+        return node
+
+    def visit_UnaryOp(self, node: ast.UnaryOp) -> ast.AST:
+        self.generic_visit(node)
+        op = self._UNARYOPS.get(type(node.op))
+        if op and isinstance(node.operand, ast.Constant):
+            try:
+                return self._constant(op(node.operand.value), node)
+            except Exception:
+                pass
+        return node
+
+    def visit_Compare(self, node: ast.Compare) -> ast.AST:
+        self.generic_visit(node)
+        operands = [node.left] + node.comparators
+        if not all(isinstance(o, ast.Constant) for o in operands):
+            return node
+        try:
+            result = True
+            for op, left, right in zip(node.ops, operands, operands[1:]):
+                result = result and self._CMPOPS[type(op)](left.value, right.value)
+            return self._constant(bool(result), node)
+        except Exception:
+            return node
+
+    def visit_BoolOp(self, node: ast.BoolOp) -> ast.AST:
+        self.generic_visit(node)
+        is_and = isinstance(node.op, ast.And)
+        values = []
+        for index, value in enumerate(node.values):
+            if isinstance(value, ast.Constant):
+                # A deciding constant short-circuits the rest; a neutral one can be dropped
+                # unless it is the last operand, whose value is the result
+                if bool(value.value) != is_and or index == len(node.values) - 1:
+                    values.append(value)
+                    break
+                continue
+            values.append(value)
+        if len(values) == 1:
+            return values[0]
+        node.values = values
+        return node
+
+    def visit_IfExp(self, node: ast.IfExp) -> ast.AST:
+        self.generic_visit(node)
+        if isinstance(node.test, ast.Constant):
+            return node.body if node.test.value else node.orelse
+        return node
+
+    def visit_If(self, node: ast.If) -> Any:
+        self.generic_visit(node)
+        if isinstance(node.test, ast.Constant):
+            branch = node.body if node.test.value else node.orelse
+            return branch or [ast.copy_location(ast.Pass(), node)]
+        return node
+
+    def visit_While(self, node: ast.While) -> Any:
+        self.generic_visit(node)
+        if isinstance(node.test, ast.Constant) and not node.test.value:
+            return node.orelse or [ast.copy_location(ast.Pass(), node)]
+        return node
+
+
+def build_constant_specialization(func: Callable, stable: Dict[int, Any]) -> Optional[Callable]:
+    """
+    Build a copy of `func` with the given positional arguments folded in as constants.
+
+    Only parameters that are never reassigned inside the function are folded.
+    Returns None if the function cannot be re-compiled from source.
+    """
+    if not isinstance(func, types.FunctionType) or func.__code__.co_freevars:
+        return None
+    node = _get_function_node(func)
+    if node is None:
+        return None
+
+    positional = [arg.arg for arg in node.args.posonlyargs + node.args.args]
+    assigned = {sub.id for sub in ast.walk(node) if isinstance(sub, ast.Name) and not isinstance(sub.ctx, ast.Load)}
+    constants = {positional[i]: value for i, value in stable.items()
+                 if i < len(positional) and positional[i] not in assigned}
+    if not constants:
+        return None
+
+    node.decorator_list = []
+    node.name = f"{func.__name__}__specialized"
+    node = _ConstantFolder(constants).visit(node)
+    module = ast.fix_missing_locations(ast.Module(body=[node], type_ignores=[]))
+
+    namespace = {}
+    try:
+        code = compile(module, inspect.getsourcefile(func) or '<specialized>', 'exec')
+        exec(code, func.__globals__, namespace)
+    except Exception:
+        return None
+    specialized = namespace[node.name]
+    specialized.__defaults__ = func.__defaults__
+    specialized.__kwdefaults__ = func.__kwdefaults__
+    specialized.folded_constants = {positional.index(name): value for name, value in constants.items()}
+    return specialized
+
+
+class GuardedFastPath(ABC):
+    """
+    A fast path installed in front of a generic function.
+
+    The guard tracks misses over a sliding window of calls; when the miss rate
+    exceeds `max_miss_rate` the fast path deoptimizes and calls `on_deopt`.
+    Counters are updated under a lock, so a fast path may be called from
+    several threads.
+    """
+
+    def __init__(self, func: Callable, kind: str, baseline_time: float,
+                 on_deopt: Callable[['GuardedFastPath'], None] = None,
+                 window: int = 256, max_miss_rate: float = 0.5):
+        self.func = func
+        self.kind = kind
+        self.baseline_time = baseline_time
+        self.on_deopt = on_deopt
+        self.window = deque(maxlen=window)
+        self.max_miss_rate = max_miss_rate
+        self.active = True
+        self.hits = 0
+        self.misses = 0
+        self.hit_time = 0.0
+        self.lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        start_time = time.perf_counter()
+        hit, result = self._fast_call(args, kwargs)
+        if hit:
+            elapsed = time.perf_counter() - start_time
+            with self.lock:
+                self.hits += 1
+                self.hit_time += elapsed
+                self.window.append(0)
+            return result
+
+        with self.lock:
+            self.misses += 1
+            self.window.append(1)
+            shifted = (len(self.window) == self.window.maxlen
+                       and sum(self.window) > self.max_miss_rate * len(self.window))
+        if shifted:
+            self.deoptimize()
+        return self.func(*args, **kwargs)
+
+    @abstractmethod
+    def _fast_call(self, args: tuple, kwargs: dict) -> Tuple[bool, Any]:
+        """Try the fast path; return (hit, result)."""
+
+    def deoptimize(self) -> None:
+        """Disable the fast path and notify the owner, once."""
+        with self.lock:
+            if not self.active:
+                return
+            self.active = False
+        if self.on_deopt:
+            self.on_deopt(self)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    @property
+    def time_saved(self) -> float:
+        """Estimated time saved against the generic function's average."""
+        return max(0.0, self.hits * self.baseline_time - self.hit_time)
+
+    def report(self) -> Dict[str, Any]:
+        """Hit rate and time saved for this fast path."""
+        with self.lock:
+            return {
+                'kind': self.kind,
+                'active': self.active,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hit_rate,
+                'time_saved': self.time_saved,
+            }
+
+
+class MemoFastPath(GuardedFastPath):
+    """
+    Bounded memo table restricted to a set of hot argument keys.
+
+    Only immutable results are stored, since every caller receives the same
+    object. The first mutable result deoptimizes the fast path.
+    """
+
+    def __init__(self, func: Callable, hot_keys: List[tuple], baseline_time: float, **kwargs):
+        super().__init__(func, 'memo', baseline_time, **kwargs)
+        self.hot_keys = frozenset(hot_keys)
+        self.table = {}
+
+    def _fast_call(self, args: tuple, kwargs: dict) -> Tuple[bool, Any]:
+        key = _make_key(args, kwargs)
+        if key is None or key not in self.hot_keys:
+            return False, None
+        try:
+            return True, self.table[key]
+        except KeyError:
+            result = self.func(*args, **kwargs)
+            if _is_immutable(result):
+                self.table[key] = result
+            else:
+                self.deoptimize()
+            return True, result
+
+
+class ConstantFastPath(GuardedFastPath):
+    """Specialized function with stable positional arguments folded in as constants."""
+
+    def __init__(self, func: Callable, specialized: Callable, baseline_time: float, **kwargs):
+        super().__init__(func, 'constant', baseline_time, **kwargs)
+        self.specialized = specialized
+        self.guards = tuple((i, type(v), v) for i, v in specialized.folded_constants.items())
+        self.min_args = max(i for i, _, _ in self.guards) + 1
+
+    def _fast_call(self, args: tuple, kwargs: dict) -> Tuple[bool, Any]:
+        if kwargs or len(args) < self.min_args:
+            return False, None
+        for index, value_type, value in self.guards:
+            arg = args[index]
+            if type(arg) is not value_type or arg != value:
+                return False, None
+        return True, self.specialized(*args)
+
+
+def plan_fast_path(func: Callable, profile: ValueProfile, pure: bool,
+                   on_deopt: Callable[[GuardedFastPath], None] = None,
+                   min_calls: int = 100, max_memo_keys: int = 64,
+                   coverage: float = 0.9) -> Optional[GuardedFastPath]:
+    """
+    Choose a fast path for a function from its value profile.
+
+    Pure functions that concentrate on a few argument tuples get a memo table;
+    otherwise stable positional arguments are folded into a specialized copy.
+    """
+    if profile.calls < min_calls:
+        return None
+
+    if pure:
+        hot_keys = profile.hot_keys(coverage=coverage, max_keys=max_memo_keys)
+        if hot_keys:
+            return MemoFastPath(func, hot_keys, profile.average_time, on_deopt=on_deopt)
+
+    stable = profile.stable_arguments()
+    if stable:
+        specialized = build_constant_specialization(func, stable)
+        if specialized is not None:
+            return ConstantFastPath(func, specialized, profile.average_time, on_deopt=on_deopt)
+    return None
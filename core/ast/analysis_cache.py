@@ -0,0 +1,715 @@
+"""
+Analysis Cache
+This module parses each Python file once and shares the result between analyzers:
+- Entries are content-addressed: a file's key is the hash of its bytes plus the
+  interpreter's cache tag, so a tree is reused for as long as the file is unchanged
+- Parsed trees, the common per-file facts (symbols, imports, calls, metrics) and
+  results derived by individual tools are memoized on disk as pickles
+- A stat check (mtime, size) skips re-hashing files that were not touched
+- The disk store is capped at MAX_DISK_BYTES; least recently used entries
+  are evicted first
+- One warm process can serve the cache to every tool over a Unix socket (a
+  named pipe on Windows) in the cache directory; set ANALYSIS_CACHE_ADDRESS
+  and get_analysis_cache() returns a client for it. Each server generates a
+  random authkey and stores it in a file only its owner can read
+"""
+import argparse
+import ast
+import hashlib
+import logging
+import os
+import pickle
+import secrets
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("analysis_cache")
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_CACHE_DIR = os.path.join(PROJECT_ROOT, ".logic_cache", "analysis")
+
+# Bump when the layout of trees or facts changes
+CACHE_VERSION = "1"
+
+# Parsed trees kept in memory; older ones are reloaded from disk on demand
+MEMORY_ENTRIES = 1024
+
+# The disk store is pruned back to PRUNE_TARGET of this size when it grows past it
+MAX_DISK_BYTES = 512 << 20
+PRUNE_TARGET = 0.8
+# Bytes written between size checks
+PRUNE_EVERY_BYTES = 32 << 20
+
+ADDRESS_ENV = "ANALYSIS_CACHE_ADDRESS"
+# Hex authkey; by default it is read from the server's key file
+AUTHKEY_ENV = "ANALYSIS_CACHE_AUTHKEY"
+SOCKET_NAME = "server.sock"
+AUTHKEY_NAME = "server.key"
+
+BRANCH_NODES = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.Try, ast.With, ast.AsyncWith, ast.IfExp)
+NESTING_NODES = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.Try, ast.With, ast.AsyncWith)
+
+
+def content_digest(data: bytes) -> str:
+    """Content address of a file's bytes for this interpreter."""
+    h = hashlib.blake2b(data, digest_size=16)
+    h.update(f":{sys.implementation.cache_tag}:{CACHE_VERSION}".encode('utf-8'))
+    return h.hexdigest()
+
+
+def _call_name(node: ast.expr) -> Optional[str]:
+    """Dotted name of a call target, if it is a plain name or attribute chain."""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if isinstance(node, ast.Name):
+        parts.append(node.id)
+        return ".".join(reversed(parts))
+    return None
+
+
+class _FactsVisitor(ast.NodeVisitor):
+    """Collects symbols, imports, calls and metrics in a single pass."""
+
+    def __init__(self):
+        self.symbols = []
+        self.imports = []
+        self.calls = {}
+        self.metrics = {
+            'statements': 0,
+            'branches': 0,
+            'functions': 0,
+            'classes': 0,
+            'max_nesting': 0,
+            'complexity': {},
+        }
+        self._scope = []
+        self._depth = 0
+        self._function = None
+
+    def _define(self, node, kind):
+        qualname = ".".join(name for name, _ in self._scope) + ("." if self._scope else "") + node.name
+        self.symbols.append({
+            'name': node.name,
+            'qualname': qualname,
+            'kind': kind,
+            'async': isinstance(node, ast.AsyncFunctionDef),
+            'lineno': node.lineno,
+            'end_lineno': getattr(node, 'end_lineno', node.lineno),
+            'docstring': ast.get_docstring(node) is not None,
+        })
+        return qualname
+
+    def visit_ClassDef(self, node):
+        self.metrics['classes'] += 1
+        self._define(node, 'class')
+        self._scope.append((node.name, 'class'))
+        self.generic_visit(node)
+        self._scope.pop()
+
+    def visit_FunctionDef(self, node):
+        self.metrics['functions'] += 1
+        kind = 'method' if self._scope and self._scope[-1][1] == 'class' else 'function'
+        qualname = self._define(node, kind)
+        outer, outer_depth = self._function, self._depth
+        self._function, self._depth = qualname, 0
+        self.metrics['complexity'][qualname] = 1
+        self._scope.append((node.name, 'function'))
+        self.generic_visit(node)
+        self._scope.pop()
+        self._function, self._depth = outer, outer_depth
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.imports.append({'module': alias.name, 'name': None, 'asname': alias.asname,
+                                 'level': 0, 'lineno': node.lineno})
+        self.generic_visit(node)
+
+    def visit_ImportFrom(self, node):
+        for alias in node.names:
+            self.imports.append({'module': node.module, 'name': alias.name, 'asname': alias.asname,
+                                 'level': node.level, 'lineno': node.lineno})
+        self.generic_visit(node)
+
+    def visit_Call(self, node):
+        name = _call_name(node.func)
+        if name:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        self.generic_visit(node)
+
+    def visit_BoolOp(self, node):
+        if self._function:
+            self.metrics['complexity'][self._function] += len(node.values) - 1
+        self.generic_visit(node)
+
+    def visit_comprehension(self, node):
+        if self._function:
+            self.metrics['complexity'][self._function] += 1 + len(node.ifs)
+        self.generic_visit(node)
+
+    def generic_visit(self, node):
+        if isinstance(node, ast.stmt):
+            self.metrics['statements'] += 1
+        if isinstance(node, BRANCH_NODES):
+            self.metrics['branches'] += 1
+            if self._function:
+                self.metrics['complexity'][self._function] += 1
+        if isinstance(node, NESTING_NODES):
+            self._depth += 1
+            self.metrics['max_nesting'] = max(self.metrics['max_nesting'], self._depth)
+            super().generic_visit(node)
+            self._depth -= 1
+        else:
+            super().generic_visit(node)
+
+
+def compute_facts(tree: ast.Module, source: str) -> Dict[str, Any]:
+    """Symbols, imports, calls and metrics of a parsed module."""
+    visitor = _FactsVisitor()
+    visitor.visit(tree)
+    lines = source.splitlines()
+    stripped = [line.strip() for line in lines]
+    visitor.metrics.update(
+        lines=len(lines),
+        blank_lines=sum(1 for line in stripped if not line),
+        comment_lines=sum(1 for line in stripped if line.startswith('#')),
+    )
+    return {
+        'docstring': ast.get_docstring(tree),
+        'symbols': visitor.symbols,
+        'imports': visitor.imports,
+        'calls': visitor.calls,
+        'metrics': visitor.metrics,
+    }
+
+
+def iter_python_files(paths: List[str]):
+    """Python files given directly or found under the given directories."""
+    for path in paths:
+        if os.path.isfile(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = [d for d in dirs if d not in ('__pycache__', '.git', '.logic_cache')]
+            for file in files:
+                if file.endswith('.py'):
+                    yield os.path.join(root, file)
+
+
+class _Entry:
+    """What is known in memory about one file content."""
+
+    __slots__ = ('source', 'tree', 'error')
+
+    def __init__(self, source: str, tree: Optional[ast.Module], error: Optional[tuple]):
+        self.source = source
+        self.tree = tree
+        self.error = error
+
+
+class AnalysisCache:
+    """
+    Parse-once cache of trees, facts and derived results.
+
+    Trees are shared between callers and must be treated as read-only; pass
+    copy=True to tree() for one that can be modified. Facts and derived
+    results are returned as fresh copies.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = DEFAULT_CACHE_DIR, memory_entries: int = MEMORY_ENTRIES,
+                 max_disk_bytes: Optional[int] = MAX_DISK_BYTES):
+        self.cache_dir = cache_dir
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.stats = {'parsed': 0, 'disk': 0, 'memory': 0, 'derived_hits': 0, 'derived_misses': 0,
+                      'evicted': 0}
+        self._written = 0
+        self._files = {}
+        self._entries = OrderedDict()
+        self._values = {}
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    # Disk store, laid out like the pipeline engine's artifact cache
+
+    def _path(self, digest: str, kind: str) -> str:
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.{kind}.pkl")
+
+    def _load(self, digest: str, kind: str) -> Optional[bytes]:
+        if not self.cache_dir:
+            return None
+        path = self._path(digest, kind)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            # The mtime orders entries for eviction
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def _store(self, digest: str, kind: str, data: bytes) -> None:
+        if not self.cache_dir:
+            return
+        path = self._path(digest, kind)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._written += len(data)
+        if self.max_disk_bytes is not None and self._written >= PRUNE_EVERY_BYTES:
+            self.prune()
+
+    def prune(self, max_bytes: Optional[int] = None) -> int:
+        """
+        Evict least recently used entries from disk once the store is larger
+        than max_bytes (max_disk_bytes by default); returns how many were removed.
+        """
+        max_bytes = self.max_disk_bytes if max_bytes is None else max_bytes
+        self._written = 0
+        if not self.cache_dir or max_bytes is None or not os.path.isdir(self.cache_dir):
+            return 0
+        entries, total = [], 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.pkl'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime_ns, st.st_size, path))
+                total += st.st_size
+        if total <= max_bytes:
+            return 0
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= max_bytes * PRUNE_TARGET:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        self.stats['evicted'] += removed
+        return removed
+
+    # Files and their content digests
+
+    def _read(self, file_path: str) -> Tuple[str, Optional[bytes]]:
+        """The content digest of a file, and its bytes if they had to be read."""
+        key = os.path.abspath(file_path)
+        st = os.stat(key)
+        signature = (st.st_mtime_ns, st.st_size)
+        known = self._files.get(key)
+        if known is not None and known[0] == signature:
+            return known[1], None
+        with open(key, 'rb') as f:
+            data = f.read()
+        digest = content_digest(data)
+        with self._lock:
+            self._files[key] = (signature, digest)
+        return digest, data
+
+    def _entry(self, digest: str, data: Optional[bytes], file_path: Optional[str]) -> _Entry:
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                self._entries.move_to_end(digest)
+                self.stats['memory'] += 1
+                return entry
+
+        if data is None:
+            with open(file_path, 'rb') as f:
+                data = f.read()
+        source = data.decode('utf-8', errors='replace')
+        stored = self._load(digest, 'tree')
+        tree, error = None, None
+        if stored is not None:
+            try:
+                tree, error = pickle.loads(stored)
+                self.stats['disk'] += 1
+            except Exception:
+                stored = None
+        if stored is None:
+            try:
+                tree = ast.parse(data)
+            except SyntaxError as e:
+                error = (e.msg, e.lineno, e.offset, e.text)
+            self.stats['parsed'] += 1
+            self._store(digest, 'tree', pickle.dumps((tree, error), protocol=pickle.HIGHEST_PROTOCOL))
+
+        entry = _Entry(source, tree, error)
+        with self._lock:
+            self._entries[digest] = entry
+            while len(self._entries) > self.memory_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _resolve(self, file_path: str) -> Tuple[str, _Entry]:
+        digest, data = self._read(file_path)
+        return digest, self._entry(digest, data, file_path)
+
+    def _source_entry(self, code: str) -> Tuple[str, _Entry]:
+        data = code.encode('utf-8')
+        digest = content_digest(data)
+        return digest, self._entry(digest, data, None)
+
+    @staticmethod
+    def _tree_of(entry: _Entry, filename: str, copy: bool) -> ast.Module:
+        if entry.error is not None:
+            msg, lineno, offset, text = entry.error
+            raise SyntaxError(msg, (filename, lineno, offset, text))
+        return pickle.loads(pickle.dumps(entry.tree)) if copy else entry.tree
+
+    # Public interface
+
+    def source(self, file_path: str) -> str:
+        """Text of a file."""
+        return self._resolve(file_path)[1].source
+
+    def tree(self, file_path: str, copy: bool = False) -> ast.Module:
+        """Parsed tree of a file; raises SyntaxError like ast.parse."""
+        return self._tree_of(self._resolve(file_path)[1], file_path, copy)
+
+    def parse_source(self, code: str, copy: bool = False) -> ast.Module:
+        """Parsed tree of a code string, shared with files of the same content."""
+        return self._tree_of(self._source_entry(code)[1], "<unknown>", copy)
+
+    def derived(self, file_path: str, name: str, compute: Callable[[], Any], version: str = "1") -> Any:
+        """
+        A result computed from a file by a tool, memoized by the file's content.
+
+        compute is only called on a miss; it should read the file through this
+        cache so the tree is shared. The name and version identify the tool's
+        result, so bump the version when the computation changes.
+        """
+        digest, _ = self._read(file_path)
+        return self._derived(digest, name, version, compute)
+
+    def source_derived(self, code: str, name: str, compute: Callable[[], Any], version: str = "1") -> Any:
+        """Like derived(), for a code string."""
+        digest = content_digest(code.encode('utf-8'))
+        return self._derived(digest, name, version, compute)
+
+    def _get_value(self, digest: str, kind: str) -> Optional[bytes]:
+        data = self._values.get((digest, kind))
+        if data is None:
+            data = self._load(digest, kind)
+            if data is not None:
+                with self._lock:
+                    self._values[(digest, kind)] = data
+        return data
+
+    def _put_value(self, digest: str, kind: str, data: bytes) -> None:
+        with self._lock:
+            self._values[(digest, kind)] = data
+        self._store(digest, kind, data)
+
+    def _derived(self, digest: str, name: str, version: str, compute: Callable[[], Any]) -> Any:
+        kind = f"{name}-{version}"
+        data = self._get_value(digest, kind)
+        if data is not None:
+            try:
+                value = pickle.loads(data)
+                self.stats['derived_hits'] += 1
+                return value
+            except Exception:
+                pass
+        self.stats['derived_misses'] += 1
+        value = compute()
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            # Unpicklable results are simply not memoized
+            return value
+        self._put_value(digest, kind, data)
+        return value
+
+    def facts(self, file_path: str) -> Dict[str, Any]:
+        """Symbols, imports, calls and metrics of a file; raises SyntaxError like ast.parse."""
+        return self.derived(file_path, 'facts', lambda: compute_facts(self.tree(file_path), self.source(file_path)),
+                            CACHE_VERSION)
+
+    def source_facts(self, code: str) -> Dict[str, Any]:
+        """Facts of a code string."""
+        return self.source_derived(code, 'facts', lambda: compute_facts(self.parse_source(code), code),
+                                   CACHE_VERSION)
+
+    def warm(self, paths: List[str]) -> int:
+        """Parse every Python file under paths and compute its facts."""
+        count = 0
+        for file_path in iter_python_files(paths):
+            try:
+                self.facts(file_path)
+            except (SyntaxError, OSError):
+                pass
+            count += 1
+        return count
+
+    def clear(self) -> None:
+        """Forget everything, in memory and on disk."""
+        with self._lock:
+            self._files.clear()
+            self._entries.clear()
+            self._values.clear()
+        if self.cache_dir and os.path.isdir(self.cache_dir):
+            import shutil
+            shutil.rmtree(self.cache_dir)
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self.stats, files=len(self._files), trees=len(self._entries))
+
+
+class AnalysisClient:
+    """
+    The AnalysisCache interface, served by a warm process (see serve()).
+
+    Trees and facts come from the server; derived results missing there are
+    computed in this process and sent back for the next tool.
+    """
+
+    def __init__(self, address: Any, authkey: bytes):
+        from multiprocessing.connection import Client
+        self._conn = Client(address, authkey=authkey)
+        self._lock = threading.Lock()
+
+    def _call(self, method: str, *args) -> Any:
+        with self._lock:
+            self._conn.send((method, args))
+            ok, value = self._conn.recv()
+        if not ok:
+            raise value
+        return value
+
+    def source(self, file_path: str) -> str:
+        return self._call('source', os.path.abspath(file_path))
+
+    def tree(self, file_path: str, copy: bool = False) -> ast.Module:
+        # Trees arrive pickled, so every one is already a private copy
+        return pickle.loads(self._call('tree_bytes', os.path.abspath(file_path)))
+
+    def parse_source(self, code: str, copy: bool = False) -> ast.Module:
+        return pickle.loads(self._call('source_tree_bytes', code))
+
+    def derived(self, file_path: str, name: str, compute: Callable[[], Any], version: str = "1") -> Any:
+        return self._derived(self._call('digest', os.path.abspath(file_path)), name, version, compute)
+
+    def source_derived(self, code: str, name: str, compute: Callable[[], Any], version: str = "1") -> Any:
+        return self._derived(content_digest(code.encode('utf-8')), name, version, compute)
+
+    def _derived(self, digest: str, name: str, version: str, compute: Callable[[], Any]) -> Any:
+        kind = f"{name}-{version}"
+        data = self._call('get_value', digest, kind)
+        if data is not None:
+            return pickle.loads(data)
+        value = compute()
+        try:
+            self._call('put_value', digest, kind, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            pass
+        return value
+
+    def facts(self, file_path: str) -> Dict[str, Any]:
+        return self._call('facts', os.path.abspath(file_path))
+
+    def source_facts(self, code: str) -> Dict[str, Any]:
+        return self._call('source_facts', code)
+
+    def warm(self, paths: List[str]) -> int:
+        return self._call('warm', [os.path.abspath(p) for p in paths])
+
+    def get_stats(self) -> Dict[str, int]:
+        return self._call('get_stats')
+
+
+def _handle(cache: AnalysisCache, method: str, args: tuple) -> Any:
+    """Run one client request against the server's cache."""
+    if method == 'tree_bytes':
+        return pickle.dumps(cache.tree(*args), protocol=pickle.HIGHEST_PROTOCOL)
+    if method == 'source_tree_bytes':
+        return pickle.dumps(cache.parse_source(*args), protocol=pickle.HIGHEST_PROTOCOL)
+    if method == 'digest':
+        return cache._read(*args)[0]
+    if method == 'get_value':
+        return cache._get_value(*args)
+    if method == 'put_value':
+        return cache._put_value(*args)
+    # Clearing the store is left to its owner ('python -m core.ast.analysis_cache clear')
+    if method in ('source', 'facts', 'source_facts', 'warm', 'get_stats'):
+        return getattr(cache, method)(*args)
+    raise ValueError(f"Unknown analysis cache request: {method}")
+
+
+def default_address(cache_dir: str = DEFAULT_CACHE_DIR) -> str:
+    """A Unix socket in the cache directory, or a named pipe on Windows."""
+    if os.name == 'nt':
+        digest = hashlib.blake2b(os.path.abspath(cache_dir).encode('utf-8'), digest_size=8).hexdigest()
+        return rf"\\.\pipe\analysis-cache-{digest}"
+    return os.path.join(cache_dir, SOCKET_NAME)
+
+
+def authkey_path(cache_dir: str = DEFAULT_CACHE_DIR) -> str:
+    return os.path.join(cache_dir, AUTHKEY_NAME)
+
+
+def create_authkey(cache_dir: str = DEFAULT_CACHE_DIR) -> bytes:
+    """A new random authkey, written to a file only the owner can read."""
+    os.makedirs(cache_dir, exist_ok=True)
+    authkey = secrets.token_bytes(32)
+    path = authkey_path(cache_dir)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        f.write(authkey.hex())
+    # O_CREAT's mode does not apply to a file that already existed
+    os.chmod(path, 0o600)
+    return authkey
+
+
+def read_authkey(cache_dir: str = DEFAULT_CACHE_DIR) -> Optional[bytes]:
+    """The authkey from ANALYSIS_CACHE_AUTHKEY or the server's key file, if either exists."""
+    value = os.environ.get(AUTHKEY_ENV)
+    if value is None:
+        try:
+            with open(authkey_path(cache_dir)) as f:
+                value = f.read()
+        except OSError:
+            return None
+    try:
+        return bytes.fromhex(value.strip())
+    except ValueError:
+        return None
+
+
+def serve(address: Any = None, cache_dir: Optional[str] = DEFAULT_CACHE_DIR, authkey: Optional[bytes] = None) -> None:
+    """
+    Serve one warm AnalysisCache to any number of clients until interrupted.
+
+    Requests are unpickled, so only clients holding the authkey may connect:
+    by default a fresh random key is written to the cache directory with
+    mode 0600, and the server listens on a Unix socket there.
+    """
+    from multiprocessing import AuthenticationError
+    from multiprocessing.connection import Listener
+
+    cache = AnalysisCache(cache_dir)
+    if address is None:
+        address = default_address(cache_dir)
+    if authkey is None:
+        authkey = create_authkey(cache_dir)
+    if isinstance(address, str) and os.name != 'nt' and os.path.exists(address):
+        # A socket left behind by a server that did not shut down cleanly
+        os.remove(address)
+
+    def client_loop(conn):
+        with conn:
+            while True:
+                try:
+                    method, args = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    conn.send((True, _handle(cache, method, args)))
+                except Exception as e:
+                    conn.send((False, e))
+
+    old_umask = os.umask(0o077)
+    try:
+        listener = Listener(address, authkey=authkey)
+    finally:
+        os.umask(old_umask)
+    with listener:
+        logger.info(f"Analysis cache serving on {listener.address}")
+        print(f"Analysis cache serving on {listener.address}")
+        while True:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, EOFError, OSError):
+                # A client without the authkey, or one that hung up during the handshake
+                continue
+            threading.Thread(target=client_loop, args=(conn,), daemon=True).start()
+
+
+def parse_address(value: str) -> Any:
+    """'host:port' for TCP, anything else is a socket path (or pipe name)."""
+    host, _, port = value.rpartition(':')
+    if host and port.isdigit():
+        return host, int(port)
+    return value
+
+
+_cache = None
+
+
+def get_analysis_cache():
+    """
+    The process-wide cache: a client of the warm server when ANALYSIS_CACHE_ADDRESS
+    is set and reachable, a local AnalysisCache otherwise.
+    """
+    global _cache
+    if _cache is None:
+        cache_dir = os.environ.get("ANALYSIS_CACHE_DIR", DEFAULT_CACHE_DIR)
+        address = os.environ.get(ADDRESS_ENV)
+        if address:
+            authkey = read_authkey(cache_dir)
+            if authkey is None:
+                logger.warning(f"No authkey for the analysis cache server at {address}; using a local cache")
+            else:
+                try:
+                    _cache = AnalysisClient(parse_address(address), authkey)
+                except Exception as e:
+                    logger.warning(f"Analysis cache server at {address} unavailable ({e}); using a local cache")
+        if _cache is None:
+            _cache = AnalysisCache(cache_dir)
+    return _cache
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Shared parse-once analysis cache")
+    parser.add_argument("command", choices=["serve", "warm", "stats", "prune", "clear"])
+    parser.add_argument("paths", nargs="*", default=[PROJECT_ROOT], help="Files or directories to warm")
+    parser.add_argument("--address", default=os.environ.get(ADDRESS_ENV),
+                        help="Socket path (default: in the cache directory) or host:port of the cache server")
+    parser.add_argument("--cache-dir", default=os.environ.get("ANALYSIS_CACHE_DIR", DEFAULT_CACHE_DIR))
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(parse_address(args.address) if args.address else None, args.cache_dir)
+        return
+
+    cache = AnalysisCache(args.cache_dir)
+    if args.command == "warm":
+        count = cache.warm(args.paths)
+        print(f"Warmed {count} files: {cache.get_stats()}")
+    elif args.command == "stats":
+        print(cache.get_stats())
+    elif args.command == "prune":
+        print(f"Evicted {cache.prune()} entries")
+    elif args.command == "clear":
+        cache.clear()
+        print(f"Cleared {args.cache_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Directory Scanner
+This module collects directory statistics for a whole tree in one pass:
+- Each directory is listed once with os.scandir; whether an entry is a file or
+  a directory comes from the DirEntry, without a stat call per entry
+- Per-directory records (file and subdirectory counts, extensions, optional
+  sizes and file entries) are aggregated into depth/breadth/extension totals
+- Top-level subtrees are scanned on a process pool for large trees
+- Incremental scans reuse the record of every directory whose mtime has not
+  changed, so only the listings that changed are read again
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_CACHE_DIR = os.path.join(PROJECT_ROOT, ".logic_cache", "dirscan")
+DEFAULT_EXCLUDE = ("__pycache__", ".git", ".logic_cache")
+
+# Directories in the previous scan above which the pool is used by default
+PARALLEL_THRESHOLD = 2000
+
+# A directory changed this close to when it was listed may have changed again
+# within the same mtime tick, so its record is not reused
+RACY_WINDOW_NS = 2 * 10**9
+
+CACHE_VERSION = 1
+
+
+def _list_directory(path: str, exclude: frozenset, sizes: bool, entries: bool) -> Dict[str, Any]:
+    """Read one directory into a record."""
+    record = {"files": 0, "subdirs": [], "symlinks": [], "extensions": {}, "size": 0}
+    if entries:
+        record["file_entries"] = []
+    extensions = record["extensions"]
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                if entry.name in exclude:
+                    continue
+                record["subdirs"].append(entry.name)
+                if entry.is_symlink():
+                    record["symlinks"].append(entry.name)
+                continue
+            record["files"] += 1
+            ext = os.path.splitext(entry.name)[1]
+            extensions[ext] = extensions.get(ext, 0) + 1
+            size = 0
+            if sizes:
+                try:
+                    size = entry.stat().st_size
+                except OSError:
+                    pass
+                record["size"] += size
+            if entries:
+                record["file_entries"].append((entry.name, size))
+    return record
+
+
+def _scan_subtree(root: str, start: str, depth: int, options: Tuple, cache: Dict[str, Dict[str, Any]]
+                  ) -> Tuple[Dict[str, Dict[str, Any]], List[Tuple[str, str]], int]:
+    """
+    Scan root/start and everything below it.
+
+    Returns the records by relative path, (path, error) pairs for directories
+    that could not be read, and how many records were reused from cache.
+    """
+    exclude, sizes, entries, max_depth = options
+    records, errors, reused = {}, [], 0
+    stack = [(start, depth)]
+    while stack:
+        rel, depth = stack.pop()
+        path = os.path.join(root, rel) if rel else root
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+            cached = cache.get(rel)
+            if (cached is not None and cached["mtime_ns"] == mtime_ns
+                    and cached["scanned_ns"] - mtime_ns > RACY_WINDOW_NS):
+                record = cached
+                reused += 1
+            else:
+                scanned_ns = time.time_ns()
+                record = _list_directory(path, exclude, sizes, entries)
+                record.update(mtime_ns=mtime_ns, scanned_ns=scanned_ns)
+        except OSError as e:
+            errors.append((rel, str(e)))
+            continue
+        record["depth"] = depth
+        records[rel] = record
+        if max_depth is not None and depth + 1 > max_depth:
+            continue
+        symlinks = set(record["symlinks"])
+        for name in reversed(record["subdirs"]):
+            if name not in symlinks:
+                stack.append((os.path.join(rel, name) if rel else name, depth + 1))
+    return records, errors, reused
+
+
+def _scan_subtree_task(args):
+    return _scan_subtree(*args)
+
+
+class TreeScan:
+    """Per-directory records of a scan and the aggregates computed from them."""
+
+    def __init__(self, root: str, records: Dict[str, Dict[str, Any]], errors: List[Tuple[str, str]],
+                 stats: Dict[str, Any]):
+        self.root = root
+        # Relative path ("" for the root) -> {'depth', 'files', 'subdirs', 'symlinks',
+        # 'extensions', 'size', ['file_entries'], 'mtime_ns', 'scanned_ns'}
+        self.records = records
+        self.errors = errors
+        self.stats = stats
+
+    @property
+    def total_files(self) -> int:
+        return sum(r["files"] for r in self.records.values())
+
+    @property
+    def total_dirs(self) -> int:
+        """Directories below the root."""
+        return sum(len(r["subdirs"]) for r in self.records.values())
+
+    @property
+    def total_size(self) -> int:
+        return sum(r["size"] for r in self.records.values())
+
+    @property
+    def max_depth(self) -> int:
+        return max((r["depth"] for r in self.records.values()), default=0)
+
+    def by_depth(self) -> Dict[int, Dict[str, int]]:
+        """{depth: {'dirs', 'files'}} for the entries inside directories at each depth."""
+        result = {}
+        for record in self.records.values():
+            counts = result.setdefault(record["depth"], {"dirs": 0, "files": 0})
+            counts["dirs"] += len(record["subdirs"])
+            counts["files"] += record["files"]
+        return dict(sorted(result.items()))
+
+    def extensions(self) -> Dict[str, int]:
+        """File counts by extension ('' for files without one)."""
+        result = {}
+        for record in self.records.values():
+            for ext, count in record["extensions"].items():
+                result[ext] = result.get(ext, 0) + count
+        return result
+
+    def breadth(self) -> Dict[int, int]:
+        """Number of directories by how many entries they hold."""
+        result = {}
+        for record in self.records.values():
+            items = record["files"] + len(record["subdirs"])
+            result[items] = result.get(items, 0) + 1
+        return dict(sorted(result.items()))
+
+    def empty_dirs(self) -> List[str]:
+        return sorted(rel for rel, r in self.records.items() if not r["files"] and not r["subdirs"])
+
+
+def _cache_file(root: str, options: Tuple, cache_dir: str) -> str:
+    key = hashlib.blake2b(repr((CACHE_VERSION, root, options)).encode("utf-8"), digest_size=16).hexdigest()
+    return os.path.join(cache_dir, key[:2], f"{key}.pkl")
+
+
+def _load_cache(path: str) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return {}
+
+
+def _save_cache(path: str, records: Dict[str, Dict[str, Any]]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(records, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def scan_tree(root: str, exclude: Iterable[str] = DEFAULT_EXCLUDE, sizes: bool = False, entries: bool = False,
+              max_depth: Optional[int] = None, incremental: bool = False, cache_dir: str = DEFAULT_CACHE_DIR,
+              max_workers: Optional[int] = None) -> TreeScan:
+    """
+    Scan a directory tree.
+
+    Args:
+        root: Directory to scan
+        exclude: Directory names that are skipped and not counted
+        sizes: Stat each file for its size (one extra call per file)
+        entries: Keep (name, size) for every file in the records
+        max_depth: Deepest directory level that is listed (root is 0)
+        incremental: Reuse records of directories whose mtime did not change
+            and save the records for the next scan. A directory's mtime
+            changes when entries are added, removed or renamed, not when a
+            file's content changes, so sizes of files in otherwise unchanged
+            directories can be stale.
+        cache_dir: Where incremental records are kept
+        max_workers: Processes for the top-level subtrees; 1 scans serially
+            and None uses the pool only when the previous scan was large
+
+    Symlinked directories are counted but not followed.
+    """
+    root = os.path.abspath(root)
+    options = (frozenset(exclude), sizes, entries, max_depth)
+    start = time.time()
+    cache_path = _cache_file(root, options, cache_dir) if incremental else None
+    cache = _load_cache(cache_path) if cache_path else {}
+
+    records, errors, reused = _scan_subtree(root, "", 0, options[:3] + (0,), cache)
+    top = records.get("")
+    subtrees = [] if top is None or max_depth == 0 else [
+        name for name in top["subdirs"] if name not in top["symlinks"]]
+
+    parallel = len(subtrees) > 1 and (max_workers or 0) != 1 and (
+        max_workers is not None or len(cache) >= PARALLEL_THRESHOLD)
+    by_subtree = {name: {} for name in subtrees}
+    for rel, record in cache.items():
+        head = rel.split(os.sep, 1)[0]
+        if rel and head in by_subtree:
+            by_subtree[head][rel] = record
+    tasks = [(root, name, 1, options, by_subtree[name]) for name in subtrees]
+
+    if parallel:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_scan_subtree_task, tasks))
+    else:
+        results = [_scan_subtree_task(task) for task in tasks]
+    for sub_records, sub_errors, sub_reused in results:
+        records.update(sub_records)
+        errors.extend(sub_errors)
+        reused += sub_reused
+
+    if cache_path:
+        _save_cache(cache_path, records)
+    stats = {"directories": len(records), "reused": reused, "listed": len(records) - reused,
+             "parallel": parallel, "duration": time.time() - start}
+    return TreeScan(root, records, errors, stats)
+
+
+def main():
+    """Main entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Directory statistics in one scan")
+    parser.add_argument("root", nargs="?", default=".", help="Directory to scan")
+    parser.add_argument("--sizes", action="store_true", help="Include file sizes")
+    parser.add_argument("--incremental", action="store_true", help="Reuse records of unchanged directories")
+    parser.add_argument("--workers", type=int, default=None, help="Processes for top-level subtrees")
+    args = parser.parse_args()
+
+    scan = scan_tree(args.root, sizes=args.sizes, incremental=args.incremental, max_workers=args.workers)
+    print(f"Files: {scan.total_files}")
+    print(f"Directories: {scan.total_dirs}")
+    print(f"Maximum depth: {scan.max_depth}")
+    if args.sizes:
+        print(f"Total size: {scan.total_size} bytes")
+    for ext, count in sorted(scan.extensions().items(), key=lambda x: x[1], reverse=True)[:10]:
+        print(f"  {ext or '(no extension)'}: {count}")
+    print(f"Listed {scan.stats['listed']} directories, reused {scan.stats['reused']} "
+          f"in {scan.stats['duration']:.2f}s")
+    for rel, error in scan.errors:
+        print(f"❌ {rel or '.'}: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,40 @@
 """
 Run NL docstring explanation on all modules in the project, backup, and legacy.
 Uses the project import fixer for robust imports from any directory.
-Outputs NL summaries to a specified file for documentation and mapping.
+Summaries are written as JSONL, one {'file', 'hash', 'mtime_ns', 'size', 'summary'}
+record per module, to all_module_nl_summaries.jsonl; modules unchanged since the
+previous run are reused rather than summarized again.
 """
-# Run NL docstring explanation on all modules in the project, backup, and legacy
-# Uses the project import fixer for robust imports from any directory
-
 import sys
-import os
 from pathlib import Path
 
-# Ensure project root is in sys.path
+# Ensure project root and the NLP utilities are in sys.path; the summarizer is
+# imported from its directory, as the utils package __init__ needs modules lost
+# in the reorganization and the fixer below replaces that package
 project_root = Path(__file__).parent.resolve()
-if str(project_root) not in sys.path:
-    sys.path.insert(0, str(project_root))
+for path in (project_root, project_root / "utils" / "nlp"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from shadow_tree_nlp import stream_module_summaries
 
 import importlib.util
 
+# The fixer does its work when it is loaded; it defines no entry point
 fixer_path = project_root / "utils" / "import" / "fix_imports_simple.py"
 spec = importlib.util.spec_from_file_location("fix_imports_simple", str(fixer_path))
 fixer_mod = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(fixer_mod)
 try:
-    fixer_mod.fix_imports_simple()
+    spec.loader.exec_module(fixer_mod)
 except Exception as e:
     import traceback
-    print("Error in fix_imports_simple():")
+    print("Error in fix_imports_simple:")
     traceback.print_exc()
     raise
 
-from utils.nlp.shadow_tree_nlp import explain_all_modules
+OUTPUT_FILE = "all_module_nl_summaries.jsonl"
 
 if __name__ == "__main__":
     # Output to file in project root
-    explain_all_modules(output_file="all_module_nl_summaries.txt")
-    print("All module NL summaries written to all_module_nl_summaries.txt")
+    stats = stream_module_summaries(output_file=OUTPUT_FILE)
+    print(f"NL summaries for {stats['files']} modules written to {OUTPUT_FILE} ({stats['errors']} errors)")
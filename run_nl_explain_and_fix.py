@@ -2,7 +2,8 @@
 Combined Import Fixer and NL Explanation Script
 
 This script merges the import fixing and NL docstring explanation pipeline.
-It ensures all imports are fixed, then generates NL summaries for all modules.
+It ensures all imports are fixed, then generates NL summaries for all modules
+as JSONL records (see utils/nlp/shadow_tree_nlp.py, stream_module_summaries).
 Use this as the main entry point for codebase mapping and documentation.
 """
 import sys
@@ -58,86 +59,15 @@ def fix_imports_simple():
     print("All imports fixed successfully")
 
 # ---- NL EXPLANATION ----
-import nltk
-nltk.data.path.insert(0, './nltk_data')
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt', download_dir='./nltk_data', quiet=True)
-try:
-    nltk.data.find('corpora/wordnet')
-except LookupError:
-    nltk.download('wordnet', download_dir='./nltk_data', quiet=True)
-from nltk.tokenize import word_tokenize, sent_tokenize
-from nltk.stem import WordNetLemmatizer
-import ast
+# Imported from its directory: the utils package __init__ needs modules lost in
+# the reorganization, and the fixer replaces that package in sys.modules
+nlp_dir = str(Path(__file__).parent.resolve() / "utils" / "nlp")
+if nlp_dir not in sys.path:
+    sys.path.insert(0, nlp_dir)
 
-MAX_SUMMARY_LENGTH = 100
-MAX_DESCRIPTION_LENGTH = 250
-lemmatizer = WordNetLemmatizer()
+from shadow_tree_nlp import stream_module_summaries
 
-def summarize_text(text, max_length=MAX_SUMMARY_LENGTH):
-    sentences = sent_tokenize(text)
-    summary = ''
-    for sent in sentences:
-        if len(summary) + len(sent) > max_length:
-            break
-        summary += sent + ' '
-    return summary.strip()
-
-def extract_keywords(content):
-    tokens = word_tokenize(content)
-    lemmatized = [lemmatizer.lemmatize(t) for t in tokens if t.isalpha()]
-    keywords = list(set(lemmatized))
-    return keywords
-
-def explain_code_docstring(docstring):
-    if not docstring:
-        return "No docstring provided."
-    return summarize_text(docstring, max_length=MAX_DESCRIPTION_LENGTH)
-
-def explain_all_modules(root_dirs=None, output_file=None):
-    if root_dirs is None:
-        root_dirs = [
-            Path('.'),
-            Path('./backup'),
-            Path('./legacy'),
-            Path('./src'),
-            Path('./modules'),
-            Path('./tools'),
-            Path('./utils')
-        ]
-    seen = set()
-    summaries = []
-    for root in root_dirs:
-        for py_file in root.rglob('*.py'):
-            py_file = py_file.resolve()
-            if py_file in seen:
-                continue
-            seen.add(py_file)
-            try:
-                with open(py_file, 'r', encoding='utf-8') as f:
-                    src = f.read()
-                mod = ast.parse(src)
-                docstring = ast.get_docstring(mod)
-                summary = explain_code_docstring(docstring) if docstring else "No docstring found."
-                summaries.append({
-                    'file': str(py_file),
-                    'summary': summary
-                })
-            except Exception as e:
-                summaries.append({
-                    'file': str(py_file),
-                    'summary': f'Error: {e}'
-                })
-    if output_file:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            for item in summaries:
-                f.write(f"{item['file']}\n{item['summary']}\n\n")
-    else:
-        for item in summaries:
-            print(f"{item['file']}\n{item['summary']}\n")
-    return summaries
+OUTPUT_FILE = "all_module_nl_summaries.jsonl"
 
 # ---- MAIN ----
 if __name__ == "__main__":
@@ -149,8 +79,8 @@ if __name__ == "__main__":
         print("Error in fix_imports_simple(). See fix_imports_error.log for details.")
         sys.exit(1)
     try:
-        explain_all_modules(output_file="all_module_nl_summaries.txt")
-        print("All module NL summaries written to all_module_nl_summaries.txt")
+        stats = stream_module_summaries(output_file=OUTPUT_FILE)
+        print(f"NL summaries for {stats['files']} modules written to {OUTPUT_FILE} ({stats['errors']} errors)")
     except Exception as e:
         with open("explain_all_modules_error.log", "w", encoding="utf-8") as f:
             traceback.print_exc(file=f)
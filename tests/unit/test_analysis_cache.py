@@ -0,0 +1,166 @@
+"""
+Analysis Cache
+Parse-once trees, facts and derived results shared between analyzers.
+
+Test cases for core.ast.analysis_cache
+"""
+import ast
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from core.ast.analysis_cache import AnalysisCache, AnalysisClient, authkey_path, read_authkey, serve
+
+SAMPLE = '''"""Sample module."""
+import os
+from .pkg import thing as other
+
+# A comment
+
+class Greeter:
+    def greet(self, name):
+        if name and name.strip():
+            return os.path.join("hello", name)
+        return None
+
+async def fetch():
+    return [x for x in range(3) if x]
+'''
+
+
+class TestAnalysisCache(unittest.TestCase):
+    """Test parse-once behavior, facts and the disk store."""
+
+    def setUp(self):
+        """Write a sample module and create a cache directory."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp.name, "cache")
+        self.path = os.path.join(self.tmp.name, "sample.py")
+        self._write(SAMPLE)
+
+    def tearDown(self):
+        """Clean up."""
+        self.tmp.cleanup()
+
+    def _write(self, content):
+        with open(self.path, "w") as f:
+            f.write(content)
+        # Make sure the stat signature changes even on coarse clocks
+        st = os.stat(self.path)
+        os.utime(self.path, ns=(st.st_atime_ns, st.st_mtime_ns + len(content) * 1000))
+
+    def test_parse_once(self):
+        """A file is parsed once; later processes load the tree from disk."""
+        cache = AnalysisCache(self.cache_dir)
+        tree = cache.tree(self.path)
+        self.assertIs(cache.tree(self.path), tree)
+        self.assertIsNot(cache.tree(self.path, copy=True), tree)
+        self.assertEqual(cache.stats['parsed'], 1)
+
+        fresh = AnalysisCache(self.cache_dir)
+        self.assertEqual(ast.dump(fresh.tree(self.path)), ast.dump(tree))
+        self.assertEqual((fresh.stats['parsed'], fresh.stats['disk']), (0, 1))
+
+        # Code strings with the same content share the entry
+        self.assertIs(fresh.parse_source(SAMPLE), fresh.tree(self.path))
+
+    def test_facts(self):
+        """Symbols, imports, calls and metrics come from one pass."""
+        facts = AnalysisCache(self.cache_dir).facts(self.path)
+        symbols = {s['qualname']: s for s in facts['symbols']}
+        self.assertEqual(symbols['Greeter.greet']['kind'], 'method')
+        self.assertTrue(symbols['fetch']['async'])
+        self.assertEqual([(i['module'], i['name'], i['level']) for i in facts['imports']],
+                         [('os', None, 0), ('pkg', 'thing', 1)])
+        self.assertEqual(facts['calls']['os.path.join'], 1)
+        self.assertEqual(facts['metrics']['complexity']['Greeter.greet'], 3)
+        self.assertEqual(facts['metrics']['complexity']['fetch'], 3)
+        self.assertEqual(facts['metrics']['comment_lines'], 1)
+        self.assertEqual(facts['docstring'], "Sample module.")
+
+    def test_invalidation_and_errors(self):
+        """Edited files are re-parsed, derived results recomputed, syntax errors re-raised."""
+        cache = AnalysisCache(self.cache_dir)
+        calls = []
+        compute = lambda: calls.append(1) or len(cache.source(self.path))
+        self.assertEqual(cache.derived(self.path, "length", compute), len(SAMPLE))
+        cache.derived(self.path, "length", compute)
+        self.assertEqual(len(calls), 1)
+
+        self._write("def broken(:\n")
+        with self.assertRaises(SyntaxError) as raised:
+            cache.tree(self.path)
+        self.assertEqual(raised.exception.filename, self.path)
+        self.assertEqual(cache.derived(self.path, "length", compute), len("def broken(:\n"))
+        self.assertEqual(len(calls), 2)
+
+
+    def test_eviction(self):
+        """Past the size limit the least recently used entries are removed from disk."""
+        cache = AnalysisCache(self.cache_dir)
+        for i in range(4):
+            cache._store(f"{i:02d}" + "0" * 30, "value", b"x" * 100)
+            old = 1_000_000_000 + i
+            os.utime(cache._path(f"{i:02d}" + "0" * 30, "value"), (old, old))
+        # Reading an entry makes it the most recently used
+        self.assertIsNotNone(cache._load("00" + "0" * 30, "value"))
+        self.assertEqual(cache.prune(max_bytes=250), 2)
+        self.assertIsNone(cache._load("01" + "0" * 30, "value"))
+        self.assertIsNotNone(cache._load("00" + "0" * 30, "value"))
+        self.assertIsNotNone(cache._load("03" + "0" * 30, "value"))
+
+
+class TestAnalysisServer(unittest.TestCase):
+    """Test the warm server and its client."""
+
+    def _start(self):
+        """Start a server on its default socket and return (path for files, address, cache_dir)."""
+        # Not a TemporaryDirectory: the daemon server unlinks its socket at interpreter exit
+        tmp = tempfile.mkdtemp()
+        cache_dir = os.path.join(tmp, "cache")
+        threading.Thread(target=serve, args=(None, cache_dir), daemon=True).start()
+        address = os.path.join(cache_dir, "server.sock")
+        for _ in range(100):
+            if os.path.exists(address) and read_authkey(cache_dir):
+                break
+            threading.Event().wait(0.02)
+        return tmp, address, cache_dir
+
+    @unittest.skipIf(os.name == 'nt', "Unix sockets")
+    def test_client(self):
+        """Clients get trees and facts from the server and share derived results."""
+        tmp, address, cache_dir = self._start()
+        path = os.path.join(tmp, "sample.py")
+        with open(path, "w") as f:
+            f.write(SAMPLE)
+        authkey = read_authkey(cache_dir)
+
+        client = AnalysisClient(address, authkey)
+        self.assertIsInstance(client.tree(path), ast.Module)
+        self.assertEqual(client.facts(path)['metrics']['classes'], 1)
+        self.assertEqual(client.derived(path, "answer", lambda: 42), 42)
+        self.assertEqual(AnalysisClient(address, authkey).derived(path, "answer", lambda: 0), 42)
+        self.assertEqual(client.get_stats()['parsed'], 1)
+        self.assertFalse(hasattr(client, "clear"))
+
+    @unittest.skipIf(os.name == 'nt', "Unix sockets and file modes")
+    def test_authkey(self):
+        """The key is random, readable only by its owner, and required to connect."""
+        from multiprocessing import AuthenticationError
+        _, address, cache_dir = self._start()
+        self.assertEqual(os.stat(authkey_path(cache_dir)).st_mode & 0o777, 0o600)
+        self.assertEqual(len(read_authkey(cache_dir)), 32)
+        with self.assertRaises(AuthenticationError):
+            AnalysisClient(address, b"analysis-cache")
+        # The server keeps serving after a rejected client
+        self.assertIn('parsed', AnalysisClient(address, read_authkey(cache_dir)).get_stats())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+"""
+Code Stats Analyzer
+Line counts from one tokenize pass over the source.
+
+Test cases for tools/analysis/code_stats_analyzer.py
+"""
+import os
+import sys
+import unittest
+
+# Add project root and the analysis tools to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+tools_dir = os.path.join(project_root, "tools", "analysis")
+for path in (project_root, tools_dir):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from code_stats_analyzer import count_lines
+
+
+class TestCountLines(unittest.TestCase):
+    """Test cases for classifying physical lines"""
+
+    def test_kinds(self):
+        """Code, docstring, comment and blank lines are told apart"""
+        source = '"""Doc\nstring."""\n\n# comment\nx = "#"  # inline\n'
+        counts = count_lines(source)
+        self.assertEqual(counts["physical_lines"], 5)
+        self.assertEqual(counts["docstring_lines"], 2)
+        self.assertEqual(counts["blank_lines"], 1)
+        self.assertEqual(counts["comment_lines"], 1)
+        self.assertEqual(counts["code_lines"], 1)
+        self.assertEqual(counts["comments"], 2)
+        self.assertEqual(counts["logical_lines"], 2)
+        self.assertEqual(counts["lines"], 4)
+
+    def test_no_trailing_newline(self):
+        """A last line without a newline still counts"""
+        self.assertEqual(count_lines("x = 1\ny = 2")["code_lines"], 2)
+        self.assertEqual(count_lines("")["physical_lines"], 0)
+
+    def test_carriage_returns_only(self):
+        """A file using bare CR line endings is one physical line, not an error"""
+        counts = count_lines("x = 1\ry = 2\r")
+        self.assertEqual(counts["physical_lines"], 1)
+        self.assertEqual(counts["code_lines"], 1)
+
+    def test_other_line_breaks_do_not_add_lines(self):
+        """Form feeds and Unicode separators inside a line are not line ends"""
+        counts = count_lines('x = 1\n\x0cy = 2\ns = "a\u2028b"\n')
+        self.assertEqual(counts["physical_lines"], 3)
+        self.assertEqual(counts["code_lines"], 3)
+        self.assertEqual(counts["blank_lines"], 0)
+
+    def test_untokenizable_source_falls_back(self):
+        """Unterminated constructs are counted line by line"""
+        counts = count_lines('x = (\n# note\n\n" \n')
+        self.assertEqual(counts["physical_lines"], 4)
+        self.assertEqual(counts["comment_lines"], 1)
+        self.assertEqual(counts["blank_lines"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
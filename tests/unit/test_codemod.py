@@ -0,0 +1,123 @@
+"""
+Codemod
+Fixes applied as edits to the original source text.
+
+Test cases for tools/refactoring/codemod.py
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+# Add the refactoring tools to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+tools_dir = os.path.join(project_root, "tools", "refactoring")
+if tools_dir not in sys.path:
+    sys.path.insert(0, tools_dir)
+
+from codemod import (BareExceptFixer, Change, Fixer, ResourceIssueFinder, UnusedImportFixer, fix_file,
+                     fix_source, merge_changes)
+
+
+def remove_unused(source):
+    new_source, changes, conflicts = fix_source(source, [UnusedImportFixer()])
+    return new_source
+
+
+class TestUnusedImportFixer(unittest.TestCase):
+    """Test cases for removing unused imports"""
+
+    def test_whole_statements_keep_other_lines(self):
+        """Unused statements go with their lines; comments elsewhere stay"""
+        source = "# header\nimport os\nimport sys  # why\n\nprint(sys)  # trailing\n"
+        self.assertEqual(remove_unused(source), "# header\nimport sys  # why\n\nprint(sys)  # trailing\n")
+
+    def test_emptied_block_gets_pass(self):
+        """A block holding only unused imports keeps a pass statement"""
+        source = "def f():\n    import os\n    import sys\n\nif True:\n    import json  # note\nx = 1\n"
+        self.assertEqual(remove_unused(source), "def f():\n    pass\n\nif True:\n    pass\nx = 1\n")
+
+    def test_try_body_imports_are_kept(self):
+        """Imports in a try body are availability checks"""
+        source = "try:\n    import numpy\nexcept ImportError:\n    numpy = None\n"
+        self.assertEqual(remove_unused(source), source)
+
+    def test_parenthesized_list_one_name_per_line(self):
+        """Dropped names take their line; the other names keep their comments"""
+        source = ("from os.path import (\n"
+                  "    join,  # used\n"
+                  "    exists,  # unused\n"
+                  "    dirname,\n"
+                  ")\n"
+                  "print(join, dirname)\n")
+        self.assertEqual(remove_unused(source), ("from os.path import (\n"
+                                                 "    join,  # used\n"
+                                                 "    dirname,\n"
+                                                 ")\n"
+                                                 "print(join, dirname)\n"))
+
+    def test_parenthesized_list_keeps_comments_between_names(self):
+        """A comment after a dropped name's comma is kept"""
+        source = "from os.path import (join, exists,  # comment\n    dirname)\nprint(dirname)\n"
+        self.assertEqual(remove_unused(source), "from os.path import (  # comment\n    dirname)\nprint(dirname)\n")
+
+        source = "from os.path import (join,  # comment\n    exists)\nprint(join)\n"
+        self.assertEqual(remove_unused(source), "from os.path import (join  # comment\n    )\nprint(join)\n")
+
+    def test_semicolon_lines(self):
+        """Statements sharing a line through ';' are cut with their separator"""
+        self.assertEqual(remove_unused("import os; import sys\nprint(sys)\n"), "import sys\nprint(sys)\n")
+        self.assertEqual(remove_unused("x = 1; import os\nprint(x)\n"), "x = 1\nprint(x)\n")
+        self.assertEqual(remove_unused("import os, sys; print(sys)\n"), "import sys; print(sys)\n")
+
+    def test_backslash_continuations(self):
+        """Names continued with a backslash are cut without breaking the statement"""
+        self.assertEqual(remove_unused("from os.path import join, \\\n    exists, dirname\nprint(dirname)\n"),
+                         "from os.path import dirname\nprint(dirname)\n")
+        self.assertEqual(remove_unused("import os, \\\n    sys\nprint(os)\n"), "import os\nprint(os)\n")
+        self.assertEqual(remove_unused("import os, \\\n    sys\nx = 1\n"), "x = 1\n")
+
+    def test_names_in_all_are_used(self):
+        """Names re-exported through __all__ are kept"""
+        source = "from os import path\n__all__ = ['path']\n"
+        self.assertEqual(remove_unused(source), source)
+
+
+class TestEngine(unittest.TestCase):
+    """Test cases for merging and applying changes"""
+
+    def test_bare_except_and_report_only_changes(self):
+        """Fixers share one parse; report-only changes are returned but not applied"""
+        source = "try:\n    f = open('x')\nexcept:  # keep\n    pass\n"
+        new_source, changes, conflicts = fix_source(source, [BareExceptFixer(), ResourceIssueFinder()])
+        self.assertEqual(new_source, "try:\n    f = open('x')\nexcept Exception:  # keep\n    pass\n")
+        self.assertEqual(sorted(c.fixer for c in changes), ["bare_except", "resource_issues"])
+        self.assertEqual(conflicts, [])
+
+    def test_overlapping_changes_conflict(self):
+        """A change overlapping an accepted one is dropped"""
+        accepted, conflicts = merge_changes([Change(0, 5, "", "a", ""), Change(3, 8, "", "b", ""),
+                                             Change(5, 5, "x", "c", "")])
+        self.assertEqual([c.fixer for c in accepted], ["a", "c"])
+        self.assertEqual([c.fixer for c in conflicts], ["b"])
+
+    def test_fix_file(self):
+        """Dry runs return a diff; real runs write the file"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "m.py")
+            with open(path, "w") as f:
+                f.write("import os\nx = 1\n")
+            result = fix_file(path, [UnusedImportFixer()], dry_run=True)
+            self.assertIn("-import os", result["diff"])
+            fix_file(path, [UnusedImportFixer()], dry_run=False)
+            with open(path) as f:
+                self.assertEqual(f.read(), "x = 1\n")
+
+    def test_fixer_is_abstract(self):
+        """Fixers must implement find()"""
+        with self.assertRaises(TypeError):
+            Fixer()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+Test Coverage Generator
+Test modules run in balanced worker shards with their coverage merged.
+
+Test cases for tools/analysis/test_coverage_generator.py
+"""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# Add the analysis tools to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+tools_dir = os.path.join(project_root, "tools", "analysis")
+if tools_dir not in sys.path:
+    sys.path.insert(0, tools_dir)
+
+import test_coverage_generator
+from test_coverage_generator import balance_shards, coverage_data_name
+
+SAMPLE_MODULE = """
+def first(x):
+    return x + 1
+
+
+def second(x):
+    return x * 2
+"""
+
+SAMPLE_TEST = """
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sample_module import {name}
+
+
+class TestSample(unittest.TestCase):
+    def test_call(self):
+        self.assertTrue({name}(3))
+"""
+
+
+class TestBalanceShards(unittest.TestCase):
+    """Test cases for splitting test modules by duration"""
+
+    def test_longest_first_to_lightest_shard(self):
+        """Each file goes to the lightest shard, longest files first"""
+        durations = {"a": 5.0, "b": 4.0, "c": 3.0, "d": 3.0, "e": 1.0}
+        self.assertEqual(balance_shards(durations, 2), [["a", "d"], ["b", "c", "e"]])
+
+    def test_shard_count(self):
+        """There are never more shards than files, and never empty shards"""
+        self.assertEqual(balance_shards({"a": 1.0, "b": 2.0}, 8), [["b"], ["a"]])
+        self.assertEqual(balance_shards({"a": 1.0}, 0), [["a"]])
+        self.assertEqual(balance_shards({}, 4), [])
+
+    def test_coverage_data_name(self):
+        """Data files are named so Coverage.combine() picks them up"""
+        tests_dir = os.path.join("root", "tests")
+        name = coverage_data_name("data", "/x/.coverage", os.path.join(tests_dir, "unit", "test_a.py"), tests_dir)
+        self.assertEqual(name, os.path.join("data", ".coverage.unit.test_a"))
+
+
+class TestRunTestsSharded(unittest.TestCase):
+    """Test cases for running shards and merging their coverage"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        with open(os.path.join(self.tmp.name, "sample_module.py"), "w") as f:
+            f.write(SAMPLE_MODULE)
+        with mock.patch.object(test_coverage_generator, "project_root", self.tmp.name):
+            self.generator = test_coverage_generator.TestCoverageGenerator()
+        for name in ("first", "second"):
+            self.write_test(name)
+        self.module_file = os.path.join(self.tmp.name, "sample_module.py")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def write_test(self, name, extra=""):
+        with open(os.path.join(self.generator.unit_tests_dir, f"test_{name}.py"), "w") as f:
+            f.write(SAMPLE_TEST.format(name=name) + extra)
+
+    def covered_lines(self):
+        return set(self.generator.cov.get_data().lines(self.module_file) or ())
+
+    def test_coverage_is_merged_and_reused(self):
+        """Both shards' coverage is combined; unchanged passing modules are reused"""
+        totals = self.generator.run_tests_sharded(workers=2)
+        self.assertEqual((totals["run"], totals["errors"], totals["failures"]), (2, 0, 0))
+        self.assertTrue({3, 7} <= self.covered_lines())
+
+        totals = self.generator.run_tests_sharded(workers=2, incremental=True)
+        self.assertEqual((totals["run"], totals["reused"]), (0, 2))
+        self.assertTrue({3, 7} <= self.covered_lines())
+
+        self.write_test("second", "\n# changed\n")
+        totals = self.generator.run_tests_sharded(workers=2, incremental=True)
+        self.assertEqual((totals["run"], totals["reused"]), (1, 1))
+        self.assertTrue({3, 7} <= self.covered_lines())
+
+        history = self.generator.load_test_history()
+        self.assertEqual(sorted(history), [os.path.join("tests", "unit", f"test_{n}.py") for n in ("first", "second")])
+        self.assertTrue(all(entry["status"] == "passed" for entry in history.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+Defer Imports
+Moving expensive top-level imports into the functions that use them.
+
+Test cases for tools/refactoring/defer_imports.py
+"""
+import os
+import sys
+import unittest
+
+# Add the refactoring tools to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+tools_dir = os.path.join(project_root, "tools", "refactoring")
+if tools_dir not in sys.path:
+    sys.path.insert(0, tools_dir)
+
+from defer_imports import apply_plan, plan_module
+
+SOURCE = '''"""Module under test."""
+import json
+import string
+from collections import OrderedDict
+from os.path import join as path_join
+import textwrap
+
+HEADER = textwrap.dedent("  x")
+
+
+def dump(value):
+    """Serialize value."""
+    return json.dumps(value)
+
+
+def load(text):
+    return json.loads(text)
+'''
+
+EVERYTHING = {
+    "import json": 50.0,
+    "import string": 50.0,
+    "from collections import OrderedDict": 50.0,
+    "from os.path import join as path_join": 50.0,
+    "import textwrap": 50.0,
+}
+
+
+def namespace(source):
+    """Public names a module binds at import time."""
+    names = {}
+    exec(compile(source, "<test>", "exec"), names)
+    return {n for n in names if not (n.startswith("__") and n.endswith("__"))}
+
+
+class TestPlanModule(unittest.TestCase):
+    """Test cases for choosing the imports to defer"""
+
+    def test_unused_imports_are_kept(self):
+        """Imports no function uses may be re-exports and stay in place"""
+        plan = plan_module(SOURCE, costs=EVERYTHING)
+        self.assertEqual([item["name"] for item in plan["deferred"]], ["json"])
+        self.assertEqual(plan["skipped"]["import string"], "not used in this module")
+        self.assertEqual(plan["skipped"]["from collections import OrderedDict"], "not used in this module")
+        self.assertEqual(plan["skipped"]["from os.path import join as path_join"], "not used in this module")
+        self.assertEqual(plan["skipped"]["import textwrap"], "used at import time")
+
+    def test_local_deferral(self):
+        """A used import moves into each using function, after its docstring"""
+        plan = plan_module(SOURCE, costs=EVERYTHING)
+        self.assertEqual(plan["deferred"][0]["functions"], ["dump", "load"])
+        new_source = apply_plan(SOURCE, plan)
+        self.assertIn('    """Serialize value."""\n    import json\n    return json.dumps', new_source)
+        self.assertIn("def load(text):\n    import json\n", new_source)
+        self.assertNotIn("\nimport json\n", new_source)
+
+        names = {}
+        exec(compile(new_source, "<test>", "exec"), names)
+        self.assertEqual(names["load"](names["dump"]([1])), [1])
+
+    def test_namespace_only_loses_moved_names(self):
+        """The rewritten module binds every name the original did but the moved ones"""
+        plan = plan_module(SOURCE, costs=EVERYTHING)
+        before = namespace(SOURCE)
+        after = namespace(apply_plan(SOURCE, plan))
+        self.assertEqual(before - after, {"json"})
+        self.assertEqual(after - before, set())
+
+    def test_proxy_deferral(self):
+        """Above max_local_sites a module is bound to a lazy proxy instead"""
+        plan = plan_module(SOURCE, costs=EVERYTHING, max_local_sites=1)
+        self.assertEqual(plan["deferred"][0]["mode"], "proxy")
+        new_source = apply_plan(SOURCE, plan)
+        self.assertIn("json = _lazy_module('json')", new_source)
+        self.assertEqual(namespace(new_source) - namespace(SOURCE), {"_lazy_module"})
+
+    def test_cheap_and_unmeasured_imports_are_kept(self):
+        """Imports below the cost threshold or without a measurement stay"""
+        plan = plan_module(SOURCE, costs={"import json": 1.0})
+        self.assertEqual(plan["deferred"], [])
+        self.assertEqual(plan["skipped"]["import json"], "cheap (1.0ms)")
+        self.assertEqual(apply_plan(SOURCE, plan), SOURCE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Directory Scanner
+Directory statistics for a whole tree in one scandir pass.
+
+Test cases for core.processing.directory_scanner
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from core.processing import directory_scanner
+from core.processing.directory_scanner import scan_tree
+
+
+class TestScanTree(unittest.TestCase):
+    """Test aggregates, exclusion, depth limits, the pool and incremental scans."""
+
+    def setUp(self):
+        """Create a small tree."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "tree")
+        self.cache_dir = os.path.join(self.tmp.name, "cache")
+        layout = {
+            "a.py": "x = 1\n",
+            "README": "readme\n",
+            "pkg/b.py": "",
+            "pkg/sub/c.txt": "text",
+            "other/d.py": "",
+            "__pycache__/a.pyc": "",
+        }
+        for rel, content in layout.items():
+            path = os.path.join(self.root, rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(content)
+        os.makedirs(os.path.join(self.root, "empty"))
+
+    def tearDown(self):
+        """Clean up."""
+        self.tmp.cleanup()
+
+    def test_aggregates(self):
+        """Counts, depths, extensions, breadth and sizes come from one scan."""
+        scan = scan_tree(self.root, sizes=True, entries=True, max_workers=1)
+        self.assertEqual((scan.total_files, scan.total_dirs, scan.max_depth), (5, 4, 2))
+        self.assertEqual(scan.by_depth(), {0: {"dirs": 3, "files": 2}, 1: {"dirs": 1, "files": 2},
+                                           2: {"dirs": 0, "files": 1}})
+        self.assertEqual(scan.extensions(), {".py": 3, "": 1, ".txt": 1})
+        self.assertEqual(scan.empty_dirs(), ["empty"])
+        self.assertEqual(scan.breadth(), {0: 1, 1: 2, 2: 1, 5: 1})
+        self.assertEqual(scan.total_size, len("x = 1\n") + len("readme\n") + len("text"))
+        self.assertIn(("c.txt", 4), scan.records[os.path.join("pkg", "sub")]["file_entries"])
+
+        limited = scan_tree(self.root, max_depth=1, max_workers=1)
+        self.assertNotIn(os.path.join("pkg", "sub"), limited.records)
+        self.assertEqual(limited.records["pkg"]["subdirs"], ["sub"])
+
+    def test_parallel_matches_serial(self):
+        """Scanning top-level subtrees on the pool gives the same records."""
+        serial = scan_tree(self.root, max_workers=1)
+        parallel = scan_tree(self.root, max_workers=2)
+        self.assertTrue(parallel.stats["parallel"])
+        strip = lambda scan: {rel: (r["files"], sorted(r["subdirs"]), r["depth"]) for rel, r in scan.records.items()}
+        self.assertEqual(strip(parallel), strip(serial))
+
+    def test_incremental(self):
+        """Unchanged directories are reused; changed ones are listed again."""
+        racy_window = directory_scanner.RACY_WINDOW_NS
+        directory_scanner.RACY_WINDOW_NS = -10**12
+        try:
+            first = scan_tree(self.root, incremental=True, cache_dir=self.cache_dir, max_workers=1)
+            self.assertEqual(first.stats["reused"], 0)
+            with open(os.path.join(self.root, "pkg", "new.py"), "w"):
+                pass
+            pkg = os.path.join(self.root, "pkg")
+            st = os.stat(pkg)
+            os.utime(pkg, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+            second = scan_tree(self.root, incremental=True, cache_dir=self.cache_dir, max_workers=1)
+        finally:
+            directory_scanner.RACY_WINDOW_NS = racy_window
+        self.assertEqual(second.stats["listed"], 1)
+        self.assertEqual(second.total_files, first.total_files + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
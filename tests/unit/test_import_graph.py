@@ -0,0 +1,170 @@
+"""
+Test All Imports
+Import cycles from a static graph of module-level imports.
+
+Test cases for tools/analysis/test_all_imports.py
+"""
+import ast
+import os
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+# Add project root and the analysis tools to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+tools_dir = os.path.join(project_root, "tools", "analysis")
+for path in (project_root, tools_dir):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from test_all_imports import (ImportTester, find_import_cycles, module_level_imports, parse_importtime,
+                              save_fixer_maps)
+
+# Stands in for utils/import/universal_import_fixer.py: aliases every scanned module
+FAKE_FIXER = """
+import sys
+import types
+
+
+class ModuleMapper:
+    def __init__(self):
+        self.module_map, self.class_map, self.function_map = {}, {}, {}
+
+    def create_import_aliases(self):
+        pass
+
+
+class UniversalImportFixer:
+    def __init__(self, mapper):
+        self.mapper = mapper
+
+    def fix_import_system(self):
+        for name in self.mapper.module_map:
+            sys.modules["alias_" + name] = types.ModuleType("alias_" + name)
+
+
+def create_missing_modules():
+    pass
+"""
+
+
+class TestFindImportCycles(unittest.TestCase):
+    """Test cases for strongly connected components of the import graph"""
+
+    def test_acyclic_graph(self):
+        """A graph without cycles has no components reported"""
+        self.assertEqual(find_import_cycles({"a": {"b"}, "b": {"c"}, "c": set()}), [])
+
+    def test_cycles_and_self_imports(self):
+        """Each cycle is reported once, sorted; a module importing itself is a cycle"""
+        graph = {
+            "a": {"b"}, "b": {"c"}, "c": {"a", "d"},
+            "d": {"e"}, "e": {"d"},
+            "f": {"f"},
+            "g": {"a", "missing"},
+        }
+        cycles = find_import_cycles(graph)
+        self.assertEqual(sorted(cycles), [["a", "b", "c"], ["d", "e"], ["f"]])
+
+    def test_deep_chain(self):
+        """Long chains don't hit the recursion limit"""
+        size = sys.getrecursionlimit() + 100
+        graph = {f"m{i}": {f"m{i + 1}"} for i in range(size)}
+        graph[f"m{size}"] = {"m0"}
+        (cycle,) = find_import_cycles(graph)
+        self.assertEqual(len(cycle), size + 1)
+
+
+class TestImportGraph(unittest.TestCase):
+    """Test cases for building the graph from source files"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        with mock.patch.object(ImportTester, "create_missing_modules"):
+            self.tester = ImportTester(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, module_path, source):
+        path = self.tester.module_file(module_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(source)
+
+    def test_module_level_imports(self):
+        """Imports in functions are skipped; imports in if/try blocks are kept"""
+        tree = ast.parse("import a\n"
+                         "try:\n    import b\nexcept ImportError:\n    import c\n"
+                         "if True:\n    from d import x\n"
+                         "def f():\n    import e\n"
+                         "class K:\n    import g\n")
+        names = sorted(ast.unparse(node) for node in module_level_imports(tree))
+        self.assertEqual(names, ["from d import x", "import a", "import b", "import c", "import g"])
+
+    def test_graph_resolves_absolute_relative_and_sibling_imports(self):
+        """Names resolve to the longest known module, relative to the package, or next to the file"""
+        self.write("pkg.a", "from . import b\nimport os\n")
+        self.write("pkg.b", "from .sub.c import thing\n")
+        self.write("pkg.sub.c", "import pkg.a.attr\nimport sibling\n\ndef lazy():\n    import pkg.b\n")
+        self.write("pkg.sub.sibling", "")
+        self.write("broken", "def (\n")
+        modules = ["pkg.a", "pkg.b", "pkg.sub.c", "pkg.sub.sibling", "broken"]
+
+        graph = self.tester.build_import_graph(modules)
+        self.assertEqual(graph["pkg.a"], {"pkg.b"})
+        self.assertEqual(graph["pkg.b"], {"pkg.sub.c"})
+        self.assertEqual(graph["pkg.sub.c"], {"pkg.a", "pkg.sub.sibling"})
+        self.assertEqual(graph["broken"], set())
+
+        self.assertEqual(self.tester.find_circular_dependencies(modules), [["pkg.a", "pkg.b", "pkg.sub.c"]])
+        self.assertEqual(self.tester.circular_deps, ["pkg.a", "pkg.b", "pkg.sub.c"])
+
+
+class TestImportIsolated(unittest.TestCase):
+    """Test cases for importing a module in a worker process"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        with mock.patch.object(ImportTester, "create_missing_modules"):
+            self.tester = ImportTester(self.tmp.name)
+        for name, source in (("universal_import_fixer", FAKE_FIXER), ("uses_alias", "import alias_real\n")):
+            with open(os.path.join(self.tmp.name, name + ".py"), "w", encoding="utf-8") as f:
+                f.write(source)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_worker_installs_fixer(self):
+        """With the parent's scan, the worker resolves the fixer's aliases as serial mode does"""
+        success, error, _ = self.tester.test_import_isolated("uses_alias")
+        self.assertFalse(success)
+        self.assertIn("alias_real", error)
+
+        mapper = types.SimpleNamespace(module_map={"real": "real.py"}, class_map={}, function_map={})
+        fixer_maps = save_fixer_maps(mapper, self.tmp.name)
+        self.assertEqual(self.tester.test_import_isolated("uses_alias", fixer_maps=fixer_maps)[:2], (True, None))
+
+
+class TestParseImporttime(unittest.TestCase):
+    """Test cases for reading -X importtime output"""
+
+    def test_tree(self):
+        """Children are printed before their parent and nest by indentation"""
+        stderr = ("import time: self [us] | cumulative | imported package\n"
+                  "import time:        10 |         10 |     leaf\n"
+                  "import time:        20 |         30 |   mid\n"
+                  "import time:         5 |          5 |   other\n"
+                  "import time:       100 |        135 | top\n"
+                  "Traceback: not an import line\n")
+        (root,), other = parse_importtime(stderr)
+        self.assertEqual((root["name"], root["self_us"], root["cumulative_us"]), ("top", 100, 135))
+        self.assertEqual([c["name"] for c in root["children"]], ["mid", "other"])
+        self.assertEqual(root["children"][0]["children"][0]["name"], "leaf")
+        self.assertEqual(other, ["Traceback: not an import line"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+Refactor Analyzer
+Single-traversal file facts and the flat-array dependency graph.
+
+Test cases for tools/refactoring/refactor_analyzer.py
+"""
+import ast
+import os
+import sys
+import tempfile
+import unittest
+
+# Add the refactoring tools to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+tools_dir = os.path.join(project_root, "tools", "refactoring")
+if tools_dir not in sys.path:
+    sys.path.insert(0, tools_dir)
+
+from refactor_analyzer import CodeAnalyzer, DependencyGraph, FileFactsVisitor
+
+SAMPLE = '''import os
+import json as js
+from typing import List
+
+
+class Loader(object):
+    """Loads things."""
+    limit = 3
+
+    @property
+    def size(self):
+        return 1
+
+    def load(self, path):
+        if path and os.path.exists(path):
+            return read(path)
+        return None
+
+
+def read(path):
+    try:
+        handle = open(path)
+    except:
+        return None
+    with open(path) as f:
+        return f.read() + parse(handle)
+
+
+def parse(data):
+    for item in data:
+        if item:
+            return item
+'''
+
+
+def facts(source):
+    visitor = FileFactsVisitor()
+    visitor.visit(ast.parse(source))
+    return visitor.results()
+
+
+class TestFileFactsVisitor(unittest.TestCase):
+    """Test cases for the per-file facts"""
+
+    def test_metrics(self):
+        """Counts, lines and total complexity come from one traversal"""
+        metrics = facts(SAMPLE)["metrics"]
+        self.assertEqual(metrics["loc"], len(SAMPLE.splitlines()))
+        self.assertEqual(metrics["functions"], 4)
+        self.assertEqual(metrics["classes"], 1)
+        self.assertEqual(metrics["imports"], 3)
+        # 1 + if + and + try + except + for + if
+        self.assertEqual(metrics["complexity"], 7)
+
+    def test_issues(self):
+        """Unused imports, unmanaged open() calls and bare excepts are reported"""
+        results = facts(SAMPLE)
+        self.assertEqual([imp["alias"] for imp in results["unused_imports"]], ["js", "List"])
+        self.assertEqual(results["resource_issues"], [{"lineno": 22}])
+        self.assertEqual(results["error_handling_issues"], [{"type": "bare_except", "lineno": 23}])
+
+    def test_function_dependencies(self):
+        """Calls are recorded between functions defined in the file"""
+        dependencies = facts(SAMPLE)["function_dependencies"]
+        self.assertEqual(dependencies["load"]["calls"], ["read"])
+        self.assertEqual(dependencies["read"]["calls"], ["parse"])
+        self.assertEqual(dependencies["parse"]["calls"], [])
+
+    def test_class_structure(self):
+        """Methods, decorators, attributes and bases are collected per class"""
+        (loader,) = facts(SAMPLE)["class_structure"]
+        self.assertEqual(loader["bases"], ["object"])
+        self.assertEqual(loader["docstring"], "Loads things.")
+        self.assertEqual([m["name"] for m in loader["methods"]], ["size", "load"])
+        self.assertTrue(loader["methods"][0]["is_property"])
+        self.assertEqual(loader["attributes"], [{"name": "limit", "lineno": 8}])
+
+    def test_complexity_is_charged_to_enclosing_functions(self):
+        """Branches in a nested function count for the outer function too"""
+        source = "def outer(x):\n    def inner(y):\n        if y:\n            return 1\n    if x:\n        return inner(x)\n"
+        complex_functions = {f["name"]: f for f in facts(source)["complex_functions"]}
+        self.assertEqual(complex_functions["outer"]["complexity"], 3)
+        self.assertIn("contains nested functions/classes", complex_functions["outer"]["reasons"])
+
+
+class TestDependencyGraph(unittest.TestCase):
+    """Test cases for the compressed-row dependency graph"""
+
+    ANALYSES = [
+        {"rel_path": "pkg/a.py", "function_dependencies": {
+            "main": {"lineno": 1, "calls": ["helper"]},
+            "helper": {"lineno": 5, "calls": []},
+        }},
+        {"rel_path": "b.py", "function_dependencies": {
+            "helper": {"lineno": 1, "calls": []},
+        }},
+    ]
+
+    def test_from_analyses(self):
+        """Files own their functions and calls stay within a file"""
+        graph = DependencyGraph.from_analyses(self.ANALYSES)
+        self.assertEqual(len(graph), 5)
+        self.assertEqual(graph.edge_count(), 4)
+        self.assertEqual(sorted(graph.successors("pkg/a.py")), ["pkg/a.py::helper", "pkg/a.py::main"])
+        self.assertEqual(graph.successors("pkg/a.py::main"), ["pkg/a.py::helper"])
+        self.assertEqual(graph.successors("b.py::helper"), [])
+        self.assertEqual(graph.nodes_of_type(DependencyGraph.FILE), ["pkg/a.py", "b.py"])
+        self.assertEqual(graph.node_type("b.py::helper"), DependencyGraph.FUNCTION)
+
+    def test_empty(self):
+        """No analyses give an empty graph"""
+        graph = DependencyGraph.from_analyses([])
+        self.assertEqual(len(graph), 0)
+        self.assertEqual(graph.edge_count(), 0)
+
+    def test_analyze_codebase(self):
+        """The serial path analyzes a directory and builds the graph"""
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "sample.py"), "w") as f:
+                f.write(SAMPLE)
+            analyzer = CodeAnalyzer(tmp)
+            results = analyzer.analyze_codebase(max_workers=1)
+            self.assertEqual([r["rel_path"] for r in results["files"]], ["sample.py"])
+            self.assertEqual(analyzer.dependency_graph.successors("sample.py::read"), ["sample.py::parse"])
+            self.assertEqual(results["module_dependencies"], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
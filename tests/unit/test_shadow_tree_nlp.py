@@ -0,0 +1,98 @@
+"""
+Shadow Tree NLP Utilities
+Natural language explanations of modules.
+
+Test cases for utils/nlp/shadow_tree_nlp.py
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+# Add the NLP utilities to path for imports, bypassing the utils package __init__
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+nlp_dir = os.path.join(project_root, "utils", "nlp")
+if nlp_dir not in sys.path:
+    sys.path.insert(0, nlp_dir)
+
+import shadow_tree_nlp
+from shadow_tree_nlp import explain_all_modules, iter_python_files, load_previous_results, stream_module_summaries
+
+
+class TestExplainAllModules(unittest.TestCase):
+    """Test enumeration, streaming output and incremental runs."""
+
+    def setUp(self):
+        """Create a small project without docstrings, so NLTK is never needed."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        os.makedirs(os.path.join(self.root, "pkg", "sub"))
+        os.makedirs(os.path.join(self.root, ".git"))
+        for rel_path in ("a.py", "pkg/b.py", "pkg/sub/c.py", ".git/hook.py"):
+            self._write(rel_path, "x = 1\n")
+        self.output = os.path.join(self.root, "summaries.jsonl")
+
+    def tearDown(self):
+        """Clean up the project."""
+        self.tmp.cleanup()
+
+    def _write(self, rel_path, content):
+        with open(os.path.join(self.root, rel_path), "w") as f:
+            f.write(content)
+
+    def _records(self):
+        with open(self.output) as f:
+            return {os.path.relpath(r["file"], self.root): r for r in map(json.loads, f)}
+
+    def test_import_is_lazy(self):
+        """Importing the module does not load NLTK."""
+        self.assertIsNone(shadow_tree_nlp._nltk)
+
+    def test_overlapping_roots_listed_once(self):
+        """Nested roots and hidden directories don't produce duplicates."""
+        files = list(iter_python_files([self.root, os.path.join(self.root, "pkg"), os.path.join(self.root, "missing")]))
+        self.assertEqual(sorted(os.path.relpath(f, self.root) for f in files),
+                         ["a.py", os.path.join("pkg", "b.py"), os.path.join("pkg", "sub", "c.py")])
+
+    def test_incremental_jsonl(self):
+        """A second run only summarizes files that changed."""
+        stats = stream_module_summaries([self.root], self.output, max_workers=1)
+        self.assertEqual(stats['summarized'], 3)
+        self.assertEqual(self._records()["a.py"]["summary"], "No docstring found.")
+
+        self._write("pkg/b.py", "def broken(:\n")
+        stats = stream_module_summaries([self.root], self.output, max_workers=1)
+        self.assertEqual((stats['summarized'], stats['unchanged'], stats['errors']), (1, 2, 1))
+        records = self._records()
+        self.assertEqual(len(records), 3)
+        self.assertTrue(records[os.path.join("pkg", "b.py")]["summary"].startswith("Error:"))
+
+    def test_stream_returns_counts(self):
+        """The streaming run returns counts; summaries are read back from the JSONL file."""
+        stats = stream_module_summaries([self.root], self.output, max_workers=1)
+        self.assertEqual(stats, {'files': 3, 'summarized': 3, 'unchanged': 0, 'errors': 0})
+        self.assertEqual(len(load_previous_results(self.output)), 3)
+
+    def test_explain_returns_summaries(self):
+        """explain_all_modules returns the summaries, reused or not, and writes the same records."""
+        for _ in range(2):
+            summaries = explain_all_modules([self.root], self.output, max_workers=1)
+            self.assertEqual(sorted(os.path.relpath(s["file"], self.root) for s in summaries),
+                             ["a.py", os.path.join("pkg", "b.py"), os.path.join("pkg", "sub", "c.py")])
+            self.assertEqual({s["summary"] for s in summaries}, {"No docstring found."})
+        self.assertEqual(len(self._records()), 3)
+
+    def test_run_script(self):
+        """run_nl_explain_all.py writes JSONL records for the working directory."""
+        script = os.path.join(project_root, "run_nl_explain_all.py")
+        result = subprocess.run([sys.executable, script], cwd=self.root, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn("NL summaries for 3 modules", result.stdout)
+        self.output = os.path.join(self.root, "all_module_nl_summaries.jsonl")
+        self.assertEqual(sorted(self._records()), ["a.py", os.path.join("pkg", "b.py"), os.path.join("pkg", "sub", "c.py")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+State Manager
+Shared state saved off-thread as a snapshot plus a write-ahead log.
+
+Test cases for utils.file.state_manager
+"""
+import importlib.util
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+
+def load_module(name):
+    """Import a module from its file, bypassing the utils package __init__."""
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(project_root, *name.split(".")) + ".py")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
+
+
+# state_manager imports StateStore from utils.file.state_store, so load that first
+state_store_module = load_module("utils.file.state_store")
+state_manager_module = load_module("utils.file.state_manager")
+StateStore = state_store_module.StateStore
+EventBus, SharedState, StateManager = (state_manager_module.EventBus, state_manager_module.SharedState,
+                                       state_manager_module.StateManager)
+
+
+class TestStateManager(unittest.TestCase):
+    """Test saving, loading and error reporting."""
+
+    def setUp(self):
+        """Give each test a fresh state and a temporary directory."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.manager = StateManager()
+        self.manager.event_bus = EventBus()
+        self.manager.shared_state = SharedState(self.manager.event_bus)
+        self.manager._stores = {}
+
+    def tearDown(self):
+        """Clean up."""
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def test_values_are_captured_when_saving(self):
+        """Mutating a value after save_state does not change what is written"""
+        state = self.manager.get_shared_state()
+        items = [1]
+        state.set("items", items)
+        future = self.manager.save_state(self.path("a.state"))
+        items.append(2)
+        future.result()
+        self.assertEqual(StateStore(self.path("a.state")).load(), {"items": [1]})
+
+    def test_load_state_forces_full_snapshot(self):
+        """After loading another file, the next save writes every key"""
+        state = self.manager.get_shared_state()
+        state.set("a", 1)
+        self.manager.save_state(self.path("first.state"), wait=True)
+
+        store = StateStore(self.path("other.state"))
+        store.compact({"b": 2})
+        self.assertTrue(self.manager.load_state(self.path("other.state")))
+        self.manager.save_state(self.path("other.state"), wait=True)
+        self.assertEqual(StateStore(self.path("other.state")).load(), {"a": 1, "b": 2})
+
+        state.set("c", 3)
+        self.manager.save_state(self.path("first.state"), wait=True)
+        self.assertEqual(StateStore(self.path("first.state")).load(), {"a": 1, "b": 2, "c": 3})
+
+    def test_failed_save_is_logged_and_recovered(self):
+        """A failed write is logged, raised to waiters, and the next save rewrites everything"""
+        state = self.manager.get_shared_state()
+        state.set("a", 1)
+        self.manager.save_state(self.path("a.state"), wait=True)
+
+        state.set("b", 2)
+        with mock.patch.object(state_store_module, "open", create=True, side_effect=OSError("disk full")), \
+                self.assertLogs(state_manager_module.logger, level="ERROR") as logs:
+            with self.assertRaises(OSError):
+                self.manager.save_state(self.path("a.state"), wait=True)
+        self.assertIn("disk full", logs.output[0])
+
+        state.set("c", 3)
+        self.manager.save_state(self.path("a.state"), wait=True)
+        self.assertEqual(StateStore(self.path("a.state")).load(), {"a": 1, "b": 2, "c": 3})
+
+
+if __name__ == "__main__":
+    unittest.main()
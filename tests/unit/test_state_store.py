@@ -0,0 +1,109 @@
+"""
+State Store
+Shared state persisted as a snapshot plus a write-ahead log.
+
+Test cases for utils.file.state_store
+"""
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+
+def load_module(name):
+    """Import a module from its file, bypassing the utils package __init__."""
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(project_root, *name.split(".")) + ".py")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
+
+
+StateStore = load_module("utils.file.state_store").StateStore
+
+
+class TestStateStore(unittest.TestCase):
+    """Test appends, compaction, reloads, torn logs and legacy JSON files."""
+
+    def setUp(self):
+        """Create a temporary state file path."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "state.bin")
+
+    def tearDown(self):
+        """Clean up."""
+        self.tmp.cleanup()
+
+    def test_append_and_reload(self):
+        """Appended changes are replayed over the snapshot by a new store."""
+        store = StateStore(self.path)
+        store.compact({"a": 1, "b": [1, 2]})
+        store.append({"b": [3]})
+        store.append({"c": {"x": 1}, "skip": lambda: None})
+        self.assertEqual(StateStore(self.path).load(), {"a": 1, "b": [3], "c": {"x": 1}})
+
+    def test_compaction(self):
+        """A log larger than the snapshot is folded into a new snapshot generation."""
+        store = StateStore(self.path, compact_min_bytes=0)
+        store.compact({"a": 1})
+        store.append({"a": "x" * 200})
+        self.assertTrue(store.should_compact())
+        store.compact({"a": "x" * 200})
+        self.assertFalse(os.path.exists(store.wal_path))
+        reloaded = StateStore(self.path)
+        self.assertEqual(reloaded.load(), {"a": "x" * 200})
+        self.assertEqual(reloaded.generation, 2)
+
+    def test_stale_log_is_ignored(self):
+        """A log from before the last compaction is not replayed."""
+        store = StateStore(self.path)
+        store.compact({"a": 1})
+        store.append({"a": 2})
+        with open(store.wal_path, "rb") as f:
+            stale_log = f.read()
+        store.compact({"a": 3})
+        with open(store.wal_path, "wb") as f:
+            f.write(stale_log)
+        self.assertEqual(StateStore(self.path).load(), {"a": 3})
+
+    def test_torn_tail_is_dropped(self):
+        """A partial frame at the end of the log is truncated on load."""
+        store = StateStore(self.path)
+        store.compact({})
+        store.append({"a": 1})
+        size = store.wal_size
+        store.append({"b": 2})
+        with open(store.wal_path, "r+b") as f:
+            f.truncate(store.wal_size - 3)
+        reloaded = StateStore(self.path)
+        self.assertEqual(reloaded.load(), {"a": 1})
+        self.assertEqual(os.path.getsize(store.wal_path), size)
+        reloaded.append({"c": 3})
+        self.assertEqual(StateStore(self.path).load(), {"a": 1, "c": 3})
+
+    def test_legacy_json(self):
+        """JSON state files are read and marked for rewriting."""
+        with open(self.path, "w") as f:
+            json.dump({"a": 1}, f)
+        store = StateStore(self.path)
+        self.assertEqual(store.load(), {"a": 1})
+        self.assertTrue(store.needs_snapshot)
+
+        with open(self.path, "w") as f:
+            f.write("{not json")
+        with self.assertRaises(ValueError):
+            StateStore(self.path).load()
+        with self.assertRaises(FileNotFoundError):
+            StateStore(os.path.join(self.tmp.name, "missing")).load()
+
+
+if __name__ == "__main__":
+    unittest.main()
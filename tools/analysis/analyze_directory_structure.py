@@ -11,11 +11,17 @@ import utils.import_utils
 
 
 import os
+import sys
 import json
 from collections import defaultdict
 
 # Define the project root
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# Directory listings come from the shared single-pass scanner
+from core.processing.directory_scanner import scan_tree
 
 
 def count_files_and_dirs(path):
@@ -23,17 +29,17 @@ def count_files_and_dirs(path):
     files = 0
     dirs = 0
 
-    for item in os.listdir(path):
-        item_path = os.path.join(path, item)
-        if os.path.isdir(item_path):
-            dirs += 1
-        else:
-            files += 1
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir():
+                dirs += 1
+            else:
+                files += 1
 
     return files, dirs
 
 
-def analyze_directory_structure():
+def analyze_directory_structure(incremental=False, max_workers=None):
     """Analyze the directory structure and return statistics."""
     results = {
         "total_files": 0,
@@ -50,51 +56,36 @@ def analyze_directory_structure():
         "breadth_distribution": {},
     }
 
-    # Walk through the directory structure
-    for root, dirs, files in os.walk(PROJECT_ROOT):
-        # Skip __pycache__ directories
-        if "__pycache__" in root:
-            continue
+    # One scandir pass over the tree; every aggregate below comes from its
+    # per-directory records
+    scan = scan_tree(PROJECT_ROOT, exclude=("__pycache__",), incremental=incremental,
+                     max_workers=max_workers)
 
-        # Calculate depth relative to project root
-        rel_path = os.path.relpath(root, PROJECT_ROOT)
-        if rel_path == ".":
-            depth = 0
-        else:
-            depth = len(rel_path.split(os.sep))
+    for rel, record in sorted(scan.records.items()):
+        rel_path = rel or "."
+        depth = record["depth"]
+        files = record["files"]
+        dirs = len(record["subdirs"])
 
-        # Update max depth
         results["max_depth"] = max(results["max_depth"], depth)
+        results["dirs_by_depth"][depth] += dirs
+        results["files_by_depth"][depth] += files
+        results["total_dirs"] += dirs
+        results["total_files"] += files
 
-        # Count files and directories at this depth
-        results["dirs_by_depth"][depth] += len(dirs)
-        results["files_by_depth"][depth] += len(files)
-
-        # Count total files and directories
-        results["total_dirs"] += len(dirs)
-        results["total_files"] += len(files)
-
-        # Store directory contents
-        dir_name = os.path.basename(root) if depth > 0 else "root"
         results["dir_contents"][rel_path] = {
-            "files": len(files),
-            "dirs": len(dirs),
+            "files": files,
+            "dirs": dirs,
             "depth": depth,
             "path": rel_path,
         }
 
-        # Count files by extension
-        for file in files:
-            _, ext = os.path.splitext(file)
-            if ext:
-                results["files_by_extension"][ext] += 1
-            else:
-                results["files_by_extension"]["no_extension"] += 1
-
-        # Check for empty directories
-        if len(dirs) == 0 and len(files) == 0:
+        if not dirs and not files:
             results["empty_dirs"].append(rel_path)
 
+    for ext, count in scan.extensions().items():
+        results["files_by_extension"][ext or "no_extension"] += count
+
     # Calculate depth distribution
     total_nodes = results["total_dirs"] + results["total_files"]
     for depth in range(results["max_depth"] + 1):
@@ -263,10 +254,19 @@ def generate_report(results):
 
 def main():
     """Main function to analyze directory structure and generate report."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Analyze directory structure")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only re-read directories whose mtime changed since the last run")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processes for scanning top-level subtrees")
+    args = parser.parse_args()
+
     print("Analyzing directory structure...")
 
     # Analyze directory structure
-    results = analyze_directory_structure()
+    results = analyze_directory_structure(incremental=args.incremental, max_workers=args.workers)
 
     # Generate report
     report = generate_report(results)
@@ -10,24 +10,75 @@ This script analyzes all Python files in the codebase and provides statistics on
 - Classes
 - Lines of code
 - Comments
-"""
-# Fix imports for reorganized codebase
-import utils.import_utils
 
+Line counts come from one tokenize pass over the source the AST was parsed
+from. Directories are analyzed on a process pool and the per-file results
+are kept column-wise, one array per metric, with per-directory rollups
+computed from the columns.
+"""
+# Fix imports for reorganized codebase; nothing below depends on it
+try:
+    import utils.import_utils
+except ImportError:
+    pass
 
 import os
 import sys
 import ast
+import io
 import re
+import tokenize
+from array import array
 from collections import defaultdict, Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # Add project root to path
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-# Import our fix for RuntimeOptimizationModule
-from fix_imports_simple import *
+# Trees are shared with the other analysis tools through the parse-once cache
+from core.ast.analysis_cache import get_analysis_cache
+
+# Below this many files the pool startup costs more than it saves
+PARALLEL_THRESHOLD = 32
+# Files per worker task
+CHUNK_SIZE = 64
+
+# Per-file counts, stored one array per metric
+METRICS = (
+    "commands",
+    "branches",
+    "functions",
+    "classes",
+    "imports",
+    "lines",
+    "comments",
+    "docstrings",
+    "assignments",
+    "calls",
+    "returns",
+    "physical_lines",
+    "logical_lines",
+    "code_lines",
+    "comment_lines",
+    "docstring_lines",
+    "blank_lines",
+)
+
+# Metrics summed into the per-directory rollups
+DIR_METRICS = ("commands", "branches", "functions", "classes", "lines")
+
+# Line kinds, in order of precedence when a line holds several
+_BLANK, _COMMENT, _DOCSTRING, _CODE = range(4)
+_LAYOUT_TOKENS = {
+    tokenize.NL,
+    tokenize.NEWLINE,
+    tokenize.INDENT,
+    tokenize.DEDENT,
+    tokenize.ENDMARKER,
+    tokenize.ENCODING,
+}
 
 
 class CodeVisitor(ast.NodeVisitor):
@@ -50,13 +101,16 @@ class CodeVisitor(ast.NodeVisitor):
         }
         self.current_function = None
         self.current_class = None
+        self.current_docstring = None
 
     def visit_FunctionDef(self, node):
         """Count function definitions."""
         self.stats["functions"] += 1
         self.stats["commands"] += 1
         old_function = self.current_function
+        old_docstring = self.current_docstring
         self.current_function = node.name
+        self.current_docstring = None
 
         # Check for docstring
         if (
@@ -65,12 +119,14 @@ class CodeVisitor(ast.NodeVisitor):
             and isinstance(node.body[0].value, ast.Str)
         ):
             self.stats["docstrings"] += 1
+            self.current_docstring = node.body[0].value
 
         # Visit function body
         for child in node.body:
             self.visit(child)
 
         self.current_function = old_function
+        self.current_docstring = old_docstring
 
     def visit_ClassDef(self, node):
         """Count class definitions."""
@@ -155,7 +211,7 @@ class CodeVisitor(ast.NodeVisitor):
         if not (
             isinstance(node.value, ast.Str)
             and (
-                self.current_function is None or node.value == node.parent.body[0].value
+                self.current_function is None or node.value is self.current_docstring
             )
         ):
             self.stats["commands"] += 1
@@ -195,46 +251,112 @@ class CodeVisitor(ast.NodeVisitor):
         self.generic_visit(node)
 
 
-def count_lines_and_comments(file_path):
-    """Count lines of code and comments in a file."""
-    lines = 0
+def count_lines(source):
+    """
+    Count lines of a source buffer with one tokenize pass.
+
+    Each physical line (ending at "\n") is code, docstring (part of a
+    statement made only of string literals), comment (a comment and nothing
+    else) or blank, in that order of precedence. '#' inside strings is not a comment. Returns those
+    counts plus physical_lines, logical_lines (statements), comments (comment
+    tokens, inline ones included) and lines (non-blank lines).
+    """
+    physical = _physical_line_count(source)
+    kinds = array("b", bytes(physical + 2))
+    logical = 0
     comments = 0
+    statement = []
+
+    def mark(token, kind):
+        for row in range(token.start[0], token.end[0] + 1):
+            if kinds[row] < kind:
+                kinds[row] = kind
+
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(source).readline):
+            if token.type == tokenize.COMMENT:
+                comments += 1
+                mark(token, _COMMENT)
+            elif token.type == tokenize.NEWLINE or token.type == tokenize.ENDMARKER:
+                if statement:
+                    logical += 1
+                    kind = _DOCSTRING if all(t.type == tokenize.STRING for t in statement) else _CODE
+                    for t in statement:
+                        mark(t, kind)
+                    statement = []
+            elif token.type not in _LAYOUT_TOKENS:
+                statement.append(token)
+    except (tokenize.TokenError, SyntaxError):
+        # Unterminated constructs: fall back to a line-based count
+        return _count_lines_plain(source)
+
+    counts = {
+        "physical_lines": physical,
+        "logical_lines": logical,
+        "code_lines": 0,
+        "comment_lines": 0,
+        "docstring_lines": 0,
+        "blank_lines": 0,
+        "comments": comments,
+    }
+    names = ("blank_lines", "comment_lines", "docstring_lines", "code_lines")
+    for row in range(1, physical + 1):
+        counts[names[kinds[row]]] += 1
+    counts["lines"] = physical - counts["blank_lines"]
+    return counts
+
+
+def _physical_line_count(source):
+    # Lines end at "\n" only, as tokenize sees them; splitlines() would also
+    # split on "\r", "\x0c", "\u2028" and others
+    return source.count("\n") + (0 if source.endswith("\n") or not source else 1)
+
+
+def _count_lines_plain(source):
+    lines = source.split("\n")
+    if lines[-1] == "":
+        lines.pop()
+    blank = sum(1 for line in lines if not line.strip())
+    comment_lines = sum(1 for line in lines if line.lstrip().startswith("#"))
+    return {
+        "physical_lines": len(lines),
+        "logical_lines": 0,
+        "code_lines": len(lines) - blank - comment_lines,
+        "comment_lines": comment_lines,
+        "docstring_lines": 0,
+        "blank_lines": blank,
+        "comments": comment_lines,
+        "lines": len(lines) - blank,
+    }
+
 
+def count_lines_and_comments(file_path):
+    """Count lines of code and comments in a file."""
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if line:  # Non-empty line
-                    lines += 1
-                    if line.startswith("#"):
-                        comments += 1
-                    elif "#" in line:
-                        comments += 1
+        counts = count_lines(get_analysis_cache().source(file_path))
     except Exception as e:
         print(f"Error reading {file_path}: {e}")
+        return 0, 0
 
-    return lines, comments
+    return counts["lines"], counts["comments"]
 
 
-def analyze_file(file_path):
-    """Analyze a Python file and return statistics."""
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            content = f.read()
+def _collect_stats(file_path):
+    # Visit the AST to collect statistics
+    cache = get_analysis_cache()
+    visitor = CodeVisitor()
+    visitor.visit(cache.tree(file_path))
 
-        # Parse the AST
-        tree = ast.parse(content)
+    # Count lines and comments from the same buffer the tree was parsed from
+    visitor.stats.update(count_lines(cache.source(file_path)))
 
-        # Visit the AST to collect statistics
-        visitor = CodeVisitor()
-        visitor.visit(tree)
+    return visitor.stats
 
-        # Count lines and comments
-        lines, comments = count_lines_and_comments(file_path)
-        visitor.stats["lines"] = lines
-        visitor.stats["comments"] = comments
 
-        return visitor.stats
+def analyze_file(file_path):
+    """Analyze a Python file and return statistics."""
+    try:
+        return get_analysis_cache().derived(file_path, "code_stats", lambda: _collect_stats(file_path), version="2")
     except SyntaxError as e:
         print(f"Syntax error in {file_path}: {e}")
         return None
@@ -259,67 +381,114 @@ def find_python_files(directory):
     return python_files
 
 
-def analyze_codebase():
-    """Analyze the entire codebase and return statistics."""
-    python_files = find_python_files(PROJECT_ROOT)
-    print(f"Found {len(python_files)} Python files to analyze")
+class CodeStatsTable:
+    """
+    Per-file statistics stored column-wise.
 
-    # Initialize statistics
-    total_stats = {
-        "commands": 0,
-        "branches": 0,
-        "variables": set(),
-        "functions": 0,
-        "classes": 0,
-        "imports": 0,
-        "lines": 0,
-        "comments": 0,
-        "docstrings": 0,
-        "assignments": 0,
-        "calls": 0,
-        "returns": 0,
-    }
+    Each metric is an array with one entry per file, and each file points
+    at its directory by index; variable names are only kept per directory.
+    """
 
-    # Statistics by directory
-    dir_stats = defaultdict(
-        lambda: {
-            "files": 0,
-            "commands": 0,
-            "branches": 0,
-            "variables": set(),
-            "functions": 0,
-            "classes": 0,
-            "lines": 0,
+    def __init__(self):
+        self.paths = []
+        self.dir_names = []
+        self.dir_index = array("l")
+        self.columns = {metric: array("q") for metric in METRICS}
+        self.variables = defaultdict(set)
+        self._dirs = {}
+
+    def __len__(self):
+        return len(self.paths)
+
+    def _dir_id(self, dir_name):
+        if dir_name not in self._dirs:
+            self._dirs[dir_name] = len(self.dir_names)
+            self.dir_names.append(dir_name)
+        return self._dirs[dir_name]
+
+    def append(self, rel_path, stats):
+        """Add one file's statistics."""
+        dir_name = os.path.dirname(rel_path) or "."  # Root directory
+        self.paths.append(rel_path)
+        self.dir_index.append(self._dir_id(dir_name))
+        for metric in METRICS:
+            self.columns[metric].append(stats.get(metric, 0))
+        self.variables[dir_name].update(stats["variables"])
+
+    def extend(self, other):
+        """Add the rows of another table, e.g. one computed by a worker."""
+        remap = array("l", (self._dir_id(name) for name in other.dir_names))
+        self.paths.extend(other.paths)
+        self.dir_index.extend(remap[i] for i in other.dir_index)
+        for metric in METRICS:
+            self.columns[metric].extend(other.columns[metric])
+        for dir_name, names in other.variables.items():
+            self.variables[dir_name].update(names)
+
+    def totals(self):
+        """Sums over all files, plus the set of all variable names."""
+        total_stats = {metric: sum(self.columns[metric]) for metric in METRICS}
+        total_stats["variables"] = set().union(*self.variables.values())
+        return total_stats
+
+    def rollup(self):
+        """Per-directory file counts and sums of DIR_METRICS."""
+        dir_stats = {
+            name: dict({"files": 0, "variables": self.variables[name]}, **{m: 0 for m in DIR_METRICS})
+            for name in self.dir_names
         }
-    )
-
-    # Analyze each file
-    for file_path in python_files:
-        rel_path = os.path.relpath(file_path, PROJECT_ROOT)
-        print(f"Analyzing {rel_path}...")
-
+        rows = [dir_stats[name] for name in self.dir_names]
+        for d in self.dir_index:
+            rows[d]["files"] += 1
+        for metric in DIR_METRICS:
+            column = self.columns[metric]
+            for i, d in enumerate(self.dir_index):
+                rows[d][metric] += column[i]
+        return dir_stats
+
+
+def _analyze_chunk(root, file_paths):
+    """Worker: statistics for a list of files as a table."""
+    table = CodeStatsTable()
+    for file_path in file_paths:
         stats = analyze_file(file_path)
         if stats:
-            # Update total statistics
-            for key, value in stats.items():
-                if key == "variables":
-                    total_stats[key].update(value)
-                else:
-                    total_stats[key] += value
-
-            # Update directory statistics
-            dir_name = os.path.dirname(rel_path)
-            if not dir_name:
-                dir_name = "."  # Root directory
-
-            dir_stats[dir_name]["files"] += 1
-            for key, value in stats.items():
-                if key in ["commands", "branches", "functions", "classes", "lines"]:
-                    dir_stats[dir_name][key] += value
-                elif key == "variables":
-                    dir_stats[dir_name][key].update(value)
+            table.append(os.path.relpath(file_path, root), stats)
+    return table
+
+
+def collect_code_stats(python_files, root=PROJECT_ROOT, max_workers=None):
+    """Analyze files, on a process pool for large sets, into one CodeStatsTable."""
+    python_files = sorted(python_files)
+    chunks = [python_files[i:i + CHUNK_SIZE] for i in range(0, len(python_files), CHUNK_SIZE)]
+    table = CodeStatsTable()
+
+    if max_workers == 1 or len(python_files) < PARALLEL_THRESHOLD:
+        for chunk in chunks:
+            table.extend(_analyze_chunk(root, chunk))
+        return table
+
+    # Chunks are merged in file order so the table does not depend on scheduling
+    results = [None] * len(chunks)
+    done = 0
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_analyze_chunk, root, chunk): i for i, chunk in enumerate(chunks)}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+            done += len(chunks[futures[future]])
+            print(f"Analyzed {done}/{len(python_files)} files")
+    for result in results:
+        table.extend(result)
+    return table
+
+
+def analyze_codebase(max_workers=None):
+    """Analyze the entire codebase and return statistics."""
+    python_files = find_python_files(PROJECT_ROOT)
+    print(f"Found {len(python_files)} Python files to analyze")
 
-    return total_stats, dir_stats
+    table = collect_code_stats(python_files, PROJECT_ROOT, max_workers)
+    return table.totals(), table.rollup()
 
 
 def print_statistics(total_stats, dir_stats):
@@ -339,6 +508,10 @@ def print_statistics(total_stats, dir_stats):
     print(f"Total unique variables: {len(total_stats['variables'])}")
     print(f"Total imports: {total_stats['imports']}")
     print(f"Total comments: {total_stats['comments']}")
+    print(f"Physical lines: {total_stats['physical_lines']} "
+          f"(code {total_stats['code_lines']}, docstring {total_stats['docstring_lines']}, "
+          f"comment {total_stats['comment_lines']}, blank {total_stats['blank_lines']})")
+    print(f"Logical lines (statements): {total_stats['logical_lines']}")
     print(f"Total docstrings: {total_stats['docstrings']}")
     print(f"Total assignments: {total_stats['assignments']}")
     print(f"Total function calls: {total_stats['calls']}")
@@ -403,10 +576,20 @@ def print_statistics(total_stats, dir_stats):
 
 def main():
     """Main function."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Code Statistics Analyzer")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    args = parser.parse_args()
+
     print("Analyzing codebase...")
-    total_stats, dir_stats = analyze_codebase()
+    total_stats, dir_stats = analyze_codebase(max_workers=args.workers)
     print_statistics(total_stats, dir_stats)
 
 
 if __name__ == "__main__":
+    # Import our fix for RuntimeOptimizationModule; it replaces modules in
+    # sys.modules, so it is only applied when run as a script
+    from fix_imports_simple import *
+
     main()
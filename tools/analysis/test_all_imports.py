@@ -4,48 +4,210 @@ Test All Imports
 
 A comprehensive script to test importing all modules in the codebase.
 It identifies circular dependencies and other import issues.
+
+In parallel mode every module is imported in a fresh interpreter under
+`-X importtime`, so results don't depend on what other tests imported and
+the timings are the module's own. Each interpreter installs the same import
+fixer and placeholder modules as serial mode, from the maps of a single scan.
+Circular dependencies come from a static graph of the imports each module
+runs at import time.
 """
-# Fix imports for reorganized codebase
-import utils.import_utils
+# Fix imports for reorganized codebase; nothing below depends on it
+try:
+    import utils.import_utils
+except ImportError:
+    pass
 
 
+import ast
+import json
 import os
 import sys
 import time
 import importlib
+import subprocess
+import tempfile
 import traceback
-from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, List, Tuple, Set, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Tuple, Set, Optional
 
 # Add project root to path
 project_root = os.path.dirname(os.path.abspath(__file__))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-# Import and run the universal import fixer
-import universal_import_fixer
 
-# Create the mapper and fixer
-mapper = universal_import_fixer.ModuleMapper()
-fixer = universal_import_fixer.UniversalImportFixer(mapper)
+# ModuleMapper attributes filled by a codebase scan
+FIXER_MAPS = ("module_map", "class_map", "function_map")
+
 
-# Scan codebase, create missing modules, and patch import system
-mapper.scan_codebase()
-mapper.create_import_aliases()
-universal_import_fixer.create_missing_modules()
-fixer.fix_import_system()
+def install_import_fixer(maps_file=None):
+    """
+    Scan the codebase, create missing modules, and patch the import system.
+
+    With maps_file (see save_fixer_maps), the maps of an earlier scan are
+    loaded instead of scanning again. Returns the mapper.
+    """
+    import universal_import_fixer
+
+    mapper = universal_import_fixer.ModuleMapper()
+    if maps_file:
+        with open(maps_file, "r", encoding="utf-8") as f:
+            maps = json.load(f)
+        for name in FIXER_MAPS:
+            setattr(mapper, name, maps[name])
+    else:
+        mapper.scan_codebase()
+    fixer = universal_import_fixer.UniversalImportFixer(mapper)
+    mapper.create_import_aliases()
+    universal_import_fixer.create_missing_modules()
+    fixer.fix_import_system()
+    return mapper
+
+
+def save_fixer_maps(mapper, directory):
+    """Save the mapper's scan to a file the worker processes load; returns its path."""
+    path = os.path.join(directory, "import_fixer_maps.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({name: getattr(mapper, name) for name in FIXER_MAPS}, f)
+    return path
+
+
+# Seconds a single module may take to import in its worker process
+IMPORT_TIMEOUT = 30
+
+# Written by the worker right before the import, so interpreter startup
+# imports can be told apart from the module's own
+IMPORTTIME_MARKER = "--- import under test ---"
+
+# __import__ rather than importlib.import_module: only imports that go through
+# the C import machinery are reported by -X importtime. With a maps file the
+# worker sets up the import fixer and placeholders first, as serial mode does.
+_WORKER = (
+    "import sys\n"
+    "sys.path.insert(0, sys.argv[1])\n"
+    "if sys.argv[3]:\n"
+    f"    sys.path.insert(0, {project_root!r})\n"
+    "    from test_all_imports import ImportTester, install_import_fixer\n"
+    "    install_import_fixer(sys.argv[3])\n"
+    "    ImportTester(sys.argv[1])\n"
+    f"sys.stderr.write({IMPORTTIME_MARKER!r} + '\\n')\n"
+    "sys.stderr.flush()\n"
+    "__import__(sys.argv[2])\n"
+)
+
+
+def parse_importtime(stderr: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Parse `-X importtime` output into a tree of imports.
+
+    Returns the top-level import nodes ({'name', 'self_us', 'cumulative_us',
+    'children'}) and the remaining stderr lines. CPython prints each import
+    after its children, indented two spaces per level.
+    """
+    pending = {}
+    other = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            other.append(line)
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header line
+        name = fields[2].lstrip(" ")
+        depth = (len(fields[2]) - len(name) - 1) // 2
+        node = {
+            "name": name,
+            "self_us": int(fields[0]),
+            "cumulative_us": int(fields[1]),
+            "children": pending.pop(depth + 1, []),
+        }
+        pending.setdefault(depth, []).append(node)
+    roots = pending.get(min(pending), []) if pending else []
+    return roots, other
+
+
+def heaviest_chain(node: Dict[str, Any]) -> List[Tuple[str, int]]:
+    """Follow the child with the largest cumulative time down from node."""
+    chain = []
+    while node:
+        chain.append((node["name"], node["cumulative_us"]))
+        node = max(node["children"], key=lambda c: c["cumulative_us"], default=None)
+    return chain
+
+
+def module_level_imports(tree: ast.Module) -> List[ast.stmt]:
+    """Import statements that run when the module is imported (not inside functions)."""
+    found = []
+    stack = list(tree.body)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            found.append(node)
+        elif not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+            stack.extend(n for n in ast.iter_child_nodes(node) if isinstance(n, ast.stmt)
+                         or isinstance(n, ast.excepthandler))
+    return found
+
+
+def find_import_cycles(graph: Dict[str, Set[str]]) -> List[List[str]]:
+    """Strongly connected components of the import graph that form cycles."""
+    index, low, on_stack, stack, cycles = {}, {}, set(), [], []
+    counter = 0
+
+    for start in sorted(graph):
+        if start in index:
+            continue
+        work = [(start, iter(sorted(graph.get(start, ()))))]
+        index[start] = low[start] = counter
+        counter += 1
+        stack.append(start)
+        on_stack.add(start)
+        while work:
+            node, children = work[-1]
+            child = next(children, None)
+            if child is not None:
+                if child not in index:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(sorted(graph.get(child, ())))))
+                elif child in on_stack:
+                    low[node] = min(low[node], index[child])
+                continue
+            work.pop()
+            if work:
+                low[work[-1][0]] = min(low[work[-1][0]], low[node])
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                if len(component) > 1 or node in graph.get(node, ()):
+                    cycles.append(sorted(component))
+    return cycles
 
 
 class ImportTester:
     """Tests imports for all modules in the codebase."""
 
+    # Scripts that do their work at import time
+    SKIP_MODULES = ("test_all_imports", "test_imports", "test_new_structure")
+
     def __init__(self, root_dir=None):
         """Initialize with the root directory."""
-        self.root_dir = root_dir or PROJECT_ROOT
+        self.root_dir = root_dir or project_root
         self.success = []
         self.failed = []
         self.circular_deps = []
+        self.cycles = []
+        self.timeouts = []
         self.import_times = {}
+        self.import_trees = {}
         self.module_deps = {}
         self.visited = set()
         self.in_progress = set()
@@ -321,27 +483,129 @@ class ImportTester:
                 self.failed.append((module_path, error))
                 print(f"❌ {module_path}: {error}")
 
-    def test_all_modules_parallel(self, max_workers=4):
-        """Test importing all modules in parallel."""
-        modules = self.find_modules()
-        print(f"Found {len(modules)} Python modules to test")
+    def test_all_modules_parallel(self, max_workers=4, timeout=IMPORT_TIMEOUT, fixer_maps=None):
+        """
+        Test importing all modules, each in a fresh interpreter.
 
-        # Sort modules by depth (top-level first)
-        modules.sort(key=lambda m: m.count("."))
+        Worker threads only wait on their child processes, so no module
+        sees another's imports or placeholders. With fixer_maps (see
+        save_fixer_maps), each interpreter installs the import fixer first.
+        """
+        modules = [m for m in self.find_modules() if m.rpartition(".")[2] not in self.SKIP_MODULES]
+        print(f"Found {len(modules)} Python modules to test")
 
-        # Test each module in parallel
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            results = list(executor.map(self.test_import, modules))
-
-        # Process results
-        for i, (success, error, time_taken) in enumerate(results):
-            module_path = modules[i]
-            self.import_times[module_path] = time_taken
-
-            if success:
-                self.success.append(module_path)
-            else:
-                self.failed.append((module_path, error))
+            futures = {executor.submit(self.test_import_isolated, m, timeout, fixer_maps): m for m in modules}
+            for future in as_completed(futures):
+                module_path = futures[future]
+                success, error, time_taken = future.result()
+                self.import_times[module_path] = time_taken
+                if success:
+                    self.success.append(module_path)
+                else:
+                    self.failed.append((module_path, error))
+
+        self.success.sort()
+        self.failed.sort()
+        self.find_circular_dependencies(modules)
+
+    def test_import_isolated(self, module_path: str, timeout: float = IMPORT_TIMEOUT,
+                             fixer_maps: Optional[str] = None) -> Tuple[bool, Optional[str], float]:
+        """
+        Import a module in a new `python -X importtime` process, after
+        installing the import fixer from fixer_maps if given.
+
+        Returns success, error message and the module's cumulative import
+        time in seconds (wall time if the import failed). The parsed import
+        tree is kept in import_trees.
+        """
+        start_time = time.perf_counter()
+        try:
+            proc = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", _WORKER, self.root_dir, module_path, fixer_maps or ""],
+                cwd=self.root_dir,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True,
+                errors="replace",
+                timeout=timeout,
+            )
+        except subprocess.TimeoutExpired:
+            self.timeouts.append(module_path)
+            return False, f"Timed out after {timeout}s", time.perf_counter() - start_time
+        elapsed = time.perf_counter() - start_time
+
+        _, _, own_output = proc.stderr.partition(IMPORTTIME_MARKER + "\n")
+        roots, other = parse_importtime(own_output)
+        tree = next((r for r in roots if r["name"] == module_path), None)
+        if tree is not None:
+            self.import_trees[module_path] = tree
+
+        if proc.returncode != 0:
+            errors = [line for line in other if line.strip()]
+            return False, errors[-1] if errors else f"Exit code {proc.returncode}", elapsed
+        if tree is None:
+            # Already imported during startup
+            return True, None, 0.0
+        return True, None, tree["cumulative_us"] / 1e6
+
+    def module_file(self, module_path: str) -> str:
+        return os.path.join(self.root_dir, module_path.replace(".", os.path.sep) + ".py")
+
+    def build_import_graph(self, modules: List[str]) -> Dict[str, Set[str]]:
+        """
+        Map each module to the codebase modules it imports at import time.
+
+        Absolute names are matched to the longest known prefix; names that
+        don't resolve are tried next to the importing file, the way scripts
+        in one directory import their siblings.
+        """
+        known = set(modules)
+        graph = {}
+        for module_path in modules:
+            package = module_path.rpartition(".")[0]
+            try:
+                with open(self.module_file(module_path), "r", encoding="utf-8") as f:
+                    tree = ast.parse(f.read())
+            except (OSError, SyntaxError, ValueError):
+                graph[module_path] = set()
+                continue
+
+            targets = set()
+            for node in module_level_imports(tree):
+                if isinstance(node, ast.Import):
+                    names = [alias.name for alias in node.names]
+                else:
+                    base = node.module or ""
+                    if node.level:
+                        parts = package.split(".") if package else []
+                        parts = parts[:len(parts) - (node.level - 1)] if node.level > 1 else parts
+                        base = ".".join(p for p in parts + [base] if p)
+                    names = [f"{base}.{alias.name}" if base else alias.name for alias in node.names]
+                    names.append(base)
+                for name in names:
+                    for candidate in (name, f"{package}.{name}" if package else None):
+                        resolved = self._longest_known(candidate, known)
+                        if resolved:
+                            targets.add(resolved)
+                            break
+            graph[module_path] = targets
+        return graph
+
+    @staticmethod
+    def _longest_known(name: Optional[str], known: Set[str]) -> Optional[str]:
+        while name:
+            if name in known:
+                return name
+            name = name.rpartition(".")[0]
+        return None
+
+    def find_circular_dependencies(self, modules: Optional[List[str]] = None) -> List[List[str]]:
+        """Record import cycles found in the static import graph."""
+        self.cycles = find_import_cycles(self.build_import_graph(modules or self.find_modules()))
+        self.circular_deps = sorted({m for cycle in self.cycles for m in cycle})
+        return self.cycles
 
     def apply_lazy_loading_fix(self, module_path: str) -> bool:
         """Apply the lazy loading fix to a module with circular dependencies."""
@@ -427,14 +691,23 @@ def get_{module_name.replace('.', '_')}():
 
         print(f"\nSuccessfully imported {len(self.success)} modules")
         print(f"Failed to import {len(self.failed)} modules")
-        print(f"Detected {len(self.circular_deps)} circular dependencies")
+        print(f"Detected {len(self.cycles) or len(self.circular_deps)} circular dependencies")
 
         if self.failed:
             print("\nFailed imports:")
             for module_path, error in self.failed:
                 print(f"  - {module_path}: {error}")
 
-        if self.circular_deps:
+        if self.timeouts:
+            print("\nTimed out:")
+            for module_path in self.timeouts:
+                print(f"  - {module_path}")
+
+        if self.cycles:
+            print("\nCircular dependencies:")
+            for cycle in self.cycles:
+                print(f"  - {' <-> '.join(cycle)}")
+        elif self.circular_deps:
             print("\nCircular dependencies:")
             for module_path in self.circular_deps:
                 print(f"  - {module_path}")
@@ -446,6 +719,23 @@ def get_{module_name.replace('.', '_')}():
         for module_path, time_taken in slowest:
             print(f"  - {module_path}: {time_taken:.3f}s")
 
+        if self.import_trees:
+            print("\nHeaviest import chains (cumulative):")
+            heaviest = sorted(self.import_trees.values(), key=lambda t: t["cumulative_us"], reverse=True)[:10]
+            for tree in heaviest:
+                chain = " -> ".join(f"{name} ({us / 1000:.1f}ms)" for name, us in heaviest_chain(tree))
+                print(f"  - {chain}")
+
+            own_times = {}
+            stack = list(self.import_trees.values())
+            while stack:
+                node = stack.pop()
+                own_times[node["name"]] = max(own_times.get(node["name"], 0), node["self_us"])
+                stack.extend(node["children"])
+            print("\nMost expensive modules (self time):")
+            for name, us in sorted(own_times.items(), key=lambda x: x[1], reverse=True)[:10]:
+                print(f"  - {name}: {us / 1000:.1f}ms")
+
         print("\n" + "=" * 80)
 
 
@@ -455,21 +745,33 @@ def main():
 
     parser = argparse.ArgumentParser(description="Test All Imports")
     parser.add_argument(
-        "--parallel", action="store_true", help="Test imports in parallel"
+        "--parallel",
+        action="store_true",
+        help="Test each import in its own process, in parallel",
     )
     parser.add_argument("--fix", action="store_true", help="Fix circular dependencies")
     parser.add_argument(
-        "--workers", type=int, default=4, help="Number of worker threads"
+        "--workers", type=int, default=4, help="Number of worker processes"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=IMPORT_TIMEOUT,
+        help="Seconds allowed for each import in parallel mode",
     )
 
     args = parser.parse_args()
 
+    mapper = install_import_fixer()
     tester = ImportTester()
 
     if args.parallel:
-        tester.test_all_modules_parallel(max_workers=args.workers)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tester.test_all_modules_parallel(max_workers=args.workers, timeout=args.timeout,
+                                             fixer_maps=save_fixer_maps(mapper, tmp_dir))
     else:
         tester.test_all_modules()
+        tester.find_circular_dependencies()
 
     tester.generate_report()
 
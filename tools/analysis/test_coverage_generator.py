@@ -12,6 +12,7 @@ This script provides a comprehensive testing solution that:
 
 Usage:
     py test_coverage_generator.py [--discover] [--generate] [--run] [--report] [--validate-imports] [--fix-imports]
+                                  [--workers N] [--incremental]
 
 Options:
     --discover         Only discover modules and create a report
@@ -22,6 +23,8 @@ Options:
     --fix-imports      Attempt to fix import issues
     --all              Do all of the above (default)
     --fast             Run in fast mode (skip slow tests)
+    --workers N        Run test modules in N worker processes, sharded by past durations
+    --incremental      Only re-run test modules whose imported code changed since the last run
 """
 
 import os
@@ -30,8 +33,14 @@ import ast
 import time
 import json
 import unittest
+import io
+import heapq
+import hashlib
 import argparse
+import tempfile
+import traceback
 import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from typing import Dict, List, Any, Optional, Set, Tuple
 
 # Add project root to path for imports
@@ -69,6 +78,73 @@ except ImportError:
     subprocess.check_call([sys.executable, "-m", "pip", "install", "coverage"])
     import coverage
 
+# Duration assumed for a test module with no recorded runs
+DEFAULT_TEST_DURATION = 1.0
+
+SKIP_DIRS = {".git", "__pycache__", ".vscode", ".idea", "venv", "env", "coverage"}
+
+
+def coverage_data_name(data_dir: str, data_file: str, test_file: str, tests_dir: str) -> str:
+    """Per-test-module coverage data file, named so Coverage.combine() picks it up."""
+    rel_path = os.path.relpath(test_file, tests_dir)
+    safe = rel_path[:-3].replace(os.sep, ".")
+    return os.path.join(data_dir, f"{os.path.basename(data_file)}.{safe}")
+
+
+def balance_shards(durations: Dict[str, float], workers: int) -> List[List[str]]:
+    """
+    Split test files into shards of similar total duration.
+
+    Longest first, each file goes to the currently lightest shard.
+    """
+    shards = [(0.0, i, []) for i in range(max(1, min(workers, len(durations))))]
+    heapq.heapify(shards)
+    for test_file in sorted(durations, key=lambda f: (-durations[f], f)):
+        total, index, files = heapq.heappop(shards)
+        files.append(test_file)
+        heapq.heappush(shards, (total + durations[test_file], index, files))
+    return [files for _, _, files in sorted(shards, key=lambda s: s[1]) if files]
+
+
+def _run_test_shard(test_files: List[str], tests_dir: str, data_dir: str,
+                    coverage_options: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Worker entry point: run each test module under its own coverage data file.
+
+    Returns per-file counts, duration and failure reports.
+    """
+    if tests_dir not in sys.path:
+        sys.path.insert(0, tests_dir)
+    loader = unittest.TestLoader()
+    results = {}
+
+    for test_file in test_files:
+        module_name = os.path.relpath(test_file, tests_dir)[:-3].replace(os.sep, ".")
+        data_file = coverage_data_name(data_dir, coverage_options["data_file"], test_file, tests_dir)
+        cov = coverage.Coverage(**dict(coverage_options, data_file=data_file))
+        cov.erase()
+        record = {"run": 0, "errors": 0, "failures": 0, "skipped": 0, "problems": []}
+        start_time = time.perf_counter()
+        cov.start()
+        try:
+            suite = loader.loadTestsFromName(module_name)
+            result = unittest.TextTestRunner(stream=io.StringIO(), verbosity=0).run(suite)
+            record.update(
+                run=result.testsRun,
+                errors=len(result.errors),
+                failures=len(result.failures),
+                skipped=len(result.skipped),
+                problems=[f"{test.id()}\n{trace}" for test, trace in result.errors + result.failures],
+            )
+        except (Exception, SystemExit):
+            # Generated tests exit when their module can't be imported
+            record.update(errors=1, problems=[f"{module_name}\n{traceback.format_exc()}"])
+        finally:
+            cov.stop()
+            cov.save()
+        record["duration"] = time.perf_counter() - start_time
+        results[test_file] = record
+    return results
 
 class TestCoverageGenerator:
     """Generate and run tests with coverage for the entire codebase."""
@@ -382,13 +458,20 @@ if __name__ == "__main__":
         print(f"Generated {generated_count} test cases")
         return generated_count
 
-    def run_tests(self) -> Dict[str, Any]:
+    def run_tests(self, workers: int = 1, incremental: bool = False) -> Dict[str, Any]:
         """
         Run all tests with coverage.
 
+        Args:
+            workers: Worker processes; above 1, test modules run in shards
+            incremental: Skip test modules whose imported code is unchanged
+
         Returns:
             Dictionary with test results
         """
+        if workers > 1 or incremental:
+            return self.run_tests_sharded(workers, incremental)
+
         print("\n🏃 Running tests with coverage...")
 
         # Start coverage
@@ -416,6 +499,190 @@ if __name__ == "__main__":
             "skipped": len(result.skipped),
         }
 
+    def find_test_files(self) -> List[str]:
+        """All test_*.py files under the tests directory."""
+        test_files = []
+        for root, dirs, files in os.walk(self.tests_dir):
+            dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS)
+            test_files.extend(
+                os.path.join(root, f) for f in sorted(files) if f.startswith("test_") and f.endswith(".py")
+            )
+        return test_files
+
+    def index_project_modules(self) -> Dict[str, str]:
+        """Map importable module names in the project to their files."""
+        index = {}
+        for root, dirs, files in os.walk(self.project_root):
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+            for file in files:
+                if not file.endswith(".py"):
+                    continue
+                rel_path = os.path.relpath(os.path.join(root, file), self.project_root)[:-3]
+                if file == "__init__.py":
+                    rel_path = os.path.dirname(rel_path)
+                if rel_path:
+                    index[rel_path.replace(os.sep, ".")] = os.path.join(root, file)
+        return index
+
+    def test_fingerprints(self, test_files: List[str]) -> Dict[str, str]:
+        """
+        Hash each test module together with every project file it imports,
+        directly or transitively.
+
+        Imports are resolved statically, against the project root and then
+        against the importing file's directory.
+        """
+        index = self.index_project_modules()
+        by_path = {path: name for name, path in index.items()}
+        imports, hashes = {}, {}
+
+        def resolve(name: str, directory: str) -> Optional[str]:
+            rel_dir = os.path.relpath(directory, self.project_root)
+            prefix = "" if rel_dir == "." else rel_dir.replace(os.sep, ".") + "."
+            for candidate in (name, prefix + name):
+                while candidate:
+                    if candidate in index:
+                        return index[candidate]
+                    candidate = candidate.rpartition(".")[0]
+            return None
+
+        def direct_imports(path: str) -> Set[str]:
+            if path not in imports:
+                found = set()
+                try:
+                    data = open(path, "rb").read()
+                    hashes[path] = hashlib.blake2b(data, digest_size=16).hexdigest()
+                    tree = ast.parse(data)
+                except (OSError, SyntaxError, ValueError):
+                    tree = None
+                directory = os.path.dirname(path)
+                package = by_path.get(path, "").rpartition(".")[0]
+                for node in ast.walk(tree) if tree else ():
+                    if isinstance(node, ast.Import):
+                        names = [alias.name for alias in node.names]
+                    elif isinstance(node, ast.ImportFrom):
+                        base = node.module or ""
+                        if node.level:
+                            parts = package.split(".") if package else []
+                            parts = parts[:len(parts) - node.level + 1]
+                            base = ".".join(p for p in parts + [base] if p)
+                        names = [f"{base}.{alias.name}" if base else alias.name for alias in node.names]
+                    else:
+                        continue
+                    for name in names:
+                        target = resolve(name, directory)
+                        if target and target != path:
+                            found.add(target)
+                imports[path] = found
+            return imports[path]
+
+        fingerprints = {}
+        for test_file in test_files:
+            seen, stack = {test_file}, [test_file]
+            while stack:
+                for target in direct_imports(stack.pop()):
+                    if target not in seen:
+                        seen.add(target)
+                        stack.append(target)
+            digest = hashlib.blake2b(digest_size=16)
+            for path in sorted(seen):
+                digest.update(f"{os.path.relpath(path, self.project_root)}:{hashes.get(path)}\n".encode())
+            fingerprints[test_file] = digest.hexdigest()
+        return fingerprints
+
+    def load_test_history(self) -> Dict[str, Dict[str, Any]]:
+        """Per-test-module durations and fingerprints from previous runs."""
+        try:
+            with open(os.path.join(self.coverage_dir, "test_history.json"), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_test_history(self, history: Dict[str, Dict[str, Any]]) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.coverage_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(history, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, os.path.join(self.coverage_dir, "test_history.json"))
+
+    def run_tests_sharded(self, workers: int = 2, incremental: bool = False) -> Dict[str, Any]:
+        """
+        Run test modules in worker processes and combine their coverage.
+
+        Modules are split into shards balanced by their recorded durations.
+        Each module writes its own coverage data file, which is kept between
+        runs, so with incremental=True unchanged modules that passed last
+        time are skipped and their previous coverage is reused.
+
+        Returns:
+            Dictionary with test results
+        """
+        print(f"\n🏃 Running tests with coverage in {workers} worker(s)...")
+        data_dir = ensure_dir(os.path.join(self.coverage_dir, "data"))
+        data_file = os.path.abspath(self.cov.config.data_file)
+        test_files = self.find_test_files()
+        history = self.load_test_history()
+        fingerprints = self.test_fingerprints(test_files)
+
+        # Coverage data of deleted test modules no longer counts
+        keep = {os.path.basename(coverage_data_name(data_dir, data_file, f, self.tests_dir)) for f in test_files}
+        for name in os.listdir(data_dir):
+            if name not in keep or not incremental:
+                os.remove(os.path.join(data_dir, name))
+
+        to_run = {}
+        totals = {"run": 0, "errors": 0, "failures": 0, "skipped": 0, "reused": 0}
+        for test_file in test_files:
+            rel_path = os.path.relpath(test_file, self.project_root)
+            previous = history.get(rel_path, {})
+            if (incremental and previous.get("fingerprint") == fingerprints[test_file]
+                    and previous.get("status") == "passed"
+                    and os.path.exists(coverage_data_name(data_dir, data_file, test_file, self.tests_dir))):
+                totals["reused"] += 1
+                continue
+            to_run[test_file] = previous.get("duration", DEFAULT_TEST_DURATION)
+        print(f"Running {len(to_run)} test modules, reusing {totals['reused']} unchanged")
+
+        coverage_options = {
+            "data_file": data_file,
+            "source": self.cov.config.source,
+            "omit": self.cov.config.run_omit,
+        }
+        shards = balance_shards(to_run, workers)
+        with ProcessPoolExecutor(max_workers=max(1, len(shards))) as executor:
+            futures = [
+                executor.submit(_run_test_shard, shard, self.tests_dir, data_dir, coverage_options)
+                for shard in shards
+            ]
+            for future in as_completed(futures):
+                for test_file, record in future.result().items():
+                    rel_path = os.path.relpath(test_file, self.project_root)
+                    passed = not (record["errors"] or record["failures"])
+                    print(f"{'✓' if passed else '✗'} {rel_path} ({record['run']} tests, {record['duration']:.2f}s)")
+                    for problem in record["problems"]:
+                        print(f"  {problem}")
+                    for key in ("run", "errors", "failures", "skipped"):
+                        totals[key] += record[key]
+                    history[rel_path] = {
+                        "duration": record["duration"],
+                        "fingerprint": fingerprints[test_file],
+                        "status": "passed" if passed else "failed",
+                    }
+
+        current = {os.path.relpath(f, self.project_root) for f in test_files}
+        self.save_test_history({k: v for k, v in history.items() if k in current})
+
+        # Merge the per-module data into the main data file
+        self.cov.erase()
+        if os.listdir(data_dir):
+            self.cov.combine(data_paths=[data_dir], keep=True)
+            self.cov.save()
+
+        print(
+            f"Ran {totals['run']} tests: {totals['errors']} errors, "
+            f"{totals['failures']} failures, {totals['skipped']} skipped"
+        )
+        return totals
+
     def generate_coverage_report(self) -> Dict[str, Any]:
         """
         Generate coverage report.
@@ -744,6 +1011,17 @@ def main():
     parser.add_argument(
         "--fast", action="store_true", help="Run in fast mode (skip slow tests)"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Run test modules in this many worker processes",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only re-run test modules whose imported code changed",
+    )
 
     args = parser.parse_args()
 
@@ -810,7 +1088,7 @@ def main():
         generator.generate_test_cases(coverage_check["untested"])
 
     if args.run or args.all:
-        generator.run_tests()
+        generator.run_tests(workers=args.workers, incremental=args.incremental)
 
     if args.report or args.all:
         coverage_report = generator.generate_coverage_report()
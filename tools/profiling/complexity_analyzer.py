@@ -10,10 +10,17 @@ import os
 import sys
 import ast
 import time
+import hashlib
 import inspect
 import logging
 from typing import Dict, List, Any, Optional, Tuple, Set, Union
 
+try:
+    from core.ast.analysis_cache import get_analysis_cache
+except ImportError:
+    # Run without the project on sys.path: parse directly, without caching
+    get_analysis_cache = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -22,6 +29,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger("complexity_analyzer")
 
+# Cached results are keyed by this module's source, so editing the analysis
+# never serves results computed by an older version
+with open(__file__, "rb") as _f:
+    ANALYZER_VERSION = hashlib.blake2b(_f.read(), digest_size=8).hexdigest()
+
 
 class ComplexityPatterns:
     """Common code patterns and their associated Big O complexity."""
@@ -437,30 +449,12 @@ class ComplexityAnalyzer:
             A dictionary with complexity analysis results
         """
         try:
-            # Parse the code to an AST
-            tree = ast.parse(code)
-
-            # Analyze complexity
-            visitor = ComplexityVisitor()
-            visitor.visit(tree)
-
-            # Prepare results
-            results = {
-                "overall_complexity": self._determine_overall_complexity(
-                    visitor.function_complexities
-                ),
-                "functions": list(visitor.function_complexities.values()),
-                "imported_modules": list(visitor.imported_modules),
-                "has_high_complexity": any(
-                    self._is_high_complexity(func["complexity"])
-                    for func in visitor.function_complexities.values()
-                ),
-                "optimization_opportunities": self._count_optimization_opportunities(
-                    visitor.function_complexities
-                ),
-            }
-
-            return results
+            if get_analysis_cache is None:
+                return self._analyze_tree(ast.parse(code))
+            # The tree and the results are shared with other tools by content
+            cache = get_analysis_cache()
+            return cache.source_derived(code, "complexity", lambda: self._analyze_tree(cache.parse_source(code)),
+                                        ANALYZER_VERSION)
         except Exception as e:
             logger.error(f"Error analyzing code complexity: {str(e)}")
             return {
@@ -471,10 +465,35 @@ class ComplexityAnalyzer:
                 "optimization_opportunities": 0,
             }
 
+    def _analyze_tree(self, tree: ast.Module) -> Dict[str, Any]:
+        """Complexity analysis results for a parsed module."""
+        # Analyze complexity
+        visitor = ComplexityVisitor()
+        visitor.visit(tree)
+
+        # Prepare results
+        return {
+            "overall_complexity": self._determine_overall_complexity(
+                visitor.function_complexities
+            ),
+            "functions": list(visitor.function_complexities.values()),
+            "imported_modules": list(visitor.imported_modules),
+            "has_high_complexity": any(
+                self._is_high_complexity(func["complexity"])
+                for func in visitor.function_complexities.values()
+            ),
+            "optimization_opportunities": self._count_optimization_opportunities(
+                visitor.function_complexities
+            ),
+        }
+
     def analyze_file(self, file_path: str) -> Dict[str, Any]:
         """
         Analyze the complexity of a Python file.
 
+        The file is parsed and analyzed once per content; repeated calls, from
+        this or any other tool, reuse the cached result.
+
         Args:
             file_path: Path to the Python file
 
@@ -482,10 +501,13 @@ class ComplexityAnalyzer:
             A dictionary with complexity analysis results
         """
         try:
-            with open(file_path, "r") as f:
-                code = f.read()
-
-            results = self.analyze_code(code)
+            if get_analysis_cache is None:
+                with open(file_path, "r") as f:
+                    results = self._analyze_tree(ast.parse(f.read()))
+            else:
+                cache = get_analysis_cache()
+                results = cache.derived(file_path, "complexity", lambda: self._analyze_tree(cache.tree(file_path)),
+                                        ANALYZER_VERSION)
             results["file_path"] = file_path
             return results
         except Exception as e:
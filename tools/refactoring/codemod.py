@@ -0,0 +1,519 @@
+#!/usr/bin/env python
+"""
+Codemod
+
+This module applies code fixes as edits to the original source text:
+- Each file is parsed and tokenized once, and every fixer works from that
+  same tree and token stream
+- Fixers return changes as (start, end, replacement) character ranges, so
+  comments and formatting outside the changed ranges are left untouched
+- Changes from all fixers are merged in one splice; a change overlapping
+  one already accepted is dropped and reported, to be picked up by a later run
+- The result is parsed before it is written, and writes are atomic
+- Files are fixed on a process pool; dry runs return unified diffs instead
+"""
+import ast
+import difflib
+import io
+import os
+import shutil
+import tempfile
+import tokenize
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# Below this many files the pool startup costs more than it saves
+PARALLEL_THRESHOLD = 32
+# Files per worker task
+CHUNK_SIZE = 32
+
+SKIP_DIRS = ('.git', '__pycache__', '.vscode', '.idea', '.logic_cache')
+FILE_OPENERS = ("open", "file")
+
+
+class Change(NamedTuple):
+    """
+    A replacement of source[start:end].
+
+    A replacement of None only reports the range; it needs fixing by hand.
+    """
+    start: int
+    end: int
+    replacement: Optional[str]
+    fixer: str
+    message: str
+
+
+class SourceFile:
+    """Source text with its tree, tokens and line offsets, each computed once."""
+
+    def __init__(self, source: str, path: Optional[str] = None):
+        self.source = source
+        self.path = path
+        self._tree = None
+        self._tokens = None
+        self._token_index = None
+        # Lines end at "\n" only, as for tokenize; "\r\n" stays in the line
+        self.lines = source.split("\n")
+        self._line_starts = [0]
+        for line in self.lines:
+            self._line_starts.append(self._line_starts[-1] + len(line) + 1)
+
+    @property
+    def tree(self) -> ast.Module:
+        if self._tree is None:
+            self._tree = ast.parse(self.source, self.path or "<unknown>")
+        return self._tree
+
+    @property
+    def tokens(self) -> List[tokenize.TokenInfo]:
+        if self._tokens is None:
+            self._tokens = list(tokenize.generate_tokens(io.StringIO(self.source).readline))
+            self._token_index = {token.start: i for i, token in enumerate(self._tokens)}
+        return self._tokens
+
+    def offset(self, row: int, col: int) -> int:
+        """Character offset of a (1-based row, character column) position."""
+        return min(self._line_starts[row - 1] + col, len(self.source))
+
+    def _column(self, row: int, byte_col: int) -> int:
+        # ast columns count UTF-8 bytes; tokenize columns count characters
+        line = self.lines[row - 1]
+        if line.isascii():
+            return byte_col
+        return len(line.encode("utf-8")[:byte_col].decode("utf-8", errors="ignore"))
+
+    def start(self, node: ast.AST) -> Tuple[int, int]:
+        return node.lineno, self._column(node.lineno, node.col_offset)
+
+    def end(self, node: ast.AST) -> Tuple[int, int]:
+        return node.end_lineno, self._column(node.end_lineno, node.end_col_offset)
+
+    def token_at(self, position: Tuple[int, int]) -> Optional[int]:
+        """Index of the token starting at a (row, column) position."""
+        self.tokens
+        return self._token_index.get(position)
+
+    def line_span(self, node: ast.stmt) -> Optional[Tuple[int, int]]:
+        """
+        Offsets of the whole lines holding a statement, with its trailing
+        comment, or None if other code shares those lines.
+        """
+        (start_row, start_col), (end_row, end_col) = self.start(node), self.end(node)
+        if self.lines[start_row - 1][:start_col].strip():
+            return None
+        rest = self.lines[end_row - 1][end_col:].strip()
+        if rest and not rest.startswith("#"):
+            return None
+        return self.offset(start_row, 0), self.offset(end_row + 1, 0)
+
+    def semicolon_span(self, node: ast.stmt) -> Optional[Tuple[int, int]]:
+        """
+        Offsets of a statement that shares its line through ';', with the
+        separator on one side, or None if it is not separated that way.
+        """
+        index = self.token_at(self.start(node))
+        if index is None:
+            return None
+        end = self.end(node)
+        following = index
+        while following < len(self.tokens) and self.tokens[following].start < end:
+            following += 1
+        if self.tokens[following].string == ";":
+            return self.offset(*self.start(node)), self.offset(*self.tokens[following + 1].start)
+        if index > 0 and self.tokens[index - 1].string == ";":
+            return self.offset(*self.tokens[index - 1].start), self.offset(*end)
+        return None
+
+    def indent(self, node: ast.stmt) -> str:
+        line = self.lines[node.lineno - 1]
+        return line[:len(line) - len(line.lstrip())]
+
+
+class Fixer(ABC):
+    """
+    Base class for fixers.
+
+    find() returns the changes for one file; summary() describes how many
+    were made, for reports.
+    """
+    name = ""
+
+    @abstractmethod
+    def find(self, source_file: SourceFile) -> List[Change]:
+        """The changes this fixer makes to one file."""
+
+    def summary(self, count: int) -> str:
+        return f"{self.name}: {count}"
+
+
+def _statement_lists(tree: ast.AST) -> Iterator[Tuple[ast.AST, List[ast.stmt]]]:
+    """Every (owner, statement list) in the tree: bodies, else and finally blocks."""
+    for node in ast.walk(tree):
+        for field in ("body", "orelse", "finalbody"):
+            statements = getattr(node, field, None)
+            if isinstance(statements, list) and statements and isinstance(statements[0], ast.stmt):
+                yield node, statements
+
+
+def _bound_name(alias: ast.alias) -> str:
+    return alias.asname or alias.name.split(".")[0]
+
+
+def _exported_names(tree: ast.Module) -> set:
+    """Strings listed in a module-level __all__."""
+    names = set()
+    for node in tree.body:
+        if isinstance(node, (ast.Assign, ast.AugAssign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            if any(isinstance(t, ast.Name) and t.id == "__all__" for t in targets) and node.value is not None:
+                for element in ast.walk(node.value):
+                    if isinstance(element, ast.Constant) and isinstance(element.value, str):
+                        names.add(element.value)
+    return names
+
+
+class UnusedImportFixer(Fixer):
+    """
+    Removes imported names that are never used.
+
+    Whole statements are removed with their lines; single names are cut out
+    of a statement with the comma that separates them. Imports in package
+    __init__ files, in try blocks (availability checks), __future__ imports
+    and star imports are kept.
+    """
+    name = "unused_imports"
+
+    def summary(self, count: int) -> str:
+        return f"Removed {count} unused imports"
+
+    def find(self, source_file: SourceFile) -> List[Change]:
+        if source_file.path and os.path.basename(source_file.path) == "__init__.py":
+            return []
+        tree = source_file.tree
+        used = _exported_names(tree)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Store):
+                used.add(node.id)
+
+        changes = []
+        for owner, statements in _statement_lists(tree):
+            if isinstance(owner, (ast.Try, getattr(ast, "TryStar", ast.Try))) and statements is owner.body:
+                continue
+            # Statements removed with their lines, and ones removed from a line shared through ';'
+            removed, inline = [], []
+            for statement in statements:
+                if not isinstance(statement, (ast.Import, ast.ImportFrom)):
+                    continue
+                if isinstance(statement, ast.ImportFrom) and (
+                        statement.module == "__future__" or statement.names[0].name == "*"):
+                    continue
+                unused = [alias for alias in statement.names if _bound_name(alias) not in used]
+                if not unused:
+                    continue
+                messages = [f"line {statement.lineno}: unused import {_bound_name(alias)}" for alias in unused]
+                if len(unused) == len(statement.names):
+                    span = source_file.line_span(statement)
+                    if span is not None:
+                        removed.append((statement, span, messages))
+                    else:
+                        span = source_file.semicolon_span(statement)
+                        if span is not None:
+                            inline.append((statement, span, messages))
+                else:
+                    changes.extend(self._remove_names(source_file, statement, unused, messages))
+            if len(removed) + len(inline) == len(statements):
+                # Emptying a block would leave invalid code
+                if not removed:
+                    continue
+                statement, (start, end), messages = removed.pop()
+                changes.append(Change(start, end, source_file.indent(statement) + "pass\n", self.name,
+                                      "; ".join(messages)))
+            for statement, (start, end), messages in removed + inline:
+                changes.append(Change(start, end, "", self.name, "; ".join(messages)))
+        return changes
+
+    def _remove_names(self, source_file: SourceFile, statement, unused, messages) -> List[Change]:
+        """Cut unused names, with their separating commas, out of one statement."""
+        tokens = source_file.tokens
+        index = source_file.token_at(source_file.start(statement))
+        if index is None:
+            return []
+        # Skip 'from module' up to the 'import' keyword
+        while tokens[index].string != "import":
+            index += 1
+        parenthesized = tokens[index + 1].string == "("
+        # Each name's [start, end] position, and the position of the comma after it
+        segments, commas, current = [], [], None
+        for token in tokens[index + 1:]:
+            if token.type in (tokenize.NEWLINE, tokenize.ENDMARKER) or token.string == ";":
+                break
+            if token.type in (tokenize.NL, tokenize.COMMENT) or token.string in ("(", ")"):
+                continue
+            if token.string == ",":
+                commas.append(token.start)
+                current = None
+                continue
+            if current is None:
+                current = [token.start, token.end]
+                segments.append(current)
+            else:
+                current[1] = token.end
+        if len(segments) != len(statement.names):
+            return []
+
+        drop = [alias in unused for alias in statement.names]
+
+        def message(i):
+            return f"line {statement.lineno}: unused import {_bound_name(statement.names[i])}"
+
+        # In a parenthesized list with one name per line, drop whole lines to keep the other lines' comments
+        line_spans = {}
+        for i, dropped in enumerate(drop):
+            if dropped and parenthesized:
+                (row, col), (end_row, end_col) = segments[i]
+                line = source_file.lines[row - 1]
+                rest = source_file.lines[end_row - 1][end_col:].strip()
+                rest = rest[1:].strip() if rest.startswith(",") else rest
+                if not line[:col].strip() and (not rest or rest.startswith("#")):
+                    line_spans[i] = (source_file.offset(row, 0), source_file.offset(end_row + 1, 0))
+        if len(line_spans) == sum(drop):
+            return [Change(start, end, "", self.name, message(i)) for i, (start, end) in line_spans.items()]
+
+        starts = [source_file.offset(*start) for start, _ in segments]
+        ends = [source_file.offset(*end) for _, end in segments]
+        comma_spans = [(source_file.offset(*c), source_file.offset(*c) + 1) for c in commas]
+        changes = []
+        last_kept = max(i for i, dropped in enumerate(drop) if not dropped)
+        for i, dropped in enumerate(drop):
+            if not dropped:
+                continue
+            if i < last_kept:
+                # Up to the next name, taking the comma and spacing after this one
+                span, comma = (starts[i], starts[i + 1]), comma_spans[i]
+            else:
+                # Names after the last kept one go with the comma before them
+                span, comma = (comma_spans[i - 1][0], ends[i]), comma_spans[i - 1]
+            if "#" in source_file.source[span[0]:span[1]]:
+                # Cut only the name and its comma, keeping the comment between them
+                (start, cut_end), (cut_start, end) = sorted([comma, (starts[i], ends[i])])
+                changes.append(Change(start, end, source_file.source[cut_end:cut_start], self.name, message(i)))
+            else:
+                changes.append(Change(*span, "", self.name, message(i)))
+        return changes
+
+
+class BareExceptFixer(Fixer):
+    """Turns 'except:' into 'except Exception:' so SystemExit and KeyboardInterrupt pass through."""
+    name = "bare_except"
+
+    def summary(self, count: int) -> str:
+        return f"Fixed {count} error handling issues"
+
+    def find(self, source_file: SourceFile) -> List[Change]:
+        changes = []
+        for node in ast.walk(source_file.tree):
+            if isinstance(node, ast.ExceptHandler) and node.type is None:
+                index = source_file.token_at(source_file.start(node))
+                if index is None or source_file.tokens[index].string != "except":
+                    continue
+                end = source_file.offset(*source_file.tokens[index].end)
+                changes.append(Change(end, end, " Exception", self.name,
+                                      f"line {node.lineno}: bare except"))
+        return changes
+
+
+class ResourceIssueFinder(Fixer):
+    """Reports open() calls outside a with statement; these are left for manual fixing."""
+    name = "resource_issues"
+
+    def summary(self, count: int) -> str:
+        return f"Found {count} resource issues (manual fixing required)"
+
+    def find(self, source_file: SourceFile) -> List[Change]:
+        with_calls = set()
+        for node in ast.walk(source_file.tree):
+            if isinstance(node, (ast.With, ast.AsyncWith)):
+                with_calls.update(id(item.context_expr) for item in node.items)
+        changes = []
+        for node in ast.walk(source_file.tree):
+            if isinstance(node, ast.Call) and id(node) not in with_calls and (
+                    (isinstance(node.func, ast.Name) and node.func.id in FILE_OPENERS) or
+                    (isinstance(node.func, ast.Attribute) and node.func.attr in FILE_OPENERS)):
+                start = source_file.offset(*source_file.start(node))
+                end = source_file.offset(*source_file.end(node))
+                changes.append(Change(start, end, None, self.name,
+                                      f"line {node.lineno}: open() outside a with statement"))
+        return changes
+
+
+FIXERS = {
+    UnusedImportFixer.name: UnusedImportFixer,
+    BareExceptFixer.name: BareExceptFixer,
+    ResourceIssueFinder.name: ResourceIssueFinder,
+}
+
+
+def merge_changes(changes: Iterable[Change]) -> Tuple[List[Change], List[Change]]:
+    """
+    Order changes by position and drop overlapping ones.
+
+    Returns the accepted edits and the conflicting ones. Insertions at the
+    same offset are all kept, in fixer order.
+    """
+    accepted, conflicts, last_end = [], [], 0
+    for change in sorted((c for c in changes if c.replacement is not None), key=lambda c: (c.start, c.end)):
+        if change.start < last_end:
+            conflicts.append(change)
+            continue
+        accepted.append(change)
+        last_end = max(last_end, change.end)
+    return accepted, conflicts
+
+
+def apply_changes(source: str, changes: List[Change]) -> str:
+    """Splice ordered, non-overlapping changes into the source."""
+    pieces, last = [], 0
+    for change in changes:
+        pieces.append(source[last:change.start])
+        pieces.append(change.replacement)
+        last = change.end
+    pieces.append(source[last:])
+    return "".join(pieces)
+
+
+def fix_source(source: str, fixers: List[Fixer], path: Optional[str] = None
+               ) -> Tuple[str, List[Change], List[Change]]:
+    """
+    Run every fixer over one parse of the source.
+
+    Returns the new source, all changes found (including report-only ones)
+    and the conflicting changes that were not applied.
+    """
+    source_file = SourceFile(source, path)
+    changes = [change for fixer in fixers for change in fixer.find(source_file)]
+    accepted, conflicts = merge_changes(changes)
+    new_source = apply_changes(source, accepted)
+    if accepted:
+        ast.parse(new_source, path or "<unknown>")
+    conflicted = set(conflicts)
+    return new_source, [c for c in changes if c not in conflicted], conflicts
+
+
+def write_atomic(file_path: str, content: str) -> None:
+    """Replace a file's content without ever leaving it half-written."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(file_path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+        shutil.copymode(file_path, tmp_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def fix_file(file_path: str, fixers: List[Fixer], dry_run: bool = True) -> Dict[str, object]:
+    """
+    Fix one file.
+
+    Returns {'file', 'counts', 'messages', 'conflicts', 'changed', 'diff',
+    'error'}; counts are by fixer name and the diff is only produced for dry runs.
+    """
+    result = {"file": file_path, "counts": {}, "messages": [], "conflicts": 0,
+              "changed": False, "diff": None, "error": None}
+    try:
+        with open(file_path, "r", encoding="utf-8", newline="") as f:
+            source = f.read()
+        new_source, changes, conflicts = fix_source(source, fixers, file_path)
+    except (OSError, UnicodeDecodeError, SyntaxError, ValueError, tokenize.TokenError) as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+
+    for change in changes:
+        result["counts"][change.fixer] = result["counts"].get(change.fixer, 0) + 1
+        result["messages"].append(change.message)
+    result["conflicts"] = len(conflicts)
+    result["changed"] = new_source != source
+    if result["changed"]:
+        if dry_run:
+            result["diff"] = "".join(difflib.unified_diff(
+                source.splitlines(keepends=True), new_source.splitlines(keepends=True),
+                fromfile=file_path, tofile=file_path))
+        else:
+            write_atomic(file_path, new_source)
+    return result
+
+
+_worker_fixers = None
+
+
+def _init_worker(fixers: List[Fixer]) -> None:
+    # Fixers are sent to each worker once rather than with every chunk
+    global _worker_fixers
+    _worker_fixers = fixers
+
+
+def _fix_chunk(file_paths: List[str], dry_run: bool) -> List[Dict[str, object]]:
+    return [fix_file(file_path, _worker_fixers, dry_run) for file_path in file_paths]
+
+
+def fix_files(file_paths: Iterable[str], fixers: List[Fixer], dry_run: bool = True,
+              max_workers: Optional[int] = None) -> Iterator[Dict[str, object]]:
+    """Fix many files, on a process pool for large batches; results are yielded in input order."""
+    file_paths = list(file_paths)
+    chunks = [file_paths[i:i + CHUNK_SIZE] for i in range(0, len(file_paths), CHUNK_SIZE)]
+
+    if max_workers == 1 or len(file_paths) < PARALLEL_THRESHOLD:
+        _init_worker(fixers)
+        for chunk in chunks:
+            yield from _fix_chunk(chunk, dry_run)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(fixers,)) as executor:
+        for chunk_results in executor.map(_fix_chunk, chunks, [dry_run] * len(chunks)):
+            yield from chunk_results
+
+
+def find_python_files(directory: str) -> List[str]:
+    """All Python files under directory."""
+    python_files = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        python_files.extend(os.path.join(root, f) for f in files if f.endswith(".py"))
+    return python_files
+
+
+def main():
+    """Main entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Apply formatting-preserving fixes to Python files")
+    parser.add_argument("paths", nargs="*", default=["."], help="Files or directories to fix")
+    parser.add_argument("--fixers", default=",".join(FIXERS), help="Comma-separated fixers to run")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes")
+    parser.add_argument("--diff", action="store_true", help="Print diffs in dry runs")
+    parser.add_argument("--apply", action="store_true", help="Write the changes (default: dry run)")
+    args = parser.parse_args()
+
+    fixers = [FIXERS[name.strip()]() for name in args.fixers.split(",") if name.strip()]
+    file_paths = []
+    for path in args.paths:
+        file_paths.extend(find_python_files(path) if os.path.isdir(path) else [path])
+
+    changed = 0
+    for result in fix_files(file_paths, fixers, dry_run=not args.apply, max_workers=args.workers):
+        if result["error"]:
+            print(f"❌ {result['file']}: {result['error']}")
+            continue
+        if result["changed"]:
+            changed += 1
+        if args.diff and result["diff"]:
+            print(result["diff"], end="")
+    print(f"{'Changed' if args.apply else 'Would change'} {changed} of {len(file_paths)} files")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,579 @@
+#!/usr/bin/env python
+"""
+Defer Imports
+
+This module moves expensive top-level imports out of the import path of a module:
+- Measures what each top-level import costs with `-X importtime`
+- Finds, through the AST, which functions use each imported name
+- Moves imports used only inside functions into those functions, or binds
+  them to a lazy module proxy when many functions use them
+- Verifies the result: the module still imports, exposes the same names and
+  imports faster, and an optional test command still passes; otherwise the
+  original file is restored
+"""
+import ast
+import difflib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# Imports cheaper than this are left where they are
+MIN_COST_MS = 5.0
+
+# Above this many using functions a plain `import x` becomes a lazy proxy
+MAX_LOCAL_SITES = 3
+
+# Seconds a measurement subprocess may take
+MEASURE_TIMEOUT = 60
+
+# Interpreter runs per measurement; the fastest one is kept
+REPEAT = 3
+
+IMPORTTIME_MARKER = "--- import under test ---"
+
+# Runs one import statement and nothing else
+_STATEMENT_WORKER = (
+    "import sys\n"
+    f"sys.stderr.write({IMPORTTIME_MARKER!r} + '\\n')\n"
+    "sys.stderr.flush()\n"
+    "exec(sys.argv[1])\n"
+)
+
+# Imports a module and reports the names it defines
+_MODULE_WORKER = (
+    "import json, sys\n"
+    "sys.path[:0] = json.loads(sys.argv[1])\n"
+    f"sys.stderr.write({IMPORTTIME_MARKER!r} + '\\n')\n"
+    "sys.stderr.flush()\n"
+    "__import__(sys.argv[2])\n"
+    "names = vars(sys.modules[sys.argv[2]])\n"
+    "print(json.dumps(sorted(n for n in names if not (n.startswith('__') and n.endswith('__')))))\n"
+)
+
+LAZY_HELPER = '''
+
+def _lazy_module(name):
+    """Return module name, executing it on first attribute access."""
+    import importlib.util
+    import sys
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+'''
+
+
+def importtime_cost(stderr: str, name: Optional[str] = None) -> int:
+    """
+    Microseconds spent importing, from `-X importtime` output.
+
+    With a name, the cumulative time of that module; otherwise the sum over
+    the top-level imports made after the marker line.
+    """
+    lines = stderr.split(IMPORTTIME_MARKER, 1)[-1].splitlines()
+    total = 0
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        module = fields[2].lstrip(" ")
+        if name is not None:
+            if module == name:
+                total = int(fields[1])
+        elif len(fields[2]) - len(module) == 1:
+            total += int(fields[1])
+    return total
+
+
+def import_text(node: ast.stmt, alias: ast.alias) -> str:
+    """The import statement that binds just one alias of node."""
+    name = alias.name + (f" as {alias.asname}" if alias.asname else "")
+    if isinstance(node, ast.Import):
+        return f"import {name}"
+    return f"from {'.' * node.level}{node.module or ''} import {name}"
+
+
+def bound_name(alias: ast.alias) -> str:
+    """The name an import alias binds in the importing namespace."""
+    return alias.asname or alias.name.split(".")[0]
+
+
+class _UsageVisitor(ast.NodeVisitor):
+    """
+    Records where each of a set of names is read.
+
+    Reads inside a function body are attributed to the innermost enclosing
+    function; everything that runs at import time (module and class bodies,
+    decorators, defaults, annotations) counts as a module-level use. Names
+    that are rebound, shadowed or declared global anywhere are unsafe to move.
+    """
+
+    def __init__(self, names: Set[str]):
+        self.names = names
+        self.functions = []
+        self.module_uses = set()
+        self.function_uses = {}
+        self.unsafe = set()
+
+    def _use(self, name: str) -> None:
+        if self.functions:
+            self.function_uses.setdefault(name, []).append(self.functions[-1])
+        else:
+            self.module_uses.add(name)
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if node.id in self.names:
+            if isinstance(node.ctx, ast.Load):
+                self._use(node.id)
+            else:
+                self.unsafe.add(node.id)
+
+    def _visit_function(self, node) -> None:
+        for decorator in node.decorator_list:
+            self.visit(decorator)
+        args = node.args
+        for default in args.defaults + [d for d in args.kw_defaults if d is not None]:
+            self.visit(default)
+        for arg in args.posonlyargs + args.args + args.kwonlyargs + [args.vararg, args.kwarg]:
+            if arg is None:
+                continue
+            if arg.arg in self.names:
+                self.unsafe.add(arg.arg)
+            if arg.annotation is not None:
+                self.visit(arg.annotation)
+        if node.returns is not None:
+            self.visit(node.returns)
+        self.functions.append(node)
+        for statement in node.body:
+            self.visit(statement)
+        self.functions.pop()
+
+    def visit_Lambda(self, node: ast.Lambda) -> None:
+        for arg in node.args.posonlyargs + node.args.args + node.args.kwonlyargs:
+            if arg.arg in self.names:
+                self.unsafe.add(arg.arg)
+        self.generic_visit(node)
+
+    def _visit_binding(self, node) -> None:
+        for name in node.names:
+            if name in self.names:
+                self.unsafe.add(name)
+
+    visit_Global = _visit_binding
+    visit_Nonlocal = _visit_binding
+
+    def _visit_import(self, node) -> None:
+        for alias in node.names:
+            if bound_name(alias) in self.names:
+                self.unsafe.add(bound_name(alias))
+
+    visit_Import = _visit_import
+    visit_ImportFrom = _visit_import
+
+    def _visit_definition(self, node) -> None:
+        if node.name in self.names:
+            self.unsafe.add(node.name)
+        if isinstance(node, ast.ClassDef):
+            self.generic_visit(node)
+        else:
+            self._visit_function(node)
+
+    visit_FunctionDef = _visit_definition
+    visit_AsyncFunctionDef = _visit_definition
+    visit_ClassDef = _visit_definition
+
+    def visit_ExceptHandler(self, node: ast.ExceptHandler) -> None:
+        if node.name in self.names:
+            self.unsafe.add(node.name)
+        self.generic_visit(node)
+
+
+def _first_line(node: ast.stmt) -> int:
+    """First source line of a statement, decorators included."""
+    return min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+
+
+def _whole_lines(node: ast.stmt, lines: List[str]) -> bool:
+    """True if no other statement shares the lines of node."""
+    before = lines[node.lineno - 1][:node.col_offset]
+    after = lines[node.end_lineno - 1][node.end_col_offset:].strip()
+    return not before.strip() and (not after or after.startswith("#"))
+
+
+def plan_module(source: str, min_cost_ms: float = MIN_COST_MS, costs: Optional[Dict[str, float]] = None,
+                max_local_sites: int = MAX_LOCAL_SITES) -> Dict[str, Any]:
+    """
+    Decide which top-level imports of a module to defer.
+
+    costs maps import statements (as produced by import_text) to their
+    measured cost in milliseconds; statements without a measurement are
+    kept. Returns {'deferred': [{'name', 'statement', 'cost_ms', 'mode',
+    'functions'}], 'skipped': {statement: reason}}.
+    """
+    tree = ast.parse(source)
+    lines = source.splitlines()
+    costs = costs or {}
+
+    exported = set()
+    candidates = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "__all__" for t in node.targets):
+            if isinstance(node.value, (ast.List, ast.Tuple)):
+                exported.update(e.value for e in node.value.elts if isinstance(e, ast.Constant))
+        if not isinstance(node, (ast.Import, ast.ImportFrom)):
+            continue
+        if isinstance(node, ast.ImportFrom) and node.module == "__future__":
+            continue
+        for alias in node.names:
+            if alias.name == "*":
+                continue
+            candidates.setdefault(bound_name(alias), []).append((node, alias))
+
+    usage = _UsageVisitor(set(candidates))
+    for node in tree.body:
+        if not isinstance(node, (ast.Import, ast.ImportFrom)):
+            usage.visit(node)
+
+    deferred, skipped = [], {}
+    for name, bindings in sorted(candidates.items()):
+        node, alias = bindings[0]
+        statement = import_text(node, alias)
+        cost_ms = costs.get(statement)
+        reason = None
+        if len(bindings) > 1:
+            reason = "bound more than once"
+        elif name in usage.unsafe:
+            reason = "rebound or shadowed"
+        elif name in exported:
+            reason = "listed in __all__"
+        elif name in usage.module_uses:
+            reason = "used at import time"
+        elif name not in usage.function_uses:
+            # Possibly a re-export or an import kept for its side effects
+            reason = "not used in this module"
+        elif not _whole_lines(node, lines):
+            reason = "shares a line with another statement"
+        elif cost_ms is None:
+            reason = "cost not measured"
+        elif cost_ms < min_cost_ms:
+            reason = f"cheap ({cost_ms:.1f}ms)"
+        if reason is not None:
+            skipped[statement] = reason
+            continue
+
+        functions = {id(f): f for f in usage.function_uses.get(name, [])}
+        functions = sorted(functions.values(), key=lambda f: f.lineno)
+        proxy = (isinstance(node, ast.Import) and "." not in alias.name and len(functions) > max_local_sites)
+        if not proxy and any(f.body[0].lineno == f.lineno for f in functions):
+            skipped[statement] = "used in a one-line function"
+            continue
+        deferred.append({
+            "name": name,
+            "statement": statement,
+            "cost_ms": cost_ms,
+            "mode": "proxy" if proxy else "local",
+            "functions": [f.name for f in functions],
+            "_node": node,
+            "_alias": alias,
+            "_targets": functions,
+        })
+    return {"deferred": deferred, "skipped": skipped}
+
+
+def apply_plan(source: str, plan: Dict[str, Any]) -> str:
+    """Rewrite source according to a plan from plan_module."""
+    if not plan["deferred"]:
+        return source
+    lines = source.splitlines(keepends=True)
+    if lines and not lines[-1].endswith("\n"):
+        lines[-1] += "\n"
+
+    # line index -> replacement text for the import statement starting there
+    replacements = {}
+    inserts = {}
+    by_statement = {}
+    for item in plan["deferred"]:
+        by_statement.setdefault(id(item["_node"]), (item["_node"], []))[1].append(item)
+
+    for node, items in by_statement.values():
+        moved = {id(item["_alias"]) for item in items}
+        kept = [alias for alias in node.names if id(alias) not in moved]
+        text = ""
+        if kept:
+            names = ", ".join(a.name + (f" as {a.asname}" if a.asname else "") for a in kept)
+            if isinstance(node, ast.Import):
+                text = f"import {names}\n"
+            else:
+                text = f"from {'.' * node.level}{node.module or ''} import {names}\n"
+        for item in items:
+            if item["mode"] == "proxy":
+                text += f"{item['name']} = _lazy_module({item['_alias'].name!r})\n"
+        replacements[node.lineno - 1] = (node.end_lineno, text)
+
+        for item in items:
+            if item["mode"] != "local":
+                continue
+            for function in item["_targets"]:
+                body = function.body
+                first = body[1] if (len(body) > 1 and isinstance(body[0], ast.Expr)
+                                    and isinstance(body[0].value, ast.Constant)
+                                    and isinstance(body[0].value.value, str)) else body[0]
+                line = _first_line(first) - 1
+                indent = lines[line][:len(lines[line]) - len(lines[line].lstrip())]
+                inserts.setdefault(line, []).append(indent + item["statement"] + "\n")
+
+    if any(item["mode"] == "proxy" for item in plan["deferred"]):
+        first_proxy = min(item["_node"].lineno - 1 for item in plan["deferred"] if item["mode"] == "proxy")
+        inserts.setdefault(first_proxy, []).insert(0, LAZY_HELPER)
+
+    output = []
+    i = 0
+    while i < len(lines):
+        for text in sorted(set(inserts.get(i, [])), key=inserts.get(i, []).index):
+            output.append(text)
+        if i in replacements:
+            end, text = replacements[i]
+            output.append(text)
+            i = end
+            continue
+        output.append(lines[i])
+        i += 1
+    return "".join(output)
+
+
+def module_location(file_path: str) -> Tuple[str, List[str]]:
+    """The dotted name a file is imported as, and the sys.path entries it needs."""
+    file_path = os.path.abspath(file_path)
+    directory, filename = os.path.split(file_path)
+    parts = [os.path.splitext(filename)[0]]
+    while os.path.exists(os.path.join(directory, "__init__.py")):
+        directory, package = os.path.split(directory)
+        parts.insert(0, package)
+    if parts[-1] == "__init__":
+        parts.pop()
+    return ".".join(parts), [directory, os.path.dirname(file_path)]
+
+
+def _run(args: List[str], cwd: Optional[str] = None, timeout: float = MEASURE_TIMEOUT) -> subprocess.CompletedProcess:
+    return subprocess.run(args, capture_output=True, text=True, timeout=timeout, cwd=cwd)
+
+
+def measure_statement(statement: str, cwd: Optional[str] = None, repeat: int = REPEAT) -> Optional[float]:
+    """Milliseconds a fresh interpreter spends on one absolute import statement, or None if it fails."""
+    best = None
+    for _ in range(repeat):
+        try:
+            result = _run([sys.executable, "-X", "importtime", "-c", _STATEMENT_WORKER, statement], cwd=cwd)
+        except subprocess.TimeoutExpired:
+            return None
+        if result.returncode != 0:
+            return None
+        cost = importtime_cost(result.stderr) / 1000
+        best = cost if best is None else min(best, cost)
+    return best
+
+
+def probe_module(file_path: str, repeat: int = REPEAT) -> Dict[str, Any]:
+    """Import a file's module in fresh interpreters: {'ok', 'error', 'ms', 'names'}."""
+    name, paths = module_location(file_path)
+    probe = {"ok": False, "error": None, "ms": None, "names": None}
+    for _ in range(repeat):
+        try:
+            result = _run([sys.executable, "-X", "importtime", "-c", _MODULE_WORKER, json.dumps(paths), name])
+        except subprocess.TimeoutExpired:
+            probe.update(ok=False, error="timed out")
+            return probe
+        if result.returncode != 0:
+            lines = result.stderr.strip().splitlines()
+            probe.update(ok=False, error=lines[-1] if lines else f"exit code {result.returncode}")
+            return probe
+        ms = importtime_cost(result.stderr, name) / 1000
+        probe.update(ok=True, ms=ms if probe["ms"] is None else min(probe["ms"], ms),
+                     names=set(json.loads(result.stdout.strip().splitlines()[-1])))
+    return probe
+
+
+def run_test_command(command: str, cwd: str) -> bool:
+    """True if the shell command exits successfully."""
+    return subprocess.run(command, shell=True, cwd=cwd, capture_output=True).returncode == 0
+
+
+def write_atomic(file_path: str, content: str) -> None:
+    """Replace a file's content without ever leaving it half-written."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(file_path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+        shutil.copymode(file_path, tmp_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ImportDeferrer:
+    """Plans, applies and verifies deferred imports for a set of files."""
+
+    def __init__(self, root_dir: Optional[str] = None, min_cost_ms: float = MIN_COST_MS,
+                 max_local_sites: int = MAX_LOCAL_SITES, repeat: int = REPEAT, max_workers: int = 4):
+        self.root_dir = os.path.abspath(root_dir or os.getcwd())
+        self.min_cost_ms = min_cost_ms
+        self.max_local_sites = max_local_sites
+        self.repeat = repeat
+        self.max_workers = max_workers
+        # Import statement -> measured milliseconds, shared across files
+        self.costs = {}
+
+    def measure(self, statements: List[str]) -> None:
+        """Measure the statements that have not been measured yet, in parallel."""
+        pending = sorted({s for s in statements if s not in self.costs and not s.startswith("from .")})
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for statement, cost in zip(pending, executor.map(
+                    lambda s: measure_statement(s, self.root_dir, self.repeat), pending)):
+                self.costs[statement] = cost
+
+    def plan(self, file_path: str) -> Tuple[str, Dict[str, Any]]:
+        """The file's source and its plan, measuring its top-level imports first."""
+        with open(file_path, "r", encoding="utf-8") as f:
+            source = f.read()
+        tree = ast.parse(source, filename=file_path)
+        self.measure([import_text(node, alias) for node in tree.body
+                      if isinstance(node, (ast.Import, ast.ImportFrom))
+                      for alias in node.names if alias.name != "*"])
+        costs = {s: c for s, c in self.costs.items() if c is not None}
+        return source, plan_module(source, self.min_cost_ms, costs, self.max_local_sites)
+
+    def optimize(self, file_path: str, apply: bool = False, test_command: Optional[str] = None,
+                 force: bool = False) -> Dict[str, Any]:
+        """
+        Defer the expensive imports of one file.
+
+        Without apply, only the plan and a diff are returned. With apply, the
+        file is rewritten and kept only if verification passes; force keeps
+        it when the module could not be imported before the change either.
+        """
+        report = {"file": file_path, "deferred": [], "skipped": {}, "diff": "",
+                  "before_ms": None, "after_ms": None, "status": "unchanged"}
+        try:
+            source, plan = self.plan(file_path)
+        except (OSError, SyntaxError, UnicodeDecodeError) as e:
+            report["status"] = f"error: {type(e).__name__}: {e}"
+            return report
+        report["deferred"] = [{k: v for k, v in item.items() if not k.startswith("_")} for item in plan["deferred"]]
+        report["skipped"] = plan["skipped"]
+        if not plan["deferred"]:
+            return report
+
+        new_source = apply_plan(source, plan)
+        compile(new_source, file_path, "exec")
+        report["diff"] = "".join(difflib.unified_diff(
+            source.splitlines(keepends=True), new_source.splitlines(keepends=True),
+            fromfile=file_path, tofile=file_path))
+        if not apply:
+            report["status"] = "planned"
+            return report
+
+        before = probe_module(file_path, self.repeat)
+        tests_before = run_test_command(test_command, self.root_dir) if test_command else None
+        write_atomic(file_path, new_source)
+        after = probe_module(file_path, self.repeat)
+        report["before_ms"], report["after_ms"] = before["ms"], after["ms"]
+
+        problem = None
+        if not before["ok"]:
+            if not force:
+                problem = f"cannot verify, module does not import: {before['error']}"
+        elif not after["ok"]:
+            problem = f"module no longer imports: {after['error']}"
+        else:
+            # Only names moved into the functions that use them may disappear,
+            # and only the lazy helper may appear
+            moved = {item["name"] for item in plan["deferred"] if item["mode"] == "local" and item["functions"]}
+            added = {"_lazy_module"} if any(item["mode"] == "proxy" for item in plan["deferred"]) else set()
+            removed = before["names"] - after["names"]
+            if removed != moved or after["names"] - before["names"] != added:
+                changed = (removed ^ moved) | ((after["names"] - before["names"]) ^ added)
+                problem = f"module namespace changed: {sorted(changed)}"
+            elif after["ms"] >= before["ms"]:
+                problem = f"no startup gain ({before['ms']:.1f}ms -> {after['ms']:.1f}ms)"
+        if problem is None and tests_before and not run_test_command(test_command, self.root_dir):
+            problem = "test command fails after the change"
+
+        if problem is not None:
+            write_atomic(file_path, source)
+            report["status"] = f"reverted: {problem}"
+        else:
+            report["status"] = "applied" if before["ok"] else "applied (unverified)"
+        return report
+
+
+def find_python_files(paths: List[str]) -> List[str]:
+    """Python files in paths, walking directories."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs[:] = [d for d in dirs if d not in ("__pycache__", ".git")]
+                files.extend(os.path.join(root, n) for n in sorted(names) if n.endswith(".py"))
+        else:
+            files.append(path)
+    return files
+
+
+def main():
+    """Main entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Defer expensive top-level imports")
+    parser.add_argument("paths", nargs="+", help="Files or directories to optimize")
+    parser.add_argument("--apply", action="store_true", help="Rewrite files and verify them (default: show the plan)")
+    parser.add_argument("--min-ms", type=float, default=MIN_COST_MS, help="Smallest import cost worth deferring")
+    parser.add_argument("--max-local-sites", type=int, default=MAX_LOCAL_SITES,
+                        help="Using functions above which a lazy proxy is used instead")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="Measurement runs per import")
+    parser.add_argument("--test", dest="test_command", help="Shell command that must keep passing")
+    parser.add_argument("--force", action="store_true", help="Keep changes to modules that cannot be imported here")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel measurements")
+    args = parser.parse_args()
+
+    deferrer = ImportDeferrer(min_cost_ms=args.min_ms, max_local_sites=args.max_local_sites,
+                              repeat=args.repeat, max_workers=args.workers)
+    saved = 0.0
+    for file_path in find_python_files(args.paths):
+        report = deferrer.optimize(file_path, apply=args.apply, test_command=args.test_command, force=args.force)
+        if not report["deferred"] and report["status"] == "unchanged":
+            continue
+        print(f"\n📄 {file_path}: {report['status']}")
+        for item in report["deferred"]:
+            print(f"  - {item['statement']} ({item['cost_ms']:.1f}ms) -> {item['mode']} "
+                  f"in {', '.join(item['functions']) or 'no functions'}")
+        if report["before_ms"] is not None and report["after_ms"] is not None:
+            print(f"  import time: {report['before_ms']:.1f}ms -> {report['after_ms']:.1f}ms")
+            if report["status"].startswith("applied"):
+                saved += report["before_ms"] - report["after_ms"]
+        if not args.apply and report["diff"]:
+            print(report["diff"], end="")
+
+    if args.apply:
+        print(f"\n✅ Saved {saved:.1f}ms of import time")
+
+
+if __name__ == "__main__":
+    main()
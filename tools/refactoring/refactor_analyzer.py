@@ -13,29 +13,313 @@ Part of a 3-file refactoring system:
 2. refactor_splitter.py - Breaks down complex files and functions
 3. refactor_builder.py - Rebuilds optimized files from components
 """
-# Fix imports for reorganized codebase
-import utils.import_utils
-
-
-# Fix imports for reorganized codebase
-
-
-
 import os
 import sys
 import ast
+from array import array
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 
 # Add project root to path for imports
 project_root = os.path.dirname(os.path.abspath(__file__))
 if project_root not in sys.path:
     sys.path.append(project_root)
 
-# Import utility functions
+# Fix imports for reorganized codebase; nothing below depends on it
+try:
+    import utils.import_utils
+except ImportError:
+    pass
+
+# Trees are shared with the other analysis tools through the parse-once cache
 try:
-except ImportError as e:
-    print(f"Error importing utilities: {e}")
-    print("Make sure you've run the reorganization scripts first.")
-    sys.exit(1)
+    from core.ast.analysis_cache import get_analysis_cache
+except ImportError:
+    # Run without the project on sys.path: read and parse files directly
+    get_analysis_cache = None
+
+# Below this many files the pool startup costs more than it saves
+PARALLEL_THRESHOLD = 32
+# Files per worker task
+CHUNK_SIZE = 64
+
+FILE_OPENERS = ("open", "file")
+BRANCH_NODES = (ast.If, ast.For, ast.While, ast.Try, ast.ExceptHandler)
+
+
+def _is_open_call(node):
+    return (isinstance(node.func, ast.Name) and node.func.id in FILE_OPENERS) or \
+           (isinstance(node.func, ast.Attribute) and node.func.attr in FILE_OPENERS)
+
+
+def _has_decorator(node, name):
+    return any(isinstance(d, ast.Name) and d.id == name for d in node.decorator_list)
+
+
+class FileFactsVisitor(ast.NodeVisitor):
+    """
+    Collects every per-file fact the analyzer reports in one traversal.
+
+    Function-level facts (complexity, calls) are charged to every enclosing
+    function, matching a walk of each function's subtree.
+    """
+    
+    def __init__(self):
+        self.loc = 0
+        self.functions = 0
+        self.classes = 0
+        self.imports = []
+        self.import_statements = 0
+        self.complexity = 1
+        self.used_names = set()
+        self.open_calls = []
+        self.with_ranges = []
+        self.bare_excepts = []
+        self.function_records = []
+        self.class_structure = []
+        self._open_functions = []
+    
+    def visit(self, node):
+        end_lineno = getattr(node, 'end_lineno', None)
+        if end_lineno and end_lineno > self.loc:
+            self.loc = end_lineno
+        if isinstance(node, BRANCH_NODES) or (isinstance(node, ast.BoolOp) and isinstance(node.op, ast.And)):
+            weight = len(node.values) - 1 if isinstance(node, ast.BoolOp) else 1
+            self.complexity += weight
+            for record in self._open_functions:
+                record["complexity"] += weight
+        super().visit(node)
+    
+    def visit_FunctionDef(self, node):
+        self.functions += 1
+        record = {
+            "node": node,
+            "name": node.name,
+            "lineno": node.lineno,
+            "complexity": 1,
+            "called_names": set()
+        }
+        self.function_records.append(record)
+        self._open_functions.append(record)
+        self.generic_visit(node)
+        self._open_functions.pop()
+    
+    def visit_ClassDef(self, node):
+        self.classes += 1
+        methods = []
+        attributes = []
+        for child in node.body:
+            if isinstance(child, ast.FunctionDef):
+                methods.append({
+                    "name": child.name,
+                    "lineno": child.lineno,
+                    "is_property": _has_decorator(child, 'property'),
+                    "is_staticmethod": _has_decorator(child, 'staticmethod'),
+                    "is_classmethod": _has_decorator(child, 'classmethod')
+                })
+            elif isinstance(child, ast.Assign):
+                for target in child.targets:
+                    if isinstance(target, ast.Name):
+                        attributes.append({"name": target.id, "lineno": child.lineno})
+        self.class_structure.append({
+            "name": node.name,
+            "lineno": node.lineno,
+            "bases": [base.id if isinstance(base, ast.Name) else ast.unparse(base)
+                     for base in node.bases],
+            "methods": methods,
+            "attributes": attributes,
+            "docstring": ast.get_docstring(node) or ""
+        })
+        self.generic_visit(node)
+    
+    def visit_Import(self, node):
+        self.import_statements += 1
+        for name in node.names:
+            self.imports.append({
+                "name": name.name,
+                "alias": name.asname or name.name,
+                "lineno": node.lineno
+            })
+    
+    def visit_ImportFrom(self, node):
+        self.import_statements += 1
+        module = node.module or ""
+        for name in node.names:
+            self.imports.append({
+                "name": f"{module}.{name.name}" if module else name.name,
+                "alias": name.asname or name.name,
+                "lineno": node.lineno
+            })
+    
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Load):
+            self.used_names.add(node.id)
+    
+    def visit_Call(self, node):
+        if _is_open_call(node):
+            self.open_calls.append(node.lineno)
+        if isinstance(node.func, ast.Name):
+            for record in self._open_functions:
+                record["called_names"].add(node.func.id)
+        self.generic_visit(node)
+    
+    def visit_With(self, node):
+        for item in node.items:
+            if isinstance(item.context_expr, ast.Call) and _is_open_call(item.context_expr):
+                self.with_ranges.append((node.lineno, getattr(node, 'end_lineno', node.lineno)))
+        self.generic_visit(node)
+    
+    def visit_Try(self, node):
+        for handler in node.handlers:
+            if handler.type is None:
+                self.bare_excepts.append(handler.lineno)
+        self.generic_visit(node)
+    
+    def results(self):
+        """The collected facts as plain data."""
+        complex_functions = []
+        for record in self.function_records:
+            node = record["node"]
+            if getattr(node, 'end_lineno', None) is not None:
+                lines = node.end_lineno - node.lineno
+            else:
+                lines = len(ast.unparse(node).splitlines())
+            params = len(node.args.args)
+            has_nested = any(isinstance(child, (ast.FunctionDef, ast.ClassDef)) for child in node.body)
+            
+            reasons = []
+            if lines > 50:
+                reasons.append(f"long function ({lines} lines)")
+            if record["complexity"] > 10:
+                reasons.append(f"high complexity ({record['complexity']})")
+            if params > 5:
+                reasons.append(f"many parameters ({params})")
+            if has_nested:
+                reasons.append("contains nested functions/classes")
+            
+            if reasons:
+                complex_functions.append({
+                    "name": node.name,
+                    "lineno": node.lineno,
+                    "end_lineno": getattr(node, 'end_lineno', node.lineno + lines),
+                    "lines": lines,
+                    "complexity": record["complexity"],
+                    "params": params,
+                    "has_nested": has_nested,
+                    "reasons": reasons,
+                    "docstring": ast.get_docstring(node) or "",
+                    "code": ast.unparse(node)
+                })
+        
+        # A later definition with the same name replaces an earlier one
+        defined = {record["name"]: record for record in self.function_records}
+        function_dependencies = {
+            name: {
+                "lineno": record["lineno"],
+                "calls": sorted(called for called in record["called_names"]
+                                if called in defined and called != name)
+            }
+            for name, record in defined.items()
+        }
+        
+        resource_issues = [
+            {"lineno": lineno} for lineno in self.open_calls
+            if not any(start <= lineno <= end for start, end in self.with_ranges)
+        ]
+        
+        return {
+            "metrics": {
+                "loc": self.loc,
+                "functions": self.functions,
+                "classes": self.classes,
+                "imports": self.import_statements,
+                "complexity": self.complexity
+            },
+            "complex_functions": complex_functions,
+            "unused_imports": [imp for imp in self.imports if imp["alias"] not in self.used_names],
+            "resource_issues": resource_issues,
+            "error_handling_issues": [{"type": "bare_except", "lineno": lineno} for lineno in self.bare_excepts],
+            "function_dependencies": function_dependencies,
+            "class_structure": self.class_structure
+        }
+
+
+class DependencyGraph:
+    """
+    File and function dependency graph stored in flat arrays.
+
+    Nodes are numbered; edges are kept in compressed rows (an offsets array
+    into one targets array), built once from all file analyses.
+    """
+    
+    FILE = 0
+    FUNCTION = 1
+    
+    def __init__(self):
+        self.nodes = []
+        self.index = {}
+        self.types = bytearray()
+        self.offsets = array('i', [0])
+        self.targets = array('i')
+    
+    def _node(self, name, node_type):
+        node_id = self.index.get(name)
+        if node_id is None:
+            node_id = self.index[name] = len(self.nodes)
+            self.nodes.append(name)
+            self.types.append(node_type)
+        return node_id
+    
+    @classmethod
+    def from_analyses(cls, analyses):
+        """Build the graph from analyze_file results."""
+        graph = cls()
+        edges = set()
+        for analysis in analyses:
+            file_node = analysis["rel_path"]
+            file_id = graph._node(file_node, cls.FILE)
+            for func_name, func_info in analysis["function_dependencies"].items():
+                func_id = graph._node(f"{file_node}::{func_name}", cls.FUNCTION)
+                edges.add((file_id, func_id))
+                for called_func in func_info["calls"]:
+                    edges.add((func_id, graph._node(f"{file_node}::{called_func}", cls.FUNCTION)))
+        
+        counts = [0] * len(graph.nodes)
+        for source, _ in edges:
+            counts[source] += 1
+        offsets = array('i', [0]) * (len(graph.nodes) + 1)
+        for node_id, count in enumerate(counts):
+            offsets[node_id + 1] = offsets[node_id] + count
+        targets = array('i', [0]) * len(edges)
+        fill = array('i', offsets[:-1])
+        for source, target in sorted(edges):
+            targets[fill[source]] = target
+            fill[source] += 1
+        graph.offsets, graph.targets = offsets, targets
+        return graph
+    
+    def __len__(self):
+        return len(self.nodes)
+    
+    def edge_count(self):
+        return len(self.targets)
+    
+    def node_type(self, name):
+        return self.types[self.index[name]]
+    
+    def successors(self, name):
+        node_id = self.index[name]
+        return [self.nodes[t] for t in self.targets[self.offsets[node_id]:self.offsets[node_id + 1]]]
+    
+    def nodes_of_type(self, node_type):
+        return [name for name, t in zip(self.nodes, self.types) if t == node_type]
+
+
+def _analyze_files(project_root, file_paths):
+    """Worker entry point: analyze a chunk of files into plain-data results."""
+    analyzer = CodeAnalyzer(project_root)
+    return [analyzer.analyze_file(file_path) for file_path in file_paths]
+
 
 class CodeAnalyzer:
     """Analyzes Python code for refactoring opportunities."""
@@ -45,7 +329,7 @@ class CodeAnalyzer:
         self.project_root = project_root
         self.file_cache = {}
         self.ast_cache = {}
-        self.dependency_graph = nx.DiGraph()
+        self.dependency_graph = DependencyGraph()
     
     def find_all_python_files(self, exclude_dirs=None):
         """Find all Python files in the project."""
@@ -69,8 +353,11 @@ class CodeAnalyzer:
             return self.file_cache[file_path]
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            if get_analysis_cache is None:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+            else:
+                content = get_analysis_cache().source(file_path)
             self.file_cache[file_path] = content
             return content
         except Exception as e:
@@ -78,16 +365,15 @@ class CodeAnalyzer:
             return None
     
     def get_ast(self, file_path):
-        """Get the AST for a file, using cache if available."""
+        """Get the AST for a file from the shared analysis cache (read-only)."""
         if file_path in self.ast_cache:
             return self.ast_cache[file_path]
         
-        content = self.get_file_content(file_path)
-        if content is None:
-            return None
-        
         try:
-            tree = ast.parse(content)
+            if get_analysis_cache is None:
+                tree = ast.parse(self.get_file_content(file_path), filename=file_path)
+            else:
+                tree = get_analysis_cache().tree(file_path)
             self.ast_cache[file_path] = tree
             return tree
         except Exception as e:
@@ -100,55 +386,45 @@ class CodeAnalyzer:
         if tree is None:
             return None
         
-        # Collect basic metrics
-        metrics = self._collect_metrics(tree)
-        
-        # Find complex functions
-        complex_functions = self._find_complex_functions(tree)
-        
-        # Find unused imports
-        unused_imports = self._find_unused_imports(tree)
-        
-        # Find resource management issues
-        resource_issues = self._find_resource_issues(tree)
-        
-        # Find error handling issues
-        error_handling_issues = self._find_error_handling_issues(tree)
-        
-        # Extract function dependencies
-        function_dependencies = self._extract_function_dependencies(tree)
-        
-        # Extract class structure
-        class_structure = self._extract_class_structure(tree)
+        # Every fact comes from a single traversal
+        visitor = FileFactsVisitor()
+        visitor.visit(tree)
         
         return {
             "file_path": file_path,
             "rel_path": os.path.relpath(file_path, self.project_root),
-            "metrics": metrics,
-            "complex_functions": complex_functions,
-            "unused_imports": unused_imports,
-            "resource_issues": resource_issues,
-            "error_handling_issues": error_handling_issues,
-            "function_dependencies": function_dependencies,
-            "class_structure": class_structure
+            **visitor.results()
         }
     
-    def analyze_codebase(self):
-        """Analyze the entire codebase."""
+    def analyze_codebase(self, max_workers=None):
+        """
+        Analyze the entire codebase.
+        
+        Files are analyzed on a process pool in chunks; workers return plain
+        data and the dependency graph is built once from all of it.
+        """
         python_files = self.find_all_python_files()
         print(f"Found {len(python_files)} Python files to analyze")
         
+        chunks = [python_files[i:i + CHUNK_SIZE] for i in range(0, len(python_files), CHUNK_SIZE)]
+        if max_workers == 1 or len(python_files) < PARALLEL_THRESHOLD:
+            chunk_results = (_analyze_files(self.project_root, chunk) for chunk in chunks)
+            executor = None
+        else:
+            executor = ProcessPoolExecutor(max_workers=max_workers)
+            chunk_results = executor.map(_analyze_files, [self.project_root] * len(chunks), chunks)
+        
         results = []
-        for i, file_path in enumerate(python_files):
-            if (i + 1) % 20 == 0 or i == len(python_files) - 1:
-                print(f"Analyzing file {i + 1}/{len(python_files)}: {os.path.relpath(file_path, self.project_root)}")
-            
-            result = self.analyze_file(file_path)
-            if result:
-                results.append(result)
-                
-                # Build dependency graph
-                self._update_dependency_graph(result)
+        try:
+            for done, chunk_result in enumerate(chunk_results, 1):
+                results.extend(result for result in chunk_result if result)
+                print(f"Analyzed {min(done * CHUNK_SIZE, len(python_files))}/{len(python_files)} files")
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        
+        # Build dependency graph
+        self.dependency_graph = DependencyGraph.from_analyses(results)
         
         # Analyze module dependencies
         module_dependencies = self._analyze_module_dependencies()
@@ -159,324 +435,24 @@ class CodeAnalyzer:
             "summary": self._generate_summary(results)
         }
     
-    def _collect_metrics(self, tree):
-        """Collect basic metrics from an AST."""
-        # Count lines of code
-        if hasattr(tree, 'end_lineno'):
-            loc = tree.end_lineno
-        else:
-            loc = len(ast.unparse(tree).splitlines())
-        
-        # Count functions, classes, and imports
-        functions = len([node for node in ast.walk(tree) if isinstance(node, ast.FunctionDef)])
-        classes = len([node for node in ast.walk(tree) if isinstance(node, ast.ClassDef)])
-        imports = len([node for node in ast.walk(tree) if isinstance(node, (ast.Import, ast.ImportFrom))])
-        
-        # Calculate complexity
-        complexity = self._calculate_complexity(tree)
-        
-        return {
-            "loc": loc,
-            "functions": functions,
-            "classes": classes,
-            "imports": imports,
-            "complexity": complexity
-        }
-    
-    def _calculate_complexity(self, node):
-        """Calculate cyclomatic complexity of an AST node."""
-        complexity = 1  # Base complexity
-        
-        # Count branches
-        for subnode in ast.walk(node):
-            if isinstance(subnode, (ast.If, ast.For, ast.While, ast.Try, ast.ExceptHandler)):
-                complexity += 1
-            elif isinstance(subnode, ast.BoolOp) and isinstance(subnode.op, ast.And):
-                complexity += len(subnode.values) - 1
-        
-        return complexity
-    
-    def _find_complex_functions(self, tree):
-        """Find complex functions in an AST."""
-        complex_functions = []
-        
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
-                # Calculate function size
-                if hasattr(node, 'end_lineno') and node.end_lineno is not None:
-                    lines = node.end_lineno - node.lineno
-                else:
-                    lines = len(ast.unparse(node).splitlines())
-                
-                # Calculate function complexity
-                complexity = self._calculate_complexity(node)
-                
-                # Check if function is complex
-                is_complex = False
-                complex_reasons = []
-                
-                if lines > 50:
-                    is_complex = True
-                    complex_reasons.append(f"long function ({lines} lines)")
-                
-                if complexity > 10:
-                    is_complex = True
-                    complex_reasons.append(f"high complexity ({complexity})")
-                
-                # Count parameters
-                params = len(node.args.args)
-                if params > 5:
-                    is_complex = True
-                    complex_reasons.append(f"many parameters ({params})")
-                
-                # Check for nested functions or classes
-                has_nested = False
-                for child in node.body:
-                    if isinstance(child, (ast.FunctionDef, ast.ClassDef)):
-                        has_nested = True
-                        break
-                
-                if has_nested:
-                    is_complex = True
-                    complex_reasons.append("contains nested functions/classes")
-                
-                if is_complex:
-                    complex_functions.append({
-                        "name": node.name,
-                        "lineno": node.lineno,
-                        "end_lineno": getattr(node, 'end_lineno', node.lineno + lines),
-                        "lines": lines,
-                        "complexity": complexity,
-                        "params": params,
-                        "has_nested": has_nested,
-                        "reasons": complex_reasons,
-                        "docstring": ast.get_docstring(node) or "",
-                        "code": ast.unparse(node)
-                    })
-        
-        return complex_functions
-    
-    def _find_unused_imports(self, tree):
-        """Find unused imports in an AST."""
-        # Collect all imports
-        imports = []
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
-                for name in node.names:
-                    imports.append({
-                        "name": name.name,
-                        "alias": name.asname or name.name,
-                        "lineno": node.lineno,
-                        "node": node
-                    })
-            elif isinstance(node, ast.ImportFrom):
-                module = node.module or ""
-                for name in node.names:
-                    imports.append({
-                        "name": f"{module}.{name.name}" if module else name.name,
-                        "alias": name.asname or name.name,
-                        "lineno": node.lineno,
-                        "node": node
-                    })
-        
-        # Collect all used names
-        used_names = set()
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
-                used_names.add(node.id)
-            elif isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
-                # This could be a module attribute access (e.g., os.path)
-                used_names.add(node.value.id)
-        
-        # Find unused imports
-        unused_imports = []
-        for imp in imports:
-            # Check if the import alias is used
-            if imp["alias"] not in used_names:
-                # Special case for import side effects (e.g., import sys)
-                if "." not in imp["name"]:
-                    # Check if any attribute of this module is used
-                    module_used = False
-                    for used in used_names:
-                        if used.startswith(imp["alias"] + "."):
-                            module_used = True
-                            break
-                    if module_used:
-                        continue
-                unused_imports.append(imp)
-        
-        return unused_imports
-    
-    def _find_resource_issues(self, tree):
-        """Find resource management issues in an AST."""
-        # Find file operations
-        file_ops = []
-        with_contexts = []
-        
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Call):
-                if (isinstance(node.func, ast.Name) and node.func.id in ["open", "file"]) or \
-                   (isinstance(node.func, ast.Attribute) and node.func.attr in ["open", "file"]):
-                    file_ops.append({
-                        "lineno": node.lineno,
-                        "node": node
-                    })
-            elif isinstance(node, ast.With):
-                for item in node.items:
-                    if isinstance(item.context_expr, ast.Call):
-                        call = item.context_expr
-                        if (isinstance(call.func, ast.Name) and call.func.id in ["open", "file"]) or \
-                           (isinstance(call.func, ast.Attribute) and call.func.attr in ["open", "file"]):
-                            with_contexts.append({
-                                "lineno": node.lineno,
-                                "end_lineno": getattr(node, 'end_lineno', node.lineno),
-                                "node": node
-                            })
-        
-        # Find file operations not in with contexts
-        resource_issues = []
-        for op in file_ops:
-            # Check if this operation is within a with context
-            in_with = False
-            for ctx in with_contexts:
-                if ctx["lineno"] <= op["lineno"] and ctx["end_lineno"] >= op["lineno"]:
-                    in_with = True
-                    break
-            if not in_with:
-                resource_issues.append(op)
-        
-        return resource_issues
-    
-    def _find_error_handling_issues(self, tree):
-        """Find error handling issues in an AST."""
-        error_handling_issues = []
-        
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Try):
-                for handler in node.handlers:
-                    if handler.type is None:
-                        # Bare except clause
-                        error_handling_issues.append({
-                            "type": "bare_except",
-                            "lineno": handler.lineno,
-                            "node": handler
-                        })
-        
-        return error_handling_issues
-    
-    def _extract_function_dependencies(self, tree):
-        """Extract function dependencies from an AST."""
-        # Collect all function definitions
-        functions = {}
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
-                functions[node.name] = {
-                    "node": node,
-                    "calls": set(),
-                    "lineno": node.lineno
-                }
-        
-        # Collect function calls
-        for func_name, func_info in functions.items():
-            for node in ast.walk(func_info["node"]):
-                if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
-                    called_func = node.func.id
-                    if called_func in functions and called_func != func_name:
-                        func_info["calls"].add(called_func)
-        
-        # Convert to serializable format
-        result = {}
-        for func_name, func_info in functions.items():
-            result[func_name] = {
-                "lineno": func_info["lineno"],
-                "calls": list(func_info["calls"])
-            }
-        
-        return result
-    
-    def _extract_class_structure(self, tree):
-        """Extract class structure from an AST."""
-        classes = []
-        
-        for node in ast.walk(tree):
-            if isinstance(node, ast.ClassDef):
-                methods = []
-                attributes = []
-                
-                for child in node.body:
-                    if isinstance(child, ast.FunctionDef):
-                        methods.append({
-                            "name": child.name,
-                            "lineno": child.lineno,
-                            "is_property": any(isinstance(d, ast.Name) and d.id == 'property' 
-                                              for d in child.decorator_list),
-                            "is_staticmethod": any(isinstance(d, ast.Name) and d.id == 'staticmethod' 
-                                                  for d in child.decorator_list),
-                            "is_classmethod": any(isinstance(d, ast.Name) and d.id == 'classmethod' 
-                                                 for d in child.decorator_list)
-                        })
-                    elif isinstance(child, ast.Assign):
-                        for target in child.targets:
-                            if isinstance(target, ast.Name):
-                                attributes.append({
-                                    "name": target.id,
-                                    "lineno": child.lineno
-                                })
-                
-                classes.append({
-                    "name": node.name,
-                    "lineno": node.lineno,
-                    "bases": [base.id if isinstance(base, ast.Name) else ast.unparse(base) 
-                             for base in node.bases],
-                    "methods": methods,
-                    "attributes": attributes,
-                    "docstring": ast.get_docstring(node) or ""
-                })
-        
-        return classes
-    
-    def _update_dependency_graph(self, file_analysis):
-        """Update the dependency graph with file analysis results."""
-        file_node = file_analysis["rel_path"]
-        
-        # Add file node
-        if not self.dependency_graph.has_node(file_node):
-            self.dependency_graph.add_node(file_node, type="file")
-        
-        # Add function nodes and dependencies
-        for func_name, func_info in file_analysis["function_dependencies"].items():
-            func_node = f"{file_node}::{func_name}"
-            if not self.dependency_graph.has_node(func_node):
-                self.dependency_graph.add_node(func_node, type="function")
-            
-            # Add edge from file to function
-            self.dependency_graph.add_edge(file_node, func_node)
-            
-            # Add function call dependencies
-            for called_func in func_info["calls"]:
-                called_node = f"{file_node}::{called_func}"
-                if not self.dependency_graph.has_node(called_node):
-                    self.dependency_graph.add_node(called_node, type="function")
-                
-                self.dependency_graph.add_edge(func_node, called_node)
-    
     def _analyze_module_dependencies(self):
         """Analyze module dependencies."""
+        graph = self.dependency_graph
+        
         # Group files by module
         modules = defaultdict(list)
-        for node in self.dependency_graph.nodes():
-            if self.dependency_graph.nodes[node].get("type") == "file":
-                module_path = os.path.dirname(node)
-                if not module_path:
-                    module_path = "root"
-                modules[module_path].append(node)
+        for node in graph.nodes_of_type(DependencyGraph.FILE):
+            module_path = os.path.dirname(node)
+            if not module_path:
+                module_path = "root"
+            modules[module_path].append(node)
         
         # Calculate module dependencies
         module_dependencies = defaultdict(set)
         for module, files in modules.items():
             for file in files:
-                for successor in self.dependency_graph.successors(file):
-                    if self.dependency_graph.nodes[successor].get("type") == "file":
+                for successor in graph.successors(file):
+                    if graph.node_type(successor) == DependencyGraph.FILE:
                         successor_module = os.path.dirname(successor)
                         if not successor_module:
                             successor_module = "root"
@@ -13,14 +13,6 @@ Part of a 3-file refactoring system:
 2. refactor_splitter.py - Breaks down complex files and functions
 3. refactor_builder.py - Rebuilds optimized files from components
 """
-# Fix imports for reorganized codebase
-import utils.import_utils
-
-
-# Fix imports for reorganized codebase
-
-
-
 import os
 import sys
 import ast
@@ -33,13 +25,21 @@ if project_root not in sys.path:
 
 # Import utility functions
 try:
-except ImportError as e:
-    print(f"Error importing utilities: {e}")
-    print("Make sure you've run the reorganization scripts first.")
-    sys.exit(1)
+    import utils.import_utils
+    from utils.path import ensure_dir
+except ImportError:
+    def ensure_dir(directory):
+        """Ensure a directory exists, creating it if necessary."""
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+# Fixes are applied as edits to the original source by the codemod engine
+from codemod import (BareExceptFixer, Change, ResourceIssueFinder, SourceFile, UnusedImportFixer,
+                     apply_changes, find_python_files, fix_file, fix_files, fix_source, merge_changes)
 
 # Import the analyzer
 try:
+    from refactor_analyzer import CodeAnalyzer
 except ImportError as e:
     print(f"Error importing CodeAnalyzer: {e}")
     print("Make sure refactor_analyzer.py is in the same directory.")
@@ -50,284 +50,21 @@ class ImportOptimizer:
     
     def __init__(self):
         """Initialize the import optimizer."""
-        self.standard_libs = set([
-            'abc', 'argparse', 'ast', 'asyncio', 'collections', 'contextlib', 'copy',
-            'datetime', 'enum', 'functools', 'glob', 'io', 'itertools', 'json',
-            'logging', 'math', 'os', 'pathlib', 'pickle', 're', 'shutil', 'sys',
-            'tempfile', 'time', 'traceback', 'typing', 'uuid', 'warnings'
-        ])
+        self.fixers = [UnusedImportFixer()]
     
     def optimize_imports(self, content):
-        """Optimize imports in a Python file."""
+        """
+        Remove unused imports from a Python file.
+        
+        Only the unused names are cut out of the source; the remaining
+        imports keep their order, grouping and comments.
+        """
         try:
-            # Parse the AST
-            tree = ast.parse(content)
-            
-            # Find all imports
-            imports = self._find_imports(tree)
-            
-            # Find all used names
-            used_names = self._find_used_names(tree)
-            
-            # Filter out unused imports
-            used_imports = self._filter_unused_imports(imports, used_names)
-            
-            # Group imports by type
-            grouped_imports = self._group_imports(used_imports)
-            
-            # Generate optimized import statements
-            import_statements = self._generate_import_statements(grouped_imports)
-            
-            # Replace imports in the original content
-            return self._replace_imports(content, tree, import_statements)
+            optimized, _, _ = fix_source(content, self.fixers)
+            return optimized
         except Exception as e:
             print(f"Error optimizing imports: {e}")
             return content
-    
-    def _find_imports(self, tree):
-        """Find all imports in an AST."""
-        imports = []
-        
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
-                for name in node.names:
-                    imports.append({
-                        "type": "import",
-                        "module": name.name,
-                        "name": name.asname or name.name,
-                        "asname": name.asname,
-                        "lineno": node.lineno,
-                        "node": node
-                    })
-            elif isinstance(node, ast.ImportFrom):
-                module = node.module or ""
-                for name in node.names:
-                    imports.append({
-                        "type": "from",
-                        "module": module,
-                        "name": name.name,
-                        "asname": name.asname,
-                        "lineno": node.lineno,
-                        "node": node
-                    })
-        
-        return imports
-    
-    def _find_used_names(self, tree):
-        """Find all used names in an AST."""
-        used_names = set()
-        
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
-                used_names.add(node.id)
-            elif isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
-                # This could be a module attribute access (e.g., os.path)
-                used_names.add(node.value.id)
-        
-        return used_names
-    
-    def _filter_unused_imports(self, imports, used_names):
-        """Filter out unused imports."""
-        used_imports = []
-        
-        for imp in imports:
-            # Check if the import is used
-            if imp["name"] in used_names:
-                used_imports.append(imp)
-            elif imp["type"] == "import" and "." in imp["module"]:
-                # Check if any part of the module is used
-                parts = imp["module"].split(".")
-                for i in range(len(parts)):
-                    if ".".join(parts[:i+1]) in used_names:
-                        used_imports.append(imp)
-                        break
-            elif imp["type"] == "from" and imp["asname"] is None:
-                # Check if the imported name is used
-                if imp["name"] in used_names:
-                    used_imports.append(imp)
-            elif imp["type"] == "from" and imp["asname"] is not None:
-                # Check if the alias is used
-                if imp["asname"] in used_names:
-                    used_imports.append(imp)
-        
-        return used_imports
-    
-    def _group_imports(self, imports):
-        """Group imports by type."""
-        grouped = {
-            "stdlib": [],
-            "thirdparty": [],
-            "local": []
-        }
-        
-        for imp in imports:
-            if imp["type"] == "import":
-                module = imp["module"].split(".")[0]
-                if module in self.standard_libs:
-                    grouped["stdlib"].append(imp)
-                elif module.startswith(("src", "utils", "core", "modules", "tools")):
-                    grouped["local"].append(imp)
-                else:
-                    grouped["thirdparty"].append(imp)
-            elif imp["type"] == "from":
-                module = imp["module"].split(".")[0]
-                if module in self.standard_libs:
-                    grouped["stdlib"].append(imp)
-                elif module.startswith(("src", "utils", "core", "modules", "tools")):
-                    grouped["local"].append(imp)
-                else:
-                    grouped["thirdparty"].append(imp)
-        
-        return grouped
-    
-    def _generate_import_statements(self, grouped_imports):
-        """Generate optimized import statements."""
-        import_statements = []
-        
-        # Standard library imports
-        if grouped_imports["stdlib"]:
-            # Group by module
-            by_module = defaultdict(list)
-            for imp in grouped_imports["stdlib"]:
-                if imp["type"] == "import":
-                    by_module[imp["module"]].append(imp)
-                else:
-                    by_module[imp["module"]].append(imp)
-            
-            # Generate import statements
-            for module, imps in sorted(by_module.items()):
-                if all(imp["type"] == "import" for imp in imps):
-                    # Use 'import module' syntax
-                    names = []
-                    for imp in imps:
-                        if imp["asname"]:
-                            names.append(f"{imp['module']} as {imp['asname']}")
-                        else:
-                            names.append(imp["module"])
-                    import_statements.append(f"import {', '.join(sorted(names))}")
-                else:
-                    # Use 'from module import name' syntax
-                    from_imports = [imp for imp in imps if imp["type"] == "from"]
-                    if from_imports:
-                        names = []
-                        for imp in from_imports:
-                            if imp["asname"]:
-                                names.append(f"{imp['name']} as {imp['asname']}")
-                            else:
-                                names.append(imp["name"])
-                        import_statements.append(f"from {module} import {', '.join(sorted(names))}")
-            
-            import_statements.append("")  # Add a blank line
-        
-        # Third-party imports
-        if grouped_imports["thirdparty"]:
-            # Group by module
-            by_module = defaultdict(list)
-            for imp in grouped_imports["thirdparty"]:
-                if imp["type"] == "import":
-                    by_module[imp["module"]].append(imp)
-                else:
-                    by_module[imp["module"]].append(imp)
-            
-            # Generate import statements
-            for module, imps in sorted(by_module.items()):
-                if all(imp["type"] == "import" for imp in imps):
-                    # Use 'import module' syntax
-                    names = []
-                    for imp in imps:
-                        if imp["asname"]:
-                            names.append(f"{imp['module']} as {imp['asname']}")
-                        else:
-                            names.append(imp["module"])
-                    import_statements.append(f"import {', '.join(sorted(names))}")
-                else:
-                    # Use 'from module import name' syntax
-                    from_imports = [imp for imp in imps if imp["type"] == "from"]
-                    if from_imports:
-                        names = []
-                        for imp in from_imports:
-                            if imp["asname"]:
-                                names.append(f"{imp['name']} as {imp['asname']}")
-                            else:
-                                names.append(imp["name"])
-                        import_statements.append(f"from {module} import {', '.join(sorted(names))}")
-            
-            import_statements.append("")  # Add a blank line
-        
-        # Local imports
-        if grouped_imports["local"]:
-            # Group by module
-            by_module = defaultdict(list)
-            for imp in grouped_imports["local"]:
-                if imp["type"] == "import":
-                    by_module[imp["module"]].append(imp)
-                else:
-                    by_module[imp["module"]].append(imp)
-            
-            # Generate import statements
-            for module, imps in sorted(by_module.items()):
-                if all(imp["type"] == "import" for imp in imps):
-                    # Use 'import module' syntax
-                    names = []
-                    for imp in imps:
-                        if imp["asname"]:
-                            names.append(f"{imp['module']} as {imp['asname']}")
-                        else:
-                            names.append(imp["module"])
-                    import_statements.append(f"import {', '.join(sorted(names))}")
-                else:
-                    # Use 'from module import name' syntax
-                    from_imports = [imp for imp in imps if imp["type"] == "from"]
-                    if from_imports:
-                        names = []
-                        for imp in from_imports:
-                            if imp["asname"]:
-                                names.append(f"{imp['name']} as {imp['asname']}")
-                            else:
-                                names.append(imp["name"])
-                        import_statements.append(f"from {module} import {', '.join(sorted(names))}")
-        
-        return import_statements
-    
-    def _replace_imports(self, content, tree, import_statements):
-        """Replace imports in the original content."""
-        # Find the range of lines containing imports
-        import_lines = set()
-        for node in ast.walk(tree):
-            if isinstance(node, (ast.Import, ast.ImportFrom)):
-                import_lines.add(node.lineno)
-        
-        if not import_lines:
-            # No imports to replace
-            return content
-        
-        # Find the first and last import line
-        first_import = min(import_lines)
-        last_import = max(import_lines)
-        
-        # Split the content into lines
-        lines = content.splitlines()
-        
-        # Check if there's a docstring
-        has_docstring = False
-        docstring_end = 0
-        
-        if lines and lines[0].strip().startswith('"""'):
-            has_docstring = True
-            for i, line in enumerate(lines):
-                if i > 0 and line.strip().endswith('"""'):
-                    docstring_end = i
-                    break
-        
-        # Insert the optimized imports after the docstring or at the beginning
-        if has_docstring:
-            # Insert after the docstring
-            new_lines = lines[:docstring_end+1] + [""] + import_statements + lines[last_import:]
-        else:
-            # Insert at the beginning
-            new_lines = import_statements + lines[last_import:]
-        
-        return "\n".join(new_lines)
 
 class CodeBuilder:
     """Rebuilds optimized Python files from components."""
@@ -414,26 +151,29 @@ class CodeBuilder:
             except Exception as e:
                 print(f"Error reading {part['path']}: {e}")
         
-        # Extract docstrings, imports, and code from each part
+        # Extract docstrings, imports, and code from each part; code is cut
+        # from the original source so comments and formatting survive
         extracted_parts = []
         for part in parts_content:
             try:
-                tree = ast.parse(part["content"])
+                source_file = SourceFile(part["content"], part["module"])
+                tree = source_file.tree
                 docstring = ast.get_docstring(tree) or ""
                 
-                # Extract imports
                 imports = []
-                for node in ast.walk(tree):
-                    if isinstance(node, (ast.Import, ast.ImportFrom)):
-                        imports.append(ast.unparse(node))
-                
-                # Extract code (excluding docstring and imports)
-                code_nodes = []
-                for node in tree.body:
-                    if not isinstance(node, (ast.Expr, ast.Import, ast.ImportFrom)):
-                        code_nodes.append(node)
+                removals = []
+                for index, node in enumerate(tree.body):
+                    is_docstring = index == 0 and docstring and isinstance(node, ast.Expr)
+                    if not (is_docstring or isinstance(node, (ast.Import, ast.ImportFrom))):
+                        continue
+                    span = source_file.line_span(node)
+                    if span is None:
+                        continue
+                    if not is_docstring:
+                        imports.append(part["content"][span[0]:span[1]].rstrip())
+                    removals.append(Change(span[0], span[1], "", "rebuild", ""))
                 
-                code = "\n".join(ast.unparse(node) for node in code_nodes)
+                code = apply_changes(part["content"], merge_changes(removals)[0]).strip("\n")
                 
                 extracted_parts.append({
                     "module": part["module"],
@@ -545,106 +285,77 @@ class CodeBuilder:
             "results": rebuilt_files
         }
     
-    def apply_fixes(self, file_path, fix_unused_imports=True, fix_error_handling=True, 
-                   fix_resource_issues=True, dry_run=True):
-        """Apply fixes to a Python file."""
-        # Analyze the file
-        analysis = self.analyzer.analyze_file(file_path)
-        if not analysis:
-            print(f"Error analyzing {file_path}")
-            return None
-        
-        # Read the file
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-        except Exception as e:
-            print(f"Error reading {file_path}: {e}")
+    def _fixers(self, fix_unused_imports, fix_error_handling, fix_resource_issues):
+        """The codemod fixers for the requested kinds of fixes."""
+        fixers = []
+        if fix_unused_imports:
+            fixers.append(UnusedImportFixer())
+        if fix_error_handling:
+            fixers.append(BareExceptFixer())
+        if fix_resource_issues:
+            # Resource issues need manual fixing; they are only reported
+            fixers.append(ResourceIssueFinder())
+        return fixers
+    
+    def _report(self, result, fixers, dry_run):
+        """Print a codemod result and turn it into this builder's result."""
+        file_path = result["file"]
+        if result["error"]:
+            print(f"Error fixing {file_path}: {result['error']}")
             return None
         
-        # Apply fixes
-        fixed_content = content
-        fixes_applied = []
+        fixes_applied = [fixer.summary(result["counts"][fixer.name])
+                         for fixer in fixers if result["counts"].get(fixer.name)]
+        if result["conflicts"]:
+            fixes_applied.append(f"Skipped {result['conflicts']} overlapping fixes (run again to apply)")
         
-        # Fix unused imports
-        if fix_unused_imports and analysis["unused_imports"]:
-            try:
-                fixed_content = self.import_optimizer.optimize_imports(fixed_content)
-                fixes_applied.append(f"Removed {len(analysis['unused_imports'])} unused imports")
-            except Exception as e:
-                print(f"Error fixing unused imports in {file_path}: {e}")
-        
-        # Fix error handling
-        if fix_error_handling and analysis["error_handling_issues"]:
-            try:
-                # Replace bare except clauses with except Exception
-                for issue in analysis["error_handling_issues"]:
-                    if issue["type"] == "bare_except":
-                        fixed_content = fixed_content.replace("except Exception:", "except Exception:")
-                
-                fixes_applied.append(f"Fixed {len(analysis['error_handling_issues'])} error handling issues")
-            except Exception as e:
-                print(f"Error fixing error handling in {file_path}: {e}")
-        
-        # Fix resource issues
-        if fix_resource_issues and analysis["resource_issues"]:
-            try:
-                # This is a more complex fix that would require AST manipulation
-                # For now, just report the issues
-                fixes_applied.append(f"Found {len(analysis['resource_issues'])} resource issues (manual fixing required)")
-            except Exception as e:
-                print(f"Error fixing resource issues in {file_path}: {e}")
-        
-        # Write the fixed file
         if dry_run:
-            print(f"Would fix {file_path}:")
+            if fixes_applied:
+                print(f"Would fix {file_path}:")
+                for fix in fixes_applied:
+                    print(f"- {fix}")
+        elif result["changed"]:
+            print(f"Fixed {file_path}:")
             for fix in fixes_applied:
                 print(f"- {fix}")
-        else:
-            if fixes_applied:
-                try:
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write(fixed_content)
-                    print(f"Fixed {file_path}:")
-                    for fix in fixes_applied:
-                        print(f"- {fix}")
-                except Exception as e:
-                    print(f"Error writing {file_path}: {e}")
-                    return None
-            else:
-                print(f"No fixes applied to {file_path}")
         
         return {
             "file_path": file_path,
-            "fixes_applied": fixes_applied
+            "fixes_applied": fixes_applied,
+            "diff": result["diff"]
         }
     
+    def apply_fixes(self, file_path, fix_unused_imports=True, fix_error_handling=True, 
+                   fix_resource_issues=True, dry_run=True):
+        """
+        Apply fixes to a Python file.
+        
+        All fixes come from one parse of the file and are applied as edits to
+        the original text, so only the fixed ranges change.
+        """
+        fixers = self._fixers(fix_unused_imports, fix_error_handling, fix_resource_issues)
+        result = fix_file(file_path, fixers, dry_run)
+        report = self._report(result, fixers, dry_run)
+        if report is not None and not report["fixes_applied"] and not dry_run:
+            print(f"No fixes applied to {file_path}")
+        return report
+    
     def fix_codebase(self, fix_unused_imports=True, fix_error_handling=True, 
-                    fix_resource_issues=True, dry_run=True):
-        """Apply fixes to the entire codebase."""
-        # Find all Python files
-        python_files = []
-        for root, _, files in os.walk(self.project_root):
-            # Skip certain directories
-            if any(skip in root for skip in ['.git', '__pycache__', '.vscode', '.idea']):
-                continue
-            
-            for file in files:
-                if file.endswith('.py'):
-                    python_files.append(os.path.join(root, file))
-        
+                    fix_resource_issues=True, dry_run=True, max_workers=None):
+        """Apply fixes to the entire codebase, on a process pool for large codebases."""
+        python_files = find_python_files(self.project_root)
         print(f"Found {len(python_files)} Python files")
         
-        # Apply fixes to each file
+        fixers = self._fixers(fix_unused_imports, fix_error_handling, fix_resource_issues)
         fixed_files = []
-        for i, file_path in enumerate(python_files):
+        results = fix_files(python_files, fixers, dry_run, max_workers)
+        for i, result in enumerate(results):
             if (i + 1) % 20 == 0 or i == len(python_files) - 1:
-                print(f"Fixing file {i+1}/{len(python_files)}: {os.path.relpath(file_path, self.project_root)}")
+                print(f"Fixing file {i+1}/{len(python_files)}: {os.path.relpath(result['file'], self.project_root)}")
             
-            result = self.apply_fixes(file_path, fix_unused_imports, fix_error_handling, 
-                                     fix_resource_issues, dry_run)
-            if result and result["fixes_applied"]:
-                fixed_files.append(result)
+            report = self._report(result, fixers, dry_run)
+            if report and report["fixes_applied"]:
+                fixed_files.append(report)
         
         return {
             "fixed_files": len(fixed_files),
@@ -662,6 +373,7 @@ def main():
     parser.add_argument("--fix", action="store_true", help="Fix issues in the codebase")
     parser.add_argument("--no-optimize-imports", action="store_true", help="Disable import optimization")
     parser.add_argument("--apply", action="store_true", help="Apply the changes (default: dry run)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for --fix")
     
     args = parser.parse_args()
     
@@ -687,7 +399,7 @@ def main():
     elif args.fix:
         # Fix issues in the codebase
         print("Fixing issues in the codebase")
-        result = builder.fix_codebase(True, True, True, not args.apply)
+        result = builder.fix_codebase(True, True, True, not args.apply, args.workers)
         
         print(f"Fixed {result['fixed_files']} files")
     else:
@@ -280,7 +280,28 @@ def create_pipeline_functions():
 \"\"\"Pipeline Functions
 
 This module contains LINQ-like pipeline functions for data processing.
+
+Pipeline is lazy: each call adds a stage to a plan and nothing runs until the
+pipeline is iterated. Adjacent where/select stages run as one fused loop,
+first_or_default and take stop reading the input as soon as they can, large
+group_by inputs are grouped by an external sort so memory stays bounded, and
+expensive selectors can run in chunks on a process pool.
 \"\"\"
+import heapq
+import itertools
+import os
+import pickle
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+# Items grouped in memory before group_by switches to sort-then-group
+GROUP_BY_MEMORY_LIMIT = 100000
+
+# Items per task for selectors run on the process pool
+CHUNK_SIZE = 256
+
 
 def where(iterable, predicate):
     \"\"\"Filter items in an iterable based on a predicate function.\"\"\"
@@ -311,54 +332,205 @@ def first_or_default(iterable, predicate=None, default=None):
             return next(iter(iterable))
         except StopIteration:
             return default
-    
+
     for item in iterable:
         if predicate(item):
             return item
-    
+
     return default
 
+
+@lru_cache(maxsize=None)
+def _fused_loop(shape):
+    \"\"\"Compile one generator running a run of where ('w') and select ('s') stages.\"\"\"
+    params = ", ".join(f"f{i}" for i in range(len(shape)))
+    lines = [f"def fused(source, {params}):", "    for item in source:"]
+    for i, kind in enumerate(shape):
+        if kind == "w":
+            lines.append(f"        if not f{i}(item):")
+            lines.append("            continue")
+        else:
+            lines.append(f"        item = f{i}(item)")
+    lines.append("        yield item")
+    namespace = {}
+    exec(compile("\\n".join(lines), f"<pipeline {shape}>", "exec"), namespace)
+    return namespace["fused"]
+
+
+def _fuse(source, run):
+    if len(run) == 1:
+        kind, function = run[0]
+        return filter(function, source) if kind == "w" else map(function, source)
+    shape = "".join(kind for kind, _ in run)
+    return _fused_loop(shape)(source, *(function for _, function in run))
+
+
+def _select_chunk(selector, chunk):
+    return [selector(item) for item in chunk]
+
+
+def _parallel_select(source, selector, workers, chunk_size):
+    \"\"\"map(selector, source) on a process pool, in order, with a bounded number of chunks in flight.\"\"\"
+    iterator = iter(source)
+    chunk = list(itertools.islice(iterator, chunk_size))
+    if len(chunk) < chunk_size:
+        # Not worth starting a pool for less than one chunk
+        yield from _select_chunk(selector, chunk)
+        return
+    window = 2 * (workers if workers > 0 else os.cpu_count() or 1)
+    executor = ProcessPoolExecutor(max_workers=workers if workers > 0 else None)
+    pending = deque()
+    try:
+        while chunk:
+            pending.append(executor.submit(_select_chunk, selector, chunk))
+            if len(pending) >= window:
+                yield from pending.popleft().result()
+            chunk = list(itertools.islice(iterator, chunk_size))
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _spill(entries):
+    \"\"\"Write a sorted run of (key, seq, item) entries to a temporary file.\"\"\"
+    f = tempfile.TemporaryFile()
+    for entry in entries:
+        pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+    f.seek(0)
+    return f
+
+
+def _read_run(f):
+    try:
+        while True:
+            yield pickle.load(f)
+    except EOFError:
+        pass
+    finally:
+        f.close()
+
+
+def _group(source, key_selector, limit):
+    \"\"\"
+    Yield (key, items) groups.
+
+    Up to limit items are grouped in a dict, in order of first appearance.
+    Beyond that the input is sorted in runs of limit items spilled to disk and
+    merged, so groups come out in key order; keys must then be orderable and
+    items picklable.
+    \"\"\"
+    iterator = iter(source)
+    runs = []
+    seq = itertools.count()
+    while True:
+        block = list(itertools.islice(iterator, limit))
+        if not runs and len(block) < limit:
+            groups = {}
+            for item in block:
+                groups.setdefault(key_selector(item), []).append(item)
+            yield from groups.items()
+            return
+        if not block:
+            break
+        entries = [(key_selector(item), next(seq), item) for item in block]
+        entries.sort(key=lambda entry: entry[:2])
+        runs.append(_spill(entries))
+
+    merged = heapq.merge(*(_read_run(f) for f in runs), key=lambda entry: entry[:2])
+    try:
+        for key, entries in itertools.groupby(merged, key=lambda entry: entry[0]):
+            yield key, [entry[2] for entry in entries]
+    finally:
+        for f in runs:
+            f.close()
+
+
 class Pipeline:
-    \"\"\"A pipeline for chaining operations on an iterable.\"\"\"
-    
+    \"\"\"A lazy pipeline for chaining operations on an iterable.\"\"\"
+
     def __init__(self, iterable):
         self.iterable = iterable
-    
+        self.stages = []
+
     def where(self, predicate):
         \"\"\"Filter items in the pipeline.\"\"\"
-        self.iterable = where(self.iterable, predicate)
+        self.stages.append(("w", predicate))
         return self
-    
-    def select(self, selector):
-        \"\"\"Transform items in the pipeline.\"\"\"
-        self.iterable = select(self.iterable, selector)
+
+    def select(self, selector, workers=None, chunk_size=CHUNK_SIZE):
+        \"\"\"
+        Transform items in the pipeline.
+
+        With workers, the selector runs in chunks on a process pool, so it
+        must be picklable (a module-level function).
+        \"\"\"
+        if workers:
+            self.stages.append(("parallel", (selector, workers, chunk_size)))
+        else:
+            self.stages.append(("s", selector))
         return self
-    
-    def group_by(self, key_selector):
-        \"\"\"Group items in the pipeline.\"\"\"
-        self.iterable = group_by(self.iterable, key_selector)
+
+    def group_by(self, key_selector, memory_limit=GROUP_BY_MEMORY_LIMIT):
+        \"\"\"Group items in the pipeline into (key, items) pairs.\"\"\"
+        self.stages.append(("group", (key_selector, memory_limit)))
         return self
-    
+
     def order_by(self, key_selector, reverse=False):
         \"\"\"Order items in the pipeline.\"\"\"
-        self.iterable = order_by(self.iterable, key_selector, reverse)
+        self.stages.append(("order", (key_selector, reverse)))
+        return self
+
+    def take(self, count):
+        \"\"\"Keep only the first count items.\"\"\"
+        self.stages.append(("take", count))
         return self
-    
+
+    def __iter__(self):
+        stream = self.iterable
+        run = []
+        stages = self.stages
+        for index, (kind, argument) in enumerate(stages):
+            if kind in ("w", "s"):
+                run.append((kind, argument))
+                continue
+            if run:
+                stream = _fuse(stream, run)
+                run = []
+            if kind == "parallel":
+                stream = _parallel_select(stream, *argument)
+            elif kind == "group":
+                stream = _group(stream, argument[0], argument[1])
+            elif kind == "order":
+                key_selector, reverse = argument
+                following = stages[index + 1] if index + 1 < len(stages) else None
+                if following is not None and following[0] == "take":
+                    # Top-n without sorting everything; the take stage still applies
+                    pick = heapq.nlargest if reverse else heapq.nsmallest
+                    stream = pick(following[1], stream, key=key_selector)
+                else:
+                    stream = sorted(stream, key=key_selector, reverse=reverse)
+            elif kind == "take":
+                stream = itertools.islice(stream, argument)
+        if run:
+            stream = _fuse(stream, run)
+        return iter(stream)
+
     def first_or_default(self, predicate=None, default=None):
         \"\"\"Get the first item that matches a predicate.\"\"\"
-        return first_or_default(self.iterable, predicate, default)
-    
+        return first_or_default(self, predicate, default)
+
     def to_list(self):
         \"\"\"Convert the pipeline to a list.\"\"\"
-        return list(self.iterable)
-    
+        return list(self)
+
     def to_dict(self):
         \"\"\"Convert the pipeline to a dictionary.\"\"\"
-        return dict(self.iterable)
-    
+        return dict(self)
+
     def to_set(self):
         \"\"\"Convert the pipeline to a set.\"\"\"
-        return set(self.iterable)
+        return set(self)
 
 def from_iterable(iterable):
     \"\"\"Create a pipeline from an iterable.\"\"\"
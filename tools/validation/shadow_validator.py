@@ -22,6 +22,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger("shadow_validator")
 
+# Rules share one parse of the code through the analysis cache
+try:
+    from core.ast.analysis_cache import get_analysis_cache
+except ImportError:
+    # Run without the project on sys.path: every rule parses the code itself
+    get_analysis_cache = None
+
+
+def _parse(code: str) -> ast.Module:
+    """Parsed tree of code, shared through the analysis cache when it is available."""
+    if get_analysis_cache is None:
+        return ast.parse(code)
+    return get_analysis_cache().parse_source(code)
+
 
 class RuleBasedValidator:
     """Simple rule-based validator for Python code."""
@@ -76,7 +90,7 @@ class RuleBasedValidator:
         """Check for syntax errors."""
         issues = []
         try:
-            ast.parse(code)
+            _parse(code)
         except SyntaxError as e:
             issues.append(f"Syntax error at line {e.lineno}: {e.msg}")
         return issues
@@ -85,7 +99,7 @@ class RuleBasedValidator:
         """Check for code complexity issues."""
         issues = []
         try:
-            tree = ast.parse(code)
+            tree = _parse(code)
             for node in ast.walk(tree):
                 # Check for overly complex functions
                 if isinstance(node, ast.FunctionDef):
@@ -124,7 +138,7 @@ class RuleBasedValidator:
         """Check for naming convention issues."""
         issues = []
         try:
-            tree = ast.parse(code)
+            tree = _parse(code)
             for node in ast.walk(tree):
                 # Check function names (snake_case)
                 if isinstance(node, ast.FunctionDef):
@@ -175,7 +189,7 @@ class RuleBasedValidator:
         """Check for import issues."""
         issues = []
         try:
-            tree = ast.parse(code)
+            tree = _parse(code)
             imports = []
             for node in ast.walk(tree):
                 if isinstance(node, ast.Import):
@@ -198,7 +212,7 @@ class RuleBasedValidator:
         """Check for missing docstrings."""
         issues = []
         try:
-            tree = ast.parse(code)
+            tree = _parse(code)
             for node in ast.walk(tree):
                 if isinstance(node, (ast.FunctionDef, ast.ClassDef, ast.Module)):
                     # Check if the first node in the body is a docstring
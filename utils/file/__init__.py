@@ -2,13 +2,11 @@
 file package.
 """
 import os
-# Fix imports for reorganized codebase
-import utils.import_utils
-
-
-# Fix imports for reorganized codebase
-
-
+# Fix imports for reorganized codebase; nothing below depends on it
+try:
+    import utils.import_utils
+except ImportError:
+    pass
 
 # Define essential file utility functions directly to avoid circular imports
 def read_file(file_path):
@@ -1,15 +1,26 @@
 """
 State Manager - Core component for managing shared state and event communication
-"""
-# Fix imports for reorganized codebase
-import utils.import_utils
-
 
-# Fix imports for reorganized codebase
+State is saved as a pickle snapshot plus a write-ahead log (see
+utils.file.state_store), so only load state files this program wrote.
+Changes are tracked per key through SharedState.set(): mutating a stored
+value in place is not seen, so call set() again with the mutated value.
+"""
+# Fix imports for reorganized codebase; nothing below depends on it
+try:
+    import utils.import_utils
+except ImportError:
+    pass
 
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
 
+from utils.file.state_store import StateStore
 
-import json
+logger = logging.getLogger(__name__)
 
 class EventBus:
     """
@@ -43,10 +54,16 @@ class SharedState:
         self.state = {}
         self.event_bus = event_bus
         self.watchers = {}
+        # Keys changed since the last save, and whether clear() was called
+        self.dirty = set()
+        self.cleared = False
+        self._lock = threading.Lock()
         
     def set(self, key: str, value: Any):
         """Set a state value and notify watchers"""
-        self.state[key] = value
+        with self._lock:
+            self.state[key] = value
+            self.dirty.add(key)
         # Notify watchers
         if key in self.watchers:
             for callback in self.watchers[key]:
@@ -75,10 +92,32 @@ class SharedState:
     
     def clear(self):
         """Clear the entire state"""
-        old_state = self.state.copy()
-        self.state = {}
+        with self._lock:
+            old_state = self.state.copy()
+            self.state = {}
+            self.dirty = set()
+            self.cleared = True
         # Notify about cleared state
         self.event_bus.publish("state_cleared", old_state)
+    
+    def update(self, values: Dict[str, Any]):
+        """
+        Set many values at once with a single "state_loaded" event
+        
+        Watchers of individual keys are not called.
+        """
+        with self._lock:
+            self.state.update(values)
+        self.event_bus.publish("state_loaded", {"keys": list(values), "state": values})
+    
+    def take_changes(self) -> tuple:
+        """Return the changed values and the cleared flag, and reset both"""
+        with self._lock:
+            changes = {key: self.state[key] for key in self.dirty if key in self.state}
+            cleared = self.cleared
+            self.dirty = set()
+            self.cleared = False
+        return changes, cleared
 
 class StateManager:
     """
@@ -92,6 +131,9 @@ class StateManager:
             cls._instance.event_bus = EventBus()
             cls._instance.shared_state = SharedState(cls._instance.event_bus)
             cls._instance.ui_keys = set()  # Track UI component keys
+            cls._instance._stores = {}  # State file path -> StateStore
+            cls._instance._saver = None  # Single writer thread, created on first save
+            cls._instance._save_lock = threading.Lock()
         return cls._instance
     
     def register_ui_key(self, key: str) -> str:
@@ -122,32 +164,91 @@ class StateManager:
         """Get the shared state instance"""
         return self.shared_state
     
-    def save_state(self, filepath: str):
-        """Save the current state to a file"""
-        serializable_state = {}
-        for key, value in self.shared_state.get_all().items():
-            # Only save serializable values
-            try:
-                json.dumps(value)
-                serializable_state[key] = value
-            except (TypeError, OverflowError):
-                pass  # Skip non-serializable values
-                
-        with open(filepath, 'w') as f:
-            json.dump(serializable_state, f, indent=2)
+    def _store_for(self, filepath: str) -> StateStore:
+        path = os.path.abspath(filepath)
+        if path not in self._stores:
+            self._stores[path] = StateStore(path)
+        return self._stores[path]
+    
+    def _prepare(self, store: StateStore):
+        """
+        Encode pending changes for a store and return the function that writes them
+        
+        Runs on the caller's thread, so the bytes reflect the state at the time
+        of the call even if values change before the write happens.
+        """
+        changes, cleared = self.shared_state.take_changes()
+        if store.needs_snapshot or store.broken or cleared:
+            data, _ = store.prepare_compact(self.shared_state.get_all())
+            write = store.write_compact
+        elif changes:
+            data, _ = store.prepare_append(changes)
+            write = store.write_append
+            if store.should_compact():
+                data, _ = store.prepare_compact(self.shared_state.get_all())
+                write = store.write_compact
+        else:
+            return None
+        # Those changes are now only in this file; others get a full snapshot next time
+        for other in self._stores.values():
+            if other is not store:
+                other.needs_snapshot = True
+        return lambda: self._write(store, write, data)
+    
+    @staticmethod
+    def _write(store: StateStore, write: Callable, data: bytes):
+        """Run a prepared write on the saver thread, logging failures nobody may wait for"""
+        try:
+            write(data)
+        except Exception as e:
+            logger.error("Failed to save state to %s: %s", store.path, e, exc_info=True)
+            raise
+    
+    def save_state(self, filepath: str, wait: bool = False) -> Future:
+        """
+        Save the current state to a file
+        
+        Only keys changed since the last save are written; the first save to a
+        file in a process writes a full snapshot. Values are pickled before
+        this returns and written on a background thread, in call order.
+        Values that cannot be pickled are skipped. Failed writes are logged,
+        and the next save writes a full snapshot. Pass wait=True, or call
+        result() on the returned future, to block until the data is written
+        and see any error.
+        """
+        store = self._store_for(filepath)
+        with self._save_lock:
+            if self._saver is None:
+                self._saver = ThreadPoolExecutor(max_workers=1, thread_name_prefix="state-saver")
+            write = self._prepare(store)
+            if write is None:
+                pending = Future()
+                pending.set_result(None)
+            else:
+                pending = self._saver.submit(write)
+        if wait:
+            pending.result()
+        return pending
     
     def load_state(self, filepath: str):
-        """Load state from a file"""
+        """
+        Load state from a file
+        
+        The whole state is applied at once with a single "state_loaded"
+        event rather than one set() per key. The next save to any file
+        writes a full snapshot, since no file holds the merged state yet.
+        """
+        store = self._store_for(filepath)
         try:
-            with open(filepath, 'r') as f:
-                loaded_state = json.load(f)
-                
-            for key, value in loaded_state.items():
-                self.shared_state.set(key, value)
-                
-            return True
-        except (FileNotFoundError, json.JSONDecodeError):
+            loaded_state = store.load()
+        except (FileNotFoundError, ValueError):
             return False
+        
+        self.shared_state.update(loaded_state)
+        with self._save_lock:
+            for other in self._stores.values():
+                other.needs_snapshot = True
+        return True
 
 # Singleton instance
 state_manager = StateManager()
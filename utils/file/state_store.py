@@ -0,0 +1,235 @@
+"""
+State Store
+This module persists shared state as a snapshot plus a write-ahead log:
+- Saves append only the changed keys to the log, as length-prefixed,
+  checksummed pickle frames
+- When the log outgrows the snapshot it is compacted into a new snapshot,
+  written atomically; a generation number ties each log to its snapshot so a
+  crash between the two writes never replays stale entries
+- A torn frame at the end of the log (a crash mid-append) is dropped on load
+- Values are encoded separately from the file writes, so callers can
+  pickle on their own thread and hand the bytes to a writer thread
+- Loading returns the whole state in one dict; JSON files written by the old
+  StateManager.save_state are still read
+
+State files are pickles: only load files this program wrote.
+"""
+import json
+import os
+import pickle
+import struct
+import tempfile
+import zlib
+from typing import Any, Dict, Tuple
+
+SNAPSHOT_MAGIC = b"STATESNAP1\n"
+WAL_MAGIC = b"STATEWAL1\n"
+_GENERATION = struct.Struct(">Q")
+_FRAME = struct.Struct(">II")  # payload length, crc32
+
+# The log is compacted once it is larger than this fraction of the snapshot...
+COMPACT_RATIO = 1.0
+# ...and larger than this many bytes
+COMPACT_MIN_BYTES = 1 << 20
+
+
+def encode_values(values: Dict[str, Any]) -> Tuple[bytes, Dict[str, Any]]:
+    """
+    Pickle a dict, leaving out values that cannot be pickled.
+
+    Returns the encoded bytes and the entries that were kept.
+    """
+    try:
+        return pickle.dumps(values, protocol=pickle.HIGHEST_PROTOCOL), values
+    except (pickle.PicklingError, TypeError, AttributeError):
+        kept = {}
+        for key, value in values.items():
+            try:
+                pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            except (pickle.PicklingError, TypeError, AttributeError):
+                continue  # Skip non-serializable values
+            kept[key] = value
+        return pickle.dumps(kept, protocol=pickle.HIGHEST_PROTOCOL), kept
+
+
+def _write_atomic(path: str, data: bytes, fsync: bool) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class StateStore:
+    """
+    Snapshot and write-ahead log for one state file.
+
+    The snapshot lives at path and the log at path + ".wal".
+    """
+
+    def __init__(self, path: str, compact_ratio: float = COMPACT_RATIO,
+                 compact_min_bytes: int = COMPACT_MIN_BYTES, fsync: bool = False):
+        self.path = path
+        self.wal_path = path + ".wal"
+        self.compact_ratio = compact_ratio
+        self.compact_min_bytes = compact_min_bytes
+        self.fsync = fsync
+        self.generation = 0
+        self.snapshot_size = 0
+        self.wal_size = 0
+        # True until the file on disk is known to match the caller's state
+        self.needs_snapshot = True
+        # Set when a write fails, until a snapshot succeeds: the file no
+        # longer matches what was prepared, so only a snapshot can fix it
+        self.broken = False
+
+    def load(self) -> Dict[str, Any]:
+        """
+        Read the snapshot and replay the log over it.
+
+        Raises FileNotFoundError when neither exists and ValueError when the
+        snapshot is unreadable.
+        """
+        state = None
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = None
+
+        if data is None:
+            self.generation, self.snapshot_size = 0, 0
+        elif data.startswith(SNAPSHOT_MAGIC):
+            offset = len(SNAPSHOT_MAGIC)
+            (self.generation,) = _GENERATION.unpack_from(data, offset)
+            try:
+                state = pickle.loads(data[offset + _GENERATION.size:])
+            except Exception as e:
+                raise ValueError(f"Unreadable state snapshot {self.path}: {e}") from e
+            self.snapshot_size = len(data)
+        else:
+            # A JSON file from before the log existed
+            try:
+                state = json.loads(data.decode("utf-8"))
+            except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                raise ValueError(f"Unreadable state file {self.path}: {e}") from e
+            self.generation, self.snapshot_size = 0, len(data)
+
+        entries = self._replay()
+        if state is None and entries is None:
+            raise FileNotFoundError(self.path)
+        state = dict(state or {})
+        for key, value in entries or ():
+            state[key] = value
+        # Legacy files are rewritten in the new format on the next save
+        self.needs_snapshot = data is not None and not data.startswith(SNAPSHOT_MAGIC)
+        return state
+
+    def _replay(self):
+        """Entries of the log, or None if there is no log for this snapshot."""
+        try:
+            with open(self.wal_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.wal_size = 0
+            return None
+
+        header = len(WAL_MAGIC) + _GENERATION.size
+        if (len(data) < header or not data.startswith(WAL_MAGIC)
+                or _GENERATION.unpack_from(data, len(WAL_MAGIC))[0] != self.generation):
+            # Left over from before the last compaction
+            self.wal_size = 0
+            return None
+
+        entries = []
+        offset = header
+        while offset + _FRAME.size <= len(data):
+            length, checksum = _FRAME.unpack_from(data, offset)
+            payload = data[offset + _FRAME.size:offset + _FRAME.size + length]
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                break
+            entries.extend(pickle.loads(payload).items())
+            offset += _FRAME.size + length
+
+        if offset < len(data):
+            # Torn write at the end of the log
+            with open(self.wal_path, "r+b") as f:
+                f.truncate(offset)
+        self.wal_size = offset
+        return entries
+
+    def append(self, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """Append changed entries to the log; returns the entries that were written."""
+        if not changes:
+            return changes
+        frame, kept = self.prepare_append(changes)
+        self.write_append(frame)
+        return kept
+
+    def compact(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Write the full state as a new snapshot and start an empty log; returns what was written."""
+        data, kept = self.prepare_compact(state)
+        self.write_compact(data)
+        return kept
+
+    # Encoding and writing are separate steps, so callers can pickle values
+    # on their own thread and leave only the file I/O to a writer thread.
+    # Writes must then happen in the order the data was prepared.
+
+    def prepare_append(self, changes: Dict[str, Any]) -> Tuple[bytes, Dict[str, Any]]:
+        """Encode a log frame for changed entries, as if it were already written."""
+        payload, kept = encode_values(changes)
+        frame = _FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+        if not self.wal_size:
+            frame = WAL_MAGIC + _GENERATION.pack(self.generation) + frame
+        self.wal_size += len(frame)
+        return frame, kept
+
+    def write_append(self, frame: bytes) -> None:
+        """Write a frame from prepare_append; a new log is started if the frame has a header."""
+        if self.broken:
+            raise RuntimeError(f"An earlier write to {self.path} failed; a snapshot is needed first")
+        try:
+            with open(self.wal_path, "wb" if frame.startswith(WAL_MAGIC) else "ab") as f:
+                f.write(frame)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+        except BaseException:
+            self.broken = True
+            raise
+
+    def should_compact(self) -> bool:
+        return self.wal_size > max(self.compact_min_bytes, self.snapshot_size * self.compact_ratio)
+
+    def prepare_compact(self, state: Dict[str, Any]) -> Tuple[bytes, Dict[str, Any]]:
+        """Encode a snapshot of the full state, as if it were already written."""
+        payload, kept = encode_values(state)
+        self.generation += 1
+        data = SNAPSHOT_MAGIC + _GENERATION.pack(self.generation) + payload
+        self.snapshot_size = len(data)
+        self.wal_size = 0
+        self.needs_snapshot = False
+        return data, kept
+
+    def write_compact(self, data: bytes) -> None:
+        """Write a snapshot from prepare_compact and remove the log it replaces."""
+        try:
+            _write_atomic(self.path, data, self.fsync)
+        except BaseException:
+            self.broken = True
+            raise
+        # The old log no longer matches the snapshot's generation, so a crash
+        # here is harmless; remove it anyway
+        try:
+            os.remove(self.wal_path)
+        except FileNotFoundError:
+            pass
+        self.broken = False
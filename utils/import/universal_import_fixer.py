@@ -24,6 +24,8 @@ PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
+from core.ast.analysis_cache import get_analysis_cache
+
 class ModuleMapper:
     """Maps modules and classes across the codebase."""
     
@@ -87,22 +89,16 @@ class ModuleMapper:
     def _extract_definitions(self, file_path, module_path):
         """Extract class and function definitions from a Python file."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
             try:
-                # Parse the file with ast
-                tree = ast.parse(content)
-                
-                # Extract class definitions
-                for node in ast.walk(tree):
-                    if isinstance(node, ast.ClassDef):
-                        class_name = node.name
-                        self.class_map[class_name] = module_path
-                    elif isinstance(node, ast.FunctionDef):
-                        func_name = node.name
-                        self.function_map[func_name] = module_path
+                # Symbols come from the shared parse-once analysis cache
+                for symbol in get_analysis_cache().facts(file_path)['symbols']:
+                    if symbol['kind'] == 'class':
+                        self.class_map[symbol['name']] = module_path
+                    elif not symbol['async']:
+                        self.function_map[symbol['name']] = module_path
             except SyntaxError:
+                content = get_analysis_cache().source(file_path)
+
                 # Fall back to regex for files with syntax errors
                 class_pattern = r'class\s+(\w+)'
                 for match in re.finditer(class_pattern, content):
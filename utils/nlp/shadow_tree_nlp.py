@@ -2,35 +2,69 @@
 Restored Shadow Tree NLP Utilities
 
 Provides natural language processing (NLP) utilities for code structure analysis and explanation, using NLTK for tokenization, lemmatization, and summarization.
+
+NLTK is imported, and its data located or downloaded, on the first call that
+tokenizes, so importing this module is cheap. explain_all_modules and
+stream_module_summaries list each file once, summarize files on a process pool,
+stream results to JSONL as they finish and skip files that are unchanged since
+the previous run.
 """
+import ast
+import hashlib
+import json
 import os
-import nltk
 
-# Set NLTK data path to use local directory
-nltk.data.path.insert(0, './nltk_data')
+MAX_SUMMARY_LENGTH = 100
+MAX_DESCRIPTION_LENGTH = 250
+
+NLTK_DATA_DIR = './nltk_data'
 
-# Ensure NLTK resources are available
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt', download_dir='./nltk_data', quiet=True)
+# Below this many changed files the pool startup costs more than it saves
+PARALLEL_THRESHOLD = 32
+# Files per worker task; small enough that results stream steadily
+CHUNK_SIZE = 16
 
-try:
-    nltk.data.find('corpora/wordnet')
-except LookupError:
-    nltk.download('wordnet', download_dir='./nltk_data', quiet=True)
+SKIP_DIRS = {'__pycache__', 'nltk_data', 'node_modules'}
 
-from nltk.tokenize import word_tokenize, sent_tokenize
-from nltk.stem import WordNetLemmatizer
+_nltk = None
 
-MAX_SUMMARY_LENGTH = 100
-MAX_DESCRIPTION_LENGTH = 250
 
-lemmatizer = WordNetLemmatizer()
+def _load_nltk():
+    """Import NLTK and make sure its data is available, once per process."""
+    global _nltk
+    if _nltk is None:
+        import nltk
+        from nltk.stem import WordNetLemmatizer
+        from nltk.tokenize import sent_tokenize, word_tokenize
+
+        # Set NLTK data path to use local directory
+        nltk.data.path.insert(0, NLTK_DATA_DIR)
+
+        # Ensure NLTK resources are available
+        for resource, package in (('tokenizers/punkt', 'punkt'), ('corpora/wordnet', 'wordnet')):
+            try:
+                nltk.data.find(resource)
+            except LookupError:
+                nltk.download(package, download_dir=NLTK_DATA_DIR, quiet=True)
+
+        _nltk = {
+            'word_tokenize': word_tokenize,
+            'sent_tokenize': sent_tokenize,
+            'lemmatizer': WordNetLemmatizer(),
+        }
+    return _nltk
+
+
+def __getattr__(name):
+    # The module-level lemmatizer is created on first access (PEP 562)
+    if name == 'lemmatizer':
+        return _load_nltk()['lemmatizer']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def summarize_text(text, max_length=MAX_SUMMARY_LENGTH):
     """Summarize a text to a short description."""
-    sentences = sent_tokenize(text)
+    sentences = _load_nltk()['sent_tokenize'](text)
     summary = ''
     for sent in sentences:
         if len(summary) + len(sent) > max_length:
@@ -40,8 +74,9 @@ def summarize_text(text, max_length=MAX_SUMMARY_LENGTH):
 
 def extract_keywords(content):
     """Extract keywords from content using tokenization and lemmatization."""
-    tokens = word_tokenize(content)
-    lemmatized = [lemmatizer.lemmatize(t) for t in tokens if t.isalpha()]
+    nlp = _load_nltk()
+    tokens = nlp['word_tokenize'](content)
+    lemmatized = [nlp['lemmatizer'].lemmatize(t) for t in tokens if t.isalpha()]
     keywords = list(set(lemmatized))
     return keywords
 
@@ -51,52 +86,187 @@ def explain_code_docstring(docstring):
         return "No docstring provided."
     return summarize_text(docstring, max_length=MAX_DESCRIPTION_LENGTH)
 
-import ast
-from pathlib import Path
 
-def explain_all_modules(root_dirs=None, output_file=None):
+def iter_python_files(root_dirs):
     """
-    Recursively find all .py files in root_dirs (default: project root, backup, legacy),
-    extract top-level docstrings, run NL explanation, and print/save a summary.
+    Yield every .py file under root_dirs exactly once.
+
+    Roots nested inside other roots are dropped up front, so files are never
+    listed twice and no per-file path resolution is needed.
+    """
+    roots = sorted({os.path.realpath(root) for root in root_dirs if os.path.isdir(root)})
+    top_level = []
+    for root in roots:
+        if not any(root.startswith(os.path.join(parent, '')) for parent in top_level):
+            top_level.append(root)
+
+    for root in top_level:
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS and not d.startswith('.'))
+            for filename in sorted(filenames):
+                if filename.endswith('.py'):
+                    yield os.path.join(dirpath, filename)
+
+
+def summarize_source(src):
+    """Summarize a module from its top-level docstring."""
+    docstring = ast.get_docstring(ast.parse(src))
+    return explain_code_docstring(docstring) if docstring else "No docstring found."
+
+
+def _summarize_files(jobs):
+    """
+    Worker entry point: summarize a chunk of (path, previous hash) jobs.
+
+    Files whose content hash matches the previous run come back with no
+    summary, so the caller reuses the previous one.
+    """
+    results = []
+    for path, previous_hash in jobs:
+        record = {'file': path, 'hash': None, 'summary': None}
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            record['hash'] = hashlib.blake2b(data, digest_size=16).hexdigest()
+            if record['hash'] != previous_hash:
+                record['summary'] = summarize_source(data.decode('utf-8'))
+        except Exception as e:
+            record['summary'] = f'Error: {e}'
+        results.append(record)
+    return results
+
+
+def load_previous_results(output_file):
+    """Read the records of a previous run, keyed by file."""
+    previous = {}
+    try:
+        with open(output_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                previous[record['file']] = record
+    except OSError:
+        pass
+    return previous
+
+
+DEFAULT_ROOT_DIRS = [
+    '.',
+    './backup',
+    './legacy',
+    './src',
+    './modules',
+    './tools',
+    './utils'
+]
+
+
+def explain_all_modules(root_dirs=None, output_file=None, max_workers=None):
+    """
+    Find all .py files in root_dirs (default: project root, backup, legacy, ...),
+    explain their top-level docstrings and return a list of
+    {'file', 'summary'} dicts.
+
+    With output_file, the summaries are also written as JSONL records (see
+    stream_module_summaries), and files unchanged since the records already in
+    output_file are not summarized again. Without it, summaries are printed.
     """
-    if root_dirs is None:
-        root_dirs = [
-            Path('.'),
-            Path('./backup'),
-            Path('./legacy'),
-            Path('./src'),
-            Path('./modules'),
-            Path('./tools'),
-            Path('./utils')
-        ]
-    seen = set()
     summaries = []
-    for root in root_dirs:
-        for py_file in root.rglob('*.py'):
-            py_file = py_file.resolve()
-            if py_file in seen:
-                continue
-            seen.add(py_file)
-            try:
-                with open(py_file, 'r', encoding='utf-8') as f:
-                    src = f.read()
-                mod = ast.parse(src)
-                docstring = ast.get_docstring(mod)
-                summary = explain_code_docstring(docstring) if docstring else "No docstring found."
-                summaries.append({
-                    'file': str(py_file),
-                    'summary': summary
-                })
-            except Exception as e:
-                summaries.append({
-                    'file': str(py_file),
-                    'summary': f'Error: {e}'
-                })
+    _summarize_modules(root_dirs, output_file, max_workers, summaries)
+    return summaries
+
+
+def stream_module_summaries(root_dirs=None, output_file=None, max_workers=None):
+    """
+    Like explain_all_modules, but keeps no summaries in memory and returns
+    counts for the run: {'files', 'summarized', 'unchanged', 'errors'}.
+
+    With output_file, one JSON record per file ({'file', 'hash', 'mtime_ns',
+    'size', 'summary'}) is written as results arrive, replacing the file once
+    the run completes. Read the summaries back with load_previous_results.
+    """
+    return _summarize_modules(root_dirs, output_file, max_workers)
+
+
+def _summarize_modules(root_dirs, output_file, max_workers, summaries=None):
+    """Summarize changed files on a process pool and stream the results; returns the counts."""
+    if root_dirs is None:
+        root_dirs = DEFAULT_ROOT_DIRS
+    previous = load_previous_results(output_file) if output_file else {}
+    stats = {'files': 0, 'summarized': 0, 'unchanged': 0, 'errors': 0}
+
     if output_file:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            for item in summaries:
-                f.write(f"{item['file']}\n{item['summary']}\n\n")
+        import tempfile
+        directory = os.path.dirname(os.path.abspath(output_file))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        out = os.fdopen(fd, 'w', encoding='utf-8')
     else:
-        for item in summaries:
-            print(f"{item['file']}\n{item['summary']}\n")
-    return summaries
+        tmp_path, out = None, None
+
+    def emit(record, stat):
+        stats['files'] += 1
+        if record['summary'].startswith('Error:'):
+            stats['errors'] += 1
+        if summaries is not None:
+            summaries.append({'file': record['file'], 'summary': record['summary']})
+        if out is None:
+            print(f"{record['file']}\n{record['summary']}\n")
+        else:
+            record = dict(record, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            out.write(json.dumps(record) + '\n')
+
+    try:
+        jobs = []
+        stats_by_path = {}
+        for path in iter_python_files(root_dirs):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            old = previous.get(path)
+            if old and old.get('mtime_ns') == stat.st_mtime_ns and old.get('size') == stat.st_size:
+                stats['unchanged'] += 1
+                emit(old, stat)
+            else:
+                stats_by_path[path] = stat
+                jobs.append((path, old['hash'] if old else None))
+
+        for record in _run_jobs(jobs, max_workers):
+            if record['summary'] is None:
+                # Touched but not modified
+                record['summary'] = previous[record['file']]['summary']
+                stats['unchanged'] += 1
+            else:
+                stats['summarized'] += 1
+            emit(record, stats_by_path[record['file']])
+
+        if out is not None:
+            out.close()
+            os.replace(tmp_path, output_file)
+    except BaseException:
+        if out is not None:
+            out.close()
+            os.remove(tmp_path)
+        raise
+
+    print(f"Summarized {stats['summarized']} files, reused {stats['unchanged']} unchanged files")
+    return stats
+
+
+def _run_jobs(jobs, max_workers=None):
+    """Yield worker results as they finish, serially for small batches."""
+    if max_workers == 1 or len(jobs) < PARALLEL_THRESHOLD:
+        for start in range(0, len(jobs), CHUNK_SIZE):
+            yield from _summarize_files(jobs[start:start + CHUNK_SIZE])
+        return
+
+    # Imported here to keep importing this module cheap
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_summarize_files, jobs[start:start + CHUNK_SIZE])
+                   for start in range(0, len(jobs), CHUNK_SIZE)]
+        for future in as_completed(futures):
+            yield from future.result()
@@ -23,6 +23,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger('shadow_validator')
 
+# Rules share one parse of the code through the analysis cache
+from core.ast.analysis_cache import get_analysis_cache
+
 class RuleBasedValidator:
     """Simple rule-based validator for Python code."""
     
@@ -76,7 +79,7 @@ class RuleBasedValidator:
         """Check for syntax errors."""
         issues = []
         try:
-            ast.parse(code)
+            get_analysis_cache().parse_source(code)
         except SyntaxError as e:
             issues.append(f"Syntax error at line {e.lineno}: {e.msg}")
         return issues
@@ -85,7 +88,7 @@ class RuleBasedValidator:
         """Check for code complexity issues."""
         issues = []
         try:
-            tree = ast.parse(code)
+            tree = get_analysis_cache().parse_source(code)
             for node in ast.walk(tree):
                 # Check for overly complex functions
                 if isinstance(node, ast.FunctionDef):
@@ -118,7 +121,7 @@ class RuleBasedValidator:
         """Check for naming convention issues."""
         issues = []
         try:
-            tree = ast.parse(code)
+            tree = get_analysis_cache().parse_source(code)
             for node in ast.walk(tree):
                 # Check function names (snake_case)
                 if isinstance(node, ast.FunctionDef):
@@ -145,7 +148,7 @@ class RuleBasedValidator:
         """Check for import issues."""
         issues = []
         try:
-            tree = ast.parse(code)
+            tree = get_analysis_cache().parse_source(code)
             imports = []
             for node in ast.walk(tree):
                 if isinstance(node, ast.Import):
@@ -168,7 +171,7 @@ class RuleBasedValidator:
         """Check for missing docstrings."""
         issues = []
         try:
-            tree = ast.parse(code)
+            tree = get_analysis_cache().parse_source(code)
             for node in ast.walk(tree):
                 if isinstance(node, (ast.FunctionDef, ast.ClassDef, ast.Module)):
                     # Check if the first node in the body is a docstring